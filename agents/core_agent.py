@@ -3,11 +3,12 @@ import json
 import logging
 import os
 import random
+import re
 import threading
 from datetime import datetime
 from pathlib import Path
 from queue import Queue
-from typing import Any, Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 import dotenv
 
@@ -21,10 +22,11 @@ from core.embedding import (
     PostgresVectorStorage,
     SQLiteConfig,
     SQLiteVectorStorage,
-    get_embedding,
+    get_embedding_async,
+    get_embedding_service,
 )
 from core.imgen import generate_image_with_retry_smartgen
-from core.llm import LLMError, call_llm, call_llm_with_tools
+from core.llm import LLMError, call_llm_async, call_llm_with_tools_async
 from core.tools.tools import Tools
 from core.tools.tools_mcp import Tools as ToolsMCP
 from core.voice import speak_text, transcribe_audio
@@ -49,6 +51,8 @@ SMALL_MODEL_ID = os.getenv("SMALL_MODEL_ID")
 TWEET_WORD_LIMITS = [15, 20, 30, 35]
 IMAGE_GENERATION_PROBABILITY = 0.3
 BASE_IMAGE_PROMPT = ""
+# Labels _classify_response_type asks for; any other reply is stored as "general"
+RESPONSE_TYPES = ("FACTUAL", "OPINION", "QUESTION", "EMOTIONAL", "ACTION")
 
 
 class CoreAgent(BaseAgent):
@@ -63,6 +67,10 @@ class CoreAgent(BaseAgent):
         self._lock = threading.Lock()
         self.last_tweet_id = 0
         self.last_raid_tweet_id = 0
+        # Storage of the latest turn of each chat, by chat ID, while it is still running
+        self._pending_interactions: Dict[str, asyncio.Task] = {}
+        # Classification and key-topic annotation of stored responses, running in the background
+        self._annotation_tasks: Set[asyncio.Task] = set()
 
         # Use PostgreSQL if configured, otherwise default to SQLite
         if all([os.getenv(env) for env in ["VECTOR_DB_NAME", "VECTOR_DB_USER", "VECTOR_DB_PASSWORD"]]):
@@ -107,7 +115,8 @@ class CoreAgent(BaseAgent):
             # Handle both list and dict formats
             items = data if isinstance(data, list) else [data]
 
-            # Process each item
+            # Build the message for each item, skipping repeats within the file
+            entries = {}
             for item in items:
                 if not isinstance(item, dict):
                     continue
@@ -122,48 +131,50 @@ class CoreAgent(BaseAgent):
                         message_parts.append(f"{key}: {json.dumps(value)}")
 
                 message = "\n\n".join(message_parts)
-
-                # Generate embedding for the message
-                message_embedding = get_embedding(message)
-
+                # Extract potential key topics from the first few keys
+                entries.setdefault(message, list(item.keys())[:3])  # Use first 3 keys as topics
+
+            # Embed everything in a few batched requests
+            try:
+                embeddings = get_embedding_service().embed_many_sync(list(entries))
+            except EmbeddingError as e:
+                logger.error(f"Failed to generate embeddings: {str(e)}")
+                return
+
+            # New entries are collected and stored with one bulk write
+            new_messages = []
+            for (message, key_topics), message_embedding in zip(entries.items(), embeddings):
                 # Check if this exact message already exists
                 existing_entries = self.message_store.find_similar_messages(
                     message_embedding,
                     threshold=0.99,  # Very high threshold to match nearly identical content
+                    limit=1,
                 )
 
                 if existing_entries:
                     logger.info("Similar content already exists in knowledge base, skipping...")
                     continue
 
-                try:
-                    # Extract potential key topics from the first few keys
-                    key_topics = list(item.keys())[:3]  # Use first 3 keys as topics
-
-                    # Create MessageData object
-                    message_data = MessageData(
-                        message=message,
-                        embedding=message_embedding,
-                        timestamp=datetime.now().isoformat(),
-                        message_type="knowledge_base",
-                        chat_id=None,
-                        source_interface="knowledge_base",
-                        original_query=None,
-                        original_embedding=None,
-                        tool_call=None,
-                        response_type="FACTUAL",
-                        key_topics=key_topics,
-                    )
-
-                    # Store in vector database
-                    self.message_store.add_message(message_data)
-                    logger.info(f"Stored knowledge base entry with keys: {', '.join(key_topics)}")
-
-                except EmbeddingError as e:
-                    logger.error(f"Failed to generate embedding: {str(e)}")
-                    continue
+                # Create MessageData object
+                message_data = MessageData(
+                    message=message,
+                    embedding=message_embedding,
+                    timestamp=datetime.now().isoformat(),
+                    message_type="knowledge_base",
+                    chat_id=None,
+                    source_interface="knowledge_base",
+                    original_query=None,
+                    original_embedding=None,
+                    tool_call=None,
+                    response_type="FACTUAL",
+                    key_topics=key_topics,
+                )
+                new_messages.append(message_data)
+                logger.info(f"Prepared knowledge base entry with keys: {', '.join(key_topics)}")
 
-            logger.info("Knowledge base update completed successfully")
+            # Store in vector database
+            self.message_store.add_messages(new_messages)
+            logger.info(f"Knowledge base update completed successfully ({len(new_messages)} new entries)")
 
         except FileNotFoundError:
             logger.error(f"JSON file not found: {json_file_path}")
@@ -223,7 +234,7 @@ class CoreAgent(BaseAgent):
             }
         ]
         try:
-            response = call_llm_with_tools(
+            response = await call_llm_with_tools_async(
                 HEURIST_BASE_URL,
                 HEURIST_API_KEY,
                 SMALL_MODEL_ID,
@@ -253,7 +264,7 @@ class CoreAgent(BaseAgent):
         prompt = self.prompt_config.get_template_image_prompt().format(tweet=message)
         logger.info("Prompt: %s", prompt)
         try:
-            image_prompt = call_llm(
+            image_prompt = await call_llm_async(
                 HEURIST_BASE_URL,
                 HEURIST_API_KEY,
                 SMALL_MODEL_ID,
@@ -378,15 +389,27 @@ class CoreAgent(BaseAgent):
             return None, None, None
 
         try:
-            message_embedding = get_embedding(message)
+            message_embedding = await get_embedding_async(message)
             logger.info(f"Generated embedding for message: {message[:50]}...")
-            system_prompt_context = self.get_knowledge_base(message, message_embedding)
+
+            if not (skip_conversation_context and skip_similar):
+                # Make sure the previous turn of this chat is stored before reading history
+                await self._wait_for_pending_interaction(chat_id)
+
+            # Knowledge base, conversation history and similar messages are independent lookups
+            lookups = [self.get_knowledge_base(message, message_embedding)]
+            if not skip_conversation_context:
+                lookups.append(self.get_conversation_context(chat_id))
+            if not skip_similar:
+                lookups.append(self.get_similar_messages(message, message_embedding, message_type, chat_id))
+            knowledge_context, *other_contexts = await asyncio.gather(*lookups)
+            system_prompt_context = knowledge_context
 
             if not skip_conversation_context:
-                system_prompt += self.get_conversation_context(chat_id)
+                system_prompt += other_contexts.pop(0)
 
             if not skip_similar:
-                system_prompt_context += self.get_similar_messages(message, message_embedding, message_type, chat_id)
+                system_prompt_context += other_contexts.pop(0)
 
             system_prompt += system_prompt_context
 
@@ -395,7 +418,7 @@ class CoreAgent(BaseAgent):
                 tools_config += self.tools_mcp.get_tools_config()
 
             if not skip_tools:
-                response = call_llm_with_tools(
+                response = await call_llm_with_tools_async(
                     HEURIST_BASE_URL,
                     HEURIST_API_KEY,
                     model_id,
@@ -407,7 +430,7 @@ class CoreAgent(BaseAgent):
                     tool_choice=tool_choice,
                 )
             else:
-                response = call_llm(
+                content = await call_llm_async(
                     HEURIST_BASE_URL,
                     HEURIST_API_KEY,
                     model_id,
@@ -416,6 +439,7 @@ class CoreAgent(BaseAgent):
                     temperature=temperature,
                     max_tokens=max_tokens,
                 )
+                response = {"content": content}
             # Process response and handle tools
             text_response = ""
             image_url = None
@@ -465,43 +489,11 @@ class CoreAgent(BaseAgent):
                     )  # default=str handles any non-JSON serializable objects
 
             if not skip_embedding:
-                # moved to post post processing as it is not relevant until finished processing
-                # Create MessageData for incoming message
-                message_data = MessageData(
-                    message=message,
-                    embedding=message_embedding,
-                    timestamp=datetime.now().isoformat(),
-                    message_type=message_type,
-                    chat_id=chat_id,
-                    source_interface=source_interface,
-                    original_query=None,
-                    original_embedding=None,
-                    response_type=None,
-                    key_topics=None,
-                    tool_call=None,
+                # Storage, classification and key topics run after the response is returned
+                self._schedule_interaction_storage(
+                    message, message_embedding, text_response, message_type, chat_id, source_interface, tool_back
                 )
 
-                # Store the incoming message
-                self.message_store.add_message(message_data)
-                logger.info("Stored message and embedding in database")
-                # Create and store MessageData for the response
-                response_data = MessageData(
-                    message=text_response,
-                    embedding=get_embedding(text_response),
-                    timestamp=datetime.now().isoformat(),
-                    message_type="agent_response",
-                    chat_id=chat_id,
-                    source_interface=source_interface,
-                    original_query=message,
-                    original_embedding=message_embedding,
-                    response_type=await self._classify_response_type(text_response),
-                    key_topics=await self._extract_key_topics(text_response),
-                    tool_call=tool_back,
-                )
-
-                # Store the response
-                self.message_store.add_message(response_data)
-
             # Notify other interfaces if needed
             # if source_interface and chat_id:
             #     for interface_name, interface in self.interfaces.items():
@@ -695,14 +687,14 @@ class CoreAgent(BaseAgent):
             logger.error(f"Error processing reply: {str(e)}")
             return None, None
 
-    def get_knowledge_base(self, message: str, message_embedding: List[float]) -> str:
+    async def get_knowledge_base(self, message: str, message_embedding: List[float]) -> str:
         """
         Get knowledge base data from the message embedding
         """
         if message_embedding is None:
-            message_embedding = get_embedding(message)
+            message_embedding = await get_embedding_async(message)
         system_prompt_context = ""
-        knowledge_base_data = self.message_store.find_similar_messages(
+        knowledge_base_data = await self.message_store.find_similar_messages_async(
             message_embedding, threshold=0.6, message_type="knowledge_base"
         )
         logger.info(f"Found {len(knowledge_base_data)} relevant items from knowledge base")
@@ -712,40 +704,35 @@ class CoreAgent(BaseAgent):
                 system_prompt_context += f"{data['message']}\n"
         return system_prompt_context
 
-    def get_conversation_context(self, chat_id: str) -> str:
+    async def get_conversation_context(self, chat_id: str) -> str:
         """
         Get conversation context from the chat ID
         """
         if chat_id is None:
             return ""
         system_prompt_conversation_context = "\n\nPrevious conversation history (in chronological order):\n"
-        # Get last 10 messages (will be in DESC order)
-        conversation_messages = self.message_store.find_messages(
-            message_type="agent_response", chat_id=chat_id, limit=10
-        )
-
-        # Sort by timestamp and reverse to get chronological order
-        conversation_messages.sort(key=lambda x: x["timestamp"], reverse=True)
-        conversation_messages.reverse()
+        # Get last 10 messages (newest first), from the per-chat history cache when possible
+        conversation_messages = await self.message_store.get_recent_responses_async(chat_id, limit=10)
 
-        # Build conversation history
-        for msg in conversation_messages:
+        # Build conversation history in chronological order
+        for msg in reversed(conversation_messages):
             if msg.get("original_query"):  # Ensure we have both question and answer
                 system_prompt_conversation_context += f"User: {msg['original_query']}\n"
                 system_prompt_conversation_context += f"Assistant: {msg['message']}\n\n"
         # print("system_prompt_conversation_context: ", system_prompt_conversation_context)
         return system_prompt_conversation_context
 
-    def get_similar_messages(
+    async def get_similar_messages(
         self, message: str, message_embedding: List[float], message_type: str = None, chat_id: str = None
-    ) -> List[Dict[str, Any]]:
+    ) -> str:
         """
         Get similar messages from the message embedding
         """
         if message_embedding is None:
-            message_embedding = get_embedding(message)
-        similar_messages = self.message_store.find_similar_messages(
-            message_embedding, threshold=0.9, message_type=message_type, chat_id=chat_id
+            message_embedding = await get_embedding_async(message)
+        # Similar messages with the responses to them, in one lookup
+        similar_messages = await self.message_store.find_similar_with_responses_async(
+            message_embedding, threshold=0.9, message_type=message_type, chat_id=chat_id, limit=10
         )
         logger.info(f"Found {len(similar_messages)} similar messages")
         if similar_messages:
@@ -753,18 +740,13 @@ class CoreAgent(BaseAgent):
             seen_responses = set()  # Track unique responses
             message_count = 0
             for similar_msg in similar_messages:
-                # Find the agent's response where this similar message was the original_query
-                agent_responses = self.message_store.find_messages(
-                    message_type="agent_response", original_query=similar_msg["message"]
-                )
-
-                for response in agent_responses:
-                    if response["message"] in seen_responses:
+                for response in similar_msg["responses"]:
+                    if response in seen_responses:
                         continue
-                    seen_responses.add(response["message"])
+                    seen_responses.add(response)
                     context += f"""
                         Previous similar question: {similar_msg["message"]}
-                        My response: {response["message"]}
+                        My response: {response}
                         Similarity score: {similar_msg.get("similarity", 0):.2f}
                         """
                     message_count += 1
@@ -784,7 +766,7 @@ class CoreAgent(BaseAgent):
             "content": "Classify this response as one of: FACTUAL, OPINION, QUESTION, EMOTIONAL, ACTION. Response:",
         }
         try:
-            classification = await call_llm(
+            classification = await call_llm_async(
                 HEURIST_BASE_URL,
                 HEURIST_API_KEY,
                 SMALL_MODEL_ID,  # Use smaller model for classification
@@ -792,7 +774,11 @@ class CoreAgent(BaseAgent):
                 user_prompt=response,
                 temperature=0.3,
             )
-            return classification.strip().upper()
+            # Small models often add punctuation or an explanation; keep the first allowed label
+            for word in re.findall(r"[A-Z]+", classification.upper()):
+                if word in RESPONSE_TYPES:
+                    return word
+            return "general"
         except Exception:
             return "general"
 
@@ -803,7 +789,7 @@ class CoreAgent(BaseAgent):
             "content": "Extract 2-3 main topics from this text as comma-separated keywords:",
         }
         try:
-            topics = await call_llm(
+            topics = await call_llm_async(
                 HEURIST_BASE_URL,
                 HEURIST_API_KEY,
                 SMALL_MODEL_ID,
@@ -876,3 +862,106 @@ class CoreAgent(BaseAgent):
         except Exception as e:
             logger.error(f"Error sending message to {target_interface}: {str(e)}")
             return False
+
+    def _schedule_interaction_storage(
+        self,
+        message: str,
+        message_embedding: List[float],
+        text_response: str,
+        message_type: str,
+        chat_id: str,
+        source_interface: str,
+        tool_back: Optional[str],
+    ) -> None:
+        """Store the turn in the background, chained after the chat's previous one, then annotate it.
+
+        The next turn of the chat waits only for the storage; the response type and key
+        topics are written to the stored response once their LLM calls finish.
+        """
+        previous = self._pending_interactions.get(chat_id)
+        task = asyncio.create_task(
+            self._store_interaction(
+                previous, message, message_embedding, text_response, message_type, chat_id, source_interface, tool_back
+            )
+        )
+        self._pending_interactions[chat_id] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            if self._pending_interactions.get(chat_id) is finished:
+                del self._pending_interactions[chat_id]
+
+        task.add_done_callback(_done)
+
+        annotation = asyncio.create_task(self._annotate_interaction(task, message, text_response, chat_id))
+        self._annotation_tasks.add(annotation)
+        annotation.add_done_callback(self._annotation_tasks.discard)
+
+    async def _wait_for_pending_interaction(self, chat_id: str) -> None:
+        task = self._pending_interactions.get(chat_id)
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def _store_interaction(
+        self,
+        previous: Optional[asyncio.Task],
+        message: str,
+        message_embedding: List[float],
+        text_response: str,
+        message_type: str,
+        chat_id: str,
+        source_interface: str,
+        tool_back: Optional[str],
+    ) -> bool:
+        """Store the message and response; the response is annotated afterwards. Returns whether it was stored"""
+        try:
+            response_embedding = await get_embedding_async(text_response)
+            # Create MessageData for incoming message
+            message_data = MessageData(
+                message=message,
+                embedding=message_embedding,
+                timestamp=datetime.now().isoformat(),
+                message_type=message_type,
+                chat_id=chat_id,
+                source_interface=source_interface,
+                original_query=None,
+                original_embedding=None,
+                response_type=None,
+                key_topics=None,
+                tool_call=None,
+            )
+            # Create MessageData for the response
+            response_data = MessageData(
+                message=text_response,
+                embedding=response_embedding,
+                timestamp=datetime.now().isoformat(),
+                message_type="agent_response",
+                chat_id=chat_id,
+                source_interface=source_interface,
+                original_query=message,
+                original_embedding=message_embedding,
+                response_type=None,
+                key_topics=None,
+                tool_call=tool_back,
+            )
+            # Keep the chat's turns in order
+            if previous is not None:
+                await asyncio.wait([previous])
+            await self.message_store.add_messages_async([message_data, response_data])
+            logger.info("Stored message, response and embeddings in database")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store interaction: {str(e)}")
+            return False
+
+    async def _annotate_interaction(self, stored: asyncio.Task, message: str, text_response: str, chat_id: str) -> None:
+        """Classify the response and extract its key topics, then write them to the stored response"""
+        try:
+            response_type, key_topics = await asyncio.gather(
+                self._classify_response_type(text_response),
+                self._extract_key_topics(text_response),
+            )
+            if not await stored:
+                return
+            await self.message_store.annotate_response_async(chat_id, message, text_response, response_type, key_topics)
+        except Exception as e:
+            logger.error(f"Failed to annotate response: {str(e)}")
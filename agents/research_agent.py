@@ -1,15 +1,16 @@
 import asyncio
 import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, TypedDict
+from typing import Any, Callable, Dict, List, Optional, TypedDict
 
 import dotenv
 
 from core.clients.search_client import SearchClient
 from core.llm import call_llm
 from core.utils.text_splitter import trim_prompt
+from core.workflows.research_scheduler import ResearchScheduler, path_learnings
 
 os.environ.clear()
 dotenv.load_dotenv(override=True)
@@ -57,6 +58,32 @@ class SerpQuery:
     research_goal: str
 
 
+@dataclass
+class ResearchNode:
+    """Work item of a research session: plan SERP queries (serp_query None) or run one."""
+
+    query: str
+    breadth: int
+    depth: int
+    serp_query: Optional[SerpQuery] = None
+    parent: Optional["ResearchNode"] = None
+    learnings: List[str] = field(default_factory=list)
+
+    def path_learnings(self) -> List[str]:
+        return path_learnings(self)
+
+
+async def _call_llm(scheduler: Optional[ResearchScheduler] = None, **kwargs):
+    """call_llm in a worker thread, within the session's LLM concurrency limit and token budget."""
+    if scheduler is None:
+        return call_llm(**kwargs)
+    scheduler.check_budget()
+    async with scheduler.slot("llm"):
+        response = await asyncio.to_thread(call_llm, **kwargs)
+    scheduler.charge_tokens(kwargs.get("system_prompt"), kwargs.get("user_prompt"), (response or {}).get("content"))
+    return response
+
+
 async def generate_feedback(query: str) -> List[str]:
     """Generates follow-up questions to clarify research direction."""
     prompt = f"Given this research topic: {query}, generate 3-5 follow-up questions to better understand the user's research needs. Return the response as a JSON object with a 'questions' array field."
@@ -88,7 +115,10 @@ search_client = SearchClient(client_type="firecrawl", api_key=os.environ.get("FI
 
 
 async def generate_serp_queries(
-    query: str, num_queries: int = 3, learnings: Optional[List[str]] = None
+    query: str,
+    num_queries: int = 3,
+    learnings: Optional[List[str]] = None,
+    scheduler: Optional[ResearchScheduler] = None,
 ) -> List[SerpQuery]:
     """Generate SERP queries based on user input and previous learnings."""
 
@@ -117,7 +147,8 @@ async def generate_serp_queries(
     if learnings:
         prompt += f"\n\nHere are some learnings from previous research, use them to generate more specific queries: {' '.join(learnings)}"
 
-    response = call_llm(
+    response = await _call_llm(
+        scheduler,
         base_url=HEURIST_BASE_URL,
         api_key=HEURIST_API_KEY,
         model_id=LARGER_MODEL_ID,
@@ -146,6 +177,7 @@ async def process_serp_result(
     search_result: SearchResponse,
     num_learnings: int = 3,
     num_follow_up_questions: int = 3,
+    scheduler: Optional[ResearchScheduler] = None,
 ) -> Dict[str, List[str]]:
     """Process search results to extract learnings and follow-up questions."""
     # Extract data - works for both Pydantic models and dicts
@@ -188,7 +220,8 @@ async def process_serp_result(
     }
     """
     prompt += example_response
-    response = call_llm(
+    response = await _call_llm(
+        scheduler,
         base_url=HEURIST_BASE_URL,
         api_key=HEURIST_API_KEY,
         model_id=LARGE_MODEL_ID,
@@ -266,86 +299,96 @@ async def deep_research(
     concurrency: int,
     learnings: List[str] = None,
     visited_urls: List[str] = None,
+    max_tokens: Optional[int] = None,
+    max_searches: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> ResearchResult:
     """
-    Main research function that recursively explores a topic.
+    Main research function that explores a topic breadth first.
 
     Args:
         query: Research query/topic
         breadth: Number of parallel searches to perform
         depth: How many levels deep to research
+        concurrency: Max concurrent searches, and max concurrent LLM calls
         learnings: Previous learnings to build upon
-        visited_urls: Previously visited URLs
+        visited_urls: Previously visited URLs, not analyzed again
+        max_tokens: LLM token budget; no new work starts once it is used up
+        max_searches: Search budget
+        max_seconds: Wall time budget; work still running at the deadline is cancelled
+        on_progress: Called with a dict for each progress event
     """
-    learnings = learnings or []
-    visited_urls = visited_urls or []
+    scheduler = ResearchScheduler(
+        concurrency=concurrency,
+        max_tokens=max_tokens,
+        max_searches=max_searches,
+        max_seconds=max_seconds,
+        on_progress=on_progress,
+    )
+    scheduler.claim_urls(visited_urls or [])
+    all_learnings = dict.fromkeys(learnings or [])
+
+    async def plan(node: ResearchNode) -> List[ResearchNode]:
+        serp_queries = await generate_serp_queries(
+            query=node.query, num_queries=node.breadth, learnings=node.path_learnings(), scheduler=scheduler
+        )
+        return [
+            ResearchNode(serp_query.query, node.breadth, node.depth, serp_query=serp_query, parent=node)
+            for serp_query in serp_queries
+        ]
 
-    # Generate search queries
-    serp_queries = await generate_serp_queries(query=query, num_queries=breadth, learnings=learnings)
+    async def process_query(node: ResearchNode) -> List[ResearchNode]:
+        serp_query = node.serp_query
+        try:
+            # Search for content
+            async with scheduler.slot("search"):
+                scheduler.check_budget()
+                scheduler.charge_search()
+                result = await search_client.search(serp_query.query, timeout=15000)
+        except Exception as e:
+            if "Timeout" in str(e):
+                print(f"Timeout error running query: {serp_query.query}: {e}")
+            else:
+                print(f"Error running query: {serp_query.query}: {e}")
+            return []
+        scheduler.emit("searched", query=serp_query.query)
+
+        # Keep only pages no earlier search in this session returned - works for both Pydantic models and dicts
+        data = getattr(result, "data", None) or (result.get("data") if isinstance(result, dict) else [])
+        urls = [getattr(item, "url", None) or (item.get("url") if isinstance(item, dict) else None) for item in data]
+        new_urls = set(scheduler.claim_urls(url for url in urls if url))
+        new_data = [item for item, url in zip(data, urls) if not url or url in new_urls]
+        if not new_data:
+            return []
 
-    # Create a semaphore to limit concurrent requests
-    semaphore = asyncio.Semaphore(concurrency)
+        # Calculate new breadth and depth for next iteration
+        new_breadth = max(1, node.breadth // 2)
+        new_depth = node.depth - 1
 
-    async def process_query(serp_query: SerpQuery) -> ResearchResult:
-        async with semaphore:
-            try:
-                # Search for content
-                result = await search_client.search(serp_query.query, timeout=15000)
+        new_learnings = await process_serp_result(
+            query=serp_query.query,
+            search_result={"data": new_data},
+            num_follow_up_questions=new_breadth,
+            scheduler=scheduler,
+        )
+        node.learnings = new_learnings["learnings"]
+        all_learnings.update(dict.fromkeys(node.learnings))
+
+        # If we have more depth to go, continue research
+        if new_depth > 0 and not scheduler.exhausted:
+            print(f"Researching deeper, breadth: {new_breadth}, depth: {new_depth}")
+
+            next_query = f"""
+            Previous research goal: {serp_query.research_goal}
+            Follow-up research directions: {" ".join(new_learnings["followUpQuestions"])}
+            """.strip()
+            return [ResearchNode(next_query, new_breadth, new_depth, parent=node)]
+        return []
+
+    async def handle(node: ResearchNode) -> List[ResearchNode]:
+        return await (process_query(node) if node.serp_query else plan(node))
+
+    await scheduler.run([ResearchNode(query, breadth, depth, learnings=list(learnings or []))], handle)
 
-                # Collect new URLs - works for both Pydantic models and dicts
-                data = getattr(result, "data", None) or (result.get("data") if isinstance(result, dict) else [])
-                new_urls = []
-                for item in data:
-                    url = getattr(item, "url", None) or (item.get("url") if isinstance(item, dict) else None)
-                    if url:
-                        new_urls.append(url)
-
-                # Calculate new breadth and depth for next iteration
-                new_breadth = max(1, breadth // 2)
-                new_depth = depth - 1
-
-                new_learnings = await process_serp_result(
-                    query=serp_query.query,
-                    search_result=result,
-                    num_follow_up_questions=new_breadth,
-                )
-
-                all_learnings = learnings + new_learnings["learnings"]
-                all_urls = visited_urls + new_urls
-
-                # If we have more depth to go, continue research
-                if new_depth > 0:
-                    print(f"Researching deeper, breadth: {new_breadth}, depth: {new_depth}")
-
-                    next_query = f"""
-                    Previous research goal: {serp_query.research_goal}
-                    Follow-up research directions: {" ".join(new_learnings["followUpQuestions"])}
-                    """.strip()
-
-                    return await deep_research(
-                        query=next_query,
-                        breadth=new_breadth,
-                        depth=new_depth,
-                        concurrency=concurrency,
-                        learnings=all_learnings,
-                        visited_urls=all_urls,
-                    )
-
-                return {"learnings": all_learnings, "visited_urls": all_urls}
-
-            except Exception as e:
-                if "Timeout" in str(e):
-                    print(f"Timeout error running query: {serp_query.query}: {e}")
-                else:
-                    print(f"Error running query: {serp_query.query}: {e}")
-                return {"learnings": [], "visited_urls": []}
-
-    # Process all queries concurrently
-    results = await asyncio.gather(*[process_query(query) for query in serp_queries])
-
-    # Combine all results
-    all_learnings = list(set(learning for result in results for learning in result["learnings"]))
-
-    all_urls = list(set(url for result in results for url in result["visited_urls"]))
-
-    return {"learnings": all_learnings, "visited_urls": all_urls}
+    return {"learnings": list(all_learnings), "visited_urls": list(scheduler.seen_urls)}
@@ -23,7 +23,17 @@ from . import (
 )
 from .clients import SearchClient
 from .config import PromptConfig
-from .embedding import MessageData, MessageStore, PostgresVectorStorage, SQLiteVectorStorage, get_embedding
+from .embedding import (
+    AsyncPostgresVectorStorage,
+    EmbeddingService,
+    MessageData,
+    MessageStore,
+    PostgresVectorStorage,
+    SQLiteVectorStorage,
+    get_embedding,
+    get_embedding_async,
+    get_embedding_service,
+)
 from .imgen import generate_image, generate_image_with_retry_smartgen
 
 # Export commonly used functions and classes directly
@@ -55,9 +65,13 @@ __all__ = [
     "call_llm_with_tools_async",
     "LLMError",
     "get_embedding",
+    "get_embedding_async",
+    "get_embedding_service",
+    "EmbeddingService",
     "VectorStorage",
     "SQLiteVectorStorage",
     "PostgresVectorStorage",
+    "AsyncPostgresVectorStorage",
     "MessageData",
     "MessageStore",
     "generate_image",
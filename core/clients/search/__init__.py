@@ -1,10 +1,14 @@
 from .base_search_client import BaseSearchClient, SearchResponse
 from .exa_client import ExaClient
 from .firecrawl_client import FirecrawlClient
+from .rate_limiter import RateLimiter, get_rate_limiter, rate_limiter_metrics
 
 __all__ = [
     "BaseSearchClient",
     "SearchResponse",
     "FirecrawlClient",
     "ExaClient",
+    "RateLimiter",
+    "get_rate_limiter",
+    "rate_limiter_metrics",
 ]
@@ -1,6 +1,13 @@
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, TypedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict, TypeVar
+
+from .rate_limiter import RateLimiter, get_rate_limiter, retry_after_seconds
+
+T = TypeVar("T")
+
+# Times a request is retried after a 429, each time after the limiter's backoff
+RATE_LIMIT_RETRIES = 2
 
 
 class SearchResponse(TypedDict):
@@ -8,13 +15,41 @@ class SearchResponse(TypedDict):
 
 
 class BaseSearchClient(ABC):
-    """Abstract base class for search clients."""
+    """Abstract base class for search clients.
+
+    Requests are paced by the RateLimiter shared by all clients of the same provider and
+    API key: `rate_limit` seconds between requests, with up to `burst` at once. The first
+    client to use the limiter configures it; setting `rate_limit` on a client later
+    reconfigures the shared limiter.
+    """
 
-    def __init__(self, api_key: str = "", api_url: Optional[str] = None, rate_limit: int = 1):
+    provider = "search"
+
+    def __init__(self, api_key: str = "", api_url: Optional[str] = None, rate_limit: int = 1, burst: int = 1):
         self.api_key = api_key
         self.api_url = api_url
+        self.burst = burst
+        self._rate_limiter: Optional[RateLimiter] = None
         self.rate_limit = rate_limit
-        self._last_request_time = 0  # Track the last request time
+
+    @property
+    def rate_limit(self):
+        return self._rate_limit
+
+    @rate_limit.setter
+    def rate_limit(self, rate_limit) -> None:
+        self._rate_limit = rate_limit
+        if self._rate_limiter is not None:
+            self._rate_limiter.configure(self._rate(), self.burst)
+
+    def _rate(self) -> Optional[float]:
+        return 1 / self._rate_limit if self._rate_limit else None
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        if self._rate_limiter is None:
+            self._rate_limiter = get_rate_limiter(self.provider, self.api_key, self._rate(), self.burst)
+        return self._rate_limiter
 
     @abstractmethod
     async def search(self, query: str, timeout: int = 15000) -> SearchResponse:
@@ -22,11 +57,39 @@ class BaseSearchClient(ABC):
         pass
 
     async def _apply_rate_limiting(self):
-        """Apply rate limiting before making a request."""
-        current_time = asyncio.get_event_loop().time()
-        time_since_last_request = current_time - self._last_request_time
-        if time_since_last_request < self.rate_limit:
-            await asyncio.sleep(self.rate_limit - time_since_last_request)
-
-        # Update last request time
-        self._last_request_time = asyncio.get_event_loop().time()
+        """Wait for the shared rate limiter before making a request."""
+        await self.rate_limiter.acquire()
+
+    def _rate_limit_info(self, error: Exception) -> Tuple[bool, Optional[float]]:
+        """(whether the error is a 429, seconds from its Retry-After header if any).
+
+        Matched on the HTTP status of the error's response; clients whose SDK reports rate
+        limiting with its own exception type override this (see DuckDuckGoClient).
+        """
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None) or getattr(error, "status_code", None)
+        if status != 429:
+            return False, None
+        headers = getattr(response, "headers", None) or {}
+        return True, retry_after_seconds(headers.get("Retry-After"))
+
+    async def _run_rate_limited(self, func: Callable[[], T]) -> T:
+        """Run a blocking request in the default executor, paced by the rate limiter.
+
+        A 429 makes the limiter back off, and the request is retried after the backoff up
+        to RATE_LIMIT_RETRIES times.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            await self._apply_rate_limiting()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(None, func)
+            except Exception as e:
+                limited, retry_after = self._rate_limit_info(e)
+                if not limited:
+                    raise
+                self.rate_limiter.report_rate_limited(retry_after)
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                continue
+            self.rate_limiter.report_success()
+            return result
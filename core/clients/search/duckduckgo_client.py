@@ -1,6 +1,7 @@
-import asyncio
+from typing import Optional, Tuple
 
 from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import RatelimitException
 
 from .base_search_client import BaseSearchClient, SearchResponse
 
@@ -11,28 +12,26 @@ class DuckDuckGoClient(BaseSearchClient):
     DuckDuckGo is unique among search providers as it doesn't require an API key or custom URL.
     """
 
-    def __init__(self, rate_limit: int = 1):
+    provider = "duckduckgo"
+
+    def __init__(self, rate_limit: int = 1, burst: int = 1):
         """
         Initialize a DuckDuckGo search client.
 
         Args:
             rate_limit: Rate limit in seconds between requests
+            burst: Requests that may be made at once after an idle period
         """
         # We call the parent constructor with empty strings for api_key and api_url
         # since DuckDuckGo doesn't use these parameters
-        super().__init__(api_key="", api_url=None, rate_limit=rate_limit)
+        super().__init__(api_key="", api_url=None, rate_limit=rate_limit, burst=burst)
 
     async def search(self, query: str, timeout: int = 15000) -> SearchResponse:
         """Search using DuckDuckGo in a thread pool to keep it async."""
         try:
-            # Apply rate limiting
-            await self._apply_rate_limiting()
-
-            # Run the synchronous DDGS call in a thread pool
+            # Run the synchronous DDGS call in a thread pool, paced by the shared rate limiter
             # Note: DDGS doesn't accept a timeout parameter for its text() method
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self._perform_search(query, max_results=10)
-            )
+            response = await self._run_rate_limited(lambda: self._perform_search(query, max_results=10))
 
             return {"data": response}
 
@@ -40,6 +39,12 @@ class DuckDuckGoClient(BaseSearchClient):
             print(f"Error searching with DuckDuckGo: {e}")
             return {"data": []}
 
+    def _rate_limit_info(self, error: Exception) -> Tuple[bool, Optional[float]]:
+        # DDGS reports rate limiting as RatelimitException, without a Retry-After time
+        if isinstance(error, RatelimitException):
+            return True, None
+        return super()._rate_limit_info(error)
+
     def _perform_search(self, query: str, max_results: int = 10) -> list:
         """
         Perform the actual search using DDGS.
@@ -57,6 +62,8 @@ class DuckDuckGoClient(BaseSearchClient):
                             "title": r["title"],
                         }
                     )
+        except RatelimitException:
+            raise
         except Exception as e:
             print(f"DDGS search error: {e}")
 
@@ -1,4 +1,3 @@
-import asyncio
 from typing import Optional
 
 import requests
@@ -9,19 +8,18 @@ from .base_search_client import BaseSearchClient, SearchResponse
 class ExaClient(BaseSearchClient):
     """Exa implementation of the search client."""
 
-    def __init__(self, api_key: str = "", api_url: Optional[str] = None, rate_limit: int = 1):
-        super().__init__(api_key, api_url, rate_limit)
+    provider = "exa"
+
+    def __init__(self, api_key: str = "", api_url: Optional[str] = None, rate_limit: int = 1, burst: int = 1):
+        super().__init__(api_key, api_url, rate_limit, burst)
         self.base_url = api_url or "https://api.exa.ai"
         self.headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
 
     async def search(self, query: str, timeout: int = 15000) -> SearchResponse:
         """Search using Exa API."""
         try:
-            # Apply rate limiting
-            await self._apply_rate_limiting()
-
-            # Run the API call in a thread pool
-            response = await asyncio.get_event_loop().run_in_executor(None, lambda: self._make_request(query, timeout))
+            # Run the API call in a thread pool, paced by the shared rate limiter
+            response = await self._run_rate_limited(lambda: self._make_request(query, timeout))
 
             # Format the search results data
             formatted_results = []
@@ -1,4 +1,3 @@
-import asyncio
 from typing import Optional
 
 from firecrawl import FirecrawlApp
@@ -10,22 +9,20 @@ from .base_search_client import BaseSearchClient, SearchResponse
 class FirecrawlClient(BaseSearchClient):
     """Firecrawl implementation of the search client."""
 
-    def __init__(self, api_key: str = "", api_url: Optional[str] = None, rate_limit: int = 1):
-        super().__init__(api_key, api_url, rate_limit)
+    provider = "firecrawl"
+
+    def __init__(self, api_key: str = "", api_url: Optional[str] = None, rate_limit: int = 1, burst: int = 1):
+        super().__init__(api_key, api_url, rate_limit, burst)
         self.app = FirecrawlApp(api_key=api_key, api_url=api_url)
 
     async def search(self, query: str, timeout: int = 15000) -> SearchResponse:
         """Search using Firecrawl SDK in a thread pool to keep it async."""
         try:
-            # Apply rate limiting
-            await self._apply_rate_limiting()
-
             # Create ScrapeOptions object instead of passing raw dict
             scrape_options = ScrapeOptions(formats=["markdown"])
 
-            # Run the synchronous SDK call in a thread pool
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
+            # Run the synchronous SDK call in a thread pool, paced by the shared rate limiter
+            response = await self._run_rate_limited(
                 lambda: self.app.search(query=query, scrape_options=scrape_options),
             )
 
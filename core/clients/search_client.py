@@ -12,7 +12,9 @@ class SearchClient(BaseSearchClient):
     Initializes with a client type and delegates to the appropriate implementation.
     """
 
-    def __init__(self, client_type: str, api_key: str = "", api_url: Optional[str] = None, rate_limit: int = 1):
+    def __init__(
+        self, client_type: str, api_key: str = "", api_url: Optional[str] = None, rate_limit: int = 1, burst: int = 1
+    ):
         """
         Initialize a search client of the specified type.
 
@@ -21,17 +23,18 @@ class SearchClient(BaseSearchClient):
             api_key: API key for the search service
             api_url: Optional custom API URL
             rate_limit: Rate limit in seconds between requests
+            burst: Requests that may be made at once after an idle period
         """
-        super().__init__(api_key, api_url, rate_limit)
+        super().__init__(api_key, api_url, rate_limit, burst)
 
         # Create the appropriate client implementation
         if client_type.lower() == "firecrawl":
-            self._implementation = FirecrawlClient(api_key=api_key, api_url=api_url, rate_limit=rate_limit)
+            self._implementation = FirecrawlClient(api_key=api_key, api_url=api_url, rate_limit=rate_limit, burst=burst)
         elif client_type.lower() == "exa":
-            self._implementation = ExaClient(api_key=api_key, api_url=api_url, rate_limit=rate_limit)
+            self._implementation = ExaClient(api_key=api_key, api_url=api_url, rate_limit=rate_limit, burst=burst)
         elif client_type.lower() == "duckduckgo":
             # DuckDuckGo doesn't require API key or custom URL
-            self._implementation = DuckDuckGoClient(rate_limit=rate_limit)
+            self._implementation = DuckDuckGoClient(rate_limit=rate_limit, burst=burst)
         else:
             raise ValueError(f"Unsupported search client type: {client_type}")
 
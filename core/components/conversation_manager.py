@@ -2,7 +2,7 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 
-from ..embedding import MessageData, get_embedding
+from ..embedding import MessageData, get_embedding_service
 
 logger = logging.getLogger(__name__)
 
@@ -10,11 +10,15 @@ logger = logging.getLogger(__name__)
 class ConversationManager:
     """Manages conversation context and history"""
 
-    def __init__(self, message_store):
+    def __init__(self, message_store, embedding_service=None):
         self.message_store = message_store
+        self.embedding_service = embedding_service or get_embedding_service()
 
     def get_embedding(self, message: str) -> List[float]:
-        return get_embedding(message)
+        return self.embedding_service.embed_sync(message)
+
+    async def get_embedding_async(self, message: str) -> List[float]:
+        return await self.embedding_service.embed(message)
 
     async def get_conversation_context(self, chat_id: str, limit: int = 10) -> str:
         """Get conversation history context"""
@@ -25,17 +29,11 @@ class ConversationManager:
             # Get conversation history
             system_prompt_conversation_context = "\n\nPrevious conversation history (in chronological order):\n"
 
-            # Get last messages (will be in DESC order)
-            conversation_messages = self.message_store.find_messages(
-                message_type="agent_response", chat_id=chat_id, limit=limit
-            )
-
-            # Sort by timestamp and reverse to get chronological order
-            conversation_messages.sort(key=lambda x: x["timestamp"], reverse=True)
-            conversation_messages.reverse()
+            # Get last messages (newest first), from the per-chat history cache when possible
+            conversation_messages = await self.message_store.get_recent_responses_async(chat_id, limit=limit)
 
-            # Build conversation history
-            for msg in conversation_messages:
+            # Build conversation history in chronological order
+            for msg in reversed(conversation_messages):
                 if msg.get("original_query"):  # Ensure we have both question and answer
                     system_prompt_conversation_context += f"User: {msg['original_query']}\n"
                     system_prompt_conversation_context += f"Assistant: {msg['message']}\n\n"
@@ -54,8 +52,9 @@ class ConversationManager:
             return ""
 
         try:
-            similar_messages = self.message_store.find_similar_messages(
-                embedding, threshold=threshold, message_type="user_message", chat_id=chat_id
+            # Similar user messages with the responses to them, in one lookup
+            similar_messages = await self.message_store.find_similar_with_responses_async(
+                embedding, threshold=threshold, message_type="user_message", chat_id=chat_id, limit=limit
             )
 
             if not similar_messages:
@@ -66,19 +65,14 @@ class ConversationManager:
             message_count = 0
 
             for similar_msg in similar_messages:
-                # Find the agent's response where this similar message was the original_query
-                agent_responses = self.message_store.find_messages(
-                    message_type="agent_response", original_query=similar_msg["message"]
-                )
-
-                for response in agent_responses:
-                    if response["message"] in seen_responses:
+                for response in similar_msg["responses"]:
+                    if response in seen_responses:
                         continue
 
-                    seen_responses.add(response["message"])
+                    seen_responses.add(response)
                     context += f"""
                         Previous similar question: {similar_msg["message"]}
-                        My response: {response["message"]}
+                        My response: {response}
                         Similarity score: {similar_msg.get("similarity", 0):.2f}
                         """
                     message_count += 1
@@ -101,8 +95,8 @@ class ConversationManager:
             return
 
         try:
-            # Generate message embedding
-            message_embedding = get_embedding(message)
+            # Generate both embeddings in one request
+            message_embedding, response_embedding = await self.embedding_service.embed_many([message, response])
 
             # Store user message
             message_data = MessageData(
@@ -123,7 +117,7 @@ class ConversationManager:
             # Store agent response
             response_data = MessageData(
                 message=response,
-                embedding=get_embedding(response),
+                embedding=response_embedding,
                 timestamp=datetime.now().isoformat(),
                 message_type="agent_response",
                 chat_id=chat_id,
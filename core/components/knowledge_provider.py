@@ -1,8 +1,9 @@
 import json
 import logging
+from datetime import datetime
 from typing import List
 
-from ..embedding import MessageData, get_embedding
+from ..embedding import MessageData, get_embedding_service
 
 logger = logging.getLogger(__name__)
 
@@ -10,18 +11,22 @@ logger = logging.getLogger(__name__)
 class KnowledgeProvider:
     """Manages knowledge storage and retrieval"""
 
-    def __init__(self, message_store):
+    def __init__(self, message_store, embedding_service=None):
         self.message_store = message_store
+        self.embedding_service = embedding_service or get_embedding_service()
 
     def get_embedding(self, message: str) -> List[float]:
-        return get_embedding(message)
+        return self.embedding_service.embed_sync(message)
+
+    async def get_embedding_async(self, message: str) -> List[float]:
+        return await self.embedding_service.embed(message)
 
     async def get_knowledge_context(self, message: str, message_embedding: List[float]) -> str:
         """
         Get knowledge base data from the message embedding
         """
         if message_embedding is None:
-            message_embedding = get_embedding(message)
+            message_embedding = await self.embedding_service.embed(message)
 
         system_prompt_context = ""
         knowledge_base_data = self.message_store.find_similar_messages(
@@ -52,7 +57,9 @@ class KnowledgeProvider:
             # Handle both list and dict formats
             items = data if isinstance(data, list) else [data]
 
-            # Process each item
+            # Build the message for each item, skipping repeats within the file
+            messages = []
+            seen = set()
             for item in items:
                 if not isinstance(item, dict):
                     continue
@@ -67,26 +74,32 @@ class KnowledgeProvider:
                         message_parts.append(f"{key}: {json.dumps(value)}")
 
                 message = "\n\n".join(message_parts)
+                if message not in seen:
+                    seen.add(message)
+                    messages.append(message)
 
-                # Generate embedding for the message
-                message_embedding = get_embedding(message)
+            # Embed everything in a few batched requests
+            embeddings = await self.embedding_service.embed_many(messages)
 
+            # New entries are collected and stored with one bulk write
+            new_messages = []
+            for message, message_embedding in zip(messages, embeddings):
                 # Check if this exact message already exists
                 existing_entries = self.message_store.find_similar_messages(
                     message_embedding,
                     threshold=0.99,  # Very high threshold to match nearly identical content
+                    limit=1,
                 )
 
                 if existing_entries:
                     logger.info("Similar content already exists in knowledge base, skipping...")
                     continue
 
-                # Store the message with metadata
-                self.message_store.add_message(
+                new_messages.append(
                     MessageData(
                         message=message,
                         embedding=message_embedding,
-                        timestamp=None,
+                        timestamp=datetime.now().isoformat(),
                         message_type="knowledge_base",
                         chat_id=None,
                         source_interface=None,
@@ -98,6 +111,7 @@ class KnowledgeProvider:
                     )
                 )
 
+            self.message_store.add_messages(new_messages)
             logger.info(f"Successfully updated knowledge base from {json_file_path}")
 
         except FileNotFoundError:
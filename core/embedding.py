@@ -1,15 +1,27 @@
+import asyncio
+import hashlib
+import inspect
+import io
 import json
 import logging
 import os
 import sqlite3
+import threading
+import weakref
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import psycopg2
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from sklearn.metrics.pairwise import cosine_similarity
 
+from .utils.data_dir import data_path
+from .utils.vector_index import VectorPartition, decode_vector, encode_vector
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,6 +50,29 @@ class PostgresConfig(StorageConfig):
     user: str
     password: str
     table_name: str = "message_embeddings"
+    # Vector index created by initialize(): "hnsw", "ivfflat" or None. Existing tables have the
+    # ivfflat index; build an HNSW one on a live table with create_vector_index("hnsw") instead
+    # of switching this, which would build it synchronously at startup.
+    index_type: Optional[str] = "ivfflat"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 64
+    ivfflat_lists: int = 100
+    # Search-time recall knobs (hnsw.ef_search / ivfflat.probes); None keeps the server default.
+    # An HNSW scan returns at most ef_search rows, so keep it >= the largest limit used. A
+    # message_type filter is applied to the rows the index scan returns, so the server default
+    # of one IVFFlat probe can leave filtered searches short; ~sqrt(ivfflat_lists) probes is
+    # pgvector's suggested starting point.
+    ef_search: Optional[int] = 100
+    probes: Optional[int] = 10
+    # "relaxed_order" or "strict_order" (pgvector >= 0.8): index scans continue until filtered
+    # searches have their rows. None keeps the server default (off), which older pgvector needs.
+    iterative_scan: Optional[str] = None
+    # Nearest neighbours fetched by find_similar when no limit is given; an explicit limit is
+    # needed for more
+    default_limit: int = 100
+    # AsyncPostgresVectorStorage connection pool
+    pool_min_size: int = 1
+    pool_max_size: int = 10
 
 
 @dataclass
@@ -46,6 +81,11 @@ class SQLiteConfig(StorageConfig):
 
     db_path: str = "embeddings.db"
     table_name: str = "message_embeddings"
+    # Partitions with at least this many rows are searched through an approximate IVF index; None keeps search exact
+    ann_min_rows: Optional[int] = 100_000
+    # Keep memory-mapped snapshots of large search partitions across restarts, under
+    # "vectors/" in the runtime data directory (HEURIST_DATA_DIR)
+    persist_vectors: bool = True
 
 
 @dataclass
@@ -63,6 +103,26 @@ class MessageData:
     tool_call: Optional[str]
 
 
+def query_hash(text: Optional[str]) -> Optional[str]:
+    """Hash of an original_query, indexed so responses can be looked up by their query"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest() if text else None
+
+
+def group_responses(rows: List[Tuple[str, float, Optional[str]]]) -> List[Dict[str, Any]]:
+    """(similar message, similarity, response) rows, best first, grouped by similar message"""
+    results: List[Dict[str, Any]] = []
+    by_message: Dict[str, Dict[str, Any]] = {}
+    for message, similarity, response in rows:
+        entry = by_message.get(message)
+        if entry is None:
+            entry = {"message": message, "similarity": similarity, "responses": []}
+            by_message[message] = entry
+            results.append(entry)
+        if response is not None and response not in entry["responses"]:
+            entry["responses"].append(response)
+    return results
+
+
 class VectorStorageProvider(ABC):
     """Abstract base class for vector storage providers"""
 
@@ -76,11 +136,59 @@ class VectorStorageProvider(ABC):
         """Store a message and its metadata with embedding"""
         pass
 
+    def store_embeddings(self, messages: List[MessageData]) -> None:
+        """Store many messages; providers override this with a bulk insert"""
+        for message_data in messages:
+            self.store_embedding(message_data)
+
     @abstractmethod
     def find_similar(
-        self, embedding: List[float], threshold: float = 0.8, message_type: str = None, chat_id: str = None
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = None,
+        chat_id: str = None,
+        limit: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        """Find similar messages based on embedding similarity"""
+        """Find similar messages based on embedding similarity, most similar first.
+
+        At most `limit` messages. Without one, PostgreSQL storage searches only the
+        PostgresConfig.default_limit (100) nearest messages; SQLite returns every match.
+        """
+        pass
+
+    def find_similar_with_responses(
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = "user_message",
+        chat_id: str = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Similar messages with the agent responses to them, most similar first.
+
+        Returns [{"message", "similarity", "responses": [response text, newest first]}].
+        Providers override this with a single joined query; this fallback looks up the
+        responses one message at a time.
+        """
+        rows = []
+        for similar in self.find_similar(embedding, threshold, message_type, chat_id, limit):
+            responses = self.find_messages(message_type="agent_response", original_query=similar["message"])
+            rows.extend((similar["message"], similar["similarity"], r["message"]) for r in responses)
+            if not responses:
+                rows.append((similar["message"], similar["similarity"], None))
+        return group_responses(rows)
+
+    @abstractmethod
+    def annotate_response(
+        self,
+        chat_id: Optional[str],
+        original_query: str,
+        message: str,
+        response_type: Optional[str],
+        key_topics: Optional[List[str]],
+    ) -> None:
+        """Set response_type and key_topics of a stored agent response, found by its chat, query and text"""
         pass
 
     @abstractmethod
@@ -106,6 +214,265 @@ class VectorStorageProvider(ABC):
         pass
 
 
+POSTGRES_COLUMNS = (
+    "message",
+    "embedding",
+    "timestamp",
+    "message_type",
+    "chat_id",
+    "source_interface",
+    "original_query",
+    "original_embedding",
+    "response_type",
+    "key_topics",
+    "tool_call",
+)
+
+
+def _postgres_schema_sql(table: str) -> List[str]:
+    """Statements creating the pgvector extension and the message table"""
+    # NOTE: embedding vector(1024) is bge-large-en-v1.5
+    # NOTE: embedding vector(1536) is text-embedding-ada-002
+    return [
+        "CREATE EXTENSION IF NOT EXISTS vector",
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id SERIAL PRIMARY KEY,
+            message TEXT NOT NULL,
+            embedding vector(1024) NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            message_type VARCHAR(50) NOT NULL,
+            chat_id VARCHAR(100),
+            source_interface VARCHAR(50),
+            original_query TEXT,
+            original_embedding vector(1024),
+            response_type VARCHAR(50),
+            key_topics TEXT[],
+            tool_call TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]
+
+
+def _postgres_lookup_index_sql(table: str, concurrently: bool = False) -> List[str]:
+    """Indexes for conversation history and for finding responses by their original query"""
+    create = "CREATE INDEX CONCURRENTLY" if concurrently else "CREATE INDEX"
+    return [
+        f"{create} IF NOT EXISTS {table}_type_chat_ts_idx ON {table} (message_type, chat_id, timestamp)",
+        # original_query can exceed the B-tree row size limit, so index its hash
+        f"{create} IF NOT EXISTS {table}_original_query_md5_idx ON {table} (md5(original_query))",
+    ]
+
+
+def _postgres_index_sql(
+    config: PostgresConfig, index_type: Optional[str] = None, concurrently: bool = False
+) -> Optional[str]:
+    """Statement creating a vector index (the configured one by default), if any"""
+    table = config.table_name
+    index_type = config.index_type if index_type is None else index_type
+    create = "CREATE INDEX CONCURRENTLY" if concurrently else "CREATE INDEX"
+    if index_type is None:
+        return None
+    if index_type == "hnsw":
+        return f"""
+            {create} IF NOT EXISTS {table}_embedding_hnsw_idx
+            ON {table}
+            USING hnsw (embedding vector_cosine_ops)
+            WITH (m = {int(config.hnsw_m)}, ef_construction = {int(config.hnsw_ef_construction)})
+        """
+    if index_type == "ivfflat":
+        return f"""
+            {create} IF NOT EXISTS embedding_idx
+            ON {table}
+            USING ivfflat (embedding vector_cosine_ops)
+            WITH (lists = {int(config.ivfflat_lists)})
+        """
+    raise ValueError(f"Unsupported index_type {index_type!r}, expected 'hnsw', 'ivfflat' or None")
+
+
+def _postgres_search_settings(config: PostgresConfig) -> Dict[str, str]:
+    """Session settings for index search (pgvector GUCs)"""
+    settings = {}
+    if config.ef_search is not None:
+        settings["hnsw.ef_search"] = str(int(config.ef_search))
+    if config.probes is not None:
+        settings["ivfflat.probes"] = str(int(config.probes))
+    if config.iterative_scan is not None:
+        settings["hnsw.iterative_scan"] = config.iterative_scan
+        settings["ivfflat.iterative_scan"] = config.iterative_scan
+    return settings
+
+
+def _postgres_similar_sql(
+    table: str, message_type: Optional[str], chat_id: Optional[str], placeholder
+) -> Tuple[str, List[str]]:
+    """KNN-first similarity query and the order of its parameters.
+
+    The inner query orders by the raw distance operator with a LIMIT, which is the form
+    pgvector can answer from an HNSW or IVFFlat index; the threshold is applied to those
+    k nearest rows afterwards. With a chat_id the rows of that chat, found through the
+    (message_type, chat_id, timestamp) index, are ranked exactly instead: the vector index
+    applies filters only to the rows its scan returns, which for one chat are often none.
+    `placeholder(name, position)` renders a parameter for the driver.
+    """
+    names: List[str] = []
+
+    def param(name: str) -> str:
+        if name not in names:
+            names.append(name)
+        return placeholder(name, names.index(name) + 1)
+
+    conditions = []
+    if message_type:
+        conditions.append(f"message_type = {param('message_type')}")
+    if chat_id:
+        conditions.append(f"chat_id = {param('chat_id')}")
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    embedding = f"{param('embedding')}::vector"
+    # Ordering by the similarity alias, unlike the raw operator, keeps the vector index out of the plan
+    order_by = "similarity DESC" if chat_id else f"embedding <=> {embedding}"
+
+    sql = f"""
+        SELECT message, similarity FROM (
+            SELECT message, 1 - (embedding <=> {embedding}) AS similarity
+            FROM {table}
+            {where_clause}
+            ORDER BY {order_by}
+            LIMIT {param("k")}
+        ) nearest
+        WHERE similarity >= {param("threshold")}
+        ORDER BY similarity DESC
+    """
+    return sql, names
+
+
+def _postgres_similar_responses_sql(
+    table: str, message_type: Optional[str], chat_id: Optional[str], placeholder
+) -> Tuple[str, List[str]]:
+    """Similar messages joined to the agent responses whose original_query they are"""
+    similar_sql, names = _postgres_similar_sql(table, message_type, chat_id, placeholder)
+    sql = f"""
+        SELECT similar_messages.message, similar_messages.similarity, responses.message AS response
+        FROM ({similar_sql}) similar_messages
+        LEFT JOIN {table} responses
+            ON responses.message_type = 'agent_response'
+            AND md5(responses.original_query) = md5(similar_messages.message)
+            AND responses.original_query = similar_messages.message
+        ORDER BY similar_messages.similarity DESC, responses.timestamp DESC
+    """
+    return sql, names
+
+
+def _postgres_messages_sql(
+    table: str, message_type: Optional[str], original_query: Optional[str], chat_id: Optional[str], limit, placeholder
+) -> Tuple[str, List[str]]:
+    """find_messages query and the order of its parameters"""
+    names: List[str] = []
+
+    def param(name: str) -> str:
+        if name not in names:
+            names.append(name)
+        return placeholder(name, names.index(name) + 1)
+
+    query_conditions = []
+    if message_type:
+        query_conditions.append(f"message_type = {param('message_type')}")
+    if original_query:
+        # The md5 condition lets the query use the original_query hash index
+        original_query_param = param("original_query")
+        query_conditions.append(
+            f"md5(original_query) = md5({original_query_param}) AND original_query = {original_query_param}"
+        )
+    if chat_id:
+        query_conditions.append(f"chat_id = {param('chat_id')}")
+
+    where_clause = " AND ".join(query_conditions) if query_conditions else "1=1"
+    limit_clause = f" LIMIT {int(limit)}" if limit else ""
+    sql = f"""
+        SELECT message, timestamp, source_interface, response_type, key_topics, original_query, original_embedding, tool_call
+        FROM {table}
+        WHERE {where_clause}
+        ORDER BY timestamp DESC
+        {limit_clause}
+    """
+    return sql, names
+
+
+def _postgres_annotate_sql(table: str, chat_id: Optional[str], placeholder) -> Tuple[str, List[str]]:
+    """annotate_response update and the order of its parameters"""
+    names: List[str] = []
+
+    def param(name: str) -> str:
+        if name not in names:
+            names.append(name)
+        return placeholder(name, names.index(name) + 1)
+
+    set_clause = f"response_type = {param('response_type')}, key_topics = {param('key_topics')}"
+    original_query_param = param("original_query")
+    chat_condition = f"chat_id = {param('chat_id')}" if chat_id else "chat_id IS NULL"
+    sql = f"""
+        UPDATE {table} SET {set_clause}
+        WHERE message_type = 'agent_response'
+            AND md5(original_query) = md5({original_query_param}) AND original_query = {original_query_param}
+            AND {chat_condition}
+            AND message = {param("message")}
+    """
+    return sql, names
+
+
+def _message_row(row) -> Dict[str, Any]:
+    message, timestamp, source_interface, response_type, key_topics, orig_query, orig_embedding, tool_call = row
+    return {
+        "message": message,
+        "timestamp": timestamp,
+        "source_interface": source_interface,
+        "response_type": response_type,
+        "key_topics": key_topics,
+        "original_query": orig_query,
+        "original_embedding": orig_embedding,
+        "tool_call": tool_call,
+    }
+
+
+def _vector_literal(values: List[float]) -> str:
+    return "[" + ",".join(str(float(v)) for v in values) + "]"
+
+
+def _copy_field(value: Any) -> str:
+    """One field in PostgreSQL COPY text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], str):
+            # TEXT[] literal
+            value = "{" + ",".join('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in value) + "}"
+        else:
+            value = _vector_literal(value)
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _copy_text(messages: List[MessageData]) -> str:
+    """Messages as COPY text-format rows in POSTGRES_COLUMNS order"""
+    lines = []
+    for m in messages:
+        values = (
+            m.message,
+            m.embedding,
+            m.timestamp,
+            m.message_type,
+            m.chat_id,
+            m.source_interface,
+            m.original_query,
+            m.original_embedding or None,
+            m.response_type,
+            m.key_topics or None,
+            m.tool_call,
+        )
+        lines.append("\t".join(_copy_field(v) for v in values))
+    return "\n".join(lines) + "\n"
+
+
 class PostgresVectorStorage(VectorStorageProvider):
     def __init__(self, config: PostgresConfig):
         self.config = config
@@ -123,36 +490,21 @@ class PostgresVectorStorage(VectorStorageProvider):
             )
 
             with self.conn.cursor() as cur:
-                # Enable pgvector extension
-                cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
-
-                # Create table with extended fields
-                # NOTE: embedding vector(1024) is bge-large-en-v1.5
-                # NOTE: embedding vector(1536) is text-embedding-ada-002
-                cur.execute(f"""
-                    CREATE TABLE IF NOT EXISTS {self.config.table_name} (
-                        id SERIAL PRIMARY KEY,
-                        message TEXT NOT NULL,
-                        embedding vector(1024) NOT NULL,
-                        timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-                        message_type VARCHAR(50) NOT NULL,
-                        chat_id VARCHAR(100),
-                        source_interface VARCHAR(50),
-                        original_query TEXT,
-                        original_embedding vector(1024),
-                        response_type VARCHAR(50),
-                        key_topics TEXT[],
-                        tool_call TEXT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-                # Create vector similarity index
-                cur.execute(f"""
-                    CREATE INDEX IF NOT EXISTS embedding_idx
-                    ON {self.config.table_name}
-                    USING ivfflat (embedding vector_cosine_ops)
-                """)
+                cur.execute("SELECT to_regclass(%s)", (self.config.table_name,))
+                (existing,) = cur.fetchone()
+                for statement in _postgres_schema_sql(self.config.table_name):
+                    cur.execute(statement)
+
+                index_sql = _postgres_index_sql(self.config)
+                if index_sql:
+                    cur.execute(index_sql)
+                # Existing tables get these through create_lookup_indexes()
+                if existing is None:
+                    for statement in _postgres_lookup_index_sql(self.config.table_name):
+                        cur.execute(statement)
+
+                for name, value in _postgres_search_settings(self.config).items():
+                    cur.execute("SELECT set_config(%s, %s, false)", (name, value))
 
             self.conn.commit()
         except Exception as e:
@@ -188,42 +540,135 @@ class PostgresVectorStorage(VectorStorageProvider):
             logger.error(f"Failed to store message: {str(e)}")
             raise
 
+    def store_embeddings(self, messages: List[MessageData]) -> None:
+        """Store many messages with one COPY"""
+        if not messages:
+            return
+        try:
+            with self.conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {self.config.table_name} ({', '.join(POSTGRES_COLUMNS)}) FROM STDIN",
+                    io.StringIO(_copy_text(messages)),
+                )
+            self.conn.commit()
+            logger.info(f"Successfully stored {len(messages)} messages in database")
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Failed to store messages: {str(e)}")
+            raise
+
     def find_similar(
-        self, embedding: List[float], threshold: float = 0.8, message_type: str = None, chat_id: str = None
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = None,
+        chat_id: str = None,
+        limit: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        """Find similar messages using vector similarity search"""
+        """Find the nearest messages with similarity >= threshold, most similar first.
+
+        Searches the `limit` nearest messages, config.default_limit when not given.
+        """
         try:
+            sql, names = _postgres_similar_sql(
+                self.config.table_name, message_type, chat_id, lambda name, _: f"%({name})s"
+            )
+            params = {
+                "embedding": embedding,
+                "message_type": message_type,
+                "chat_id": chat_id,
+                "k": int(limit or self.config.default_limit),
+                "threshold": threshold,
+            }
             with self.conn.cursor() as cur:
-                query_conditions = ["1 - (embedding <=> %s::vector) >= %s"]
-                query_params = [embedding, embedding, threshold]
+                cur.execute(sql, {name: params[name] for name in names})
+                return [{"message": message, "similarity": similarity} for message, similarity in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Failed to find similar messages: {str(e)}")
+            raise
 
-                if message_type:
-                    query_conditions.append("message_type = %s")
-                    query_params.append(message_type)
+    def find_similar_with_responses(
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = "user_message",
+        chat_id: str = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Similar messages and their agent responses in one query"""
+        try:
+            sql, names = _postgres_similar_responses_sql(
+                self.config.table_name, message_type, chat_id, lambda name, _: f"%({name})s"
+            )
+            params = {
+                "embedding": embedding,
+                "message_type": message_type,
+                "chat_id": chat_id,
+                "k": int(limit or self.config.default_limit),
+                "threshold": threshold,
+            }
+            with self.conn.cursor() as cur:
+                cur.execute(sql, {name: params[name] for name in names})
+                return group_responses(cur.fetchall())
+        except Exception as e:
+            logger.error(f"Failed to find similar messages: {str(e)}")
+            raise
 
-                if chat_id:
-                    query_conditions.append("chat_id = %s")
-                    query_params.append(chat_id)
+    def annotate_response(
+        self,
+        chat_id: Optional[str],
+        original_query: str,
+        message: str,
+        response_type: Optional[str],
+        key_topics: Optional[List[str]],
+    ) -> None:
+        """Set response_type and key_topics of a stored agent response"""
+        try:
+            sql, names = _postgres_annotate_sql(self.config.table_name, chat_id, lambda name, _: f"%({name})s")
+            params = {
+                "response_type": response_type,
+                "key_topics": key_topics,
+                "original_query": original_query,
+                "chat_id": chat_id,
+                "message": message,
+            }
+            with self.conn.cursor() as cur:
+                cur.execute(sql, {name: params[name] for name in names})
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Failed to annotate response: {str(e)}")
+            raise
 
-                where_clause = " AND ".join(query_conditions)
+    def create_vector_index(self, index_type: str = "hnsw") -> None:
+        """Migration step: build a vector index with CREATE INDEX CONCURRENTLY.
 
-                cur.execute(
-                    f"""
-                    SELECT message, 1 - (embedding <=> %s::vector) as similarity
-                    FROM {self.config.table_name}
-                    WHERE {where_clause}
-                    ORDER BY similarity DESC
-                """,
-                    tuple(query_params),
-                )
+        The table stays writable while it builds. Set `index_type` in the config once it
+        exists (and drop the old index) so new deployments create it directly.
+        """
+        autocommit = self.conn.autocommit
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        self.conn.autocommit = True
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(_postgres_index_sql(self.config, index_type, concurrently=True))
+        finally:
+            self.conn.autocommit = autocommit
 
-                results = []
-                for message, similarity in cur.fetchall():
-                    results.append({"message": message, "similarity": similarity})
-                return results
-        except Exception as e:
-            logger.error(f"Failed to find similar messages: {str(e)}")
-            raise
+    def create_lookup_indexes(self) -> None:
+        """Migration step: build the history and original_query indexes with CREATE INDEX CONCURRENTLY.
+
+        initialize() only creates them along with a new table, so run this once on tables
+        created by earlier versions.
+        """
+        autocommit = self.conn.autocommit
+        self.conn.autocommit = True
+        try:
+            with self.conn.cursor() as cur:
+                for statement in _postgres_lookup_index_sql(self.config.table_name, concurrently=True):
+                    cur.execute(statement)
+        finally:
+            self.conn.autocommit = autocommit
 
     def close(self) -> None:
         """Close PostgreSQL connection"""
@@ -235,69 +680,258 @@ class PostgresVectorStorage(VectorStorageProvider):
     ) -> List[Dict[str, Any]]:
         """Find messages matching the given criteria"""
         try:
+            sql, names = _postgres_messages_sql(
+                self.config.table_name, message_type, original_query, chat_id, limit, lambda name, _: f"%({name})s"
+            )
+            params = {"message_type": message_type, "original_query": original_query, "chat_id": chat_id}
             with self.conn.cursor() as cur:
-                query_conditions = []
-                query_params = []
+                cur.execute(sql, {name: params[name] for name in names})
+                return [_message_row(row) for row in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Failed to find messages: {str(e)}")
+            raise
 
-                if message_type:
-                    query_conditions.append("message_type = %s")
-                    query_params.append(message_type)
 
-                if original_query:
-                    query_conditions.append("original_query = %s")
-                    query_params.append(original_query)
+class AsyncPostgresVectorStorage:
+    """PostgreSQL storage for async callers, backed by an asyncpg connection pool.
 
-                if chat_id:
-                    query_conditions.append("chat_id = %s")
-                    query_params.append(chat_id)
+    Same table, index and queries as PostgresVectorStorage, with coroutine methods, so
+    concurrent chats each use their own pooled connection instead of sharing one
+    blocking psycopg2 connection. Requires asyncpg.
+    """
 
-                where_clause = " AND ".join(query_conditions) if query_conditions else "1=1"
-                limit_clause = f" LIMIT {limit}" if limit else ""
+    def __init__(self, config: PostgresConfig):
+        self.config = config
+        self.pool = None
 
-                cur.execute(
-                    f"""
-                    SELECT message, timestamp, source_interface, response_type, key_topics, original_query, original_embedding, tool_call
-                    FROM {self.config.table_name}
-                    WHERE {where_clause}
-                    ORDER BY timestamp DESC
-                    {limit_clause}
-                """,
-                    tuple(query_params),
+    async def initialize(self) -> None:
+        """Create the table and index, then open the connection pool"""
+        try:
+            import asyncpg
+        except ImportError as e:
+            raise EmbeddingError("asyncpg is required for AsyncPostgresVectorStorage") from e
+
+        connect_kwargs = dict(
+            host=self.config.host,
+            port=self.config.port,
+            database=self.config.database,
+            user=self.config.user,
+            password=self.config.password,
+        )
+        try:
+            # The vector type must exist before pooled connections can register a codec for it
+            conn = await asyncpg.connect(**connect_kwargs)
+            try:
+                existing = await conn.fetchval("SELECT to_regclass($1)", self.config.table_name)
+                for statement in _postgres_schema_sql(self.config.table_name):
+                    await conn.execute(statement)
+                index_sql = _postgres_index_sql(self.config)
+                if index_sql:
+                    await conn.execute(index_sql)
+                # Existing tables get these through create_lookup_indexes()
+                if existing is None:
+                    for statement in _postgres_lookup_index_sql(self.config.table_name):
+                        await conn.execute(statement)
+            finally:
+                await conn.close()
+
+            self.pool = await asyncpg.create_pool(
+                min_size=self.config.pool_min_size,
+                max_size=self.config.pool_max_size,
+                init=self._init_connection,
+                **connect_kwargs,
+            )
+            logger.info(f"Initialized PostgreSQL pool for {self.config.table_name}")
+        except Exception as e:
+            logger.error(f"Failed to initialize PostgreSQL storage: {str(e)}")
+            raise
+
+    async def _init_connection(self, conn) -> None:
+        await conn.set_type_codec("vector", schema="public", encoder=_vector_literal, decoder=json.loads, format="text")
+        for name, value in _postgres_search_settings(self.config).items():
+            await conn.execute("SELECT set_config($1, $2, false)", name, value)
+
+    @staticmethod
+    def _timestamp(value: Any) -> Any:
+        # asyncpg binds timestamptz parameters from datetime objects only
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+    async def store_embedding(self, message_data: MessageData) -> None:
+        """Store a message and its embedding in PostgreSQL"""
+        try:
+            await self.pool.execute(
+                f"""INSERT INTO {self.config.table_name} ({", ".join(POSTGRES_COLUMNS)})
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)""",
+                message_data.message,
+                message_data.embedding,
+                self._timestamp(message_data.timestamp),
+                message_data.message_type,
+                message_data.chat_id,
+                message_data.source_interface,
+                message_data.original_query,
+                message_data.original_embedding or None,
+                message_data.response_type,
+                message_data.key_topics,
+                message_data.tool_call,
+            )
+            logger.info("Successfully stored message with metadata in database")
+        except Exception as e:
+            logger.error(f"Failed to store message: {str(e)}")
+            raise
+
+    async def store_embeddings(self, messages: List[MessageData]) -> None:
+        """Store many messages with one COPY"""
+        if not messages:
+            return
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.copy_to_table(
+                    self.config.table_name,
+                    source=io.BytesIO(_copy_text(messages).encode("utf-8")),
+                    columns=list(POSTGRES_COLUMNS),
+                    format="text",
                 )
+            logger.info(f"Successfully stored {len(messages)} messages in database")
+        except Exception as e:
+            logger.error(f"Failed to store messages: {str(e)}")
+            raise
 
-                results = []
-                for (
-                    message,
-                    timestamp,
-                    source_interface,
-                    response_type,
-                    key_topics,
-                    orig_query,
-                    orig_embedding,
-                    tool_call,
-                ) in cur.fetchall():
-                    results.append(
-                        {
-                            "message": message,
-                            "timestamp": timestamp,
-                            "source_interface": source_interface,
-                            "response_type": response_type,
-                            "key_topics": key_topics,
-                            "original_query": orig_query,
-                            "original_embedding": orig_embedding,
-                            "tool_call": tool_call,
-                        }
-                    )
-                return results
+    async def find_similar(
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = None,
+        chat_id: str = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Find the nearest messages with similarity >= threshold, most similar first.
+
+        Searches the `limit` nearest messages, config.default_limit when not given.
+        """
+        try:
+            sql, names = _postgres_similar_sql(
+                self.config.table_name, message_type, chat_id, lambda _, position: f"${position}"
+            )
+            params = {
+                "embedding": embedding,
+                "message_type": message_type,
+                "chat_id": chat_id,
+                "k": int(limit or self.config.default_limit),
+                "threshold": threshold,
+            }
+            rows = await self.pool.fetch(sql, *(params[name] for name in names))
+            return [{"message": row["message"], "similarity": row["similarity"]} for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to find similar messages: {str(e)}")
+            raise
+
+    async def find_similar_with_responses(
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = "user_message",
+        chat_id: str = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Similar messages and their agent responses in one query"""
+        try:
+            sql, names = _postgres_similar_responses_sql(
+                self.config.table_name, message_type, chat_id, lambda _, position: f"${position}"
+            )
+            params = {
+                "embedding": embedding,
+                "message_type": message_type,
+                "chat_id": chat_id,
+                "k": int(limit or self.config.default_limit),
+                "threshold": threshold,
+            }
+            rows = await self.pool.fetch(sql, *(params[name] for name in names))
+            return group_responses([tuple(row) for row in rows])
+        except Exception as e:
+            logger.error(f"Failed to find similar messages: {str(e)}")
+            raise
+
+    async def find_messages(
+        self, message_type: str = None, original_query: str = None, chat_id: str = None, limit: int = None
+    ) -> List[Dict[str, Any]]:
+        """Find messages matching the given criteria"""
+        try:
+            sql, names = _postgres_messages_sql(
+                self.config.table_name,
+                message_type,
+                original_query,
+                chat_id,
+                limit,
+                lambda _, position: f"${position}",
+            )
+            params = {"message_type": message_type, "original_query": original_query, "chat_id": chat_id}
+            rows = await self.pool.fetch(sql, *(params[name] for name in names))
+            return [_message_row(tuple(row)) for row in rows]
         except Exception as e:
             logger.error(f"Failed to find messages: {str(e)}")
             raise
 
+    async def annotate_response(
+        self,
+        chat_id: Optional[str],
+        original_query: str,
+        message: str,
+        response_type: Optional[str],
+        key_topics: Optional[List[str]],
+    ) -> None:
+        """Set response_type and key_topics of a stored agent response"""
+        try:
+            sql, names = _postgres_annotate_sql(self.config.table_name, chat_id, lambda _, position: f"${position}")
+            params = {
+                "response_type": response_type,
+                "key_topics": key_topics,
+                "original_query": original_query,
+                "chat_id": chat_id,
+                "message": message,
+            }
+            await self.pool.execute(sql, *(params[name] for name in names))
+        except Exception as e:
+            logger.error(f"Failed to annotate response: {str(e)}")
+            raise
+
+    async def create_vector_index(self, index_type: str = "hnsw") -> None:
+        """Migration step: build a vector index with CREATE INDEX CONCURRENTLY (see PostgresVectorStorage)."""
+        async with self.pool.acquire() as conn:
+            await conn.execute(_postgres_index_sql(self.config, index_type, concurrently=True))
+
+    async def create_lookup_indexes(self) -> None:
+        """Migration step: build the lookup indexes with CREATE INDEX CONCURRENTLY (see PostgresVectorStorage)."""
+        async with self.pool.acquire() as conn:
+            for statement in _postgres_lookup_index_sql(self.config.table_name, concurrently=True):
+                await conn.execute(statement)
+
+    async def close(self) -> None:
+        """Close the connection pool"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
 
 class SQLiteVectorStorage(VectorStorageProvider):
+    """SQLite storage with embeddings as float32 BLOBs.
+
+    Similarity search runs in NumPy over one normalized matrix per (message_type, chat_id)
+    filter, loaded once and then extended with newly stored rows (see core.utils.vector_index).
+    """
+
+    MAX_PARTITIONS = 16
+    MIGRATION_BATCH_SIZE = 1000
+    ID_LOOKUP_BATCH_SIZE = 500
+
     def __init__(self, config: SQLiteConfig):
         self.config = config
         self.conn = None
+        self._partitions: "OrderedDict[Tuple[Optional[str], Optional[str]], VectorPartition]" = OrderedDict()
+        # One connection is shared by all threads (MessageStore's async methods use worker threads)
+        self._lock = threading.Lock()
+        # Tables created by earlier versions lack original_query_hash until migrate_query_hashes()
+        self._query_hash_column = True
+        self._query_hashes_filled = True
 
     def initialize(self) -> None:
         """Initialize SQLite connection and create necessary tables"""
@@ -309,91 +943,310 @@ class SQLiteVectorStorage(VectorStorageProvider):
                     CREATE TABLE IF NOT EXISTS {self.config.table_name} (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         message TEXT NOT NULL,
-                        embedding TEXT NOT NULL,
+                        embedding BLOB NOT NULL,
                         timestamp TEXT NOT NULL,
                         message_type TEXT NOT NULL,
                         chat_id TEXT,
                         source_interface TEXT,
                         original_query TEXT,
-                        original_embedding TEXT,
+                        original_embedding BLOB,
                         response_type TEXT,
                         key_topics TEXT,
                         tool_call TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        original_query_hash TEXT
                     )
                 """)
+                columns = {row[1] for row in cur.execute(f"PRAGMA table_info({self.config.table_name})")}
+                self._query_hash_column = "original_query_hash" in columns
+                cur.execute(f"""
+                    CREATE INDEX IF NOT EXISTS {self.config.table_name}_partition_idx
+                    ON {self.config.table_name} (message_type, chat_id, id)
+                """)
+                cur.execute(f"""
+                    CREATE INDEX IF NOT EXISTS {self.config.table_name}_type_chat_ts_idx
+                    ON {self.config.table_name} (message_type, chat_id, timestamp)
+                """)
+                if self._query_hash_column:
+                    cur.execute(self._query_hash_index_sql())
+            self._migrate_json_embeddings()
+            self._query_hashes_filled = self._query_hash_column and not self._unhashed_queries()
+            if not self._query_hashes_filled:
+                logger.warning(
+                    f"{self.config.table_name} has no filled original_query_hash column; "
+                    "run migrate_query_hashes() to index response lookups"
+                )
             logger.info(f"Initialized SQLite storage at {self.config.db_path}")
         except Exception as e:
             logger.error(f"Failed to initialize SQLite storage: {str(e)}")
             raise
 
+    def _migrate_json_embeddings(self) -> None:
+        """Convert embeddings stored as JSON text by earlier versions to float32 BLOBs"""
+        table = self.config.table_name
+        migrated = 0
+        while True:
+            rows = self.conn.execute(
+                f"""SELECT id, embedding, original_embedding FROM {table}
+                WHERE typeof(embedding) = 'text' OR typeof(original_embedding) = 'text'
+                LIMIT {self.MIGRATION_BATCH_SIZE}"""
+            ).fetchall()
+            if not rows:
+                break
+            with self.conn:
+                self.conn.executemany(
+                    f"UPDATE {table} SET embedding = ?, original_embedding = ? WHERE id = ?",
+                    [
+                        (encode_vector(decode_vector(emb)), encode_vector(decode_vector(orig)), row_id)
+                        for row_id, emb, orig in rows
+                    ],
+                )
+            migrated += len(rows)
+        if migrated:
+            logger.info(f"Converted {migrated} JSON embeddings to float32 BLOBs")
+
+    def _query_hash_index_sql(self) -> str:
+        return f"""
+            CREATE INDEX IF NOT EXISTS {self.config.table_name}_original_query_hash_idx
+            ON {self.config.table_name} (original_query_hash)
+        """
+
+    def migrate_query_hashes(self) -> None:
+        """Migration step: add and index original_query_hash on a table created by an earlier version.
+
+        Rows are filled in batches, each in its own transaction, so stores and searches
+        keep running in between. Lookups match original_query directly until it is done.
+        """
+        table = self.config.table_name
+        with self._lock, self.conn:
+            columns = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if "original_query_hash" not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN original_query_hash TEXT")
+            self.conn.execute(self._query_hash_index_sql())
+            # New rows carry their hash from here on; the backfill covers the older ones
+            self._query_hash_column = True
+        filled = 0
+        while True:
+            with self._lock, self.conn:
+                rows = self._unhashed_queries(self.MIGRATION_BATCH_SIZE)
+                self.conn.executemany(
+                    f"UPDATE {table} SET original_query_hash = ? WHERE id = ?",
+                    [(query_hash(original_query), row_id) for row_id, original_query in rows],
+                )
+            if not rows:
+                break
+            filled += len(rows)
+        self._query_hashes_filled = True
+        logger.info(f"Indexed original_query of {filled} stored messages")
+
+    def _unhashed_queries(self, limit: int = 1) -> List[Tuple[int, str]]:
+        return self.conn.execute(
+            f"""SELECT id, original_query FROM {self.config.table_name}
+            WHERE original_query_hash IS NULL AND original_query IS NOT NULL AND original_query != ''
+            LIMIT {int(limit)}"""
+        ).fetchall()
+
+    def _query_condition(self, original_query: str) -> Tuple[str, list]:
+        """WHERE condition matching rows of an original query, through its hash once every row has one"""
+        if self._query_hashes_filled:
+            return "original_query_hash = ? AND original_query = ?", [query_hash(original_query), original_query]
+        return "original_query = ?", [original_query]
+
+    def _insert_sql(self) -> str:
+        if not self._query_hash_column:
+            return f"""INSERT INTO {self.config.table_name}
+                (message, embedding, timestamp, message_type, chat_id,
+                source_interface, original_query, original_embedding, response_type, key_topics, tool_call)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+        return f"""INSERT INTO {self.config.table_name}
+            (message, embedding, timestamp, message_type, chat_id,
+            source_interface, original_query, original_embedding, response_type, key_topics, tool_call,
+            original_query_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+    def _insert_row(self, message_data: MessageData) -> tuple:
+        row = (
+            message_data.message,
+            encode_vector(message_data.embedding),
+            message_data.timestamp,
+            message_data.message_type,
+            message_data.chat_id,
+            message_data.source_interface,
+            message_data.original_query,
+            encode_vector(message_data.original_embedding) if message_data.original_embedding else None,
+            message_data.response_type,
+            json.dumps(message_data.key_topics) if message_data.key_topics else None,
+            message_data.tool_call,
+        )
+        return (*row, query_hash(message_data.original_query)) if self._query_hash_column else row
+
     def store_embedding(self, message_data: MessageData) -> None:
         """Store a message and its embedding in SQLite"""
         try:
-            embedding_json = json.dumps(message_data.embedding)
-            original_embedding_json = (
-                json.dumps(message_data.original_embedding) if message_data.original_embedding else None
-            )
-            key_topics_json = json.dumps(message_data.key_topics) if message_data.key_topics else None
-
-            with self.conn:
-                self.conn.execute(
-                    f"""INSERT INTO {self.config.table_name}
-                    (message, embedding, timestamp, message_type, chat_id,
-                    source_interface, original_query, original_embedding, response_type, key_topics, tool_call)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        message_data.message,
-                        embedding_json,
-                        message_data.timestamp,
-                        message_data.message_type,
-                        message_data.chat_id,
-                        message_data.source_interface,
-                        message_data.original_query,
-                        original_embedding_json,
-                        message_data.response_type,
-                        key_topics_json,
-                        message_data.tool_call,
-                    ),
-                )
+            with self._lock, self.conn:
+                self.conn.execute(self._insert_sql(), self._insert_row(message_data))
             logger.info("Successfully stored message with metadata in database")
         except Exception as e:
             logger.error(f"Failed to store message: {str(e)}")
             raise
 
+    def store_embeddings(self, messages: List[MessageData]) -> None:
+        """Store many messages in one transaction"""
+        if not messages:
+            return
+        try:
+            with self._lock, self.conn:
+                self.conn.executemany(self._insert_sql(), [self._insert_row(m) for m in messages])
+            logger.info(f"Successfully stored {len(messages)} messages in database")
+        except Exception as e:
+            logger.error(f"Failed to store messages: {str(e)}")
+            raise
+
+    def _snapshot_path(self, key: Tuple[Optional[str], Optional[str]]) -> Optional[str]:
+        if not self.config.persist_vectors or self.config.db_path == ":memory:":
+            return None
+        digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()[:16]
+        database = hashlib.sha1(os.path.abspath(self.config.db_path).encode("utf-8")).hexdigest()[:16]
+        return data_path("vectors", database, f"{self.config.table_name}-{digest}.npy")
+
+    def _partition(self, message_type: Optional[str], chat_id: Optional[str]) -> VectorPartition:
+        """Search partition for a filter, brought up to date with rows stored since the last search"""
+        key = (message_type or None, chat_id or None)
+        query_conditions = []
+        query_params = []
+        if message_type:
+            query_conditions.append("message_type = ?")
+            query_params.append(message_type)
+        if chat_id:
+            query_conditions.append("chat_id = ?")
+            query_params.append(chat_id)
+        where_clause = " AND ".join(query_conditions) if query_conditions else "1=1"
+
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = VectorPartition(self._snapshot_path(key), ann_min_rows=self.config.ann_min_rows)
+            if len(partition):
+                # A snapshot must match the database it was taken from
+                (count,) = self.conn.execute(
+                    f"SELECT COUNT(*) FROM {self.config.table_name} WHERE {where_clause} AND id <= ?",
+                    (*query_params, partition.max_id),
+                ).fetchone()
+                if count != len(partition):
+                    logger.warning("Vector snapshot does not match the database, rebuilding it")
+                    partition.discard_all()
+            self._partitions[key] = partition
+            while len(self._partitions) > self.MAX_PARTITIONS:
+                self._partitions.popitem(last=False)
+        self._partitions.move_to_end(key)
+
+        cur = self.conn.execute(
+            f"SELECT id, embedding FROM {self.config.table_name} WHERE {where_clause} AND id > ? ORDER BY id",
+            (*query_params, partition.max_id),
+        )
+        partition.extend(cur.fetchall())
+        return partition
+
+    def _messages_by_id(self, ids: List[int]) -> Dict[int, str]:
+        messages = {}
+        for i in range(0, len(ids), self.ID_LOOKUP_BATCH_SIZE):
+            batch = ids[i : i + self.ID_LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            cur = self.conn.execute(
+                f"SELECT id, message FROM {self.config.table_name} WHERE id IN ({placeholders})", batch
+            )
+            messages.update(cur.fetchall())
+        return messages
+
     def find_similar(
-        self, embedding: List[float], threshold: float = 0.8, message_type: str = None, chat_id: str = None
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = None,
+        chat_id: str = None,
+        limit: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         """Find similar messages using cosine similarity"""
         try:
-            with self.conn:
-                cur = self.conn.cursor()
-                query_conditions = []
-                query_params = []
-
-                if message_type:
-                    query_conditions.append("message_type = ?")
-                    query_params.append(message_type)
-
-                if chat_id:
-                    query_conditions.append("chat_id = ?")
-                    query_params.append(chat_id)
+            with self._lock:
+                hits = self._partition(message_type, chat_id).search(embedding, threshold, limit)
+                messages = self._messages_by_id([row_id for row_id, _ in hits])
+            return [
+                {"message": messages[row_id], "similarity": similarity}
+                for row_id, similarity in hits
+                if row_id in messages
+            ]
+        except Exception as e:
+            logger.error(f"Failed to find similar messages: {str(e)}")
+            raise
 
-                where_clause = " AND ".join(query_conditions) if query_conditions else "1=1"
+    def find_similar_with_responses(
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = "user_message",
+        chat_id: str = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Similar messages and their agent responses, with one indexed response lookup per batch"""
+        try:
+            with self._lock:
+                hits = self._partition(message_type, chat_id).search(embedding, threshold, limit)
+                messages = self._messages_by_id([row_id for row_id, _ in hits])
+                queries = list({message for message in messages.values() if message})
+                if self._query_hashes_filled:
+                    column, keys = "original_query_hash", list({query_hash(query) for query in queries})
+                else:
+                    column, keys = "original_query", queries
+                responses: Dict[str, List[str]] = {}
+                for i in range(0, len(keys), self.ID_LOOKUP_BATCH_SIZE):
+                    batch = keys[i : i + self.ID_LOOKUP_BATCH_SIZE]
+                    cur = self.conn.execute(
+                        f"""SELECT original_query, message FROM {self.config.table_name}
+                        WHERE message_type = 'agent_response' AND {column} IN ({",".join("?" * len(batch))})
+                        ORDER BY timestamp DESC""",
+                        batch,
+                    )
+                    for original_query, response in cur.fetchall():
+                        responses.setdefault(original_query, []).append(response)
+
+            rows = []
+            for row_id, similarity in hits:
+                message = messages.get(row_id)
+                if message is None:
+                    continue
+                rows.extend((message, similarity, response) for response in responses.get(message, [None]))
+            return group_responses(rows)
+        except Exception as e:
+            logger.error(f"Failed to find similar messages: {str(e)}")
+            raise
 
-                cur.execute(
-                    f"SELECT message, embedding FROM {self.config.table_name} WHERE {where_clause}", tuple(query_params)
+    def annotate_response(
+        self,
+        chat_id: Optional[str],
+        original_query: str,
+        message: str,
+        response_type: Optional[str],
+        key_topics: Optional[List[str]],
+    ) -> None:
+        """Set response_type and key_topics of a stored agent response"""
+        try:
+            chat_condition = "chat_id = ?" if chat_id else "chat_id IS NULL"
+            with self._lock, self.conn:
+                query_condition, query_params = self._query_condition(original_query)
+                self.conn.execute(
+                    f"""UPDATE {self.config.table_name} SET response_type = ?, key_topics = ?
+                    WHERE message_type = 'agent_response' AND {query_condition}
+                    AND {chat_condition} AND message = ?""",
+                    (
+                        response_type,
+                        json.dumps(key_topics) if key_topics else None,
+                        *query_params,
+                        *((chat_id,) if chat_id else ()),
+                        message,
+                    ),
                 )
-                results = []
-                for message, embedding_json in cur.fetchall():
-                    stored_embedding = json.loads(embedding_json)
-                    similarity = compute_similarity(embedding, stored_embedding)
-                    if similarity >= threshold:
-                        results.append({"message": message, "similarity": similarity})
-                results.sort(key=lambda x: x["similarity"], reverse=True)
-                return results
         except Exception as e:
-            logger.error(f"Failed to find similar messages: {str(e)}")
+            logger.error(f"Failed to annotate response: {str(e)}")
             raise
 
     def close(self) -> None:
@@ -406,7 +1259,7 @@ class SQLiteVectorStorage(VectorStorageProvider):
     ) -> List[Dict[str, Any]]:
         """Find messages matching the given criteria"""
         try:
-            with self.conn:
+            with self._lock, self.conn:
                 cur = self.conn.cursor()
                 query_conditions = []
                 query_params = []
@@ -416,8 +1269,9 @@ class SQLiteVectorStorage(VectorStorageProvider):
                     query_params.append(message_type)
 
                 if original_query:
-                    query_conditions.append("original_query = ?")
-                    query_params.append(original_query)
+                    query_condition, original_query_params = self._query_condition(original_query)
+                    query_conditions.append(query_condition)
+                    query_params.extend(original_query_params)
 
                 if chat_id:
                     query_conditions.append("chat_id = ?")
@@ -449,7 +1303,7 @@ class SQLiteVectorStorage(VectorStorageProvider):
                     tool_call,
                 ) in cur.fetchall():
                     key_topics_list = json.loads(key_topics) if key_topics else None
-                    original_embedding_list = json.loads(orig_embedding) if orig_embedding else None
+                    original_embedding_list = decode_vector(orig_embedding).tolist() if orig_embedding else None
                     results.append(
                         {
                             "message": message,
@@ -468,7 +1322,277 @@ class SQLiteVectorStorage(VectorStorageProvider):
             raise
 
 
-def get_embedding(text: str, model: str = "BAAI/bge-large-en-v1.5") -> list:
+DEFAULT_EMBEDDING_MODEL = "BAAI/bge-large-en-v1.5"
+EMBEDDING_MAX_BATCH_SIZE = 64
+EMBEDDING_BATCH_WINDOW_SECONDS = 0.01
+EMBEDDING_MAX_CONCURRENT_REQUESTS = 4
+EMBEDDING_CACHE_SIZE = 4096
+EMBEDDING_CACHE_LOOKUP_BATCH_SIZE = 500
+
+
+class EmbeddingService:
+    """Embeddings from Heurist's OpenAI-compatible API, batched and cached.
+
+    - Clients are created once and reused (one AsyncOpenAI per event loop), so requests
+      share pooled connections.
+    - `embed` calls made within EMBEDDING_BATCH_WINDOW_SECONDS of each other are sent as
+      one multi-input request (up to max_batch_size texts); `embed_many` splits a bulk
+      input into such requests directly.
+    - Results are cached by model and SHA-256 of the text: an in-memory LRU of float32
+      vectors, backed by a SQLite file (`cache_path`; None keeps the cache in memory).
+      get_embedding_service keeps that file in the runtime data directory.
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE,
+        batch_window: float = EMBEDDING_BATCH_WINDOW_SECONDS,
+        max_concurrent_requests: int = EMBEDDING_MAX_CONCURRENT_REQUESTS,
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+        cache_path: Optional[str] = None,
+    ):
+        self.model = model
+        self.api_key = api_key or os.environ.get("HEURIST_API_KEY")
+        self.base_url = base_url or os.environ.get("HEURIST_BASE_URL")
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = batch_window
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self.cache_size = cache_size
+
+        self._sync_client: Optional[OpenAI] = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._request_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Texts waiting for the next micro-batch, per loop
+        self._pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._batch_tasks = set()
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_db = None
+        if cache_path:
+            try:
+                self._cache_db = sqlite3.connect(cache_path, check_same_thread=False)
+                with self._cache_db:
+                    self._cache_db.execute(
+                        "CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache at {cache_path} unavailable, caching in memory only: {e}")
+                self._cache_db = None
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, texts: List[str]) -> Dict[str, List[float]]:
+        """Cached embeddings for whichever of the texts have one"""
+        found: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        with self._cache_lock:
+            for text in texts:
+                key = self._key(text)
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    found[text] = vector.tolist()
+                else:
+                    missing[key] = text
+
+            keys = list(missing)
+            for start in range(0, len(keys) if self._cache_db else 0, EMBEDDING_CACHE_LOOKUP_BATCH_SIZE):
+                batch = keys[start : start + EMBEDDING_CACHE_LOOKUP_BATCH_SIZE]
+                rows = self._cache_db.execute(
+                    f"SELECT key, embedding FROM embedding_cache WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = decode_vector(blob)
+                    self._remember(key, vector)
+                    found[missing[key]] = vector.tolist()
+        return found
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _cache_put(self, embeddings: Dict[str, List[float]]) -> None:
+        with self._cache_lock:
+            rows = []
+            for text, embedding in embeddings.items():
+                key = self._key(text)
+                blob = encode_vector(embedding)
+                self._remember(key, decode_vector(blob))
+                rows.append((key, blob))
+            if self._cache_db and rows:
+                try:
+                    with self._cache_db:
+                        self._cache_db.executemany("INSERT OR REPLACE INTO embedding_cache VALUES (?, ?)", rows)
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist {len(rows)} embeddings: {e}")
+
+    # ------------------------------------------------------------------
+    # API requests
+    # ------------------------------------------------------------------
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i : i + self.max_batch_size] for i in range(0, len(texts), self.max_batch_size)]
+
+    @staticmethod
+    def _vectors(response, count: int) -> List[List[float]]:
+        data = sorted(response.data, key=lambda item: item.index)
+        if len(data) != count:
+            raise EmbeddingError(f"Expected {count} embeddings, got {len(data)}")
+        return [item.embedding for item in data]
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        if self._sync_client is None:
+            self._sync_client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        response = self._sync_client.embeddings.create(model=self.model, input=texts, encoding_format="float")
+        return self._vectors(response, len(texts))
+
+    async def _request_async(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+            self._async_clients[loop] = client
+        slot = self._request_slots.get(loop)
+        if slot is None:
+            slot = asyncio.Semaphore(self.max_concurrent_requests)
+            self._request_slots[loop] = slot
+        async with slot:
+            response = await client.embeddings.create(model=self.model, input=texts, encoding_format="float")
+        return self._vectors(response, len(texts))
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+    async def embed(self, text: str) -> List[float]:
+        """Embedding for one text; concurrent calls are grouped into one request"""
+        cached = self._cache_get([text])
+        if text in cached:
+            return cached[text]
+
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(loop, {})
+        future = pending.get(text)
+        if future is None:
+            future = loop.create_future()
+            pending[text] = future
+            if len(pending) >= self.max_batch_size:
+                self._flush(loop)
+            elif len(pending) == 1:
+                loop.call_later(self.batch_window, self._flush, loop)
+        return list(await asyncio.shield(future))
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        batch = self._pending.pop(loop, None)
+        if batch:
+            task = loop.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: Dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        try:
+            try:
+                vectors = await self._request_async(texts)
+            except Exception as e:
+                logger.error(f"Failed to generate {len(texts)} embeddings: {str(e)}")
+                error = e if isinstance(e, EmbeddingError) else EmbeddingError(f"Embedding generation failed: {str(e)}")
+                for future in batch.values():
+                    if not future.done():
+                        future.set_exception(error)
+                        # Retrieved here so callers that were cancelled meanwhile do not log it again
+                        future.exception()
+                return
+            self._cache_put(dict(zip(texts, vectors)))
+            for text, vector in zip(texts, vectors):
+                if not batch[text].done():
+                    batch[text].set_result(vector)
+        finally:
+            # If the batch task itself was cancelled, waiting embed() calls must not hang
+            for future in batch.values():
+                if not future.done():
+                    future.cancel()
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for many texts, in input order, using up to max_concurrent_requests requests at a time"""
+        found = self._cache_get(texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            try:
+                results = await asyncio.gather(*(self._request_async(batch) for batch in self._batches(missing)))
+            except EmbeddingError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to generate embeddings: {str(e)}")
+                raise EmbeddingError(f"Embedding generation failed: {str(e)}")
+            fetched = dict(zip(missing, (vector for vectors in results for vector in vectors)))
+            self._cache_put(fetched)
+            found.update(fetched)
+        return [found[text] for text in texts]
+
+    # ------------------------------------------------------------------
+    # Sync API
+    # ------------------------------------------------------------------
+    def embed_sync(self, text: str) -> List[float]:
+        """Embedding for one text, for synchronous callers"""
+        return self.embed_many_sync([text])[0]
+
+    def embed_many_sync(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for many texts, in input order, one request per max_batch_size texts"""
+        found = self._cache_get(texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            try:
+                fetched = {}
+                for batch in self._batches(missing):
+                    fetched.update(zip(batch, self._request(batch)))
+            except EmbeddingError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to generate embedding: {str(e)}")
+                raise EmbeddingError(f"Embedding generation failed: {str(e)}")
+            self._cache_put(fetched)
+            found.update(fetched)
+        return [found[text] for text in texts]
+
+
+# One service per embedding model
+_embedding_services: Dict[str, EmbeddingService] = {}
+_embedding_services_lock = threading.Lock()
+
+
+def get_embedding_service(model: str = DEFAULT_EMBEDDING_MODEL) -> EmbeddingService:
+    """Get or create the shared EmbeddingService for a model.
+
+    The persistent cache file is EMBEDDING_CACHE_PATH (default embedding_cache.db in the
+    runtime data directory); set it to an empty string to cache in memory only.
+    """
+    with _embedding_services_lock:
+        service = _embedding_services.get(model)
+        if service is None:
+            cache_path = os.environ.get("EMBEDDING_CACHE_PATH")
+            if cache_path is None:
+                cache_path = data_path("embedding_cache.db")
+            service = EmbeddingService(model, cache_path=cache_path)
+            _embedding_services[model] = service
+        return service
+
+
+def get_embedding(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> list:
     """
     Generate an embedding for the given text using Heurist's API.
 
@@ -482,17 +1606,17 @@ def get_embedding(text: str, model: str = "BAAI/bge-large-en-v1.5") -> list:
     Raises:
         EmbeddingError: If embedding generation fails
     """
-    try:
-        client = OpenAI(api_key=os.environ.get("HEURIST_API_KEY"), base_url=os.environ.get("HEURIST_BASE_URL"))
+    return get_embedding_service(model).embed_sync(text)
 
-        response = client.embeddings.create(model=model, input=text, encoding_format="float")
 
-        # Return the embedding vector for the input text
-        return response.data[0].embedding
+async def get_embedding_async(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> list:
+    """
+    Async version of get_embedding; concurrent calls are batched into one API request.
 
-    except Exception as e:
-        logger.error(f"Failed to generate embedding: {str(e)}")
-        raise EmbeddingError(f"Embedding generation failed: {str(e)}")
+    Raises:
+        EmbeddingError: If embedding generation fails
+    """
+    return await get_embedding_service(model).embed(text)
 
 
 def compute_similarity(embedding1: list, embedding2: list) -> float:
@@ -509,11 +1633,57 @@ def compute_similarity(embedding1: list, embedding2: list) -> float:
     return cosine_similarity([embedding1], [embedding2])[0][0]
 
 
+CONVERSATION_CACHE_CHATS = 1024
+CONVERSATION_CACHE_TURNS = 50
+
+
 class MessageStore:
+    """Message storage on top of a storage provider.
+
+    The `*_async` methods are for async callers: they await the methods of an async
+    provider (AsyncPostgresVectorStorage) and run those of a synchronous provider in a
+    worker thread, so database round trips never block the event loop. An async
+    provider is initialized on first use and only supports the `*_async` methods.
+
+    The latest agent responses of recently active chats are cached in memory
+    (`get_recent_responses`): loaded once per chat and then kept current by the
+    messages added through this store.
+    """
+
     def __init__(self, storage_provider: VectorStorageProvider):
         """Initialize the store with a storage provider."""
         self.storage_provider = storage_provider
-        self.storage_provider.initialize()
+        # chat_id -> {"turns": agent responses newest first, "complete": all of the chat's responses are held}
+        self._history: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # chat_id -> history loads in flight, and responses added while any of them runs, so
+        # a load that raced with an add is not cached; both are dropped once the loads finish
+        self._history_loads: Dict[str, int] = {}
+        self._history_writes: Dict[str, int] = {}
+        self._history_lock = threading.Lock()
+        self._is_async = inspect.iscoroutinefunction(storage_provider.initialize)
+        self._initialized = False
+        self._init_lock: Optional[asyncio.Lock] = None
+        if not self._is_async:
+            self.storage_provider.initialize()
+            self._initialized = True
+
+    async def initialize_async(self) -> None:
+        """Initialize an async storage provider (no-op for synchronous providers)"""
+        if self._initialized:
+            return
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if not self._initialized:
+                await self.storage_provider.initialize()
+                self._initialized = True
+
+    async def _call_async(self, method: str, *args) -> Any:
+        fn = getattr(self.storage_provider, method)
+        if self._is_async:
+            await self.initialize_async()
+            return await fn(*args)
+        return await asyncio.to_thread(fn, *args)
 
     def add_message(self, message_data: MessageData) -> None:
         """
@@ -523,9 +1693,25 @@ class MessageStore:
             message_data (MessageData): The message data to store
         """
         self.storage_provider.store_embedding(message_data)
+        self._remember_turns([message_data])
+
+    def add_messages(self, messages: List[MessageData]) -> None:
+        """
+        Add many messages in one bulk write (COPY on PostgreSQL).
+
+        Args:
+            messages (List[MessageData]): The messages to store
+        """
+        self.storage_provider.store_embeddings(messages)
+        self._remember_turns(messages)
 
     def find_similar_messages(
-        self, embedding: List[float], threshold: float = 0.8, message_type: str = None, chat_id: str = None
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = None,
+        chat_id: str = None,
+        limit: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         """
         Find messages similar to the given embedding.
@@ -535,15 +1721,236 @@ class MessageStore:
             threshold (float): Similarity threshold (0-1) to consider a message as similar
             message_type (str, optional): Filter by message type
             chat_id (str, optional): Filter by chat ID
+            limit (int, optional): Maximum number of messages to return, most similar first.
+                PostgreSQL storage returns at most PostgresConfig.default_limit (100) when not given.
 
         Returns:
             list: List of dictionaries containing similar messages and their similarity scores
         """
-        return self.storage_provider.find_similar(embedding, threshold, message_type, chat_id)
+        return self.storage_provider.find_similar(embedding, threshold, message_type, chat_id, limit)
+
+    async def add_message_async(self, message_data: MessageData) -> None:
+        """Async version of add_message"""
+        await self._call_async("store_embedding", message_data)
+        self._remember_turns([message_data])
+
+    async def add_messages_async(self, messages: List[MessageData]) -> None:
+        """Async version of add_messages"""
+        await self._call_async("store_embeddings", messages)
+        self._remember_turns(messages)
+
+    def find_similar_with_responses(
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = "user_message",
+        chat_id: str = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find messages similar to the given embedding together with the agent responses to them.
+
+        Args:
+            embedding (list): The embedding vector to compare against
+            threshold (float): Similarity threshold (0-1) to consider a message as similar
+            message_type (str, optional): Type of the similar messages (default 'user_message')
+            chat_id (str, optional): Filter the similar messages by chat ID
+            limit (int, optional): Maximum number of similar messages, most similar first.
+                PostgreSQL storage returns at most PostgresConfig.default_limit (100) when not given.
+
+        Returns:
+            list: [{"message", "similarity", "responses": [response text, newest first]}]
+        """
+        return self.storage_provider.find_similar_with_responses(embedding, threshold, message_type, chat_id, limit)
+
+    async def find_similar_with_responses_async(
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = "user_message",
+        chat_id: str = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Async version of find_similar_with_responses"""
+        return await self._call_async("find_similar_with_responses", embedding, threshold, message_type, chat_id, limit)
+
+    # ------------------------------------------------------------------
+    # Conversation history cache
+    # ------------------------------------------------------------------
+    def _cached_turns(self, chat_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        with self._history_lock:
+            entry = self._history.get(chat_id)
+            if entry is None or (len(entry["turns"]) < limit and not entry["complete"]):
+                return None
+            self._history.move_to_end(chat_id)
+            return [dict(turn) for turn in entry["turns"][:limit]]
+
+    def _start_load(self, chat_id: str) -> int:
+        """Register a history load; returns the write count to hand back to _finish_load"""
+        with self._history_lock:
+            self._history_loads[chat_id] = self._history_loads.get(chat_id, 0) + 1
+            return self._history_writes.get(chat_id, 0)
+
+    def _finish_load(self, chat_id: str, writes: int, turns: Optional[List[Dict[str, Any]]], requested: int) -> None:
+        """Cache a loaded history unless a response was added meanwhile (turns is None if the load failed)"""
+        with self._history_lock:
+            raced = self._history_writes.get(chat_id, 0) != writes
+            loads = self._history_loads[chat_id] - 1
+            if loads:
+                self._history_loads[chat_id] = loads
+            else:
+                del self._history_loads[chat_id]
+                self._history_writes.pop(chat_id, None)
+            if turns is None or raced:
+                return
+            self._history[chat_id] = {"turns": list(turns), "complete": len(turns) < requested}
+            self._history.move_to_end(chat_id)
+            while len(self._history) > CONVERSATION_CACHE_CHATS:
+                self._history.popitem(last=False)
+
+    def _remember_turns(self, messages: List[MessageData]) -> None:
+        """Put newly stored agent responses at the head of their chat's cached history"""
+        with self._history_lock:
+            for m in messages:
+                if m.message_type != "agent_response" or not m.chat_id:
+                    continue
+                if m.chat_id in self._history_loads:
+                    self._history_writes[m.chat_id] = self._history_writes.get(m.chat_id, 0) + 1
+                entry = self._history.get(m.chat_id)
+                if entry is None:
+                    continue
+                entry["turns"].insert(
+                    0,
+                    {
+                        "message": m.message,
+                        "timestamp": m.timestamp,
+                        "source_interface": m.source_interface,
+                        "response_type": m.response_type,
+                        "key_topics": m.key_topics,
+                        "original_query": m.original_query,
+                        "original_embedding": m.original_embedding,
+                        "tool_call": m.tool_call,
+                    },
+                )
+                if len(entry["turns"]) > CONVERSATION_CACHE_TURNS:
+                    del entry["turns"][CONVERSATION_CACHE_TURNS:]
+                    entry["complete"] = False
+
+    def _annotate_turn(
+        self,
+        chat_id: Optional[str],
+        original_query: str,
+        message: str,
+        response_type: Optional[str],
+        key_topics: Optional[List[str]],
+    ) -> None:
+        """Copy annotations written after the fact into the cached history"""
+        with self._history_lock:
+            entry = self._history.get(chat_id) if chat_id else None
+            for turn in entry["turns"] if entry else []:
+                if turn["message"] == message and turn["original_query"] == original_query:
+                    turn["response_type"] = response_type
+                    turn["key_topics"] = key_topics
+
+    def get_recent_responses(self, chat_id: str, limit: int = 10) -> List[Dict]:
+        """
+        The latest agent responses of a chat, newest first, served from memory when cached.
+
+        Args:
+            chat_id (str): The chat ID
+            limit (int): Maximum number of responses to return
+
+        Returns:
+            List[Dict]: Responses in the find_messages format
+        """
+        turns = self._cached_turns(chat_id, limit)
+        if turns is None:
+            requested = max(limit, CONVERSATION_CACHE_TURNS)
+            writes = self._start_load(chat_id)
+            loaded = None
+            try:
+                loaded = self.find_messages(message_type="agent_response", chat_id=chat_id, limit=requested)
+            finally:
+                self._finish_load(chat_id, writes, loaded, requested)
+            turns = [dict(turn) for turn in loaded[:limit]]
+        return turns
+
+    async def get_recent_responses_async(self, chat_id: str, limit: int = 10) -> List[Dict]:
+        """Async version of get_recent_responses"""
+        turns = self._cached_turns(chat_id, limit)
+        if turns is None:
+            requested = max(limit, CONVERSATION_CACHE_TURNS)
+            writes = self._start_load(chat_id)
+            loaded = None
+            try:
+                loaded = await self.find_messages_async(message_type="agent_response", chat_id=chat_id, limit=requested)
+            finally:
+                self._finish_load(chat_id, writes, loaded, requested)
+            turns = [dict(turn) for turn in loaded[:limit]]
+        return turns
+
+    async def find_similar_messages_async(
+        self,
+        embedding: List[float],
+        threshold: float = 0.8,
+        message_type: str = None,
+        chat_id: str = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Async version of find_similar_messages"""
+        return await self._call_async("find_similar", embedding, threshold, message_type, chat_id, limit)
+
+    async def find_messages_async(
+        self, message_type: str = None, original_query: str = None, chat_id: str = None, limit: int = None
+    ) -> List[Dict]:
+        """Async version of find_messages"""
+        return await self._call_async("find_messages", message_type, original_query, chat_id, limit)
+
+    def annotate_response(
+        self,
+        chat_id: Optional[str],
+        original_query: str,
+        message: str,
+        response_type: Optional[str],
+        key_topics: Optional[List[str]],
+    ) -> None:
+        """
+        Set the response type and key topics of an agent response stored without them.
+
+        Args:
+            chat_id (str, optional): The chat the response belongs to
+            original_query (str): The message the response answered
+            message (str): The response text
+            response_type (str, optional): Classification of the response
+            key_topics (List[str], optional): Key topics of the response
+        """
+        self.storage_provider.annotate_response(chat_id, original_query, message, response_type, key_topics)
+        self._annotate_turn(chat_id, original_query, message, response_type, key_topics)
+
+    async def annotate_response_async(
+        self,
+        chat_id: Optional[str],
+        original_query: str,
+        message: str,
+        response_type: Optional[str],
+        key_topics: Optional[List[str]],
+    ) -> None:
+        """Async version of annotate_response"""
+        await self._call_async("annotate_response", chat_id, original_query, message, response_type, key_topics)
+        self._annotate_turn(chat_id, original_query, message, response_type, key_topics)
+
+    async def close_async(self) -> None:
+        """Close the storage provider from async code"""
+        if self._is_async:
+            await self.storage_provider.close()
+        else:
+            self.storage_provider.close()
 
     def __del__(self):
         """Cleanup resources when the store is destroyed"""
-        self.storage_provider.close()
+        # An async provider's close() is a coroutine; it is closed through close_async()
+        if not self._is_async:
+            self.storage_provider.close()
 
     def find_messages(
         self, message_type: str = None, original_query: str = None, chat_id: str = None, limit: int = None
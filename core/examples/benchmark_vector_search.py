@@ -0,0 +1,143 @@
+"""Benchmark SQLiteVectorStorage.find_similar at increasing message counts.
+
+Compares the previous per-row path (JSON embeddings, one cosine_similarity call per row)
+with the float32 BLOB partitions, exact and with the IVF index, on synthetic clustered
+embeddings. Needs no network access:
+
+    python core/examples/benchmark_vector_search.py
+    python core/examples/benchmark_vector_search.py --sizes 10000 100000 --dim 1024
+    python core/examples/benchmark_vector_search.py --sizes 1000000 --dim 256 --legacy-max 0
+
+1M rows at 1024 dimensions take about 4 GB for the matrix (and as much again on disk).
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from core.embedding import SQLiteConfig, SQLiteVectorStorage  # noqa: E402
+from core.utils.vector_index import encode_vector  # noqa: E402
+
+THRESHOLD = 0.8
+TOP_K = 10
+QUERIES = 20
+INSERT_BATCH = 10_000
+
+
+def make_embeddings(count: int, dim: int, rng: np.random.Generator, clusters: int = 500) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    noise = rng.standard_normal((count, dim)).astype(np.float32) * 0.5
+    return centers[labels] + noise
+
+
+def fill(storage: SQLiteVectorStorage, embeddings: np.ndarray, as_json: bool = False) -> None:
+    table = storage.config.table_name
+    for start in range(0, len(embeddings), INSERT_BATCH):
+        batch = embeddings[start : start + INSERT_BATCH]
+        with storage.conn:
+            storage.conn.executemany(
+                f"INSERT INTO {table} (message, embedding, timestamp, message_type) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        f"message {start + i}",
+                        json.dumps(vector.tolist()) if as_json else encode_vector(vector),
+                        "2025-01-01T00:00:00",
+                        "user_message",
+                    )
+                    for i, vector in enumerate(batch)
+                ],
+            )
+
+
+def legacy_find_similar(storage: SQLiteVectorStorage, embedding: list) -> list:
+    # The previous SQLiteVectorStorage.find_similar
+    cur = storage.conn.execute(
+        f"SELECT message, embedding FROM {storage.config.table_name} WHERE message_type = ?", ("user_message",)
+    )
+    results = []
+    for message, embedding_json in cur.fetchall():
+        similarity = cosine_similarity([embedding], [json.loads(embedding_json)])[0][0]
+        if similarity >= THRESHOLD:
+            results.append({"message": message, "similarity": similarity})
+    results.sort(key=lambda x: x["similarity"], reverse=True)
+    return results[:TOP_K]
+
+
+def timed_queries(fn, queries: np.ndarray) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        fn(query.tolist())
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def bench(size: int, dim: int, legacy_max: int, workdir: str) -> None:
+    rng = np.random.default_rng(size)
+    embeddings = make_embeddings(size, dim, rng)
+    queries = embeddings[rng.choice(size, size=QUERIES, replace=False)] + rng.standard_normal((QUERIES, dim)) * 0.1
+    print(f"\n== {size:,} messages, {dim} dimensions ==")
+
+    def storage(name: str, ann_min_rows) -> SQLiteVectorStorage:
+        s = SQLiteVectorStorage(
+            SQLiteConfig(db_path=os.path.join(workdir, f"{name}-{size}.db"), ann_min_rows=ann_min_rows)
+        )
+        s.initialize()
+        return s
+
+    if size <= legacy_max:
+        legacy = storage("legacy", None)
+        # Write JSON rows directly, bypassing the BLOB migration that initialize() would run
+        fill(legacy, embeddings, as_json=True)
+        queries_ms = timed_queries(lambda q: legacy_find_similar(legacy, q), queries[:3])
+        print(f"previous (JSON + per-row cosine_similarity): {queries_ms:10.1f} ms/query")
+        legacy.close()
+
+    exact = storage("blob", None)
+    fill(exact, embeddings)
+    start = time.perf_counter()
+    exact.find_similar(queries[0].tolist(), THRESHOLD, "user_message", limit=TOP_K)
+    print(f"blob partition load (first query):          {(time.perf_counter() - start) * 1000:10.1f} ms")
+    exact_ms = timed_queries(lambda q: exact.find_similar(q, THRESHOLD, "user_message", limit=TOP_K), queries)
+    print(f"blob exact matvec + argpartition:           {exact_ms:10.2f} ms/query")
+
+    ann = SQLiteVectorStorage(SQLiteConfig(db_path=exact.config.db_path, ann_min_rows=min(size, 10_000)))
+    ann.initialize()
+    start = time.perf_counter()
+    ann.find_similar(queries[0].tolist(), THRESHOLD, "user_message", limit=TOP_K)
+    print(f"IVF build (first query):                    {(time.perf_counter() - start) * 1000:10.1f} ms")
+    ann_ms = timed_queries(lambda q: ann.find_similar(q, THRESHOLD, "user_message", limit=TOP_K), queries)
+
+    recall = []
+    for query in queries:
+        expected = {r["message"] for r in exact.find_similar(query.tolist(), THRESHOLD, "user_message", limit=TOP_K)}
+        found = {r["message"] for r in ann.find_similar(query.tolist(), THRESHOLD, "user_message", limit=TOP_K)}
+        if expected:
+            recall.append(len(expected & found) / len(expected))
+    print(f"IVF search:                                 {ann_ms:10.2f} ms/query (recall@{TOP_K} {np.mean(recall):.3f})")
+    exact.close()
+    ann.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--legacy-max", type=int, default=100_000, help="Largest size to run the previous path at")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            bench(size, args.dim, args.legacy_max, workdir)
+
+
+if __name__ == "__main__":
+    main()
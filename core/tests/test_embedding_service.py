@@ -0,0 +1,94 @@
+"""Tests for EmbeddingService micro-batching and caching, with a fake embeddings API (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.embedding import EmbeddingError, EmbeddingService  # noqa: E402
+
+
+class FakeEmbeddingService(EmbeddingService):
+    """Embeds a text as [len(text), 1.0] and records the inputs of every request."""
+
+    def __init__(self, **kwargs):
+        super().__init__(api_key="test", base_url="http://localhost", **kwargs)
+        self.requests: List[List[str]] = []
+        self.fail = False
+
+    async def _request_async(self, texts: List[str]) -> List[List[float]]:
+        self.requests.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("API down")
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_concurrent_embeds_share_one_request() -> None:
+    service = FakeEmbeddingService(batch_window=0.01)
+
+    async def main():
+        return await asyncio.gather(*(service.embed(text) for text in ["a", "bb", "a", "ccc"]))
+
+    vectors = asyncio.run(main())
+
+    assert service.requests == [["a", "bb", "ccc"]]
+    assert vectors == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+
+
+def test_batches_are_flushed_at_max_batch_size() -> None:
+    service = FakeEmbeddingService(max_batch_size=2, batch_window=10)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(service.embed(text) for text in ["a", "b", "c", "d"])), 1)
+
+    asyncio.run(main())
+
+    assert service.requests == [["a", "b"], ["c", "d"]]
+
+
+def test_cached_embeddings_survive_a_restart(tmp_path: Path) -> None:
+    cache_path = str(tmp_path / "embedding_cache.db")
+    service = FakeEmbeddingService(cache_path=cache_path)
+    asyncio.run(service.embed("hello"))
+
+    restarted = FakeEmbeddingService(cache_path=cache_path)
+    assert asyncio.run(restarted.embed("hello")) == [5.0, 1.0]
+    assert restarted.requests == []
+
+
+def test_failed_request_fails_every_waiter() -> None:
+    service = FakeEmbeddingService()
+    service.fail = True
+
+    async def main():
+        return await asyncio.gather(service.embed("a"), service.embed("b"), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert len(service.requests) == 1
+    assert all(isinstance(result, EmbeddingError) for result in results)
+
+
+def test_cancelled_batch_cancels_its_waiters() -> None:
+    service = FakeEmbeddingService()
+
+    async def main():
+        waiter = asyncio.ensure_future(service.embed("a"))
+        await asyncio.sleep(0)
+        service._flush(asyncio.get_running_loop())
+        await asyncio.sleep(0)  # the batch is now waiting on its request
+        for task in list(service._batch_tasks):
+            task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(main())
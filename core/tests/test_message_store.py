@@ -0,0 +1,99 @@
+"""Tests for annotating stored agent responses after the fact and the original_query hash migration (no network)."""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.embedding import (  # noqa: E402
+    MessageData,
+    MessageStore,
+    SQLiteConfig,
+    SQLiteVectorStorage,
+    _postgres_annotate_sql,
+)
+
+
+def _message(message: str, message_type: str, original_query: str | None = None, chat_id: str = "chat-1"):
+    return MessageData(
+        message=message,
+        embedding=[1.0, 0.0, 0.0],
+        timestamp="2026-01-01T00:00:00",
+        message_type=message_type,
+        chat_id=chat_id,
+        source_interface="api",
+        original_query=original_query,
+        original_embedding=None,
+        response_type=None,
+        key_topics=None,
+        tool_call=None,
+    )
+
+
+@pytest.fixture
+def store() -> MessageStore:
+    store = MessageStore(SQLiteVectorStorage(SQLiteConfig(db_path=":memory:", persist_vectors=False)))
+    store.add_messages(
+        [
+            _message("gm", "user_message"),
+            _message("gm! how can I help?", "agent_response", "gm"),
+            _message("gm! how can I help?", "agent_response", "gm", chat_id="chat-2"),
+        ]
+    )
+    return store
+
+
+def test_annotations_reach_the_stored_response_and_the_cached_history(store: MessageStore) -> None:
+    assert store.get_recent_responses("chat-1")[0]["response_type"] is None
+
+    store.annotate_response("chat-1", "gm", "gm! how can I help?", "QUESTION", ["greeting"])
+
+    cached = store.get_recent_responses("chat-1")[0]
+    stored = store.find_messages(message_type="agent_response", chat_id="chat-1")[0]
+    assert (cached["response_type"], cached["key_topics"]) == ("QUESTION", ["greeting"])
+    assert (stored["response_type"], stored["key_topics"]) == ("QUESTION", ["greeting"])
+    # The same reply in another chat is a different row
+    assert store.find_messages(message_type="agent_response", chat_id="chat-2")[0]["response_type"] is None
+
+
+def test_postgres_annotation_matches_the_response_through_the_query_hash() -> None:
+    sql, names = _postgres_annotate_sql("messages", None, lambda name, _: f"%({name})s")
+
+    assert "md5(original_query) = md5(%(original_query)s)" in sql
+    assert "chat_id IS NULL" in sql
+    assert names == ["response_type", "key_topics", "original_query", "message"]
+
+
+def test_tables_without_query_hashes_work_until_migrated_and_are_then_filled(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "messages.db")
+    with sqlite3.connect(db_path) as conn:
+        # The schema written before original_query_hash existed
+        conn.execute(
+            """CREATE TABLE message_embeddings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, message TEXT NOT NULL, embedding BLOB NOT NULL,
+                timestamp TEXT NOT NULL, message_type TEXT NOT NULL, chat_id TEXT, source_interface TEXT,
+                original_query TEXT, original_embedding BLOB, response_type TEXT, key_topics TEXT,
+                tool_call TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+        )
+    storage = SQLiteVectorStorage(SQLiteConfig(db_path=db_path, persist_vectors=False))
+    storage.initialize()
+    storage.store_embeddings([_message("gm", "user_message"), _message("gm!", "agent_response", "gm")])
+
+    before = storage.find_similar_with_responses([1.0, 0.0, 0.0], chat_id="chat-1")
+    storage.migrate_query_hashes()
+    storage.store_embedding(_message("gm again!", "agent_response", "gm"))
+
+    assert before[0]["responses"] == ["gm!"]
+    unhashed = storage.conn.execute(
+        "SELECT COUNT(*) FROM message_embeddings WHERE original_query_hash IS NULL"
+    ).fetchone()
+    assert unhashed == (1,)  # only the user message, which has no original query
+    responses = storage.find_messages(message_type="agent_response", original_query="gm")
+    assert sorted(row["message"] for row in responses) == ["gm again!", "gm!"]
@@ -0,0 +1,43 @@
+"""Tests for the SQL and session settings of the PostgreSQL vector storage (no database)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.embedding import PostgresConfig, _postgres_search_settings, _postgres_similar_sql  # noqa: E402
+
+
+def _placeholder(name: str, position: int) -> str:
+    return f"${position}"
+
+
+def _config(**kwargs) -> PostgresConfig:
+    return PostgresConfig(host="localhost", port=5432, database="db", user="user", password="", **kwargs)
+
+
+def test_unfiltered_and_type_filtered_searches_order_by_the_index_operator() -> None:
+    sql, names = _postgres_similar_sql("messages", "user_message", None, _placeholder)
+
+    assert "ORDER BY embedding <=> $2::vector" in sql
+    assert names == ["message_type", "embedding", "k", "threshold"]
+
+
+def test_chat_searches_rank_the_chat_rows_exactly() -> None:
+    sql, names = _postgres_similar_sql("messages", "user_message", "chat-1", _placeholder)
+
+    assert "ORDER BY similarity DESC\n            LIMIT $4" in sql
+    assert "ORDER BY embedding <=>" not in sql
+    assert names == ["message_type", "chat_id", "embedding", "k", "threshold"]
+
+
+def test_search_settings_probe_several_lists_by_default() -> None:
+    assert _postgres_search_settings(_config()) == {"hnsw.ef_search": "100", "ivfflat.probes": "10"}
+    assert _postgres_search_settings(_config(ef_search=None, probes=None, iterative_scan="relaxed_order")) == {
+        "hnsw.iterative_scan": "relaxed_order",
+        "ivfflat.iterative_scan": "relaxed_order",
+    }
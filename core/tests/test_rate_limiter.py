@@ -0,0 +1,95 @@
+"""Tests for the shared adaptive rate limiter of the search clients (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.clients.search.base_search_client import BaseSearchClient  # noqa: E402
+from core.clients.search.rate_limiter import RateLimiter, get_rate_limiter, retry_after_seconds  # noqa: E402
+
+
+def test_requests_are_paced_after_the_burst() -> None:
+    limiter = RateLimiter("test", rate=20.0, burst=2)
+
+    async def main():
+        return await asyncio.gather(*(limiter.acquire() for _ in range(4)))
+
+    start = time.monotonic()
+    waits = asyncio.run(main())
+
+    # Two tokens are available at once, the other two refill at 20/s
+    assert time.monotonic() - start >= 0.09
+    assert sorted(waits)[:2] == pytest.approx([0.0, 0.0], abs=0.02)
+    assert limiter.metrics()["acquired"] == 4
+
+
+def test_rate_limited_response_pauses_and_halves_the_rate() -> None:
+    limiter = RateLimiter("test", rate=10.0, burst=1)
+    limiter.report_rate_limited(retry_after=0.1)
+    assert limiter.metrics()["effective_rate"] == 5.0
+    assert limiter.metrics()["paused_for"] > 0
+
+    start = time.monotonic()
+    asyncio.run(limiter.acquire())
+    assert time.monotonic() - start >= 0.09
+
+    for _ in range(10):
+        limiter.report_success()
+    assert limiter.metrics()["effective_rate"] == 10.0
+
+
+def test_backoff_without_retry_after_never_drops_below_the_minimum_rate() -> None:
+    limiter = RateLimiter("test", rate=8.0)
+    for _ in range(10):
+        limiter.report_rate_limited(retry_after=0)
+    assert limiter.metrics()["effective_rate"] == 1.0
+    assert limiter.metrics()["rate_limited"] == 10
+
+
+def test_limiters_are_shared_per_provider_and_key() -> None:
+    limiter = get_rate_limiter("test-shared", "key-1", rate=5.0)
+    assert get_rate_limiter("test-shared", "key-1") is limiter
+    assert get_rate_limiter("test-shared", "key-2") is not limiter
+    assert limiter.rate == 5.0
+
+
+def test_retry_after_accepts_seconds_and_http_dates() -> None:
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds("Thu, 01 Jan 1970 00:00:00 GMT") == 0.0
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
+
+
+def test_configure_keeps_the_backoff_state() -> None:
+    limiter = RateLimiter("test", rate=10.0, burst=4)
+    limiter.report_rate_limited(retry_after=30)
+    limiter.configure(20.0, burst=2)
+
+    metrics = limiter.metrics()
+    assert metrics["rate"] == 20.0
+    assert metrics["effective_rate"] == 10.0
+    assert metrics["burst"] == 2
+    assert metrics["paused_for"] > 29
+
+
+class _Client(BaseSearchClient):
+    async def search(self, query: str, timeout: int = 15000):
+        return {"data": []}
+
+
+def test_rate_limit_errors_are_matched_on_status_only() -> None:
+    client = _Client()
+    response = SimpleNamespace(status_code=429, headers={"Retry-After": "7"})
+    assert client._rate_limit_info(SimpleNamespace(response=response)) == (True, 7.0)
+    assert client._rate_limit_info(SimpleNamespace(status_code=429)) == (True, None)
+    assert client._rate_limit_info(ValueError("order 429 not found")) == (False, None)
@@ -0,0 +1,74 @@
+"""Tests for the deep research work-queue scheduler (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.workflows.research_scheduler import ResearchScheduler, path_learnings  # noqa: E402
+
+
+@dataclass
+class Node:
+    learnings: List[str] = field(default_factory=list)
+    parent: Optional["Node"] = None
+
+
+def test_search_budget_stops_new_work() -> None:
+    scheduler = ResearchScheduler(concurrency=1, max_searches=3)
+    handled = []
+
+    async def handler(level: int):
+        handled.append(level)
+        scheduler.charge_search()
+        return [level + 1, level + 1]
+
+    asyncio.run(scheduler.run([0], handler))
+
+    assert handled == [0, 1, 1]
+    assert scheduler.stop_reason == "search budget"
+    assert scheduler.completed == 3
+    assert scheduler.skipped == 4
+
+
+def test_claim_urls_returns_each_url_once_per_session() -> None:
+    scheduler = ResearchScheduler()
+    assert scheduler.claim_urls(["a", "b", "a"]) == ["a", "b"]
+    assert scheduler.claim_urls(["b", "c"]) == ["c"]
+    assert list(scheduler.seen_urls) == ["a", "b", "c"]
+
+
+def test_deadline_cancels_work_in_flight() -> None:
+    scheduler = ResearchScheduler(concurrency=2, max_seconds=0.2)
+    cancelled = []
+
+    async def handler(item: str):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+
+    start = time.monotonic()
+    asyncio.run(scheduler.run(["a", "b", "c"], handler))
+
+    assert time.monotonic() - start < 2
+    assert scheduler.stop_reason == "time budget"
+    assert sorted(cancelled) == ["a", "b"]
+    assert scheduler.completed == 0
+
+
+def test_path_learnings_lists_ancestors_first() -> None:
+    root = Node(["r1", "r2"])
+    child = Node(["c1"], parent=root)
+    leaf = Node([], parent=child)
+    assert path_learnings(leaf) == ["r1", "r2", "c1"]
+    assert path_learnings(root) == ["r1", "r2"]
@@ -0,0 +1,70 @@
+"""Tests for in-memory vector partitions and their IVF index (no network)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.utils import vector_index  # noqa: E402
+from core.utils.vector_index import VectorPartition, encode_vector  # noqa: E402
+
+
+def _rows(vectors: np.ndarray, first_id: int = 1):
+    return [(first_id + i, encode_vector(v)) for i, v in enumerate(vectors)]
+
+
+def test_exact_search_matches_cosine_similarity() -> None:
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    partition = VectorPartition()
+    assert partition.extend(_rows(vectors)) == 50
+
+    query = vectors[7] * 3
+    results = partition.search(query, threshold=-1.0, limit=5)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5] + 1
+    assert [row_id for row_id, _ in results] == expected.tolist()
+    assert results[0] == (8, pytest.approx(1.0, abs=1e-5))
+
+
+def test_extend_skips_rows_already_held() -> None:
+    vectors = np.eye(4, dtype=np.float32)
+    partition = VectorPartition()
+    partition.extend(_rows(vectors[:2]))
+    assert partition.extend(_rows(vectors)) == 2
+    assert len(partition) == 4
+    assert partition.max_id == 4
+
+
+def test_ivf_search_finds_nearest_rows_of_a_large_snapshot(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(vector_index, "PERSIST_MIN_TAIL_ROWS", 100)
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(16, 32)).astype(np.float32)
+    vectors = (np.repeat(centers, 100, axis=0) + 0.05 * rng.normal(size=(1600, 32))).astype(np.float32)
+
+    snapshot = str(tmp_path / "vectors" / "partition.npy")
+    partition = VectorPartition(snapshot, ann_min_rows=1000)
+    partition.extend(_rows(vectors))
+    assert len(partition.base_ids) == 1600
+
+    reloaded = VectorPartition(snapshot, ann_min_rows=1000)
+    assert len(reloaded) == 1600
+    results = reloaded.search(vectors[250], threshold=0.9, limit=10)
+    assert reloaded._ivf is not None
+    assert results[0][0] == 251
+    assert all(201 <= row_id <= 300 for row_id, _ in results)
+
+
+def test_search_rejects_a_query_of_another_dimension() -> None:
+    partition = VectorPartition()
+    partition.extend(_rows(np.eye(3, dtype=np.float32)))
+    with pytest.raises(ValueError):
+        partition.search([1.0, 0.0], threshold=0.0)
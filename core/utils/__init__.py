@@ -2,6 +2,6 @@
 Utility functions for the Heurist Core package
 """
 
-from .text_splitter import trim_prompt
+from .text_splitter import trim_prompt, trim_prompts
 
-__all__ = ["trim_prompt"]
+__all__ = ["trim_prompt", "trim_prompts"]
@@ -0,0 +1,116 @@
+"""
+Cache of per-document analysis results, keyed by URL and content hash.
+
+Deep research extracts learnings from each scraped page on its own, so a page that comes
+back from several queries, depth levels or search providers only needs one LLM pass as
+long as its content is unchanged. Entries are JSON values held in an in-memory LRU,
+backed by a SQLite file so they are reused across research sessions.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from .data_dir import data_path
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_SIZE = 10_000
+ANALYSIS_CACHE_LOOKUP_BATCH_SIZE = 500
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def document_key(url: str, text: str, namespace: str = "") -> str:
+    """Cache key of a document: its URL and content hash, within a namespace (model, prompt version)."""
+    return hashlib.sha256(f"{namespace}\0{url or ''}\0{content_hash(text)}".encode("utf-8")).hexdigest()
+
+
+class DocumentAnalysisCache:
+    def __init__(self, cache_size: int = ANALYSIS_CACHE_SIZE, cache_path: Optional[str] = None):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if cache_path:
+            try:
+                self._db = sqlite3.connect(cache_path, check_same_thread=False)
+                with self._db:
+                    self._db.execute(
+                        "CREATE TABLE IF NOT EXISTS document_analysis (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Analysis cache at {cache_path} unavailable, caching in memory only: {e}")
+                self._db = None
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Cached values for whichever of the keys have one"""
+        found: Dict[str, Any] = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+                else:
+                    missing.append(key)
+
+            for start in range(0, len(missing) if self._db else 0, ANALYSIS_CACHE_LOOKUP_BATCH_SIZE):
+                batch = missing[start : start + ANALYSIS_CACHE_LOOKUP_BATCH_SIZE]
+                try:
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM document_analysis WHERE key IN ({','.join('?' * len(batch))})", batch
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to read the analysis cache: {e}")
+                    break
+                for key, value in rows:
+                    found[key] = json.loads(value)
+                    self._remember(key, found[key])
+        return found
+
+    def put_many(self, values: Dict[str, Any]) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._remember(key, value)
+            if self._db and values:
+                try:
+                    with self._db:
+                        self._db.executemany(
+                            "INSERT OR REPLACE INTO document_analysis VALUES (?, ?)",
+                            [(key, json.dumps(value)) for key, value in values.items()],
+                        )
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist {len(values)} document analyses: {e}")
+
+
+# Singleton instance
+_document_analysis_cache: Optional[DocumentAnalysisCache] = None
+
+
+def get_document_analysis_cache() -> DocumentAnalysisCache:
+    """Get or create the singleton DocumentAnalysisCache instance.
+
+    The persistent cache file is RESEARCH_CACHE_PATH (default research_cache.db in the
+    runtime data directory); set it to an empty string to cache in memory only.
+    """
+    global _document_analysis_cache
+    if _document_analysis_cache is None:
+        cache_path = os.environ.get("RESEARCH_CACHE_PATH")
+        if cache_path is None:
+            cache_path = data_path("research_cache.db")
+        _document_analysis_cache = DocumentAnalysisCache(cache_path=cache_path)
+    return _document_analysis_cache
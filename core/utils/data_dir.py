@@ -0,0 +1,27 @@
+"""
+Location of the files Heurist Core writes at runtime (embedding and analysis caches,
+vector snapshots).
+
+They live under HEURIST_DATA_DIR, by default the user cache directory
+($XDG_CACHE_HOME/heurist or ~/.cache/heurist), so running an agent does not leave
+untracked files in the working directory.
+"""
+
+import os
+from pathlib import Path
+
+
+def data_dir() -> Path:
+    """The runtime data directory, created on first use."""
+    configured = os.environ.get("HEURIST_DATA_DIR")
+    if configured:
+        path = Path(configured).expanduser()
+    else:
+        path = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "heurist"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_path(*parts: str) -> str:
+    """Path of a file or directory inside the runtime data directory."""
+    return str(data_dir().joinpath(*parts))
@@ -1,117 +1,224 @@
 import os
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from collections import deque
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
 
 import tiktoken
 
+# (start, end) offsets of a piece of the text being split
+Span = Tuple[int, int]
+
 
 class TextSplitter(ABC):
-    """Base text splitter class that handles splitting text into chunks."""
+    """Base text splitter class that handles splitting text into chunks.
+
+    Chunk sizes are measured with `length_function`, the character count by default;
+    pass `count_tokens` to measure them in tokens.
+    """
 
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, length_function: Callable[[str], int] = len):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.length_function = length_function
 
         if self.chunk_overlap >= self.chunk_size:
             raise ValueError("Cannot have chunk_overlap >= chunk_size")
 
     @abstractmethod
+    def iter_text(self, text: str) -> Iterator[str]:
+        """Yield the chunks of `text` one at a time."""
+
     def split_text(self, text: str) -> List[str]:
-        pass
+        return list(self.iter_text(text))
 
-    def create_documents(self, texts: List[str]) -> List[str]:
-        documents = []
+    def iter_documents(self, texts: List[str]) -> Iterator[str]:
         for text in texts:
-            for chunk in self.split_text(text):
-                documents.append(chunk)
-        return documents
+            yield from self.iter_text(text)
+
+    def create_documents(self, texts: List[str]) -> List[str]:
+        return list(self.iter_documents(texts))
 
     def split_documents(self, documents: List[str]) -> List[str]:
         return self.create_documents(documents)
 
-    def _join_docs(self, docs: List[str], separator: str) -> Optional[str]:
-        text = separator.join(docs).strip()
-        return text if text else None
+    def _span_length(self, text: str, span: Span) -> int:
+        if self.length_function is len:
+            return span[1] - span[0]
+        return self.length_function(text[span[0] : span[1]])
 
     def merge_splits(self, splits: List[str], separator: str) -> List[str]:
-        docs: List[str] = []
-        current_doc: List[str] = []
-        total = 0
-
-        for d in splits:
-            _len = len(d)
-            if total + _len >= self.chunk_size:
-                if total > self.chunk_size:
-                    print(f"Created a chunk of size {total}, which is longer than the specified {self.chunk_size}")
-
-                if current_doc:
-                    doc = self._join_docs(current_doc, separator)
-                    if doc is not None:
-                        docs.append(doc)
-
-                    while total > self.chunk_overlap or (total + _len > self.chunk_size and total > 0):
-                        total -= len(current_doc[0])
-                        current_doc.pop(0)
-
-            current_doc.append(d)
-            total += _len
-
-        doc = self._join_docs(current_doc, separator)
+        text = separator.join(splits)
+        spans, start = [], 0
+        for split in splits:
+            spans.append((start, start + len(split)))
+            start += len(split) + len(separator)
+        merger = _SpanMerger(self, text)
+        docs = [doc for doc in map(merger.add, spans) if doc is not None]
+        doc = merger.flush()
         if doc is not None:
             docs.append(doc)
         return docs
 
 
+class _SpanMerger:
+    """Merges consecutive pieces of one text into chunks of up to chunk_size.
+
+    The pieces held are always consecutive pieces of the same split, so a chunk is the
+    single slice of the text from the first held piece to the last one. Chunk length
+    counts the pieces only, not the separators between them.
+    """
+
+    def __init__(self, splitter: TextSplitter, text: str):
+        self.splitter = splitter
+        self.text = text
+        self.current: Deque[Tuple[Span, int]] = deque()  # (span, length)
+        self.total = 0
+
+    def _doc(self) -> Optional[str]:
+        doc = self.text[self.current[0][0][0] : self.current[-1][0][1]].strip()
+        return doc or None
+
+    def add(self, span: Span, length: Optional[int] = None) -> Optional[str]:
+        """Add the next piece; returns the chunk it completes, if any."""
+        splitter = self.splitter
+        if length is None:
+            length = splitter._span_length(self.text, span)
+        doc = None
+        if self.total + length >= splitter.chunk_size:
+            if self.total > splitter.chunk_size:
+                print(f"Created a chunk of size {self.total}, which is longer than the specified {splitter.chunk_size}")
+
+            if self.current:
+                doc = self._doc()
+                while self.total > splitter.chunk_overlap or (
+                    self.total + length > splitter.chunk_size and self.total > 0
+                ):
+                    self.total -= self.current.popleft()[1]
+
+        self.current.append((span, length))
+        self.total += length
+        return doc
+
+    def flush(self) -> Optional[str]:
+        """Return the chunk being built, if any, and start over."""
+        doc = self._doc() if self.current else None
+        self.current.clear()
+        self.total = 0
+        return doc
+
+
 class RecursiveCharacterTextSplitter(TextSplitter):
-    """Splits text recursively by different separators."""
+    """Splits text recursively by different separators.
+
+    The text is split by the first separator it contains; pieces still too long are
+    split by the next separators in turn. The recursion is run iteratively over
+    offsets into the original text, and chunks are yielded as soon as they are complete.
+    """
 
     def __init__(
         self,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
         separators: Optional[List[str]] = None,
+        length_function: Callable[[str], int] = len,
     ):
-        super().__init__(chunk_size, chunk_overlap)
+        super().__init__(chunk_size, chunk_overlap, length_function)
         self.separators = separators or ["\n\n", "\n", ".", ",", ">", "<", " ", ""]
 
-    def split_text(self, text: str) -> List[str]:
-        final_chunks: List[str] = []
-
-        # Get appropriate separator to use
-        separator = self.separators[-1]
-        for s in self.separators:
-            if s == "":
-                separator = s
-                break
-            if s in text:
-                separator = s
+    def _separator(self, text: str, span: Span, level: int) -> int:
+        """Index of the first separator from `level` on that occurs in the span."""
+        for i in range(level, len(self.separators)):
+            separator = self.separators[i]
+            if separator == "" or text.find(separator, span[0], span[1]) != -1:
+                return i
+        return len(self.separators) - 1
+
+    @staticmethod
+    def _pieces(text: str, span: Span, separator: str) -> Iterator[Span]:
+        start, end = span
+        if not separator:
+            yield from zip(range(start, end), range(start + 1, end + 1))
+            return
+        while True:
+            position = text.find(separator, start, end)
+            if position == -1:
+                yield start, end
+                return
+            yield start, position
+            start = position + len(separator)
+
+    def iter_text(self, text: str) -> Iterator[str]:
+        if not text:
+            return
+        last_level = len(self.separators) - 1
+        chunk_size = self.chunk_size
+        measure = None if self.length_function is len else self.length_function
+        # Frames of the pending splits, innermost last: (separator index, pieces, merger)
+        level = self._separator(text, (0, len(text)), 0)
+        stack = [(level, self._pieces(text, (0, len(text)), self.separators[level]), _SpanMerger(self, text))]
+        while stack:
+            level, pieces, merger = stack[-1]
+            for span in pieces:
+                length = span[1] - span[0] if measure is None else measure(text[span[0] : span[1]])
+                if length < chunk_size or level == last_level:
+                    if merger.total + length < chunk_size:
+                        # Fits in the chunk being built (the common case, inlined)
+                        merger.current.append((span, length))
+                        merger.total += length
+                        continue
+                    doc = merger.add(span, length)
+                    if doc is not None:
+                        yield doc
+                    continue
+
+                # Too long: emit what was merged so far, then split this piece further. It cannot
+                # contain this frame's separator or any before it, so the scan starts after it.
+                doc = merger.flush()
+                if doc is not None:
+                    yield doc
+                inner = self._separator(text, span, level + 1)
+                stack.append((inner, self._pieces(text, span, self.separators[inner]), _SpanMerger(self, text)))
                 break
+            else:
+                doc = merger.flush()
+                if doc is not None:
+                    yield doc
+                stack.pop()
 
-        # Split the text
-        splits = text.split(separator) if separator else list(text)
 
-        # Merge splits recursively
-        good_splits: List[str] = []
-        for s in splits:
-            if len(s) < self.chunk_size:
-                good_splits.append(s)
-            else:
-                if good_splits:
-                    merged_text = self.merge_splits(good_splits, separator)
-                    final_chunks.extend(merged_text)
-                    good_splits = []
-                other_info = self.split_text(s)
-                final_chunks.extend(other_info)
+MIN_CHUNK_SIZE = 140
+# A trimmed prompt is cut back to the last of these separators (tried in order) when
+# one falls within the last TRIM_SNAP_FRACTION of the kept text; otherwise it is cut
+# at the exact token boundary.
+TRIM_SEPARATORS = ["\n\n", "\n", ". ", "! ", "? "]
+TRIM_SNAP_FRACTION = 0.2
+encoder = tiktoken.get_encoding("cl100k_base")  # Updated to use OpenAI's current encoding
 
-        if good_splits:
-            merged_text = self.merge_splits(good_splits, separator)
-            final_chunks.extend(merged_text)
 
-        return final_chunks
+def _encode(text: str) -> List[int]:
+    # Scraped pages may contain special-token text such as "<|endoftext|>"; count it as plain text
+    return encoder.encode(text, disallowed_special=())
 
 
-MIN_CHUNK_SIZE = 140
-encoder = tiktoken.get_encoding("cl100k_base")  # Updated to use OpenAI's current encoding
+def count_tokens(text: str) -> int:
+    """Token count of a text, for measuring chunks in tokens (length_function=count_tokens)."""
+    return len(_encode(text))
+
+
+def _cut(tokens: List[int], context_size: int) -> str:
+    """Text of the first `context_size` tokens, snapped back to a paragraph or sentence end."""
+    # Decoding a token prefix gives a prefix of the original text, except that a multi-byte
+    # character split at the boundary is dropped
+    text = encoder.decode_bytes(tokens[:context_size]).decode("utf-8", errors="ignore")
+    if len(text) <= MIN_CHUNK_SIZE:
+        return text
+    floor = max(MIN_CHUNK_SIZE, int(len(text) * (1 - TRIM_SNAP_FRACTION)))
+    for separator in TRIM_SEPARATORS:
+        position = text.rfind(separator, floor)
+        if position != -1:
+            # Keep sentence punctuation, drop the trailing whitespace
+            return text[: position + len(separator.rstrip())].rstrip()
+    return text
 
 
 def trim_prompt(prompt: str, context_size: int = int(os.environ.get("CONTEXT_SIZE", "128000"))) -> str:
@@ -119,22 +226,27 @@ def trim_prompt(prompt: str, context_size: int = int(os.environ.get("CONTEXT_SIZ
     if not prompt:
         return ""
 
-    length = len(encoder.encode(prompt))
-    if length <= context_size:
+    tokens = _encode(prompt)
+    if len(tokens) <= context_size:
         return prompt
-
-    overflow_tokens = length - context_size
-    # Estimate characters to remove (3 chars per token on average)
-    chunk_size = len(prompt) - overflow_tokens * 3
-    if chunk_size < MIN_CHUNK_SIZE:
-        return prompt[:MIN_CHUNK_SIZE]
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=0)
-
-    trimmed_prompt = splitter.split_text(prompt)[0] if splitter.split_text(prompt) else ""
-
-    # Handle edge case where trimmed prompt is same length
-    if len(trimmed_prompt) == len(prompt):
-        return trim_prompt(prompt[:chunk_size], context_size)
-
-    return trim_prompt(trimmed_prompt, context_size)
+    return _cut(tokens, max(context_size, 0))
+
+
+def trim_prompts(prompts: List[str], context_size: int, max_tokens_each: Optional[int] = None) -> List[str]:
+    """Trims several prompts to share one context size, encoding each prompt once.
+
+    Prompts are first capped at `max_tokens_each`. If they still exceed `context_size`
+    together, the budget is split in proportion to their lengths, so every prompt keeps
+    the same fraction of its tokens.
+    """
+    token_lists = [_encode(prompt) if prompt else [] for prompt in prompts]
+    lengths = [len(tokens) if max_tokens_each is None else min(len(tokens), max_tokens_each) for tokens in token_lists]
+    total = sum(lengths)
+    if total > context_size:
+        budget = max(context_size, 0)
+        lengths = [length * budget // total for length in lengths]
+
+    return [
+        prompt if len(tokens) <= length else _cut(tokens, length)
+        for prompt, tokens, length in zip(prompts, token_lists, lengths)
+    ]
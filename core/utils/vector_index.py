@@ -0,0 +1,264 @@
+"""
+In-memory vector search over stored message embeddings.
+
+Embeddings are stored as raw float32 bytes. For search, the rows of one filter
+partition (message_type, chat_id) are held as a single L2-normalized float32 matrix,
+so cosine similarity against every row is one matrix-vector product and top-k
+selection is an argpartition. A partition is made of a base matrix, which may be a
+read-only memory-mapped .npy snapshot shared across restarts, plus an in-memory tail
+of rows added since the snapshot; the tail is folded into a new snapshot once it
+reaches PERSIST_MIN_TAIL_ROWS rows and a tenth of the base.
+
+Above a size threshold the base matrix also gets an IVF index (k-means coarse
+quantizer): a query is scored only against the rows of the closest clusters. IVF
+search is approximate, so it is only used past the threshold and can be disabled.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+IVF_TRAIN_SAMPLE = 50_000
+IVF_ITERATIONS = 8
+IVF_MIN_PROBES = 8
+# The tail is folded into the snapshot once it reaches this many rows and 10% of the base
+PERSIST_MIN_TAIL_ROWS = 5_000
+PERSIST_MIN_TAIL_FRACTION = 0.1
+
+
+def encode_vector(values: Optional[Iterable[float]]) -> Optional[bytes]:
+    """float32 bytes for storage."""
+    if values is None:
+        return None
+    return np.asarray(values, dtype=np.float32).tobytes()
+
+
+def decode_vector(value: Any) -> Optional[np.ndarray]:
+    """Vector from float32 bytes, or from the JSON text rows written before the BLOB format."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=np.float32)
+    return np.asarray(json.loads(value), dtype=np.float32)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length; all-zero rows stay zero (similarity 0, as with cosine_similarity)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def top_matches(scores: np.ndarray, threshold: float, limit: Optional[int]) -> np.ndarray:
+    """Indices of scores >= threshold, best first, at most `limit` of them."""
+    hits = np.flatnonzero(scores >= threshold)
+    if limit is not None and len(hits) > limit:
+        hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+    return hits[np.argsort(-scores[hits], kind="stable")]
+
+
+class IVFIndex:
+    """Inverted-file index over a fixed matrix: rows are bucketed by their nearest k-means centroid."""
+
+    def __init__(self, matrix: np.ndarray, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        n = len(matrix)
+        self.nlist = max(1, int(np.sqrt(n)))
+        sample = matrix[np.sort(rng.choice(n, size=min(n, IVF_TRAIN_SAMPLE), replace=False))]
+        centroids = sample[rng.choice(len(sample), size=self.nlist, replace=False)].copy()
+        for _ in range(IVF_ITERATIONS):
+            labels = self._nearest(sample, centroids)
+            for c in range(self.nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = normalize_rows(centroids)
+        self.centroids = centroids
+        self.size = 0
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.extend(matrix)
+
+    def _nearest(self, rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        return np.argmax(rows @ centroids.T, axis=1).astype(np.int32)
+
+    def _assign(self, matrix: np.ndarray, chunk: int = 65_536) -> np.ndarray:
+        return np.concatenate(
+            [self._nearest(matrix[i : i + chunk], self.centroids) for i in range(0, len(matrix), chunk)]
+        )
+
+    def extend(self, matrix: np.ndarray) -> None:
+        """Assign rows appended to the indexed matrix (from row `self.size` on) without retraining."""
+        if len(matrix) > self.size:
+            self.assignments = np.concatenate([self.assignments, self._assign(matrix[self.size :])])
+            self.size = len(matrix)
+            # Row indices grouped by list: list c is order[offsets[c]:offsets[c + 1]]
+            self.order = np.argsort(self.assignments, kind="stable")
+            self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.assignments, minlength=self.nlist))])
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        nprobe = nprobe or max(IVF_MIN_PROBES, self.nlist // 16)
+        probes = np.argpartition(-(self.centroids @ query), min(nprobe, self.nlist) - 1)[:nprobe]
+        rows = np.concatenate([self.order[self.offsets[c] : self.offsets[c + 1]] for c in probes])
+        rows.sort()
+        return rows
+
+
+class VectorPartition:
+    """Normalized embedding matrix for one filter partition, with the matching row IDs."""
+
+    def __init__(self, snapshot_path: Optional[str] = None, ann_min_rows: Optional[int] = None):
+        self.snapshot_path = snapshot_path
+        self.ann_min_rows = ann_min_rows
+        self.dim: Optional[int] = None
+        self.base = np.zeros((0, 0), dtype=np.float32)
+        self.base_ids = np.zeros(0, dtype=np.int64)
+        self._tail: List[np.ndarray] = []  # normalized row blocks
+        self._tail_ids: List[int] = []
+        self._tail_matrix: Optional[np.ndarray] = None
+        self._tail_id_array: Optional[np.ndarray] = None
+        self._ivf: Optional[IVFIndex] = None
+        if snapshot_path:
+            self._load_snapshot()
+
+    @property
+    def max_id(self) -> int:
+        if self._tail_ids:
+            return self._tail_ids[-1]
+        return int(self.base_ids[-1]) if len(self.base_ids) else 0
+
+    def __len__(self) -> int:
+        return len(self.base_ids) + len(self._tail_ids)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _load_snapshot(self) -> None:
+        ids_path = f"{self.snapshot_path}.ids.npy"
+        if not (os.path.exists(self.snapshot_path) and os.path.exists(ids_path)):
+            return
+        try:
+            base = np.load(self.snapshot_path, mmap_mode="r")
+            base_ids = np.load(ids_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable vector snapshot {self.snapshot_path}: {e}")
+            return
+        if base.ndim != 2 or len(base) != len(base_ids):
+            logger.warning(f"Ignoring inconsistent vector snapshot {self.snapshot_path}")
+            return
+        self.base, self.base_ids, self.dim = base, base_ids, base.shape[1]
+
+    def discard_all(self) -> None:
+        self.dim = None
+        self.base = np.zeros((0, 0), dtype=np.float32)
+        self.base_ids = np.zeros(0, dtype=np.int64)
+        self._tail, self._tail_ids, self._tail_matrix, self._ivf = [], [], None, None
+
+    def extend(self, rows: Iterable[Tuple[int, Any]]) -> int:
+        """Append (id, stored embedding) rows in id order with ids above max_id; returns the number added."""
+        rows = [(row_id, value) for row_id, value in rows if value is not None and row_id > self.max_id]
+        if not rows:
+            return 0
+        values = [value for _, value in rows]
+        if self.dim is None:
+            self.dim = len(decode_vector(values[0]))
+
+        if all(isinstance(v, bytes) and len(v) == self.dim * 4 for v in values):
+            # Fast path: one buffer for the whole batch
+            block = np.frombuffer(b"".join(values), dtype=np.float32).reshape(-1, self.dim)
+            self._tail_ids.extend(row_id for row_id, _ in rows)
+        else:
+            vectors = []
+            for row_id, value in rows:
+                vector = decode_vector(value)
+                if len(vector) != self.dim:
+                    logger.warning(f"Skipping embedding {row_id} with dimension {len(vector)} (expected {self.dim})")
+                    continue
+                vectors.append(vector)
+                self._tail_ids.append(row_id)
+            if not vectors:
+                return 0
+            block = np.vstack(vectors)
+        self._tail.append(normalize_rows(block))
+        added = len(block)
+
+        self._tail_matrix = None
+        tail = len(self._tail_ids)
+        if (
+            self.snapshot_path
+            and tail >= PERSIST_MIN_TAIL_ROWS
+            and tail >= PERSIST_MIN_TAIL_FRACTION * len(self.base_ids)
+        ):
+            self._persist()
+        return added
+
+    def _tail_normalized(self) -> np.ndarray:
+        if self._tail_matrix is None:
+            if self._tail:
+                self._tail_matrix = np.vstack(self._tail) if len(self._tail) > 1 else self._tail[0]
+                self._tail = [self._tail_matrix]
+            else:
+                self._tail_matrix = np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._tail_id_array = np.asarray(self._tail_ids, dtype=np.int64)
+        return self._tail_matrix
+
+    def _persist(self) -> None:
+        """Fold the tail into a new memory-mapped base snapshot."""
+        matrix = np.concatenate([np.asarray(self.base).reshape(-1, self.dim), self._tail_normalized()])
+        ids = np.concatenate([self.base_ids, np.asarray(self._tail_ids, dtype=np.int64)])
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        tmp = f"{self.snapshot_path}.tmp.npy"
+        np.save(tmp, matrix)
+        np.save(f"{self.snapshot_path}.ids.tmp.npy", ids)
+        os.replace(tmp, self.snapshot_path)
+        os.replace(f"{self.snapshot_path}.ids.tmp.npy", f"{self.snapshot_path}.ids.npy")
+        self.base, self.base_ids = np.load(self.snapshot_path, mmap_mode="r"), ids
+        self._tail, self._tail_ids, self._tail_matrix = [], [], None
+        logger.info(f"Saved vector snapshot with {len(ids)} rows to {self.snapshot_path}")
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def _base_candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if self.ann_min_rows is None or len(self.base_ids) < self.ann_min_rows:
+            return None
+        if self._ivf is None or self._ivf.size > len(self.base_ids) or len(self.base_ids) > 2 * self._ivf.size:
+            logger.info(f"Building IVF index over {len(self.base_ids)} vectors")
+            self._ivf = IVFIndex(np.asarray(self.base))
+        else:
+            self._ivf.extend(self.base)
+        return self._ivf.candidates(query)
+
+    def search(
+        self, embedding: Iterable[float], threshold: float, limit: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """(row id, cosine similarity) pairs with similarity >= threshold, best first."""
+        if not len(self):
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        if query.shape != (self.dim,):
+            raise ValueError(f"Query embedding has shape {query.shape}, stored embeddings have {self.dim} dimensions")
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+
+        ids_parts, score_parts = [], []
+        if len(self.base_ids):
+            candidates = self._base_candidates(query)
+            if candidates is None:
+                ids_parts.append(self.base_ids)
+                score_parts.append(self.base @ query)
+            else:
+                ids_parts.append(self.base_ids[candidates])
+                score_parts.append(self.base[candidates] @ query)
+        if self._tail_ids:
+            score_parts.append(self._tail_normalized() @ query)
+            ids_parts.append(self._tail_id_array)
+
+        ids = np.concatenate(ids_parts)
+        scores = np.concatenate(score_parts)
+        hits = top_matches(scores, threshold, limit)
+        return [(int(ids[i]), float(scores[i])) for i in hits]
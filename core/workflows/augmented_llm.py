@@ -50,7 +50,7 @@ class AugmentedLLMCall:
 
         if options["use_knowledge"] or options["use_similar"]:
             try:
-                message_embedding = self.conversation_provider.get_embedding(message)
+                message_embedding = await self.conversation_provider.get_embedding_async(message)
             except Exception as e:
                 logger.error(f"Failed to generate embedding: {str(e)}")
 
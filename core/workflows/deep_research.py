@@ -1,14 +1,26 @@
 import asyncio
 import json
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, TypedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict
 
-from ..utils.text_splitter import trim_prompt
+from ..utils.analysis_cache import DocumentAnalysisCache, content_hash, document_key, get_document_analysis_cache
+from ..utils.text_splitter import trim_prompts
+from .research_scheduler import ResearchScheduler, path_learnings
 
 logger = logging.getLogger(__name__)
 
+# Token budget for one scraped page in a document analysis prompt
+MAX_TOKENS_PER_CONTENT = 25_000
+# Token budget shared by the uncached pages of one search query; when they exceed it
+# together, every page keeps the same fraction of its tokens
+MAX_TOKENS_PER_QUERY = 100_000
+# Learnings extracted from each page; they are cached and reused for every query returning the page
+LEARNINGS_PER_DOCUMENT = 8
+# Bump when the document prompt changes, so cached learnings from the old prompt are not reused
+DOCUMENT_PROMPT_VERSION = 1
+
 
 @dataclass
 class ResearchQuery:
@@ -21,12 +33,37 @@ class ResearchResult(TypedDict):
     visited_urls: List[str]
     follow_up_questions: List[str]
     analyses: List[Dict]
+    stats: Dict
+
+
+@dataclass
+class _ResearchNode:
+    """One work item of a research session: plan search queries, or run one search query."""
+
+    query: str
+    breadth: int
+    depth: int
+    research_goal: str = ""
+    search: bool = False
+    parent: Optional["_ResearchNode"] = None
+    learnings: List[str] = field(default_factory=list)
+
+    def path_learnings(self) -> List[str]:
+        """Learnings from this node and the nodes above it, oldest first."""
+        return path_learnings(self)
 
 
 class ResearchWorkflow:
     """Research workflow combining interactive and autonomous research patterns with advanced analysis"""
 
-    def __init__(self, llm_provider, tool_manager, search_client=None, search_clients=None):
+    def __init__(
+        self,
+        llm_provider,
+        tool_manager,
+        search_client=None,
+        search_clients=None,
+        analysis_cache: Optional[DocumentAnalysisCache] = None,
+    ):
         """
         Initialize the research workflow with LLM provider and search capabilities.
 
@@ -41,6 +78,7 @@ class ResearchWorkflow:
                                 "firecrawl": FirecrawlClient(api_key="..."),
                                 "duckduckgo": DuckDuckGoClient()
                             }
+            analysis_cache: Cache of per-page learnings (default: the shared DocumentAnalysisCache)
         """
         self.llm_provider = llm_provider
         self.tool_manager = tool_manager
@@ -70,6 +108,7 @@ class ResearchWorkflow:
         # For convenience, set search_client to the default client
         self.search_client = self.search_clients.get("default", next(iter(self.search_clients.values())))
 
+        self.analysis_cache = analysis_cache or get_document_analysis_cache()
         self._last_request_time = 0
         self.analysis_model = getattr(self.llm_provider, "small_model_id", None)
         self.report_model = getattr(self.llm_provider, "large_model_id", None)
@@ -87,7 +126,11 @@ class ResearchWorkflow:
             "interactive": False,  # Whether to ask clarifying questions first
             "breadth": 3,  # Number of parallel searches
             "depth": 2,  # How deep to go in research
-            "concurrency": 3,  # Max concurrent requests
+            "concurrency": 3,  # Max concurrent requests per provider
+            "max_tokens": None,  # LLM token budget for the research phase (None = unlimited)
+            "max_searches": None,  # Search budget for the research phase
+            "max_seconds": None,  # Wall time budget for the research phase
+            "on_progress": None,  # Callable receiving a dict per research progress event
             "temperature": 0.7,
             "raw_data_only": False,  # Whether to return only raw data without report
             "analysis_model": self.analysis_model,  # Model to use for intermediate reasoning
@@ -119,6 +162,10 @@ class ResearchWorkflow:
                 concurrency=options["concurrency"],
                 multi_provider=options.get("multi_provider", False),
                 search_providers=options.get("search_providers", []),
+                max_tokens=options["max_tokens"],
+                max_searches=options["max_searches"],
+                max_seconds=options["max_seconds"],
+                on_progress=options["on_progress"],
             )
 
             if options["raw_data_only"]:
@@ -141,6 +188,16 @@ class ResearchWorkflow:
             logger.error(f"Research workflow failed: {str(e)}")
             return f"Research failed: {str(e)}", None, None
 
+    async def _call_llm(self, scheduler: Optional[ResearchScheduler] = None, **kwargs):
+        """llm_provider.call, within the session's LLM concurrency limit and token budget when given one."""
+        if scheduler is None:
+            return await self.llm_provider.call(**kwargs)
+        scheduler.check_budget()
+        async with scheduler.slot("llm"):
+            result = await self.llm_provider.call(**kwargs)
+        scheduler.charge_tokens(kwargs.get("system_prompt"), kwargs.get("user_prompt"), result[0])
+        return result
+
     async def _generate_questions(self, query: str) -> List[str]:
         """Generate clarifying questions for research"""
         prompt = f"""Given this research topic: {query}, generate 3-5 follow-up questions to better understand the research needs.
@@ -162,7 +219,11 @@ class ResearchWorkflow:
             return []
 
     async def _generate_search_queries(
-        self, query: str, num_queries: int = 3, learnings: List[str] = None
+        self,
+        query: str,
+        num_queries: int = 3,
+        learnings: List[str] = None,
+        scheduler: Optional[ResearchScheduler] = None,
     ) -> List[ResearchQuery]:
         """Generate intelligent search queries based on input topic and previous learnings"""
         learnings_text = "\n".join([f"- {learning}" for learning in learnings]) if learnings else ""
@@ -197,7 +258,8 @@ class ResearchWorkflow:
         """
         prompt += example_response
         model_for_queries = self.analysis_model or self.report_model
-        response, _, _ = await self.llm_provider.call(
+        response, _, _ = await self._call_llm(
+            scheduler,
             system_prompt=self._get_system_prompt(),
             user_prompt=prompt,
             temperature=0.3,
@@ -213,28 +275,123 @@ class ResearchWorkflow:
             logger.debug(f"Raw response: {response}")
             return [ResearchQuery(query=query, research_goal="Main topic research")]
 
-    async def _process_search_result(
-        self, query: str, search_result: Dict, num_learnings: int = 5, num_follow_up_questions: int = 3
-    ) -> Dict:
-        """Process search results to extract learnings and follow-up questions with enhanced validation"""
-        # Extract data - works for both Pydantic models and dicts
-        data = getattr(search_result, "data", None) or (
-            search_result.get("data") if isinstance(search_result, dict) else []
-        )
-
-        contents = []
-        for item in data:
+    def _documents(self, items: List) -> List[Dict[str, str]]:
+        """Pages with markdown, one per URL and per content."""
+        documents, seen = [], set()
+        for item in items:
             # Extract markdown - works for both Pydantic models and dicts
             markdown = getattr(item, "markdown", None) or (item.get("markdown") if isinstance(item, dict) else None)
-            if markdown:
-                contents.append(trim_prompt(markdown, 25000))
+            if not markdown:
+                continue
+            url = self._item_url(item) or ""
+            digest = content_hash(markdown)
+            if (url and url in seen) or digest in seen:
+                continue
+            seen.update((url, digest) if url else (digest,))
+            documents.append({"url": url, "markdown": markdown})
+        return documents
+
+    async def _document_learnings(
+        self, documents: List[Dict[str, str]], scheduler: Optional[ResearchScheduler] = None
+    ) -> List[List[str]]:
+        """Learnings of each page, from the analysis cache or from one LLM call per uncached page.
+
+        The uncached pages are trimmed together to MAX_TOKENS_PER_QUERY, each page to at most
+        MAX_TOKENS_PER_CONTENT.
+        """
+        namespace = f"learnings:v{DOCUMENT_PROMPT_VERSION}:{self.analysis_model}"
+        keys = [document_key(doc["url"], doc["markdown"], namespace) for doc in documents]
+        cached = self.analysis_cache.get_many(keys)
+
+        async def extract(doc: Dict[str, str], content: str) -> Optional[List[str]]:
+            prompt = f"""Extract the key learnings from this web page{f" ({doc['url']})" if doc["url"] else ""}.
+
+        <content>
+        {content}
+        </content>
+
+        Return a JSON object with a 'learnings' field: a list of up to {LEARNINGS_PER_DOCUMENT} learnings.
+        The learnings should be unique, concise, and information-dense, including entities, metrics, numbers, and dates.
+        IMPORTANT: DON'T MAKE ANY INFORMATION UP, IT MUST BE FROM THE CONTENT.
+        IMPORTANT: MAKE SURE YOU RETURN THE JSON ONLY, NO OTHER TEXT OR MARKUP AND A VALID JSON.
+        USE THE FOLLOWING FORMAT FOR THE JSON:
+        {{
+            "learnings": ["Learning 1", "Learning 2", "Learning 3"]
+        }}
+        """
+            response, _, _ = await self._call_llm(
+                scheduler,
+                system_prompt=self._get_system_prompt(),
+                user_prompt=prompt,
+                temperature=0.3,
+                model_id=self.analysis_model,
+            )
+            try:
+                cleaned_response = response.replace("```json", "").replace("```", "").strip()
+                learnings = json.loads(cleaned_response).get("learnings", [])
+                return [str(learning) for learning in learnings][:LEARNINGS_PER_DOCUMENT]
+            except (json.JSONDecodeError, AttributeError) as e:
+                logger.error(f"Error parsing document learnings JSON for {doc['url']}: {e}")
+                logger.debug(f"Raw response: {response}")
+                return None
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        contents = trim_prompts(
+            [documents[i]["markdown"] for i in missing], MAX_TOKENS_PER_QUERY, max_tokens_each=MAX_TOKENS_PER_CONTENT
+        )
+        tasks = [asyncio.ensure_future(extract(documents[i], content)) for i, content in zip(missing, contents)]
+        fetched: Dict[str, List[str]] = {}
+        errors: List[BaseException] = []
+        try:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            # Pages analyzed before another page failed, the budget ran out or the session was
+            # cancelled are still cached; failed extractions are not, so they are tried again
+            for i, task in zip(missing, tasks):
+                if not task.done() or task.cancelled():
+                    continue
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                elif task.result() is not None:
+                    fetched[keys[i]] = task.result()
+            self.analysis_cache.put_many(fetched)
+        if errors:
+            raise errors[0]
+        cached.update(fetched)
+        logger.info(f"Document learnings: {len(documents) - len(missing)} cached, {len(fetched)} extracted")
+        return [cached.get(key, []) for key in keys]
+
+    async def _process_search_result(
+        self,
+        query: str,
+        search_result: Dict,
+        num_learnings: int = 5,
+        num_follow_up_questions: int = 3,
+        scheduler: Optional[ResearchScheduler] = None,
+    ) -> Dict:
+        """Process search results to extract learnings and follow-up questions with enhanced validation
 
-        if not contents:
+        Learnings are extracted from each page separately and cached by URL and content hash,
+        so a page is only sent to the analysis model once; the analysis of the query then
+        works from the learnings of its pages.
+        """
+        documents = self._documents(self._result_items(search_result))
+        if not documents:
             return {"learnings": [], "follow_up_questions": [], "analysis": "No search results found to analyze."}
 
-        contents_str = "".join(f"<content>\n{content}\n</content>" for content in contents)
+        document_learnings = await self._document_learnings(documents, scheduler)
+        contents_str = "".join(
+            f"<content source={json.dumps(doc['url'])}>\n"
+            + "\n".join(f"- {learning}" for learning in learnings)
+            + "\n</content>"
+            for doc, learnings in zip(documents, document_learnings)
+            if learnings
+        )
+        if not contents_str:
+            return {"learnings": [], "follow_up_questions": [], "analysis": "Error processing search results."}
 
         prompt = f"""Analyze these search results for the query: <query>{query}</query>
+        Each result is given as the learnings extracted from one page.
 
         <contents>{contents_str}</contents>
 
@@ -251,11 +408,12 @@ class ResearchWorkflow:
             "follow_up_questions": ["Question 1", "Question 2", "Question 3"]
         }}
 
-        The learnings should be unique, concise, and information-dense, including entities, metrics, numbers, and dates.
+        The learnings should be the ones most relevant to the query, unique, concise, and information-dense, including entities, metrics, numbers, and dates.
         IMPORTANT: DON'T MAKE ANY INFORMATION UP, IT MUST BE FROM THE CONTENT. ONLY USE THE CONTENT TO GENERATE THE LEARNINGS AND FOLLOW UP QUESTIONS.
         """
 
-        response, _, _ = await self.llm_provider.call(
+        response, _, _ = await self._call_llm(
+            scheduler,
             system_prompt=self._get_system_prompt(),
             user_prompt=prompt,
             temperature=0.3,
@@ -275,6 +433,35 @@ class ResearchWorkflow:
             logger.debug(f"Raw response: {response}")
             return {"learnings": [], "follow_up_questions": [], "analysis": "Error processing search results."}
 
+    @staticmethod
+    def _result_items(search_result) -> List:
+        # Works for both Pydantic models and dicts
+        return getattr(search_result, "data", None) or (
+            search_result.get("data") if isinstance(search_result, dict) else []
+        )
+
+    @staticmethod
+    def _item_url(item) -> Optional[str]:
+        return getattr(item, "url", None) or (item.get("url") if isinstance(item, dict) else None)
+
+    async def _search(self, scheduler: ResearchScheduler, provider: str, search_client, query: str):
+        """Search with retries within the provider's concurrency limit; None if every attempt failed."""
+        async with scheduler.slot(f"search:{provider}"):
+            for attempt in range(3):
+                scheduler.check_budget()
+                scheduler.charge_search()
+                try:
+                    logger.info(f"Searching with {provider} for {query}")
+                    result = await search_client.search(query, timeout=20000)
+                    scheduler.emit("searched", provider=provider, query=query)
+                    return result
+                except Exception as e:
+                    if attempt == 2:  # Last attempt
+                        logger.error(f"Error searching with {provider} for {query}: {str(e)}")
+                        return None
+                    logger.warning(f"Search attempt {attempt + 1} failed: {str(e)}")
+                    await asyncio.sleep(2)  # Wait before retrying
+
     async def _deep_research(
         self,
         query: str,
@@ -286,23 +473,25 @@ class ResearchWorkflow:
         learnings: List[str] = None,
         visited_urls: List[str] = None,
         analyses: List[Dict] = None,
+        max_tokens: Optional[int] = None,
+        max_searches: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> ResearchResult:
-        """Conduct deep research using SearchClient with improved handling and parallelization"""
+        """Conduct deep research as one breadth-first session on a ResearchScheduler.
+
+        Each level plans `breadth` search queries from the query and the learnings found on
+        the way to it, searches them with every active provider, analyzes the pages not yet
+        seen in the session and, while depth remains, plans the next level from the
+        follow-up questions with half the breadth. Searches are limited to `concurrency` in
+        flight per provider and LLM calls to `concurrency` in total for the whole session.
+        Once the token, search or time budget is used up the session returns what it found.
+        """
 
         logger.info(
             f"Starting deep research with query: {query}, depth: {depth}, breadth: {breadth}, concurrency: {concurrency}"
         )
 
-        learnings = learnings or []
-        visited_urls = visited_urls or []
-        analyses = analyses or []
-
-        # Generate search queries using previous learnings
-        search_queries = await self._generate_search_queries(query=query, num_queries=breadth, learnings=learnings)
-
-        # Create semaphore for concurrent requests
-        semaphore = asyncio.Semaphore(concurrency)
-
         # Decide which search clients to use
         active_search_clients = {}
 
@@ -315,257 +504,86 @@ class ResearchWorkflow:
         # If no specific providers were requested or found, use all available clients
         if not active_search_clients:
             active_search_clients = self.search_clients
+        several_providers = len(active_search_clients) > 1
+
+        scheduler = ResearchScheduler(
+            concurrency=concurrency,
+            max_tokens=max_tokens,
+            max_searches=max_searches,
+            max_seconds=max_seconds,
+            on_progress=on_progress,
+        )
+        scheduler.claim_urls(visited_urls or [])
+        all_learnings = dict.fromkeys(learnings or [])
+        all_questions: Dict[str, None] = {}
+        all_analyses = list(analyses or [])
+
+        async def plan(node: _ResearchNode) -> List[_ResearchNode]:
+            search_queries = await self._generate_search_queries(
+                query=node.query, num_queries=node.breadth, learnings=node.path_learnings(), scheduler=scheduler
+            )
+            return [
+                _ResearchNode(q.query, node.breadth, node.depth, q.research_goal, search=True, parent=node)
+                for q in search_queries
+            ]
 
-        # Single provider simplification - if only one provider, just use that
-        if len(active_search_clients) == 1:
-            provider = next(iter(active_search_clients.keys()))
-            search_client = active_search_clients[provider]
-
-            async def process_query(research_query: ResearchQuery) -> Dict:
-                async with semaphore:
-                    try:
-                        # Search using SearchClient with timeouts and retries
-                        for attempt in range(3):
-                            try:
-                                print(f"Searching with {provider} for {research_query.query}")
-                                result = await search_client.search(research_query.query, timeout=20000)
-                                break
-                            except Exception as e:
-                                if attempt == 2:  # Last attempt
-                                    raise
-                                logger.warning(f"Search attempt {attempt + 1} failed: {str(e)}")
-                                await asyncio.sleep(2)  # Wait before retrying
-
-                        # Extract URLs - works for both Pydantic models and dicts
-                        data = getattr(result, "data", None) or (result.get("data") if isinstance(result, dict) else [])
-                        urls = []
-                        for item in data:
-                            url = getattr(item, "url", None) or (item.get("url") if isinstance(item, dict) else None)
-                            if url:
-                                urls.append(url)
-
-                        # Process content to extract learnings
-                        processed_result = await self._process_search_result(
-                            query=research_query.query, search_result=result
-                        )
-
-                        new_breadth = max(1, breadth // 2)
-                        new_depth = depth - 1
-
-                        # If we have depth remaining and follow-up questions, explore deeper
-                        if new_depth > 0 and processed_result["follow_up_questions"]:
-                            next_query = "\n".join(
-                                [
-                                    f"Previous research goal: {research_query.research_goal}",
-                                    "Follow-up questions to explore:",
-                                    "\n".join(f"- {q}" for q in processed_result["follow_up_questions"][:new_breadth]),
-                                ]
-                            )
-
-                            deeper_results = await self._deep_research(
-                                query=next_query,
-                                breadth=new_breadth,
-                                depth=new_depth,
-                                concurrency=concurrency,
-                                multi_provider=multi_provider,
-                                search_providers=search_providers,
-                                learnings=learnings + processed_result["learnings"],
-                                visited_urls=visited_urls + urls,
-                                analyses=analyses
-                                + [{"query": research_query.query, "analysis": processed_result["analysis"]}],
-                            )
-
-                            return {
-                                "learnings": deeper_results["learnings"],
-                                "urls": deeper_results["visited_urls"],
-                                "follow_up_questions": deeper_results["follow_up_questions"],
-                                "analyses": deeper_results["analyses"],
-                            }
-
-                        return {
-                            "learnings": processed_result["learnings"],
-                            "urls": urls,
-                            "follow_up_questions": processed_result["follow_up_questions"],
-                            "analyses": [{"query": research_query.query, "analysis": processed_result["analysis"]}],
-                        }
-
-                    except Exception as e:
-                        logger.error(f"Error processing query {research_query.query}: {str(e)}")
-                        return {"learnings": [], "urls": [], "follow_up_questions": [], "analyses": []}
-
-            # Process all queries concurrently
-            results = await asyncio.gather(*[process_query(q) for q in search_queries])
-
-        else:
-            # Multiple providers case - search each query with each provider
-            async def search_with_provider(research_query: ResearchQuery, provider: str, search_client) -> Dict:
-                # Variables to store results outside the semaphore block
-                search_result = None
-                urls = []
-
-                # Only use semaphore for the search operation
-                async with semaphore:
-                    try:
-                        # Search using this provider's client
-                        for attempt in range(3):
-                            try:
-                                print(f"Searching with {provider} for {research_query.query}")
-                                search_result = await search_client.search(research_query.query, timeout=20000)
-                                print(
-                                    f"Search finished from {provider} for {research_query.query} at time {datetime.now()}"
-                                )
-                                break
-                            except Exception as e:
-                                if attempt == 2:  # Last attempt
-                                    raise
-                                logger.warning(f"Search attempt {attempt + 1} failed: {str(e)}")
-                                await asyncio.sleep(2)  # Wait before retrying
-
-                        # Extract URLs - works for both Pydantic models and dicts
-                        data = getattr(search_result, "data", None) or (
-                            search_result.get("data") if isinstance(search_result, dict) else []
-                        )
-                        urls = []
-                        for item in data:
-                            url = getattr(item, "url", None) or (item.get("url") if isinstance(item, dict) else None)
-                            if url:
-                                urls.append(url)
-                    except Exception as e:
-                        logger.error(f"Error searching with {provider} for {research_query.query}: {str(e)}")
-
-                # Process results outside the semaphore block
-                if search_result:
-                    try:
-                        print(
-                            f"Creating processing task for {provider} for {research_query.query} at time {datetime.now()}"
-                        )
-
-                        # Create a separate task for processing to avoid blocking the event loop
-                        processing_task = asyncio.create_task(
-                            self._process_search_result(
-                                query=f"{research_query.query} [{provider}]", search_result=search_result
-                            )
-                        )
-
-                        # Wait for the processing task to complete
-                        processed_result = await processing_task
-                        print(
-                            f"Processed from {provider} content to extract learnings for {research_query.query} at time {datetime.now()}"
-                        )
-
-                        return {
-                            "learnings": processed_result["learnings"],
-                            "urls": urls,
-                            "follow_up_questions": processed_result["follow_up_questions"],
-                            "analysis": processed_result["analysis"],
-                            "provider": provider,
-                        }
-                    except Exception as e:
-                        logger.error(f"Error processing results for {research_query.query} with {provider}: {str(e)}")
-
-                # Return empty results if there was an error
-                return {
-                    "learnings": [],
-                    "urls": urls,
-                    "follow_up_questions": [],
-                    "analysis": f"Error with {provider}: Unknown error occurred",
-                    "provider": provider,
-                }
+        async def research(node: _ResearchNode) -> List[_ResearchNode]:
+            results = await asyncio.gather(
+                *(
+                    self._search(scheduler, provider, client, node.query)
+                    for provider, client in active_search_clients.items()
+                )
+            )
 
-            async def process_query_with_providers(research_query: ResearchQuery) -> Dict:
-                try:
-                    # Create tasks to search with all providers in parallel
-                    provider_tasks = [
-                        search_with_provider(research_query, provider, client)
-                        for provider, client in active_search_clients.items()
+            # Merge the providers' results and analyze only the pages no earlier search in this session returned
+            items, providers = [], []
+            for provider, result in zip(active_search_clients, results):
+                if result is not None:
+                    items.extend(self._result_items(result))
+                    providers.append(provider)
+            new_urls = set(scheduler.claim_urls(url for url in map(self._item_url, items) if url))
+            new_items = [item for item in items if not self._item_url(item) or self._item_url(item) in new_urls]
+            if not new_items:
+                return []
+
+            result = await self._process_search_result(
+                query=node.query, search_result={"data": new_items}, scheduler=scheduler
+            )
+            node.learnings.extend(result["learnings"])
+            follow_ups = dict.fromkeys(result["follow_up_questions"])
+            analysis = {"query": node.query, "analysis": result["analysis"]}
+            if several_providers:
+                analysis["providers"] = providers
+            all_analyses.append(analysis)
+            all_learnings.update(dict.fromkeys(node.learnings))
+
+            new_breadth = max(1, node.breadth // 2)
+            new_depth = node.depth - 1
+            if new_depth > 0 and follow_ups and not scheduler.exhausted:
+                next_query = "\n".join(
+                    [
+                        f"Previous research goal: {node.research_goal}",
+                        "Follow-up questions to explore:",
+                        "\n".join(f"- {q}" for q in list(follow_ups)[:new_breadth]),
                     ]
+                )
+                return [_ResearchNode(next_query, new_breadth, new_depth, parent=node)]
 
-                    # Run all provider searches in parallel
-                    provider_results = await asyncio.gather(*provider_tasks)
-
-                    # Combine results from all providers for this query
-                    combined_result = {"learnings": [], "urls": [], "follow_up_questions": [], "analyses": []}
-
-                    for result in provider_results:
-                        combined_result["learnings"].extend(result["learnings"])
-                        combined_result["urls"].extend(result["urls"])
-                        combined_result["follow_up_questions"].extend(result["follow_up_questions"])
-                        combined_result["analyses"].append(
-                            {
-                                "query": research_query.query,
-                                "provider": result["provider"],
-                                "analysis": result["analysis"],
-                            }
-                        )
-
-                    # Process follow-up questions if needed
-                    new_breadth = max(1, breadth // 2)
-                    new_depth = depth - 1
-
-                    if new_depth > 0 and combined_result["follow_up_questions"]:
-                        # Get unique follow-up questions
-                        unique_follow_ups = list(dict.fromkeys(combined_result["follow_up_questions"]))
-
-                        next_query = "\n".join(
-                            [
-                                f"Previous research goal: {research_query.research_goal}",
-                                "Follow-up questions to explore:",
-                                "\n".join(f"- {q}" for q in unique_follow_ups[:new_breadth]),
-                            ]
-                        )
-
-                        deeper_results = await self._deep_research(
-                            query=next_query,
-                            breadth=new_breadth,
-                            depth=new_depth,
-                            concurrency=concurrency,
-                            multi_provider=multi_provider,
-                            search_providers=search_providers,
-                            learnings=learnings + combined_result["learnings"],
-                            visited_urls=visited_urls + combined_result["urls"],
-                            analyses=analyses + combined_result["analyses"],
-                        )
-
-                        return {
-                            "learnings": deeper_results["learnings"],
-                            "urls": deeper_results["visited_urls"],
-                            "follow_up_questions": deeper_results["follow_up_questions"],
-                            "analyses": deeper_results["analyses"],
-                        }
-                    else:
-                        return combined_result
-                except Exception as e:
-                    logger.error(f"Error processing query with providers: {str(e)}")
-                    return {"learnings": [], "urls": [], "follow_up_questions": [], "analyses": []}
-
-            # Process all queries concurrently - outer level parallelism
-            results = await asyncio.gather(*[process_query_with_providers(q) for q in search_queries])
-
-        # Combine results from all queries
-        all_learnings = learnings.copy()
-        for result in results:
-            all_learnings.extend(result.get("learnings", []))
-        all_learnings = list(dict.fromkeys(all_learnings))
-
-        all_urls = visited_urls.copy()
-        for result in results:
-            all_urls.extend(result.get("urls", []))
-        all_urls = list(dict.fromkeys(all_urls))
+            all_questions.update(follow_ups)
+            return []
 
-        all_questions = []
-        for result in results:
-            all_questions.extend(result.get("follow_up_questions", []))
-        all_questions = list(dict.fromkeys(all_questions))
+        async def handle(node: _ResearchNode) -> List[_ResearchNode]:
+            return await (research(node) if node.search else plan(node))
 
-        all_analyses = analyses.copy()
-        for result in results:
-            all_analyses.extend(result.get("analyses", []))
+        root = _ResearchNode(query, breadth, depth, learnings=list(learnings or []))
+        await scheduler.run([root], handle)
 
         return {
-            "learnings": all_learnings,
-            "visited_urls": all_urls,
-            "follow_up_questions": all_questions,
+            "learnings": list(all_learnings),
+            "visited_urls": list(scheduler.seen_urls),
+            "follow_up_questions": list(all_questions),
             "analyses": all_analyses,
+            "stats": scheduler.stats(),
         }
 
     async def _generate_report(
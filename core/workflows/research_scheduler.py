@@ -0,0 +1,204 @@
+"""
+Breadth-first work-queue scheduler for one deep research session.
+
+A research session is a tree of work items (plan a level of search queries, run a search
+and analyze it, ...). Instead of recursing per query with a new semaphore at every level,
+the session puts every item on one priority queue ordered by tree level and runs it with a
+fixed pool of workers, so the whole tree is explored breadth first with bounded work in
+flight. On top of the queue the scheduler provides:
+
+- one concurrency limit per provider ("llm", "search:exa", ...) shared by the session;
+- URL deduplication, so a page returned by several searches is analyzed once;
+- a budget of LLM tokens, searches and wall time: once it is used up no new work starts,
+  and at the deadline work in flight is cancelled, so the session ends with what it has;
+- progress events passed to an optional callback.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from ..utils.text_splitter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchBudgetExceeded(Exception):
+    """The research session has used up its token, search or time budget."""
+
+
+def path_learnings(node: Any) -> List[str]:
+    """Learnings of a work item (with `learnings` and `parent`) and the items above it, oldest first."""
+    chain = []
+    while node is not None:
+        chain.append(node.learnings)
+        node = node.parent
+    return [learning for learnings in reversed(chain) for learning in learnings]
+
+
+class ResearchScheduler:
+    def __init__(
+        self,
+        concurrency: int = 3,
+        provider_limits: Optional[Dict[str, int]] = None,
+        max_tokens: Optional[int] = None,
+        max_searches: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        """
+        Args:
+            concurrency: Number of work items processed at once, and the default limit per provider
+            provider_limits: Concurrent requests allowed per provider name, overriding `concurrency`
+            max_tokens: LLM tokens (prompts and responses, counted with tiktoken) the session may use
+            max_searches: Searches the session may run
+            max_seconds: Wall time after which the session stops
+            on_progress: Called with a dict for each progress event
+        """
+        self.concurrency = max(1, concurrency)
+        self.provider_limits = provider_limits or {}
+        self.max_tokens = max_tokens
+        self.max_searches = max_searches
+        self.max_seconds = max_seconds
+        self.on_progress = on_progress
+
+        self.tokens = 0
+        self.searches = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.stop_reason: Optional[str] = None
+        self.seen_urls: Dict[str, None] = {}  # insertion-ordered set
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._started_at = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Providers and budget
+    # ------------------------------------------------------------------
+    def slot(self, provider: str) -> asyncio.Semaphore:
+        """Session-wide concurrency limit for one provider."""
+        slot = self._slots.get(provider)
+        if slot is None:
+            slot = asyncio.Semaphore(max(1, self.provider_limits.get(provider, self.concurrency)))
+            self._slots[provider] = slot
+        return slot
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started_at
+
+    @property
+    def exhausted(self) -> bool:
+        if self.stop_reason is None:
+            if self.max_tokens is not None and self.tokens >= self.max_tokens:
+                self._stop("token budget")
+            elif self.max_searches is not None and self.searches >= self.max_searches:
+                self._stop("search budget")
+            elif self.max_seconds is not None and self.elapsed >= self.max_seconds:
+                self._stop("time budget")
+        return self.stop_reason is not None
+
+    def _stop(self, reason: str) -> None:
+        self.stop_reason = reason
+        logger.info(f"Research stopped early: {reason} used up")
+        self.emit("budget_exhausted", reason=reason)
+
+    def check_budget(self) -> None:
+        """Raise ResearchBudgetExceeded if no new work should start."""
+        if self.exhausted:
+            raise ResearchBudgetExceeded(self.stop_reason)
+
+    def charge_tokens(self, *texts: Optional[str]) -> None:
+        self.tokens += sum(count_tokens(text) for text in texts if text)
+
+    def charge_search(self) -> None:
+        self.searches += 1
+
+    def claim_urls(self, urls: Iterable[str]) -> List[str]:
+        """The URLs not seen before in this session, now marked as seen."""
+        new_urls = []
+        for url in urls:
+            if url not in self.seen_urls:
+                self.seen_urls[url] = None
+                new_urls.append(url)
+        return new_urls
+
+    # ------------------------------------------------------------------
+    # Progress
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "tokens": self.tokens,
+            "searches": self.searches,
+            "urls": len(self.seen_urls),
+            "elapsed": round(self.elapsed, 2),
+            "stop_reason": self.stop_reason,
+        }
+
+    def emit(self, event: str, **data: Any) -> None:
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress({"event": event, **data, **self.stats()})
+        except Exception as e:
+            logger.warning(f"Research progress callback failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Work queue
+    # ------------------------------------------------------------------
+    async def run(self, roots: Iterable[Any], handler: Callable[[Any], Awaitable[Optional[Iterable[Any]]]]) -> None:
+        """Process `roots` and every item the handler returns for them, breadth first.
+
+        `handler(item)` does the work for one item and returns its child items, which are
+        queued one level below it. Returns when the queue is empty, or at the deadline.
+        """
+        self._started_at = time.monotonic()
+        self._queue = asyncio.PriorityQueue()
+        for item in roots:
+            self._queue.put_nowait((0, next(self._sequence), item))
+
+        workers = [asyncio.create_task(self._worker(handler)) for _ in range(self.concurrency)]
+        remaining = None if self.max_seconds is None else max(0.0, self.max_seconds - self.elapsed)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=remaining)
+        except asyncio.TimeoutError:
+            if self.stop_reason is None:
+                self._stop("time budget")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        self.emit("done")
+
+    async def _worker(self, handler: Callable[[Any], Awaitable[Optional[Iterable[Any]]]]) -> None:
+        while True:
+            level, _, item = await self._queue.get()
+            try:
+                if self.exhausted:
+                    self.skipped += 1
+                    continue
+                self.emit("started", level=level)
+                try:
+                    children = await handler(item) or []
+                except ResearchBudgetExceeded:
+                    self.skipped += 1
+                    continue
+                except Exception as e:
+                    logger.error(f"Research work item failed: {e}")
+                    self.failed += 1
+                    self.emit("failed", level=level, error=str(e))
+                    continue
+                for child in children:
+                    self._queue.put_nowait((level + 1, next(self._sequence), child))
+                self.completed += 1
+                self.emit("completed", level=level)
+            finally:
+                self._queue.task_done()
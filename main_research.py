@@ -32,6 +32,8 @@ async def async_prompt(message: str, default: str = "") -> str:
 @coro
 async def main(
     concurrency: int = typer.Option(default=2, help="Number of concurrent tasks, depending on your API rate limits."),
+    max_tokens: int = typer.Option(default=0, help="LLM token budget for the research phase (0 for no limit)."),
+    max_minutes: float = typer.Option(default=0, help="Time budget for the research phase (0 for no limit)."),
 ):
     """Deep Research CLI"""
     console.print(Panel.fit("[bold blue]Deep Research Assistant[/bold blue]\n[dim]An AI-powered research tool[/dim]"))
@@ -76,11 +78,24 @@ async def main(
     ) as progress:
         # Do research
         task = progress.add_task("[yellow]Researching your topic...[/yellow]", total=None)
+
+        def show_progress(event):
+            progress.update(
+                task,
+                description=(
+                    f"[yellow]Researching your topic... {event['searches']} searches, "
+                    f"{event['urls']} pages, {event['tokens']:,} tokens[/yellow]"
+                ),
+            )
+
         research_results = await deep_research(
             query=combined_query,
             breadth=breadth,
             depth=depth,
             concurrency=concurrency,
+            max_tokens=max_tokens or None,
+            max_seconds=max_minutes * 60 or None,
+            on_progress=show_progress,
         )
         progress.remove_task(task)
 
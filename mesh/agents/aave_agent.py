@@ -1,16 +1,71 @@
+import asyncio
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
-from eth_defi.aave_v3.reserve import AaveContractsNotConfigured, fetch_reserve_data, get_helper_contracts
+from eth_abi import decode as abi_decode
+from eth_defi.aave_v3.reserve import AaveContractsNotConfigured, get_helper_contracts
+from eth_utils.abi import collapse_if_tuple
+from hexbytes import HexBytes
 from web3 import Web3
+from web3.providers.base import BaseProvider
 
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.evm_rpc_pool import get_evm_rpc_pool
 
 logger = logging.getLogger(__name__)
 
+# Roughly one block; a reserve read at "latest" is reused for this long.
+BLOCK_TIME_SECONDS = {1: 12.0, 137: 2.0, 43114: 2.0, 42161: 0.25}
+RESERVE_CACHE_MAX_ENTRIES = 256
+
+
+def _abi_value(component: Dict[str, Any], value: Any) -> Any:
+    """A decoded ABI value as web3's call() returns it: structs as dicts, addresses checksummed."""
+    abi_type = component["type"]
+    if abi_type == "tuple":
+        return _abi_struct(component["components"], value)
+    if abi_type.startswith("tuple["):
+        return [_abi_struct(component["components"], item) for item in value]
+    if abi_type == "address":
+        return Web3.to_checksum_address(value)
+    if abi_type.startswith("address["):
+        return [Web3.to_checksum_address(item) for item in value]
+    return value
+
+
+def _abi_struct(components: List[Dict[str, Any]], values: Tuple) -> Dict[str, Any]:
+    return {component["name"]: _abi_value(component, value) for component, value in zip(components, values)}
+
+
+class _ChainIdProvider(BaseProvider):
+    """Offline provider that only answers eth_chainId.
+
+    eth_defi builds its contract objects from a Web3 instance; this lets it do so
+    without a network round trip. Actual reads go through the shared EvmRpcPool.
+    """
+
+    def __init__(self, chain_id: int):
+        super().__init__()
+        self.chain_id = chain_id
+
+    def make_request(self, method, params):
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 0, "result": hex(self.chain_id)}
+        raise RuntimeError(f"Offline provider cannot serve {method}")
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
 
 class AaveAgent(MeshAgent):
+    # Shared across instances: chain_id -> eth_defi HelperContracts
+    _helper_contracts: Dict[int, Any] = {}
+    # (chain_id, block) -> (expires_at or None for immutable blocks, (block_number, reserves, base_currency))
+    _reserve_cache: "OrderedDict[Tuple[int, Any], Tuple[Optional[float], Tuple]]" = OrderedDict()
+    _reserve_inflight: Dict[Tuple[Any, int, Any], asyncio.Future] = {}
+
     def __init__(self):
         super().__init__()
         self.metadata.update(
@@ -74,79 +129,110 @@ class AaveAgent(MeshAgent):
     # ------------------------------------------------------------------------
     #                      AAVE API-SPECIFIC METHODS
     # ------------------------------------------------------------------------
-    def _initialize_web3(self, chain_id: int = 137) -> Web3:
-        """Initialize Web3 connection for a supported chain."""
-        try:
-            chain_id = int(chain_id)
-        except ValueError:
-            raise ValueError(f"Invalid chain ID format: {chain_id}")
-
-        rpc_urls = {
-            1: [
-                "https://rpc.ankr.com/eth",
-                "https://eth.llamarpc.com",
-                "https://ethereum.publicnode.com",
-            ],
-            137: [
-                "https://polygon-rpc.com",
-                "https://rpc.ankr.com/polygon",
-                "https://polygon.llamarpc.com",
-                "https://polygon-bor-rpc.publicnode.com",
-            ],
-            43114: [
-                "https://api.avax.network/ext/bc/C/rpc",
-                "https://rpc.ankr.com/avalanche",
-                "https://avalanche.public-rpc.com",
-            ],
-            42161: [
-                "https://arb1.arbitrum.io/rpc",
-                "https://rpc.ankr.com/arbitrum",
-                "https://arbitrum.llamarpc.com",
-            ],
+    def _initialize_aave_contracts(self, chain_id: int):
+        """Aave helper contracts for a chain, built once without touching the network."""
+        contracts = self._helper_contracts.get(chain_id)
+        if contracts is None:
+            try:
+                contracts = get_helper_contracts(Web3(_ChainIdProvider(chain_id)))
+            except AaveContractsNotConfigured as e:
+                raise RuntimeError(f"Aave v3 not supported on chain ID {chain_id}") from e
+            self._helper_contracts[chain_id] = contracts
+        return contracts
+
+    def _block_param(self, block_id: Any) -> Any:
+        if block_id is None:
+            return "latest"
+        if isinstance(block_id, int):
+            return hex(block_id)
+        if isinstance(block_id, str) and block_id.startswith("0x") and len(block_id) == 66:
+            return {"blockHash": block_id}
+        return block_id
+
+    async def _resolve_block_number(self, chain_id: int, block_tag: str) -> int:
+        """Number of the block a tag ("latest", "finalized", "safe", "earliest", ...) refers to now."""
+        block = await get_evm_rpc_pool().call(chain_id, "eth_getBlockByNumber", [block_tag, False])
+        if not block or block.get("number") is None:
+            raise ValueError(f"Block '{block_tag}' not found on chain {chain_id}")
+        return int(block["number"], 16)
+
+    async def _fetch_reserve_data(self, chain_id: int, block_id: Any) -> Tuple[int, List[Dict], Dict]:
+        """Read getReservesData from the UiPoolDataProvider, plus the number of the block it was read at.
+
+        Tags are resolved to a block number first and the call is made at that number, so the
+        returned number is always the block the data comes from. A block hash is read in one
+        batch with its header; "pending" has no stable number and is read at the tag itself.
+        """
+        contracts = self._initialize_aave_contracts(chain_id)
+        provider_address = contracts.pool_addresses_provider.address
+        func = contracts.ui_pool_data_provider.functions.getReservesData(provider_address)
+        call = {
+            "to": contracts.ui_pool_data_provider.address,
+            "data": contracts.ui_pool_data_provider.encodeABI(fn_name="getReservesData", args=[provider_address]),
         }
 
-        urls = rpc_urls.get(chain_id)
-        if not urls:
-            raise ValueError(f"Unsupported chain ID: {chain_id}")
-
-        last_error = None
-        for rpc_url in urls:
-            for attempt in range(3):
-                try:
-                    w3 = Web3(
-                        Web3.HTTPProvider(
-                            rpc_url,
-                            request_kwargs={
-                                "timeout": 30,
-                                "headers": {
-                                    "Content-Type": "application/json",
-                                    "User-Agent": "AaveReserveAgent/1.0.0",
-                                },
-                            },
-                        )
-                    )
-                    if w3.is_connected():
-                        logger.info(f"Connected to chain {chain_id} via {rpc_url}")
-                        return w3
-                except Exception as e:
-                    last_error = e
-                    logger.warning(f"Attempt {attempt + 1} failed for {rpc_url}: {e}")
-
-                if attempt < 2:
-                    time.sleep(1.5 ** (attempt + 1))
-
-            logger.warning(f"All retries failed for {rpc_url}, trying next endpoint...")
-
-        raise ConnectionError(
-            f"Web3 failed to connect for chain ID {chain_id} after trying {len(urls)} endpoints. Last error: {last_error}"
-        )
+        block_param = self._block_param(block_id)
+        if isinstance(block_param, dict):
+            block, raw_result = await get_evm_rpc_pool().batch(
+                chain_id, [("eth_getBlockByHash", [block_param["blockHash"], False]), ("eth_call", [call, block_param])]
+            )
+            if not block:
+                raise ValueError(f"Block {block_param['blockHash']} not found on chain {chain_id}")
+            block_number = int(block["number"], 16)
+        elif block_param == "pending":
+            block, raw_result = await get_evm_rpc_pool().batch(
+                chain_id, [("eth_getBlockByNumber", ["pending", False]), ("eth_call", [call, "pending"])]
+            )
+            if not block or block.get("number") is None:
+                raise ValueError(f"Pending block not available on chain {chain_id}")
+            block_number = int(block["number"], 16)
+        else:
+            if isinstance(block_id, int):
+                block_number = block_id
+            else:
+                block_number = await self._resolve_block_number(chain_id, block_param)
+            raw_result = await get_evm_rpc_pool().call(chain_id, "eth_call", [call, hex(block_number)])
 
-    def _initialize_aave_contracts(self, web3: Web3):
-        """Initialize Aave contracts for a given Web3 instance."""
+        outputs = func.abi["outputs"]
+        decoded = abi_decode([collapse_if_tuple(output) for output in outputs], HexBytes(raw_result))
+        # Same named structs as eth_defi's fetch_reserve_data
+        raw_reserves, base_currency = (_abi_value(output, value) for output, value in zip(outputs, decoded))
+        return block_number, raw_reserves, base_currency
+
+    async def _cached_reserve_data(self, chain_id: int, block_id: Any) -> Tuple[int, List[Dict], Dict]:
+        """Reserve data cached per block; concurrent reads of the same block share one RPC batch."""
+        cache_key = (chain_id, block_id if block_id is not None else "latest")
+        cached = self._reserve_cache.get(cache_key)
+        if cached is not None and (cached[0] is None or cached[0] > time.monotonic()):
+            self._reserve_cache.move_to_end(cache_key)
+            return cached[1]
+
+        inflight_key = (asyncio.get_running_loop(), *cache_key)
+        inflight = self._reserve_inflight.get(inflight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._fetch_reserve_data(chain_id, block_id))
+        self._reserve_inflight[inflight_key] = task
         try:
-            return get_helper_contracts(web3)
-        except AaveContractsNotConfigured as e:
-            raise RuntimeError(f"Aave v3 not supported on chain ID {web3.eth.chain_id}") from e
+            result = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._reserve_inflight.pop(inflight_key, None)
+            else:
+                task.add_done_callback(lambda _: self._reserve_inflight.pop(inflight_key, None))
+
+        # Numbered and hashed blocks never change; tags like "latest" only hold for about a block.
+        block_param = self._block_param(block_id)
+        immutable = isinstance(block_id, int) or isinstance(block_param, dict)
+        expires_at = None if immutable else time.monotonic() + BLOCK_TIME_SECONDS.get(chain_id, 2.0)
+        self._reserve_cache[cache_key] = (expires_at, result)
+        if not isinstance(block_id, int) and block_param != "pending":
+            # The read was made at (or pinned to) this block number, so it also answers queries for it.
+            self._reserve_cache[(chain_id, result[0])] = (None, result)
+        while len(self._reserve_cache) > RESERVE_CACHE_MAX_ENTRIES:
+            self._reserve_cache.popitem(last=False)
+        return result
 
     def _process_reserve(self, reserve: Dict) -> Dict:
         result = {k: str(v) if isinstance(v, int) and abs(v) > 2**53 - 1 else v for k, v in reserve.items()}
@@ -164,16 +250,14 @@ class AaveAgent(MeshAgent):
     ) -> Dict:
         """Fetch and process Aave reserve data."""
         try:
+            try:
+                chain_id = int(chain_id)
+            except ValueError:
+                raise ValueError(f"Invalid chain ID format: {chain_id}")
             block_id = int(block_identifier) if block_identifier and block_identifier.isdigit() else block_identifier
-            web3 = self._initialize_web3(chain_id)
-            if chain_id == 1:
-                web3.eth.default_block_identifier = "latest"
-                logger.info("Using latest block for Ethereum mainnet")
-
-            helper_contracts = self._initialize_aave_contracts(web3)
 
             try:
-                raw_reserves, base_currency = fetch_reserve_data(helper_contracts, block_identifier=block_id)
+                block_number, raw_reserves, base_currency = await self._cached_reserve_data(chain_id, block_id)
             except Exception as e:
                 logger.error(f"Contract fetch error: {e}")
                 if chain_id == 1:
@@ -200,6 +284,7 @@ class AaveAgent(MeshAgent):
                     }
                 },
                 "chain_id": chain_id,
+                "block_number": block_number,
                 "total_reserves": len(processed_reserves),
             }
 
@@ -230,6 +315,7 @@ class AaveAgent(MeshAgent):
         return {
             "reserve_data": {
                 "chain_id": chain_id,
+                "block_number": result["block_number"],
                 "reserves": result["reserves"],
                 "base_currency": result["base_currency"],
                 "total_reserves": result["total_reserves"],
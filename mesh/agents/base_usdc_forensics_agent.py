@@ -1,23 +1,67 @@
+import asyncio
 import base64
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import pyarrow as pa
 from dotenv import load_dotenv
 from google.cloud import bigquery
 from google.oauth2 import service_account
 
 from decorators import monitor_execution, with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.data_dir import data_path
+from mesh.utils.query_result_cache import QueryResultCache
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
 USDC_BASE = "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913"
+BIGQUERY_MAX_CONCURRENT_JOBS = int(os.getenv("BIGQUERY_MAX_CONCURRENT_JOBS", "4"))
+BIGQUERY_CACHE_TTL_SECONDS = int(os.getenv("BIGQUERY_CACHE_TTL_SECONDS", "3600"))
+# Query result cache file; defaults to bigquery_cache.db in the runtime data directory (HEURIST_DATA_DIR)
+BIGQUERY_CACHE_DB_PATH = os.getenv("BIGQUERY_CACHE_DB_PATH")
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+def _arrow_to_records(table: pa.Table) -> List[Dict[str, Any]]:
+    """Convert a result table to JSON-safe row dicts column by column, without pandas."""
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        values = column.to_pylist()
+        if pa.types.is_temporal(field.type):
+            values = [None if value is None else str(value) for value in values]
+        elif pa.types.is_decimal(field.type):
+            values = [None if value is None else float(value) for value in values]
+        elif pa.types.is_nested(field.type):
+            values = [_json_safe(value) for value in values]
+        columns.append(values)
+    return [dict(zip(table.column_names, row)) for row in zip(*columns)]
 
 
 class BaseUSDCForensicsAgent(MeshAgent):
+    # BigQuery jobs block while they run; keep them off the event loop and cap how many run at once.
+    _query_executor = ThreadPoolExecutor(max_workers=BIGQUERY_MAX_CONCURRENT_JOBS, thread_name_prefix="bigquery")
+    _result_cache: Optional[QueryResultCache] = None
+    _inflight_queries: Dict[tuple, asyncio.Future] = {}
+
     def __init__(self):
         super().__init__()
         self.project_id = os.getenv("BIGQUERY_PROJECT_ID")
@@ -36,6 +80,10 @@ class BaseUSDCForensicsAgent(MeshAgent):
 
         self.table = f"{self.project_id}.base_blockchain___community_public_dataset.token_transfers"
         self.client = bigquery.Client(project=self.project_id, credentials=credentials)
+        if BaseUSDCForensicsAgent._result_cache is None:
+            BaseUSDCForensicsAgent._result_cache = QueryResultCache(
+                Path(BIGQUERY_CACHE_DB_PATH or data_path("bigquery_cache.db"))
+            )
 
         self.metadata.update(
             {
@@ -65,13 +113,14 @@ class BaseUSDCForensicsAgent(MeshAgent):
     def get_system_prompt(self) -> str:
         return """You are a blockchain forensics analyst specializing in USDC transaction analysis on the Base network.
 
-            You have access to six powerful forensic tools:
+            You have access to seven powerful forensic tools:
             1. usdc_basic_profile - Get a wallet's USDC activity summary (first/last seen, total in/out, net flow)
             2. usdc_top_funders - Find where USDC comes from (top source wallets)
             3. usdc_top_sinks - Find where USDC goes (top destination wallets)
             4. usdc_net_counterparties - Per-counterparty net flow analysis (who is this wallet paying vs receiving from)
             5. usdc_daily_activity - Daily transaction patterns (volume spikes, active periods)
             6. usdc_hourly_pair_activity - Hourly flows between two specific addresses
+            7. usdc_address_overview - Profile, top funders, top sinks and daily activity in one call; prefer it when you need several of these for the same address
 
             When analyzing results:
             - Highlight unusual patterns like concentrated funding sources or circular flows
@@ -184,6 +233,28 @@ class BaseUSDCForensicsAgent(MeshAgent):
                     },
                 },
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": "usdc_address_overview",
+                    "description": "Get a wallet's USDC profile, top funders, top sinks and daily activity on Base in one call. Prefer this over calling usdc_basic_profile, usdc_top_funders, usdc_top_sinks and usdc_daily_activity separately when investigating an address, as it reads the transfer history once.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "address": {
+                                "type": "string",
+                                "description": "Wallet address starting with 0x",
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Maximum number of funders and sinks to return (default 20)",
+                                "default": 20,
+                            },
+                        },
+                        "required": ["address"],
+                    },
+                },
+            },
             {
                 "type": "function",
                 "function": {
@@ -207,16 +278,54 @@ class BaseUSDCForensicsAgent(MeshAgent):
             },
         ]
 
-    def _run_query(self, query: str, params: List[bigquery.ScalarQueryParameter]) -> List[Dict[str, Any]]:
+    def _execute_query(self, query: str, params: List[bigquery.ScalarQueryParameter]) -> List[Dict[str, Any]]:
+        """Submit a job and wait for its rows; runs in _query_executor."""
         job_config = bigquery.QueryJobConfig(query_parameters=params)
         job = self.client.query(query, job_config=job_config)
-        df = job.to_dataframe()
-        for col in df.columns:
-            if df[col].dtype == "datetime64[ns, UTC]" or "timestamp" in col.lower() or "time" in col.lower():
-                df[col] = df[col].astype(str)
-            if "date" in col.lower():
-                df[col] = df[col].astype(str)
-        return df.to_dict(orient="records")
+        return _arrow_to_records(job.to_arrow())
+
+    async def _cache_get(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return await asyncio.to_thread(self._result_cache.get, cache_key)
+        except Exception as e:
+            logger.warning(f"BigQuery result cache read failed: {e}")
+            return None
+
+    async def _cache_set(self, cache_key: str, records: List[Dict[str, Any]]) -> None:
+        try:
+            await asyncio.to_thread(self._result_cache.set, cache_key, records, BIGQUERY_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"BigQuery result cache write failed: {e}")
+
+    async def _run_query(self, query: str, params: List[bigquery.ScalarQueryParameter]) -> List[Dict[str, Any]]:
+        """Run a query off the event loop, serving repeats from the persistent result cache.
+
+        Identical queries that arrive while one is running wait for that job instead of
+        starting another.
+        """
+        cache_key = QueryResultCache.make_key(query, [[param.name, param.type_, param.value] for param in params])
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, cache_key)
+        inflight = self._inflight_queries.get(inflight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        job = loop.run_in_executor(self._query_executor, self._execute_query, query, params)
+        self._inflight_queries[inflight_key] = job
+        try:
+            records = await asyncio.shield(job)
+        finally:
+            if job.done():
+                self._inflight_queries.pop(inflight_key, None)
+            else:
+                job.add_done_callback(lambda _: self._inflight_queries.pop(inflight_key, None))
+
+        await self._cache_set(cache_key, records)
+        return records
 
     @with_cache(ttl_seconds=300)
     @with_retry(max_retries=3)
@@ -277,7 +386,7 @@ class BaseUSDCForensicsAgent(MeshAgent):
             bigquery.ScalarQueryParameter("addr", "STRING", addr),
             bigquery.ScalarQueryParameter("usdc", "STRING", USDC_BASE),
         ]
-        result = self._run_query(query, params)
+        result = await self._run_query(query, params)
         return {"status": "success", "data": result[0] if result else {}}
 
     @with_cache(ttl_seconds=300)
@@ -314,7 +423,7 @@ class BaseUSDCForensicsAgent(MeshAgent):
             bigquery.ScalarQueryParameter("addr", "STRING", addr),
             bigquery.ScalarQueryParameter("usdc", "STRING", USDC_BASE),
         ]
-        result = self._run_query(query, params)
+        result = await self._run_query(query, params)
         return {"status": "success", "data": result}
 
     @with_cache(ttl_seconds=300)
@@ -351,7 +460,7 @@ class BaseUSDCForensicsAgent(MeshAgent):
             bigquery.ScalarQueryParameter("addr", "STRING", addr),
             bigquery.ScalarQueryParameter("usdc", "STRING", USDC_BASE),
         ]
-        result = self._run_query(query, params)
+        result = await self._run_query(query, params)
         return {"status": "success", "data": result}
 
     @with_cache(ttl_seconds=300)
@@ -404,7 +513,7 @@ class BaseUSDCForensicsAgent(MeshAgent):
             bigquery.ScalarQueryParameter("addr", "STRING", addr),
             bigquery.ScalarQueryParameter("usdc", "STRING", USDC_BASE),
         ]
-        result = self._run_query(query, params)
+        result = await self._run_query(query, params)
         return {"status": "success", "data": result}
 
     @with_cache(ttl_seconds=300)
@@ -442,7 +551,7 @@ class BaseUSDCForensicsAgent(MeshAgent):
             bigquery.ScalarQueryParameter("addr", "STRING", addr),
             bigquery.ScalarQueryParameter("usdc", "STRING", USDC_BASE),
         ]
-        result = self._run_query(query, params)
+        result = await self._run_query(query, params)
         return {"status": "success", "data": result}
 
     @with_cache(ttl_seconds=300)
@@ -485,9 +594,96 @@ class BaseUSDCForensicsAgent(MeshAgent):
             bigquery.ScalarQueryParameter("addr_b", "STRING", addr_b),
             bigquery.ScalarQueryParameter("usdc", "STRING", USDC_BASE),
         ]
-        result = self._run_query(query, params)
+        result = await self._run_query(query, params)
         return {"status": "success", "data": result}
 
+    @with_cache(ttl_seconds=300)
+    @with_retry(max_retries=3)
+    async def usdc_address_overview(self, address: str, limit: int = 20) -> Dict[str, Any]:
+        """Profile, funders, sinks and daily activity from a single scan of the transfer table.
+
+        BigQuery may re-evaluate a CTE once per reference, so the address's transfers are
+        materialized into a temp table first and every section reads from that.
+        """
+        addr = address.lower()
+        limit = int(limit)
+        query = f"""
+        CREATE TEMP TABLE addr_txs AS
+        SELECT
+          block_timestamp,
+          from_address,
+          to_address,
+          SAFE_CAST(quantity AS NUMERIC) AS quantity_raw
+        FROM `{self.table}` t
+        WHERE t.event_type = 'ERC-20'
+          AND t.address = @usdc
+          AND (t.from_address = @addr OR t.to_address = @addr);
+
+        SELECT
+          (
+            SELECT AS STRUCT
+              @addr                 AS address,
+              MIN(block_timestamp)  AS first_seen,
+              MAX(block_timestamp)  AS last_seen,
+              COUNT(*)              AS total_txs,
+              COUNTIF(to_address   = @addr) AS in_tx_count,
+              COUNTIF(from_address = @addr) AS out_tx_count,
+              SUM(IF(to_address   = @addr, quantity_raw, 0)) / 1e6 AS total_in_usdc,
+              SUM(IF(from_address = @addr, quantity_raw, 0)) / 1e6 AS total_out_usdc,
+              SUM(
+                CASE
+                  WHEN to_address = @addr AND from_address = @addr THEN 0
+                  WHEN to_address   = @addr THEN quantity_raw
+                  WHEN from_address = @addr THEN -quantity_raw
+                  ELSE 0
+                END
+              ) / 1e6 AS net_flow_usdc
+            FROM addr_txs
+          ) AS profile,
+          ARRAY(
+            SELECT AS STRUCT
+              from_address AS funder,
+              COUNT(*) AS tx_count,
+              SUM(quantity_raw) / 1e6 AS total_received_usdc,
+              MIN(block_timestamp) AS first_time,
+              MAX(block_timestamp) AS last_time
+            FROM addr_txs
+            WHERE to_address = @addr
+            GROUP BY funder
+            ORDER BY total_received_usdc DESC
+            LIMIT {limit}
+          ) AS top_funders,
+          ARRAY(
+            SELECT AS STRUCT
+              to_address AS counterparty,
+              COUNT(*) AS tx_count,
+              SUM(quantity_raw) / 1e6 AS total_sent_usdc,
+              MIN(block_timestamp) AS first_time,
+              MAX(block_timestamp) AS last_time
+            FROM addr_txs
+            WHERE from_address = @addr
+            GROUP BY counterparty
+            ORDER BY total_sent_usdc DESC
+            LIMIT {limit}
+          ) AS top_sinks,
+          ARRAY(
+            SELECT AS STRUCT
+              DATE(block_timestamp) AS tx_date,
+              COUNT(*) AS tx_count,
+              SUM(IF(to_address   = @addr, quantity_raw, 0)) / 1e6 AS in_usdc,
+              SUM(IF(from_address = @addr, quantity_raw, 0)) / 1e6 AS out_usdc
+            FROM addr_txs
+            GROUP BY tx_date
+            ORDER BY tx_date
+          ) AS daily_activity;
+        """
+        params = [
+            bigquery.ScalarQueryParameter("addr", "STRING", addr),
+            bigquery.ScalarQueryParameter("usdc", "STRING", USDC_BASE),
+        ]
+        result = await self._run_query(query, params)
+        return {"status": "success", "data": result[0] if result else {}}
+
     async def _handle_tool_logic(
         self, tool_name: str, function_args: dict, session_context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -526,6 +722,13 @@ class BaseUSDCForensicsAgent(MeshAgent):
                 return {"status": "error", "error": "Missing 'address' parameter"}
             return await self.usdc_daily_activity(address)
 
+        elif tool_name == "usdc_address_overview":
+            address = function_args.get("address")
+            limit = function_args.get("limit", 20)
+            if not address:
+                return {"status": "error", "error": "Missing 'address' parameter"}
+            return await self.usdc_address_overview(address, limit)
+
         elif tool_name == "usdc_hourly_pair_activity":
             address_a = function_args.get("address_a")
             address_b = function_args.get("address_b")
@@ -1,13 +1,14 @@
+import asyncio
 import datetime
 import logging
 import os
 from typing import Any, Dict, List, Optional
 
-import requests
 from dotenv import load_dotenv
 
 from decorators import monitor_execution, with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.bitquery_client import get_bitquery_client
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -37,9 +38,6 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
         if not self.api_key:
             raise ValueError("BITQUERY_API_KEY environment variable is required")
 
-        self.headers = {"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"}
-        self.bitquery_url = "https://streaming.bitquery.io/eap"
-
         self.metadata.update(
             {
                 "name": "Solana Token Info Agent",
@@ -196,7 +194,7 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
 
     async def _execute_query(self, query: str, variables: Dict = None) -> Dict:
         """
-        Execute a GraphQL query against the Bitquery API with improved error handling.
+        Execute a GraphQL query against the Bitquery API through the shared Bitquery client.
 
         Args:
             query (str): GraphQL query to execute
@@ -205,29 +203,10 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
         Returns:
             Dict: Query results
         """
-        payload = {"query": query}
-        if variables:
-            payload["variables"] = variables
-
-        try:
-            result = await self._api_request(
-                url=self.bitquery_url, method="POST", headers=self.headers, json_data=payload
-            )
-
-            if "error" in result:
-                logger.error(f"API request error: {result['error']}")
-                return result
-
-            if "errors" in result:
-                error_messages = [error.get("message", "Unknown error") for error in result["errors"]]
-                logger.error(f"GraphQL errors: {error_messages}")
-                return {"error": f"GraphQL errors: {', '.join(error_messages)}"}
-
-            return result
-
-        except Exception as e:
-            logger.error(f"Error in _execute_query: {str(e)}")
-            return {"error": f"Query execution failed: {str(e)}"}
+        result = await get_bitquery_client().execute(query, variables, self.api_key)
+        if "error" in result:
+            logger.error(f"Bitquery query error: {result['error']}")
+        return result
 
     def _safe_float_conversion(self, value, default=0.0) -> float:
         """Safely convert a value to float with proper error handling."""
@@ -282,7 +261,11 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
 
             variables = {"time_1h_ago": time_1h_ago, "token": token_address, "quote_token": quote_token_address}
 
-            result = await self._execute_query(query, variables)
+            # The price-movement query only depends on the token, so it goes out alongside the
+            # metrics query and the shared client merges both into one request.
+            result, trading_data = await asyncio.gather(
+                self._execute_query(query, variables), self.fetch_and_organize_dex_trade_data(token_address)
+            )
 
             if "error" in result:
                 return result
@@ -311,7 +294,6 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
             # Get trading data for price movements
             if "data" in result and "Solana" in result["data"]:
                 try:
-                    trading_data = self.fetch_and_organize_dex_trade_data(token_address)
                     if trading_data:
                         latest_data = trading_data[-1]
                         first_data = trading_data[0]
@@ -364,7 +346,7 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
         limit = self._validate_limit(limit, default=self.DEFAULT_LIMIT)
 
         try:
-            trending_tokens = self.get_trending_tokens(limit)
+            trending_tokens = await self.get_trending_tokens(limit)
             return {"trending_tokens": trending_tokens, "total_count": len(trending_tokens), "query_limit": limit}
         except Exception as e:
             logger.error(f"Error in get_top_trending_tokens: {str(e)}")
@@ -747,7 +729,7 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
             logger.error(f"Error in _handle_tool_logic for {tool_name}: {str(e)}")
             return {"error": f"Tool execution failed: {str(e)}"}
 
-    def fetch_and_organize_dex_trade_data(self, base_address: str) -> List[Dict]:
+    async def fetch_and_organize_dex_trade_data(self, base_address: str) -> List[Dict]:
         """
         Fetches DEX trade data from Bitquery for the given base token address,
         setting the time_ago parameter to one hour before the current UTC time,
@@ -780,17 +762,10 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
                 "interval": 5,
             }
 
-            # Send the POST request.
-            response = requests.post(
-                self.bitquery_url, json={"query": query, "variables": variables}, headers=self.headers, timeout=30
-            )
-
-            if response.status_code != 200:
-                logger.error(f"Query failed with status code {response.status_code}: {response.text}")
+            raw_data = await self._execute_query(query, variables)
+            if "error" in raw_data:
                 return []
 
-            raw_data = response.json()
-
             try:
                 buckets = raw_data["data"]["Solana"]["DEXTradeByTokens"]
             except (KeyError, TypeError):
@@ -824,7 +799,7 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
             logger.error(f"Error in fetch_and_organize_dex_trade_data: {str(e)}")
             return []
 
-    def get_trending_tokens(self, limit: int = 10):
+    async def get_trending_tokens(self, limit: int = 10):
         """
         Fetches trade summary data from Bitquery using the provided GraphQL query,
         and organizes the returned data into a list of dictionaries for the latest 1-hour data.
@@ -845,14 +820,9 @@ class BitquerySolanaTokenInfoAgent(MeshAgent):
             # Define the GraphQL query with the dynamic time filter.
             query = f'query MyQuery {{ Solana {{ DEXTradeByTokens( where: {{ Transaction: {{Result: {{Success: true}}}}, Trade: {{Side: {{Currency: {{MintAddress: {{is: "{self.SOL_ADDRESS}"}}}}}}}}, Block: {{Time: {{since: "{time_since}"}}}} }} orderBy: {{descendingByField: "total_trades"}} limit: {{count: {limit}}} ) {{ Trade {{ Currency {{ Name MintAddress Symbol }} start: PriceInUSD(minimum: Block_Time) min5: PriceInUSD( minimum: Block_Time, if: {{Block: {{Time: {{after: "2024-08-15T05:14:00Z"}}}}}} ) end: PriceInUSD(maximum: Block_Time) Dex {{ ProtocolName ProtocolFamily ProgramAddress }} Market {{ MarketAddress }} Side {{ Currency {{ Symbol Name MintAddress }} }} }} makers: count(distinct:Transaction_Signer) total_trades: count total_traded_volume: sum(of: Trade_Side_AmountInUSD) total_buy_volume: sum( of: Trade_Side_AmountInUSD, if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}}} ) total_sell_volume: sum( of: Trade_Side_AmountInUSD, if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}}} ) total_buys: count(if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}}} ) total_sells: count(if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}}} ) }} }} }}'
 
-            # Execute the HTTP POST request.
-            response = requests.post(self.bitquery_url, json={"query": query}, headers=self.headers, timeout=30)
-
-            if response.status_code != 200:
-                logger.error(f"Query failed with status code {response.status_code}: {response.text}")
-                raise Exception(f"Query failed with status code {response.status_code}: {response.text}")
-
-            raw_data = response.json()
+            raw_data = await self._execute_query(query)
+            if "error" in raw_data:
+                raise Exception(raw_data["error"])
 
             try:
                 trade_summaries = raw_data["data"]["Solana"]["DEXTradeByTokens"]
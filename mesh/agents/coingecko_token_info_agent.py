@@ -1,33 +1,17 @@
 import asyncio
-import json
 import logging
 import os
 from datetime import datetime, timedelta, timezone
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from decorators import monitor_execution, with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
 from mesh.utils.r2_image_uploader import R2ImageUploader
+from mesh.utils.token_identity_index import get_token_identity_index
 
 logger = logging.getLogger(__name__)
 
 
-def load_coingecko_id_map() -> Dict[str, str]:
-    """Load CoinGecko ID mapping from JSON file."""
-    map_file = Path(__file__).parent.parent / "data" / "coingecko_id_map.json"
-
-    if not map_file.exists():
-        logger.warning(f"CoinGecko ID map not found at {map_file}, using empty map")
-        return {}
-
-    with open(map_file, "r") as f:
-        return json.load(f)
-
-
-COINGECKO_ID_MAP = load_coingecko_id_map()
-
-
 class CoinGeckoTokenInfoAgent(MeshAgent):
     def __init__(self):
         super().__init__()
@@ -497,6 +481,8 @@ Format your response in clean text. Be objective and informative."""
         cex_data = self.extract_cex_data(tickers)
         if cex_data:
             result["cex_data"] = cex_data
+        if data.get("approximate_match"):
+            result["approximate_match"] = data["approximate_match"]
 
         return result
 
@@ -529,9 +515,24 @@ Format your response in clean text. Be objective and informative."""
     def _map_coingecko_id(query: str) -> str | None:
         if not query:
             return None
-        return COINGECKO_ID_MAP.get(query) or COINGECKO_ID_MAP.get(query.upper()) or COINGECKO_ID_MAP.get(
-            query.title()
-        )
+        return get_token_identity_index().resolve_coingecko_id(query)
+
+    async def _get_approximate_token_info(self, query: str, tried: set) -> dict:
+        """Token info for the closest indexed name, used only once exact lookups and /search found nothing"""
+        approximate_id = get_token_identity_index().resolve_coingecko_id(query, fuzzy=True)
+        if not approximate_id or approximate_id in tried:
+            return {"error": "Failed to fetch token info"}
+
+        url = f"{self.pro_api_url}/coins/{approximate_id}"
+        response = await super()._api_request(url=url, headers=self.pro_headers)
+        if "error" in response:
+            return {"error": "Failed to fetch token info"}
+        image_urls = response.get("image", {})
+        if image_urls:
+            await self.r2_uploader.upload_token_images(approximate_id, image_urls)
+        result = self.preprocess_api_response(response)
+        result["approximate_match"] = {"query": query, "coingecko_id": approximate_id}
+        return result
 
     # ------------------------------------------------------------------------
     #                      COINGECKO API-SPECIFIC METHODS
@@ -592,7 +593,7 @@ Format your response in clean text. Be objective and informative."""
                     coingecko_id = await self._search_token(query)
                     searched_before_fetch = bool(coingecko_id)
                     if not coingecko_id:
-                        return {"error": "Failed to fetch token info"}
+                        return await self._get_approximate_token_info(query, tried=set())
 
             # Try coins API with resolved coingecko_id
             url = f"{self.pro_api_url}/coins/{coingecko_id}"
@@ -616,6 +617,8 @@ Format your response in clean text. Be objective and informative."""
                     if image_urls:
                         await self.r2_uploader.upload_token_images(searched_id, image_urls)
                     return self.preprocess_api_response(response)
+            elif not searched_id:
+                return await self._get_approximate_token_info(query, tried={coingecko_id})
 
             return {"error": "Failed to fetch token info"}
         except Exception as e:
@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from decorators import with_cache
 from mesh.mesh_agent import MeshAgent
 from mesh.utils.r2_image_uploader import R2ImageUploader
+from mesh.utils.token_identity_index import get_token_identity_index
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -291,6 +292,15 @@ class DexScreenerTokenInfoAgent(MeshAgent):
             if "pairAddress" in pair:
                 pair["pairAddress"] = pair["pairAddress"].lower()
 
+        # Link each side to its canonical CoinGecko token when the contract is known
+        index = get_token_identity_index()
+        for k in ["baseToken", "quoteToken"]:
+            token = pair.get(k)
+            if token and token.get("address") and pair.get("chainId"):
+                coingecko_id = index.coingecko_id_for_contract(pair["chainId"], token["address"])
+                if coingecko_id:
+                    token["coingecko_id"] = coingecko_id
+
         return pair
 
     @with_cache(ttl_seconds=300)
@@ -4,9 +4,11 @@ from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
 from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import RatelimitException
 
 from decorators import with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -88,7 +90,15 @@ class DuckDuckGoSearchAgent(MeshAgent):
                         results.append({"title": r["title"], "link": r["href"], "snippet": r["body"]})
                     return results
 
-            results = await asyncio.get_event_loop().run_in_executor(None, _do_search)
+            rate_limiter = get_rate_limiter("duckduckgo")
+            await rate_limiter.acquire()
+            try:
+                results = await asyncio.get_event_loop().run_in_executor(None, _do_search)
+            except RatelimitException:
+                # DDGS gives no Retry-After time; the limiter backs off exponentially
+                rate_limiter.report_rate_limited()
+                raise
+            rate_limiter.report_success()
 
             logger.info(f"Found {len(results)} results for search: {search_term}")
             return {"status": "success", "data": {"search_term": search_term, "results": results}}
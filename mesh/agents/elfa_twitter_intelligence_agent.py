@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 
 from decorators import with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.twitter_entity_store import get_twitter_entity_store
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -315,22 +316,33 @@ class ElfaTwitterIntelligenceAgent(MeshAgent):
         Enrich ELFA tweets by hydrating tweet IDs into full tweet objects.
 
         Strategy:
-        1) Try bulk hydration via PracticalTools (Apify actor).
-        2) For missing IDs (or if bulk fails), fall back to per-tweet detail calls.
+        1) Reuse tweets already held in the shared Twitter entity store.
+        2) Try bulk hydration via PracticalTools (Apify actor) for the rest.
+        3) For missing IDs (or if bulk fails), fall back to per-tweet detail calls.
         """
         tweet_ids = [str(tweet.get("tweetId")).strip() for tweet in tweets if tweet.get("tweetId")]
         if not tweet_ids:
             return []
 
         tweet_ids = list(dict.fromkeys(tweet_ids))
-        bulk = await self._bulk_hydrate_tweets_by_ids(tweet_ids)
-        by_id = {t["id"]: t for t in bulk["tweets"]}
-
-        error_tweet_ids = bulk["error_tweet_ids"]
-        if error_tweet_ids:
-            logger.info(f"Falling back to per-tweet detail for {len(error_tweet_ids)} tweets")
-            fallback = await self._fetch_batch_tweet_details(error_tweet_ids, batch_size=5, delay=2.0)
-            by_id.update({t["id"]: t for t in fallback})
+        store = get_twitter_entity_store()
+        by_id = store.get_tweets(tweet_ids)
+        missing_ids = [tid for tid in tweet_ids if tid not in by_id]
+        if by_id:
+            logger.info(f"Reusing {len(by_id)} held tweets, hydrating {len(missing_ids)}")
+
+        if missing_ids:
+            bulk = await self._bulk_hydrate_tweets_by_ids(missing_ids)
+            hydrated = {t["id"]: t for t in bulk["tweets"]}
+
+            error_tweet_ids = bulk["error_tweet_ids"]
+            if error_tweet_ids:
+                logger.info(f"Falling back to per-tweet detail for {len(error_tweet_ids)} tweets")
+                fallback = await self._fetch_batch_tweet_details(error_tweet_ids, batch_size=5, delay=2.0)
+                hydrated.update({t["id"]: t for t in fallback})
+
+            store.put_tweets(hydrated.values())
+            by_id.update(hydrated)
 
         ordered = [by_id[tid] for tid in tweet_ids if tid in by_id]
         logger.info(f"Successfully enriched {len(ordered)} out of {len(tweet_ids)} tweets")
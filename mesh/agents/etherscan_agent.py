@@ -1,29 +1,35 @@
-import asyncio
 import logging
 import os
 import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
-from firecrawl import FirecrawlApp
 
 from decorators import with_cache, with_retry
 from mesh.gemini import call_gemini_async
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.explorer_extractor import extract_explorer_page
+from mesh.utils.firecrawl_client import get_firecrawl_client
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
+MAX_PROCESSED_PAGES = 256
+
 
 class EtherscanAgent(MeshAgent):
+    # "<page type>:<content hash>" -> processed content, so an unchanged page is never processed twice
+    _processed_pages: "OrderedDict[str, str]" = OrderedDict()
+
     def __init__(self):
         super().__init__()
         self.api_key = os.getenv("FIRECRAWL_API_KEY")
         if not self.api_key:
             raise ValueError("FIRECRAWL_API_KEY environment variable is required")
 
-        self.app = FirecrawlApp(api_key=self.api_key)
-        self._api_clients["firecrawl"] = self.app  # Register in base class API clients
+        self.firecrawl = get_firecrawl_client(self.api_key)
+        self._api_clients["firecrawl"] = self.firecrawl
 
         # Supported blockchain
         self.explorers = {
@@ -116,16 +122,39 @@ class EtherscanAgent(MeshAgent):
             logger.warning("Falling back to raw content due to LLM processing failure")
             return raw_content
 
+    async def _process_page(self, markdown_content: str, page_hash: str, context_info: Dict[str, str]) -> str:
+        """Parse the page deterministically when its layout is recognized, otherwise process it with the LLM"""
+        cache_key = f"{context_info['type']}:{page_hash}"
+        processed_content = self._processed_pages.get(cache_key)
+        if processed_content is not None:
+            self._processed_pages.move_to_end(cache_key)
+            logger.info(f"Reusing processed {context_info['type']} data for unchanged page")
+            return processed_content
+
+        processed_content = extract_explorer_page(
+            markdown_content, context_info["type"], context_info.get("chain", ""), context_info.get("url", "")
+        )
+        if processed_content is not None:
+            logger.info(f"Parsed {context_info['type']} page without LLM")
+        else:
+            processed_content = await self._process_with_llm(markdown_content, context_info)
+            if processed_content is markdown_content:
+                # LLM failed and returned the raw page; do not cache that
+                return processed_content
+
+        self._processed_pages[cache_key] = processed_content
+        while len(self._processed_pages) > MAX_PROCESSED_PAGES:
+            self._processed_pages.popitem(last=False)
+        return processed_content
+
     async def _scrape_and_process(self, url: str, context_info: Dict[str, str]) -> Dict[str, Any]:
-        """Common method to scrape URL and process with LLM"""
+        """Common method to scrape URL and extract its blockchain data"""
         try:
-            scrape_result = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.app.scrape_url(url, formats=["markdown"], wait_for=10000)
-            )
-            markdown_content = getattr(scrape_result, "markdown", "") if hasattr(scrape_result, "markdown") else ""
+            page = await self.firecrawl.scrape(url, wait_for=10000)
+            markdown_content = page["markdown"]
             if not markdown_content:
                 return {"status": "error", "error": f"Failed to scrape {context_info['type']} page"}
-            processed_content = await self._process_with_llm(markdown_content, context_info)
+            processed_content = await self._process_page(markdown_content, page["content_hash"], context_info)
             logger.info(f"Successfully processed {context_info['type']} data")
 
             return {
@@ -5,6 +5,7 @@ from typing import Any, Dict, List, Optional
 
 from decorators import with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.rate_limiter import RateLimiter, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +95,10 @@ class ExaSearchAgent(MeshAgent):
         error_lower = error_msg.lower()
         return not any(code in error_lower for code in NON_ROTATABLE_ERRORS)
 
+    def api_rate_limiter(self) -> Optional[RateLimiter]:
+        # Exa quotas are per API key, so each key has its own limiter
+        return get_rate_limiter("exa", self.current_api_key)
+
     async def _request_with_key_rotation(
         self,
         url: str,
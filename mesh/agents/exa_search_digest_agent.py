@@ -9,6 +9,7 @@ from dotenv import load_dotenv  # type: ignore
 from decorators import with_cache, with_retry
 from mesh.gemini import call_gemini_async
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.rate_limiter import RateLimiter, get_rate_limiter
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -101,6 +102,10 @@ class ExaSearchDigestAgent(MeshAgent):
         error_lower = error_msg.lower()
         return not any(code in error_lower for code in NON_ROTATABLE_ERRORS)
 
+    def api_rate_limiter(self) -> Optional[RateLimiter]:
+        # Exa quotas are per API key, so each key has its own limiter
+        return get_rate_limiter("exa", self.current_api_key)
+
     async def _request_with_key_rotation(
         self, url: str, method: str = "GET", params: Dict = None, json_data: Dict = None, timeout: int = 30
     ) -> Dict:
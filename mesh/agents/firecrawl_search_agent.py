@@ -1,18 +1,16 @@
-import asyncio
 import logging
 import os
 import time
 from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
-from firecrawl import FirecrawlApp
-from firecrawl.firecrawl import ScrapeOptions
 
 from decorators import with_cache, with_retry
 from mesh.agents.exa_search_agent import build_firecrawl_to_exa_fallback
 from mesh.firecrawl_logger import FirecrawlLogger
 from mesh.gemini import call_gemini_async
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.firecrawl_client import get_firecrawl_client
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -25,7 +23,8 @@ class FirecrawlSearchAgent(MeshAgent):
         if not self.api_key:
             raise ValueError("FIRECRAWL_API_KEY environment variable is required")
 
-        self.app = FirecrawlApp(api_key=self.api_key)
+        self.firecrawl = get_firecrawl_client(self.api_key)
+        self._api_clients["firecrawl"] = self.firecrawl
         self.firecrawl_logger = FirecrawlLogger()
         self.metadata.update(
             {
@@ -210,42 +209,21 @@ class FirecrawlSearchAgent(MeshAgent):
         )
 
         try:
-            scrape_options = ScrapeOptions(formats=["markdown"])
-
-            # Build search parameters
-            search_params = {"query": search_term, "limit": limit, "scrape_options": scrape_options}
-
-            # Add time filter if specified
             if time_filter:
-                search_params["tbs"] = time_filter
                 logger.info(f"Applied time filter: {time_filter}")
+            results = await self.firecrawl.search(search_term, limit=limit, tbs=time_filter)
 
-            response = await asyncio.get_event_loop().run_in_executor(None, lambda: self.app.search(**search_params))
-
-            data = getattr(response, "data", None) or (response.get("data") if isinstance(response, dict) else None)
-
-            if isinstance(data, list) and data:
-                logger.info(f"Search completed successfully with {len(data)} results")
-                if self.firecrawl_logger.is_enabled():
-                    try:
-                        request_id = await self.firecrawl_logger.log_search_operation(
-                            search_query=search_term, raw_results=data, llm_processed_result=str(data)
-                        )
-                        logger.info(f"Logged to R2 with request ID: {request_id}")
-                    except Exception as e:
-                        logger.error(f"Failed to log to R2: {str(e)}")
-                return {"status": "success", "data": {"results": data}}
-            elif isinstance(response, list):
-                logger.info(f"Search completed with {len(response)} results")
+            if results:
+                logger.info(f"Search completed successfully with {len(results)} results")
                 if self.firecrawl_logger.is_enabled():
                     try:
                         request_id = await self.firecrawl_logger.log_search_operation(
-                            search_query=search_term, raw_results=response, llm_processed_result=str(response)
+                            search_query=search_term, raw_results=results, llm_processed_result=str(results)
                         )
                         logger.info(f"Logged to R2 with request ID: {request_id}")
                     except Exception as e:
                         logger.error(f"Failed to log to R2: {str(e)}")
-                return {"status": "success", "data": {"results": response}}
+                return {"status": "success", "data": {"results": results}}
             else:
                 logger.warning("Search completed but no results were found")
                 if self.firecrawl_logger.is_enabled():
@@ -282,10 +260,7 @@ class FirecrawlSearchAgent(MeshAgent):
         logger.info(f"Extracting web data from '{urls_str}' with prompt '{extraction_prompt}'")
 
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.app.extract(urls=urls, prompt=extraction_prompt, enable_web_search=enable_web_search),
-            )
+            response = await self.firecrawl.extract(urls, extraction_prompt, enable_web_search=enable_web_search)
 
             if isinstance(response, dict):
                 if "data" in response:
@@ -361,11 +336,8 @@ class FirecrawlSearchAgent(MeshAgent):
         logger.info(f"Scraping content from URL: {url}")
 
         try:
-            scrape_result = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.app.scrape_url(url, formats=["markdown"], wait_for=wait_time, timeout=15000)
-            )
-
-            markdown_content = getattr(scrape_result, "markdown", "") if hasattr(scrape_result, "markdown") else ""
+            page = await self.firecrawl.scrape(url, wait_for=wait_time, timeout_ms=15000)
+            markdown_content = page["markdown"]
             if not markdown_content:
                 if self.firecrawl_logger.is_enabled():
                     try:
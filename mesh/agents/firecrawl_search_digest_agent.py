@@ -1,18 +1,16 @@
-import asyncio
 import logging
 import os
 import time
 from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
-from firecrawl import FirecrawlApp
-from firecrawl.firecrawl import ScrapeOptions
 
 from decorators import with_cache, with_retry
 from mesh.agents.exa_search_agent import build_firecrawl_to_exa_fallback
 from mesh.firecrawl_logger import FirecrawlLogger
 from mesh.gemini import call_gemini_async
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.firecrawl_client import get_firecrawl_client
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -25,7 +23,8 @@ class FirecrawlSearchDigestAgent(MeshAgent):
         if not self.api_key:
             raise ValueError("FIRECRAWL_API_KEY environment variable is required")
 
-        self.app = FirecrawlApp(api_key=self.api_key)
+        self.firecrawl = get_firecrawl_client(self.api_key)
+        self._api_clients["firecrawl"] = self.firecrawl
         self.firecrawl_logger = FirecrawlLogger()
         self.metadata.update(
             {
@@ -230,25 +229,11 @@ Return clear, focused summaries that extract only the most relevant information.
         )
 
         try:
-            scrape_options = ScrapeOptions(formats=["markdown"])
-
-            # Build search parameters
-            search_params = {"query": search_term, "limit": limit, "scrape_options": scrape_options, "timeout": 30000}
-
-            # Add time filter if specified
             if time_filter:
-                search_params["tbs"] = time_filter
                 logger.info(f"Applied time filter: {time_filter}")
+            results = await self.firecrawl.search(search_term, limit=limit, tbs=time_filter, timeout_ms=30000)
 
-            response = await asyncio.get_event_loop().run_in_executor(None, lambda: self.app.search(**search_params))
-
-            data = getattr(response, "data", None) or (response.get("data") if isinstance(response, dict) else None)
-
-            if isinstance(data, list) and data:
-                results = data
-            elif isinstance(response, list):
-                results = response
-            else:
+            if not results:
                 logger.warning("Search completed but no results were found")
                 if self.firecrawl_logger.is_enabled():
                     try:
@@ -303,10 +288,7 @@ Return clear, focused summaries that extract only the most relevant information.
         logger.info(f"Extracting web data from '{urls_str}' with prompt '{extraction_prompt}'")
 
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.app.extract(urls=urls, prompt=extraction_prompt, enable_web_search=enable_web_search),
-            )
+            response = await self.firecrawl.extract(urls, extraction_prompt, enable_web_search=enable_web_search)
 
             if isinstance(response, dict):
                 if "data" in response:
@@ -360,11 +342,8 @@ Return clear, focused summaries that extract only the most relevant information.
         logger.info(f"Scraping content from URL: {url}")
 
         try:
-            scrape_result = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.app.scrape_url(url, formats=["markdown"], wait_for=wait_time, timeout=15000)
-            )
-
-            markdown_content = getattr(scrape_result, "markdown", "") if hasattr(scrape_result, "markdown") else ""
+            page = await self.firecrawl.scrape(url, wait_for=wait_time, timeout_ms=15000)
+            markdown_content = page["markdown"]
             if not markdown_content:
                 if self.firecrawl_logger.is_enabled():
                     try:
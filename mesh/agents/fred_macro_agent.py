@@ -1,14 +1,17 @@
 import json
 import logging
 import os
+import time
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import numpy as np
 from dotenv import load_dotenv
 
 from decorators import with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.fred_observation_store import FredObservationStore, SeriesObservations
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -34,6 +37,27 @@ PERIOD_TO_DAYS = {
     "5y": 1827,
     "10y": 3653,
 }
+# Incremental refreshes re-fetch this far back from the last stored date so revisions
+# to recent observations (e.g. the two prior payroll months) replace the stored values.
+REVISION_LOOKBACK_DAYS = {
+    "daily": 10,
+    "weekly": 56,
+    "monthly": 95,
+    "quarterly": 280,
+    "other": 366,
+}
+# Daily series have no rows on weekends and holidays, so their YoY comparison is the latest
+# observation on or before the same date a year earlier, at most this many days before it.
+DAILY_YOY_MAX_GAP_DAYS = 7
+# Upper bound on how long a stored series is served without checking FRED, in case a
+# release date is missed or moved; refreshes normally follow the release calendar.
+STORE_MAX_AGE_SECONDS = {
+    "daily": 60 * 60,
+    "weekly": 6 * 60 * 60,
+    "monthly": 12 * 60 * 60,
+    "quarterly": 12 * 60 * 60,
+    "other": 6 * 60 * 60,
+}
 
 
 def _parse_date(value: Optional[str]) -> Optional[date]:
@@ -77,6 +101,9 @@ def _sign_label(value: float) -> str:
 
 
 class FredMacroAgent(MeshAgent):
+    # Shared across instances so every request reuses the same seeded series.
+    _observation_store = FredObservationStore()
+
     def __init__(self):
         super().__init__()
         self.fred_api_key = os.getenv("FRED_API_KEY")
@@ -418,7 +445,7 @@ Rules:
             return "monthly"
         if "week" in normalized:
             return "weekly"
-        if "day" in normalized:
+        if "daily" in normalized:
             return "daily"
         return "other"
 
@@ -446,8 +473,26 @@ Rules:
                 return current.replace(year=current.year - 1, day=28)
         if kind == "weekly":
             return current - timedelta(weeks=52)
+        if kind == "daily":
+            try:
+                return current.replace(year=current.year - 1)
+            except ValueError:
+                return current.replace(year=current.year - 1, day=28)
         return None
 
+    def _prior_period_dates(self, dates: np.ndarray, kind: str) -> Optional[np.ndarray]:
+        """Vectorized `_prior_period_date` over a datetime64[D] array."""
+        if kind == "weekly":
+            return dates - np.timedelta64(52 * 7, "D")
+        if kind not in {"monthly", "quarterly", "daily"}:
+            return None
+        months = dates.astype("datetime64[M]")
+        day_offset = dates - months.astype("datetime64[D]")
+        prior_months = months - np.timedelta64(12, "M")
+        # Clamp to the last day of the prior-year month (Feb 29 -> Feb 28).
+        prior_month_end = (prior_months + np.timedelta64(1, "M")).astype("datetime64[D]") - np.timedelta64(1, "D")
+        return np.minimum(prior_months.astype("datetime64[D]") + day_offset, prior_month_end)
+
     def _observations_by_date(self, observations: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
         return {obs["date"]: obs for obs in observations if obs.get("date")}
 
@@ -460,7 +505,7 @@ Rules:
     ) -> Optional[Dict[str, Any]]:
         """Observation for the same calendar period one year earlier."""
         kind = self._frequency_kind(spec["frequency"])
-        if kind not in {"monthly", "quarterly", "weekly"}:
+        if kind not in {"monthly", "quarterly", "weekly", "daily"}:
             return None
         current = observations[idx]
         current_date = _parse_date(current.get("date"))
@@ -470,7 +515,13 @@ Rules:
         if target_date is None:
             return None
         lookup = by_date if by_date is not None else self._observations_by_date(observations)
-        return lookup.get(_iso_date(target_date))
+        if kind != "daily":
+            return lookup.get(_iso_date(target_date))
+        for days_back in range(DAILY_YOY_MAX_GAP_DAYS + 1):
+            observation = lookup.get(_iso_date(target_date - timedelta(days=days_back)))
+            if observation is not None:
+                return observation
+        return None
 
     def _snapshot_history_limit(self, spec: Dict[str, Any]) -> int:
         kind = self._frequency_kind(spec["frequency"])
@@ -626,23 +677,89 @@ Rules:
     def _transform_observations(
         self, spec: Dict[str, Any], observations: List[Dict[str, Any]], view: str
     ) -> List[Dict[str, Any]]:
-        by_date = self._observations_by_date(observations) if view in {"yoy", "yoy_change"} else None
+        return self._transform_series(spec, SeriesObservations.from_observations(observations), view)
+
+    def _transform_series(self, spec: Dict[str, Any], series: SeriesObservations, view: str) -> List[Dict[str, Any]]:
+        """Apply `view` to every observation at once; same points as `_metric_point` row by row."""
+        count = len(series)
+        if not count:
+            return []
+        values = series.values
+        unit = self._view_unit(spec, view)
+        dates = series.dates.astype(str).tolist()
+        comparison = None
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if view in {"level", "sign"}:
+                valid = np.ones(count, dtype=bool)
+                derived = values
+            elif view in {"change", "mom_change", "wow_change", "mom_annualized", "qoq_annualized"}:
+                comparison = np.arange(count) - 1
+                previous = values[np.maximum(comparison, 0)]
+                valid = comparison >= 0
+                if view in {"change", "mom_change", "wow_change"}:
+                    derived = values - previous
+                else:
+                    valid &= previous != 0
+                    periods = 12 if view == "mom_annualized" else 4
+                    derived = ((values / previous) ** periods - 1) * 100
+            elif view in {"yoy", "yoy_change"}:
+                targets = self._prior_period_dates(series.dates, self._frequency_kind(spec["frequency"]))
+                if targets is None:
+                    return []
+                if self._frequency_kind(spec["frequency"]) == "daily":
+                    # Latest observation on or before the target, within DAILY_YOY_MAX_GAP_DAYS
+                    comparison = np.searchsorted(series.dates, targets, "right") - 1
+                    found = np.maximum(comparison, 0)
+                    valid = (comparison >= 0) & (
+                        targets - series.dates[found] <= np.timedelta64(DAILY_YOY_MAX_GAP_DAYS, "D")
+                    )
+                else:
+                    comparison = np.searchsorted(series.dates, targets)
+                    found = np.minimum(comparison, count - 1)
+                    valid = (comparison < count) & (series.dates[found] == targets)
+                comparison = found
+                previous = values[found]
+                if view == "yoy":
+                    valid &= previous != 0
+                    derived = ((values / previous) - 1) * 100
+                else:
+                    derived = values - previous
+            else:
+                return []
+
+        raw_values = values.tolist()
+        derived_values = derived.tolist()
+        comparison_indices = comparison.tolist() if comparison is not None else None
+        with_basis_points = "Percent" in spec["units"] and view in {"change", "mom_change", "wow_change", "yoy_change"}
+
         transformed = []
-        for idx in range(len(observations)):
-            point = self._metric_point(spec, observations, idx, view, by_date=by_date)
-            if point is None:
-                continue
-            if "realtime_start" in observations[idx]:
-                point["realtime_start"] = observations[idx]["realtime_start"]
-            if "realtime_end" in observations[idx]:
-                point["realtime_end"] = observations[idx]["realtime_end"]
+        for idx in np.flatnonzero(valid).tolist():
+            if view == "sign":
+                point = {
+                    "date": dates[idx],
+                    "value": _sign_label(raw_values[idx]),
+                    "raw_value": _round_value(raw_values[idx]),
+                    "unit": unit,
+                }
+            else:
+                point = {"date": dates[idx], "value": _round_value(derived_values[idx]), "unit": unit}
+            if comparison_indices is not None:
+                point["comparison_date"] = dates[comparison_indices[idx]]
+            if with_basis_points:
+                point["basis_points"] = _round_value(derived_values[idx] * 100, 2)
+            if series.realtime_start is not None:
+                if series.realtime_start[idx]:
+                    point["realtime_start"] = str(series.realtime_start[idx])
+                if series.realtime_end[idx]:
+                    point["realtime_end"] = str(series.realtime_end[idx])
             transformed.append(point)
         return transformed
 
     def _latest_metric_summary(
-        self, spec: Dict[str, Any], observations: List[Dict[str, Any]], view: str
+        self, spec: Dict[str, Any], series: SeriesObservations, view: str
     ) -> Optional[Dict[str, Any]]:
-        transformed = self._transform_observations(spec, observations, view)
+        transformed = self._transform_series(spec, series, view)
         if not transformed:
             return None
         latest = dict(transformed[-1])
@@ -693,46 +810,113 @@ Rules:
             return self._error(f"No metadata returned for series '{spec['series_id']}'.")
         return payload["seriess"][0]
 
+    async def _next_release_date(self, spec: Dict[str, Any], after_today: bool = False) -> Optional[date]:
+        today = date.today()
+        try:
+            payload = await self._fred_get(
+                "release/dates",
+                release_id=spec["release_id"],
+                realtime_start=_iso_date(today),
+                realtime_end="9999-12-31",
+                include_release_dates_with_no_data="true",
+                sort_order="asc",
+                limit=10,
+            )
+        except Exception as exc:
+            logger.warning(f"Failed to fetch upcoming release dates for release {spec['release_id']}: {exc}")
+            return None
+        if payload.get("status") == "error":
+            return None
+        for item in payload.get("release_dates", []):
+            release_date = _parse_date(item.get("date"))
+            if release_date and (release_date > today or (release_date == today and not after_today)):
+                return release_date
+        return None
+
+    async def _stored_series(self, spec: Dict[str, Any], realtime_date: Optional[str] = None) -> Dict[str, Any]:
+        """Full observation history for a series (or one ALFRED vintage), kept current incrementally.
+
+        The first request seeds the store with the whole history. Later requests are served
+        from the store until the series' next scheduled release (or STORE_MAX_AGE_SECONDS),
+        then only observations from shortly before the last stored date are re-fetched.
+        """
+        store = self._observation_store
+        store_key = spec["series_id"] if realtime_date is None else f"{spec['series_id']}@{realtime_date}"
+        async with store.lock(store_key):
+            stored = store.get(store_key)
+            if stored is not None and not stored.needs_refresh():
+                store.stats["hits"] += 1
+                return {"status": "success", "data": stored}
+
+            kind = self._frequency_kind(spec["frequency"])
+            params: Dict[str, Any] = {"series_id": spec["series_id"], "sort_order": "asc"}
+            if realtime_date:
+                params["realtime_start"] = realtime_date
+                params["realtime_end"] = realtime_date
+            fetched_from = None
+            if stored is not None and len(stored):
+                fetched_from = _iso_date(stored.last_date - timedelta(days=REVISION_LOOKBACK_DAYS[kind]))
+                params["observation_start"] = fetched_from
+
+            try:
+                payload = await self._fred_get("series/observations", **params)
+            except Exception as exc:
+                if stored is None:
+                    raise
+                payload = self._error(str(exc))
+            if payload.get("status") == "error":
+                if stored is not None:
+                    logger.warning(f"Serving stored {store_key} after failed refresh: {payload['error']}")
+                    return {"status": "success", "data": stored}
+                return payload
+
+            observations = []
+            for item in payload["observations"]:
+                observation = self._normalize_observation(item, include_realtime=realtime_date is not None)
+                if observation is not None:
+                    observations.append(observation)
+            fetched = SeriesObservations.from_observations(observations, refreshed_at=time.time())
+
+            if fetched_from is None:
+                series = fetched
+                store.stats["seeds"] += 1
+            else:
+                series = stored.merge_tail(fetched, fetched_from)
+                store.stats["refreshes"] += 1
+                store.stats["appended"] += max(0, len(series) - len(stored))
+
+            if realtime_date and _parse_date(realtime_date) < date.today():
+                # A vintage pinned in the past never changes; keep it for good.
+                series.max_age_seconds = None
+            else:
+                series.max_age_seconds = STORE_MAX_AGE_SECONDS[kind]
+                updated = stored is not None and (
+                    len(series) != len(stored) or not np.array_equal(series.values, stored.values)
+                )
+                series.next_release = await self._next_release_date(spec, after_today=updated)
+
+            if not len(series):
+                return self._error(f"No observations returned for series '{spec['key']}'.")
+            store.put(store_key, series)
+            return {"status": "success", "data": series}
+
     async def _series_observations(
         self,
         spec: Dict[str, Any],
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         limit: Optional[int] = None,
-        sort_order: str = "asc",
         realtime_date: Optional[str] = None,
     ) -> Dict[str, Any]:
-        params: Dict[str, Any] = {
-            "series_id": spec["series_id"],
-            "sort_order": sort_order,
-        }
-        if start_date:
-            params["observation_start"] = start_date
-        if end_date:
-            params["observation_end"] = end_date
-        if limit:
-            params["limit"] = limit
-        if realtime_date:
-            params["realtime_start"] = realtime_date
-            params["realtime_end"] = realtime_date
-
-        payload = await self._fred_get("series/observations", **params)
-        if payload.get("status") == "error":
-            return payload
-
-        observations = []
-        for item in payload["observations"]:
-            observation = self._normalize_observation(item, include_realtime=realtime_date is not None)
-            if observation is None:
-                continue
-            observations.append(observation)
+        """Ascending observations in the window; with limit, only the latest `limit` of them."""
+        stored_result = await self._stored_series(spec, realtime_date=realtime_date)
+        if stored_result["status"] == "error":
+            return stored_result
 
-        if sort_order == "desc":
-            observations.reverse()
-
-        if not observations:
+        series = stored_result["data"].window(start_date, end_date, limit)
+        if not len(series):
             return self._error(f"No observations returned for series '{spec['key']}'.")
-        return {"status": "success", "data": observations}
+        return {"status": "success", "data": series.to_observations(), "series": series}
 
     async def _release_metadata(self, release_spec: Dict[str, Any]) -> Dict[str, Any]:
         payload = await self._fred_get("release", release_id=release_spec["release_id"])
@@ -786,7 +970,6 @@ Rules:
             spec,
             end_date=observation_end,
             limit=self._snapshot_history_limit(spec),
-            sort_order="desc",
         )
         if observations_result["status"] == "error":
             return observations_result
@@ -796,7 +979,7 @@ Rules:
         for view in spec["default_views"]:
             if view == "level":
                 continue
-            summary = self._latest_metric_summary(spec, observations, view)
+            summary = self._latest_metric_summary(spec, observations_result["series"], view)
             if summary:
                 derived[view] = summary
 
@@ -852,13 +1035,12 @@ Rules:
             spec,
             start_date=resolved_window["start_date"],
             end_date=resolved_window["end_date"],
-            sort_order="asc",
             realtime_date=realtime_date,
         )
         if observations_result["status"] == "error":
             return observations_result
 
-        transformed = self._transform_observations(spec, observations_result["data"], view)
+        transformed = self._transform_series(spec, observations_result["series"], view)
         if not transformed:
             return self._error(f"No transformed observations available for {spec['key']} with view '{view}'.")
 
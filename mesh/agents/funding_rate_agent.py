@@ -1,13 +1,22 @@
 import asyncio
+import heapq
 import logging
 import os
+import time
+import weakref
 from typing import Any, Dict, List, Optional, Tuple
 
 from decorators import with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.token_identity_index import get_token_identity_index
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_TTL_SECONDS = 60
+OI_FETCH_CONCURRENCY = 8
+DEFAULT_FUNDING_INTERVAL_HOURS = 8
+MAX_OPPORTUNITIES = 100
+
 
 def _pct(x: float) -> float:
     return x * 100.0
@@ -25,18 +34,23 @@ class FundingRateAgent(MeshAgent):
       - Exchange Info:          GET /fapi/v1/exchangeInfo
       - Mark Price (all/one):   GET /fapi/v1/premiumIndex
       - Funding Info:           GET /fapi/v1/fundingInfo
-      - Funding Rate History:   GET /fapi/v1/fundingRate
       - Open Interest (point):  GET /fapi/v1/openInterest     [not required, but handy]
       - OI Statistics (4h):     GET /futures/data/openInterestHist
 
     Strategy:
       - Verify symbol exists on Binance perp via exchangeInfo
       - OI: fetch 7d of 4h bars, summarize trend + snapshot
-      - Funding: use premiumIndex.lastFundingRate as "current"; derive fundingIntervalHours
-                 from fundingInfo when present; otherwise infer from fundingRate timestamps;
-                 otherwise default to 8h. Compute APR.
+      - Funding: use premiumIndex.lastFundingRate as "current"; take fundingIntervalHours
+                 from fundingInfo, which lists every symbol whose interval was adjusted;
+                 all other symbols use the default 8h. Compute APR.
     """
 
+    # All-symbol snapshot shared across instances: symbol -> premiumIndex fields + funding interval
+    _snapshot: Dict[str, Dict[str, Any]] = {}
+    _snapshot_at: float = 0.0
+    # Locks belong to the event loop they are used on, so the refresh lock is kept per loop.
+    _snapshot_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
     def __init__(self, base_url: Optional[str] = None):
         super().__init__()
 
@@ -60,6 +74,7 @@ class FundingRateAgent(MeshAgent):
                     "What is the current funding rate APR for SOL on Binance?",
                     "List current Binance funding rates (interval-aware)",
                     "Spot-perp carry candidates on Binance with funding > 0.02% per interval",
+                    "Which Binance perps have the most extreme funding right now?",
                 ],
                 "credits": {"default": 0.1},
                 "x402_config": {
@@ -84,6 +99,7 @@ CAPABILITIES:
 - Get latest funding rates and convert to APR based on each symbol's funding interval
 - Fetch and summarize 7-day 4h Open Interest trends per symbol
 - Identify spot-perp carry candidates on Binance (positive funding)
+- Scan all Binance perps for the most extreme positive/negative funding
 
 RESPONSE GUIDELINES:
 - Format funding rates as percentages with 4 decimal places (e.g., "0.0123%")
@@ -150,6 +166,39 @@ RESPONSE GUIDELINES:
                                 "type": "number",
                                 "description": "Per-interval threshold, default 0.0003",
                             },
+                            "limit": {
+                                "type": "integer",
+                                "description": f"Maximum number of symbols to return, highest funding first (max {MAX_OPPORTUNITIES})",
+                                "default": 20,
+                            },
+                        },
+                        "required": [],
+                    },
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "scan_extreme_funding",
+                    "description": "Scan all Binance perpetual markets for the most extreme positive and negative funding, ranked by APR. Useful for spotting crowded longs/shorts across the whole market.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "top_n": {
+                                "type": "integer",
+                                "description": "Number of symbols to return on each side (max 50)",
+                                "default": 10,
+                            },
+                            "min_abs_apr": {
+                                "type": "number",
+                                "description": "Only include symbols whose absolute funding APR is at least this (decimal, e.g. 0.5 = 50%)",
+                                "default": 0.0,
+                            },
+                            "include_open_interest": {
+                                "type": "boolean",
+                                "description": "Also return the 7d OI trend for each returned symbol",
+                                "default": False,
+                            },
                         },
                         "required": [],
                     },
@@ -165,52 +214,67 @@ RESPONSE GUIDELINES:
         url = f"{base}{path}"
         return await self._api_request(url=url, method="GET", params=params or {})
 
-    @with_cache(ttl_seconds=7200)
-    async def _premium_index(self, symbol: Optional[str] = None) -> Any:
-        params = {"symbol": symbol} if symbol else None
-        return await self._get("/fapi/v1/premiumIndex", params=params)
-
-    @with_cache(ttl_seconds=7200)
+    @with_cache(ttl_seconds=600)
     async def _funding_info_all(self) -> List[Dict[str, Any]]:
         # fundingInfo returns only symbols that had adjustments; we’ll filter locally.
         res = await self._get("/fapi/v1/fundingInfo")
         return res if isinstance(res, list) else []
 
-    @with_cache(ttl_seconds=7200)
-    async def _funding_rate_history(self, symbol: str, limit: int = 2) -> List[Dict[str, Any]]:
-        params = {"symbol": symbol, "limit": limit}
-        res = await self._get("/fapi/v1/fundingRate", params=params)
-        return res if isinstance(res, list) else []
+    async def _refresh_snapshot(self) -> None:
+        premium, funding_info = await asyncio.gather(self._get("/fapi/v1/premiumIndex"), self._funding_info_all())
+        if not isinstance(premium, list):
+            raise RuntimeError(f"Unexpected premiumIndex response: {str(premium)[:200]}")
 
-    async def _infer_interval_hours(self, symbol: str) -> int:
+        intervals = {
+            row["symbol"]: int(row["fundingIntervalHours"])
+            for row in funding_info
+            if row.get("symbol") and row.get("fundingIntervalHours")
+        }
+        snapshot = {}
+        for row in premium:
+            symbol = row.get("symbol")
+            # Delivery contracts (e.g. BTCUSDT_250627) have no funding.
+            if not symbol or "_" in symbol:
+                continue
+            snapshot[symbol] = {
+                "symbol": symbol,
+                "mark_price": float(row.get("markPrice") or 0.0),
+                "index_price": float(row.get("indexPrice") or 0.0),
+                "last_funding_rate": float(row.get("lastFundingRate") or 0.0),
+                "next_funding_time": int(row.get("nextFundingTime") or 0),
+                "interval_hours": intervals.get(symbol),
+            }
+        FundingRateAgent._snapshot = snapshot
+        FundingRateAgent._snapshot_at = time.time()
+
+    async def _get_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """All-symbol funding snapshot, refreshed at most every SNAPSHOT_TTL_SECONDS.
+
+        Two calls (premiumIndex and fundingInfo, both all-symbol) replace the per-symbol
+        requests; symbol lookups are then dictionary reads.
         """
-        1) Try fundingInfo.fundingIntervalHours
-        2) Else infer from last 2 fundingRate timestamps
-        3) Else default 8h
+        if self._snapshot and time.time() - self._snapshot_at < SNAPSHOT_TTL_SECONDS:
+            return self._snapshot
+        loop = asyncio.get_running_loop()
+        lock = self._snapshot_locks.get(loop)
+        if lock is None:
+            lock = self._snapshot_locks[loop] = asyncio.Lock()
+        async with lock:
+            if not self._snapshot or time.time() - self._snapshot_at >= SNAPSHOT_TTL_SECONDS:
+                try:
+                    await self._refresh_snapshot()
+                except Exception as e:
+                    if not self._snapshot:
+                        raise
+                    logger.warning(f"Funding snapshot refresh failed, serving previous snapshot: {e}")
+        return self._snapshot
+
+    def _interval_hours(self, entry: Dict[str, Any]) -> int:
+        """Funding interval of a snapshot entry: fundingInfo's value, else Binance's default 8h.
+
+        Every tool annualizes with this, so the same symbol always gets the same APR.
         """
-        # 1) fundingInfo, when exists
-        info_list = await self._funding_info_all()
-        for row in info_list:
-            if row.get("symbol") == symbol and "fundingIntervalHours" in row:
-                return int(row["fundingIntervalHours"])
-
-        # 2) infer from history
-        hist = await self._funding_rate_history(symbol, limit=3)
-        if len(hist) >= 2:
-            t2 = int(hist[-1].get("fundingTime", 0))
-            t1 = int(hist[-2].get("fundingTime", 0))
-            if t1 and t2:
-                hours = max(1, round((t2 - t1) / 3_600_000))
-                # Clamp to common values
-                if hours in (1, 2, 4, 6, 8, 12):
-                    return hours
-                # nearest typical
-                for cand in (1, 2, 4, 6, 8, 12):
-                    if abs(hours - cand) <= 1:
-                        return cand
-
-        # 3) default
-        return 8
+        return entry.get("interval_hours") or DEFAULT_FUNDING_INTERVAL_HOURS
 
     def _apr_from_rate(self, per_interval_rate: float, interval_hours: int) -> Tuple[float, int]:
         """
@@ -222,12 +286,34 @@ RESPONSE GUIDELINES:
         apr = per_interval_rate * intervals_per_year
         return apr, int(round(intervals_per_year))
 
+    @with_cache(ttl_seconds=300)
     async def _oi_hist_4h_7d(self, symbol: str) -> List[Dict[str, Any]]:
         # 7 days * 24h / 4h = 42 bars
         params = {"symbol": symbol, "period": "4h", "limit": 42}
         res = await self._get("/futures/data/openInterestHist", params=params, use_data_host=True)
         return res if isinstance(res, list) else []
 
+    async def _oi_hist_batch(self, symbols: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """OI history for many symbols; Binance has no multi-symbol OI endpoint, so fetch concurrently."""
+        semaphore = asyncio.Semaphore(OI_FETCH_CONCURRENCY)
+
+        async def fetch(symbol: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self._oi_hist_4h_7d(symbol)
+                except Exception as e:
+                    logger.warning(f"OI history fetch failed for {symbol}: {e}")
+                    return []
+
+        rows = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        return dict(zip(symbols, rows))
+
+    def _funding_row(self, entry: Dict[str, Any]) -> List:
+        """Compact ["symbol", rate_decimal, "intervalH", "apr%"] row from a snapshot entry."""
+        interval = self._interval_hours(entry)
+        apr, _ = self._apr_from_rate(entry["last_funding_rate"], interval)
+        return [entry["symbol"], entry["last_funding_rate"], f"{interval}h", _fmt_pct(apr, 2)]
+
     def _summarize_oi(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Transform 4h OI series into compact features/trend for LLM consumption.
@@ -281,46 +367,19 @@ RESPONSE GUIDELINES:
     # ---------------------------------------------------------------------
     # Public Tool Methods
     # ---------------------------------------------------------------------
-    @with_cache(ttl_seconds=300)
+    @with_cache(ttl_seconds=60)
     async def get_all_funding_rates(self) -> Dict[str, Any]:
         """
         Return funding rates for top 5 Binance USDⓈ-M tokens (BTC, ETH, SOL, BNB, XRP).
-        Fetches in parallel with individual error handling.
+        Read from the all-symbol snapshot.
         Format: ["symbol", rate_decimal, "intervalH", "apr%"]
         """
         # Top 5 tokens to track
         top_tokens = ["BTC", "ETH", "SOL", "BNB", "XRP"]
 
-        async def fetch_token_funding(token: str) -> Optional[List]:
-            """Fetch funding rate for a single token with error handling."""
-            try:
-                result = await self.get_symbol_funding_rates(token)
-                if result.get("status") == "success":
-                    data = result.get("data", {})
-                    symbol = data.get("symbol")
-                    funding = data.get("funding", {})
-                    rate = funding.get("latest_rate", 0.0)
-                    interval = funding.get("interval_hours", 8)
-                    # Calculate APR assuming 8h interval as specified
-                    apr, _ = self._apr_from_rate(rate, interval)
-                    apr_pct = _fmt_pct(apr, 2)
-                    logger.info(f"Successfully fetched funding rate for {token}: {rate * 100:.6f}%")
-                    return [symbol, rate, f"{interval}h", apr_pct]
-                else:
-                    logger.warning(f"Could not resolve symbol for {token}: {result.get('message', 'Unknown error')}")
-                    return None
-            except Exception as e:
-                logger.warning(f"Error fetching funding rate for {token}: {str(e)}")
-                return None
-
         try:
-            logger.info("Fetching funding rates for top 5 tokens in parallel")
-            # Fetch all tokens in parallel
-            tasks = [fetch_token_funding(token) for token in top_tokens]
-            results = await asyncio.gather(*tasks)
-
-            # Filter out None results (failed fetches) and build formatted list
-            formatted = [result for result in results if result is not None]
+            snapshot = await self._get_snapshot()
+            formatted = [self._funding_row(snapshot[f"{t}USDT"]) for t in top_tokens if f"{t}USDT" in snapshot]
 
             # Sort by absolute rate descending
             formatted.sort(key=lambda x: abs(x[1]), reverse=True)
@@ -331,11 +390,12 @@ RESPONSE GUIDELINES:
             logger.exception("get_all_funding_rates failed")
             return {"status": "error", "error": str(e)}
 
-    @with_cache(ttl_seconds=300)
+    @with_cache(ttl_seconds=60)
     async def get_symbol_funding_rates(self, symbol: str) -> Dict[str, Any]:
         """
         Latest funding rate and APR for a single symbol.
-        Accepts 'BTC' or 'BTCUSDT'. Directly fetches data and returns friendly error if market doesn't exist.
+        Accepts 'BTC' or 'BTCUSDT'. Looks the symbol up in the all-symbol snapshot and returns
+        a friendly error if the market doesn't exist.
         Always uses USDT as quote asset.
         """
         try:
@@ -348,26 +408,23 @@ RESPONSE GUIDELINES:
             else:
                 resolved = s
 
-            # Try to fetch data directly - if market doesn't exist, API will return error
-            prem = await self._premium_index(resolved)
-
-            # Check if API returned valid data
-            if not isinstance(prem, dict):
-                return {
-                    "status": "no_data",
-                    "message": f"Unable to fetch funding rate for '{symbol}'. "
-                    f"Binance may not have a perpetual market for this token.",
-                }
-
-            if prem.get("symbol") != resolved:
+            snapshot = await self._get_snapshot()
+            entry = snapshot.get(resolved)
+            if entry is None and resolved != s:
+                # Names and CoinGecko IDs ("bitcoin", "dogwifhat") resolve to their ticker.
+                ticker = get_token_identity_index().symbol_for(symbol.strip())
+                if ticker and f"{ticker}USDT" in snapshot:
+                    resolved = f"{ticker}USDT"
+                    entry = snapshot[resolved]
+            if entry is None:
                 return {
                     "status": "no_data",
                     "message": f"Symbol '{symbol}' (resolved as '{resolved}') not found. "
                     f"Binance may not have a perpetual market for this token.",
                 }
 
-            last_rate = float(prem.get("lastFundingRate", 0.0) or 0.0)
-            interval_h = await self._infer_interval_hours(resolved)
+            last_rate = entry["last_funding_rate"]
+            interval_h = self._interval_hours(entry)
             apr, intervals_year = self._apr_from_rate(last_rate, interval_h)
 
             result = {
@@ -449,17 +506,27 @@ RESPONSE GUIDELINES:
             logger.exception("get_symbol_oi_and_funding failed")
             return {"status": "error", "error": str(e)}
 
-    @with_cache(ttl_seconds=180)
+    @with_cache(ttl_seconds=60)
     @with_retry(max_retries=1)
-    async def find_spot_futures_opportunities(self, min_funding_rate: float = 0.0003) -> Dict[str, Any]:
+    async def find_spot_futures_opportunities(
+        self, min_funding_rate: float = 0.0003, limit: int = 20
+    ) -> Dict[str, Any]:
         """
-        On Binance only: list symbols whose latest per-interval funding >= threshold.
+        On Binance only: list the `limit` perp symbols with the highest latest per-interval
+        funding at or above the threshold.
         """
         try:
-            all_rates = await self.get_all_funding_rates()
-            if "rates" not in all_rates:
-                return all_rates
-
+            limit = max(1, min(int(limit), MAX_OPPORTUNITIES))
+            snapshot = await self._get_snapshot()
+            rows = heapq.nlargest(
+                limit,
+                (
+                    self._funding_row(entry)
+                    for entry in snapshot.values()
+                    if entry["last_funding_rate"] >= min_funding_rate
+                ),
+                key=lambda row: row[1],
+            )
             positives = [
                 {
                     "symbol": sym,
@@ -468,15 +535,68 @@ RESPONSE GUIDELINES:
                     "funding_interval": interval,
                     "apr": apr_pct,
                 }
-                for sym, rate, interval, apr_pct in all_rates["rates"]
-                if rate >= min_funding_rate
+                for sym, rate, interval, apr_pct in rows
             ]
-            return {"status": "success", "data": {"spot_futures_opportunities": positives}}
+            return {
+                "status": "success",
+                "data": {"spot_futures_opportunities": positives, "symbols_scanned": len(snapshot)},
+            }
 
         except Exception as e:
             logger.exception("find_spot_futures_opportunities failed")
             return {"status": "error", "error": str(e)}
 
+    @with_cache(ttl_seconds=60)
+    @with_retry(max_retries=1)
+    async def scan_extreme_funding(
+        self, top_n: int = 10, min_abs_apr: float = 0.0, include_open_interest: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Scan every Binance USDⓈ-M perp for the most positive and most negative funding, ranked by APR
+        so symbols with shorter funding intervals compare fairly. Optionally adds the 7d OI trend
+        for the returned symbols.
+        """
+        try:
+            top_n = max(1, min(int(top_n), 50))
+            snapshot = await self._get_snapshot()
+
+            ranked = []
+            for entry in snapshot.values():
+                apr, _ = self._apr_from_rate(entry["last_funding_rate"], self._interval_hours(entry))
+                if abs(apr) >= min_abs_apr:
+                    ranked.append((apr, self._funding_row(entry)))
+            ranked.sort(key=lambda item: item[0])
+
+            most_negative = [row for apr, row in ranked[:top_n] if apr < 0]
+            most_positive = [row for apr, row in reversed(ranked[-top_n:]) if apr > 0]
+
+            data: Dict[str, Any] = {
+                "symbols_scanned": len(snapshot),
+                "most_positive": most_positive,
+                "most_negative": most_negative,
+                "format": ["symbol", "rate", "interval", "apr"],
+            }
+            if include_open_interest:
+                symbols = [row[0] for row in most_positive + most_negative]
+                oi_by_symbol = await self._oi_hist_batch(symbols)
+                open_interest = {}
+                for sym, rows in oi_by_symbol.items():
+                    summary = self._summarize_oi(rows)
+                    if summary.get("status") == "success":
+                        open_interest[sym] = {
+                            "trend": summary["trend_label"],
+                            "latest_oi": summary["latest_oi"],
+                            "change_7d_pct": _fmt_pct(summary["change_7d_pct"], 2),
+                            "change_24h_pct": _fmt_pct(summary["change_24h_pct"], 2),
+                        }
+                data["open_interest"] = open_interest
+
+            return {"status": "success", "data": data}
+
+        except Exception as e:
+            logger.exception("scan_extreme_funding failed")
+            return {"status": "error", "error": str(e)}
+
     # ---------------------------------------------------------------------
     # Tool dispatcher
     # ---------------------------------------------------------------------
@@ -502,6 +622,13 @@ RESPONSE GUIDELINES:
 
         if tool_name == "find_spot_futures_opportunities":
             min_rate = function_args.get("min_funding_rate", 0.0003)
-            return await self.find_spot_futures_opportunities(min_rate)
+            return await self.find_spot_futures_opportunities(min_rate, limit=function_args.get("limit", 20))
+
+        if tool_name == "scan_extreme_funding":
+            return await self.scan_extreme_funding(
+                top_n=function_args.get("top_n", 10),
+                min_abs_apr=function_args.get("min_abs_apr", 0.0),
+                include_open_interest=function_args.get("include_open_interest", False),
+            )
 
         return {"error": f"Unsupported tool: {tool_name}"}
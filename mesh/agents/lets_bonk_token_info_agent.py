@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 
 from decorators import monitor_execution, with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.bitquery_client import get_bitquery_client
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -18,8 +19,6 @@ class LetsBonkTokenInfoAgent(MeshAgent):
         self.api_key = os.getenv("BITQUERY_API_KEY")
         if not self.api_key:
             raise ValueError("BITQUERY_API_KEY environment variable is required")
-        self.headers = {"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"}
-        self.bitquery_url = "https://streaming.bitquery.io/eap"
 
         # LetsBonk.fun specific constants
         self.LETSBONK_DEX_PROGRAM = "LanMV9sAd7wArD4vJFi2qDdfnVhFxYSUg6eADduJ3uj"
@@ -352,7 +351,7 @@ class LetsBonkTokenInfoAgent(MeshAgent):
 
     async def _execute_query(self, query: str, variables: Dict = None) -> Dict:
         """
-        Execute a GraphQL query against the Bitquery API using the base class's _api_request method.
+        Execute a GraphQL query against the Bitquery API through the shared Bitquery client.
 
         Args:
             query (str): GraphQL query to execute
@@ -361,27 +360,10 @@ class LetsBonkTokenInfoAgent(MeshAgent):
         Returns:
             Dict: Query results
         """
-        payload = {"query": query}
-        if variables:
-            payload["variables"] = variables
-
-        try:
-            result = await self._api_request(
-                url=self.bitquery_url, method="POST", headers=self.headers, json_data=payload
-            )
-
-            if "error" in result:
-                return result
-
-            if "errors" in result:
-                error_messages = [error.get("message", "Unknown error") for error in result["errors"]]
-                return {"error": f"GraphQL errors: {', '.join(error_messages)}"}
-
-            return result
-
-        except Exception as e:
-            logger.error(f"Error in _execute_query: {str(e)}")
-            return {"error": f"Query execution failed: {str(e)}"}
+        result = await get_bitquery_client().execute(query, variables, self.api_key)
+        if "error" in result:
+            logger.error(f"Bitquery query error: {result['error']}")
+        return result
 
     def _calculate_bonding_curve_progress(self, balance: float) -> float:
         """
@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 
 from decorators import with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.twitter_entity_store import normalize_username
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -124,7 +125,7 @@ class MoniTwitterInsightAgent(MeshAgent):
         """
         Remove @ symbol if present in the username
         """
-        return username.replace("@", "")
+        return normalize_username(username)
 
     # ------------------------------------------------------------------------
     #                      MONI API-SPECIFIC METHODS
@@ -1,4 +1,5 @@
 import asyncio
+import heapq
 import logging
 import os
 import uuid
@@ -14,6 +15,8 @@ from mesh.mesh_agent import MeshAgent
 logger = logging.getLogger(__name__)
 load_dotenv()
 
+HOLDERS_PAGE_SIZE = 1000
+
 
 class SolWalletAgent(MeshAgent):
     def __init__(self):
@@ -128,6 +131,26 @@ class SolWalletAgent(MeshAgent):
             await asyncio.sleep(0.5)  # Rate limiting delay
             return await self._api_request(url=url, method=method, **kwargs)
 
+    async def _get_token_supply(self, token_address: str) -> Optional[int]:
+        """Raw (undecimalized) total supply of a mint, or None if unavailable."""
+        payload = {
+            "jsonrpc": "2.0",
+            "id": f"get-token-supply-{uuid.uuid4()}",
+            "method": "getTokenSupply",
+            "params": [token_address],
+        }
+        try:
+            data = await self._rate_limited_request(
+                "POST", url=f"{self.api_url}/?api-key={self.api_key}", headers=self.headers, json_data=payload
+            )
+        except Exception as e:
+            data = {"error": str(e)}
+        amount = _py.get(data, "result.value.amount")
+        if "error" in data or amount is None:
+            logger.warning(f"Token supply unavailable for {token_address}, scanning all holder pages")
+            return None
+        return int(amount)
+
     @with_cache(ttl_seconds=600)
     @retry(
         retry=retry_if_exception_type(Exception),
@@ -137,10 +160,18 @@ class SolWalletAgent(MeshAgent):
     async def _get_holders(self, token_address: str, top_n: int = 20) -> List[Dict]:
         """
         Query the HELIUS API to get the token top holders for a given token address.
+
+        Token accounts are streamed page by page into a bounded min-heap of the top_n
+        largest. Since every token account's balance counts toward the mint's supply,
+        once the supply not yet seen is smaller than the current top_n-th balance no
+        later page can change the result and the scan stops.
         """
         try:
             logger.info(f"Querying token holders for address: {token_address}")
-            all_holders = []
+            total_supply = await self._get_token_supply(token_address)
+            heap: List[tuple[int, int, str]] = []
+            seen_amount = 0
+            seen_accounts = 0
             cursor = None
 
             while True:
@@ -148,7 +179,7 @@ class SolWalletAgent(MeshAgent):
                     "jsonrpc": "2.0",
                     "id": f"get-token-accounts-{uuid.uuid4()}",
                     "method": "getTokenAccounts",
-                    "params": {"mint": token_address, "limit": 1000, "cursor": cursor},
+                    "params": {"mint": token_address, "limit": HOLDERS_PAGE_SIZE, "cursor": cursor},
                 }
 
                 data = await self._rate_limited_request(
@@ -159,30 +190,43 @@ class SolWalletAgent(MeshAgent):
                     logger.error(f"API error: {data['error']}")
                     return []
 
-                if not data.get("result", {}).get("token_accounts"):
+                token_accounts = data.get("result", {}).get("token_accounts")
+                if not token_accounts:
                     break
 
-                all_holders.extend(data["result"]["token_accounts"])
-                cursor = data["result"].get("cursor")
+                for account in token_accounts:
+                    amount = int(account["amount"])
+                    seen_amount += amount
+                    seen_accounts += 1
+                    entry = (amount, seen_accounts, account["owner"])
+                    if len(heap) < top_n:
+                        heapq.heappush(heap, entry)
+                    elif amount > heap[0][0]:
+                        heapq.heapreplace(heap, entry)
 
+                cursor = data["result"].get("cursor")
                 if not cursor:
                     break
+                if total_supply is not None and len(heap) == top_n and total_supply - seen_amount < heap[0][0]:
+                    logger.info(
+                        f"Stopped holder scan for {token_address} after {seen_accounts} accounts; "
+                        "remaining supply cannot enter the top holders"
+                    )
+                    break
 
-            if not all_holders:
+            if not heap:
                 return []
 
-            total_supply = sum(float(account["amount"]) for account in all_holders)
-
+            denominator = total_supply if total_supply else seen_amount
             holders = [
                 {
-                    "address": account["owner"],
-                    "amount": float(account["amount"]),
-                    "percentage": f"{(float(account['amount']) / total_supply * 100):.2f}",
+                    "address": owner,
+                    "amount": float(amount),
+                    "percentage": f"{(amount / denominator * 100):.2f}",
                 }
-                for account in all_holders
+                for amount, _, owner in sorted(heap, key=lambda entry: (-entry[0], entry[1]))
             ]
-
-            return sorted(holders, key=lambda x: x["amount"], reverse=True)[:top_n]
+            return holders
 
         except Exception as e:
             logger.error(f"Error querying token holders: {str(e)}")
@@ -282,32 +326,29 @@ class SolWalletAgent(MeshAgent):
             if not top_holders:
                 return {"error": "No valid holders found after filtering"}
 
-            batch_size = 3
-            common_tokens = {}
+            # Concurrency is bounded by request_semaphore inside _rate_limited_request.
+            holder_assets = await asyncio.gather(
+                *(self.get_wallet_assets(holder["address"]) for holder in top_holders), return_exceptions=True
+            )
 
-            for i in range(0, len(top_holders), batch_size):
-                batch = top_holders[i : i + batch_size]
-                for holder in batch:
-                    assets = await self.get_wallet_assets(holder["address"])
-
-                    if assets is None or (isinstance(assets, dict) and "error" in assets):
-                        continue
-
-                    for token in assets:
-                        token_address = token["token_address"]
-                        if token_address not in common_tokens:
-                            common_tokens[token_address] = {
-                                "token_address": token_address,
-                                "symbol": token["symbol"],
-                                "price_per_token": token["price_per_token"],
-                                "total_holding_value": 0,
-                                "holder_count": 0,
-                            }
+            common_tokens = {}
+            for assets in holder_assets:
+                if not assets or isinstance(assets, BaseException) or (isinstance(assets, dict) and "error" in assets):
+                    continue
 
-                        common_tokens[token_address]["total_holding_value"] += token["total_holding_value"]
-                        common_tokens[token_address]["holder_count"] += 1
+                for token in assets:
+                    token_address = token["token_address"]
+                    if token_address not in common_tokens:
+                        common_tokens[token_address] = {
+                            "token_address": token_address,
+                            "symbol": token["symbol"],
+                            "price_per_token": token["price_per_token"],
+                            "total_holding_value": 0,
+                            "holder_count": 0,
+                        }
 
-                await asyncio.sleep(1.0)
+                    common_tokens[token_address]["total_holding_value"] += token["total_holding_value"]
+                    common_tokens[token_address]["holder_count"] += 1
 
             # sort by total_holding_value and get top 5
             sorted_tokens = sorted(common_tokens.values(), key=lambda x: x["total_holding_value"], reverse=True)[:5]
@@ -1,11 +1,16 @@
 import json
 import logging
 import re
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from decorators import with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.dex_pairs import by_liquidity, by_score, filter_records, pair_records, top_k
+from mesh.utils.source_graph import SourceGraph
+from mesh.utils.token_identity_index import get_token_identity_index, normalize_address
+from mesh.utils.token_identity_index import normalize_chain as _normalize_platform_name
 
 logger = logging.getLogger(__name__)
 
@@ -36,24 +41,19 @@ ALLOWED_CHAINS = {
 }
 
 
-COINGECKO_TO_DEXSCREENER_PLATFORM = {
-    "binance-smart-chain": "bsc",
-    "arbitrum-one": "arbitrum",
-    "optimistic-ethereum": "optimism",
-    "polygon-pos": "polygon",
-    "sei-network": "sei",
-    "zora-network": "zora",
-    "blast-mainnet": "blast",
-}
-
 YF_DEFAULT_INTERVAL = "1d"
 YF_DEFAULT_PERIOD = "6mo"
 
-# Minimum 24h volume threshold for DEX pools (filters out low-activity/fake pools)
-MIN_POOL_VOLUME_24H = 2000
-
-# Minimum liquidity threshold for DEX pools (filters out scam/fake pools with wash trading)
-MIN_POOL_LIQUIDITY_USD = 4000
+# Per-source deadlines; a source that misses its deadline is reported as timed out and
+# the response is built from the sources that did answer.
+SOURCE_DEADLINES_SECONDS = {
+    "coingecko": 10,
+    "dexscreener": 8,
+    "gmgn": 8,
+    "funding_rates": 6,
+    "technical_indicators": 10,
+    "profile": 15,
+}
 
 # Common suffixes in crypto project names to strip before fuzzy matching
 COMMON_CRYPTO_SUFFIXES = {
@@ -96,17 +96,6 @@ def _normalize_chain(chain: Optional[str]) -> Optional[str]:
     return c
 
 
-def _normalize_platform_name(platform_id: str) -> str:
-    return COINGECKO_TO_DEXSCREENER_PLATFORM.get(platform_id, platform_id)
-
-
-def _safe_float(x) -> Optional[float]:
-    try:
-        return float(x)
-    except Exception:
-        return None
-
-
 def _uniq(seq: List[Any]) -> List[Any]:
     seen = set()
     out = []
@@ -177,95 +166,6 @@ def _clean_empty_fields(obj: Any) -> Any:
         return obj
 
 
-def _has_sufficient_volume(pair: Dict[str, Any]) -> bool:
-    """Check if a pair has sufficient 24h volume to be considered active.
-    Returns True if volume data is not available (benefit of the doubt).
-    """
-    volume_obj = pair.get("volume")
-    if not volume_obj:
-        return True  # No volume data available, don't filter
-
-    volume_24h = volume_obj.get("h24")
-    if volume_24h is None:
-        return True  # No 24h volume data, don't filter
-
-    return volume_24h >= MIN_POOL_VOLUME_24H
-
-
-def _has_sufficient_liquidity(pair: Dict[str, Any]) -> bool:
-    """Check if a pair has sufficient liquidity to be considered legitimate.
-    Filters out scam tokens with near-zero liquidity but fake/wash trading volume.
-    """
-    liquidity_obj = pair.get("liquidity")
-    if not liquidity_obj:
-        return False  # No liquidity data = likely scam
-
-    liquidity_usd = liquidity_obj.get("usd")
-    if liquidity_usd is None:
-        return False  # No USD liquidity = likely scam
-
-    return liquidity_usd >= MIN_POOL_LIQUIDITY_USD
-
-
-def _filter_pairs(pairs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Filter invalid pairs; apply volume and liquidity thresholds."""
-    if not pairs:
-        return pairs
-
-    valid = []
-    for p in pairs:
-        base = p.get("baseToken") or {}
-        quote = p.get("quoteToken") or {}
-        base_symbol = base.get("symbol", "").upper()
-        quote_symbol = quote.get("symbol", "").upper()
-
-        # Skip same-symbol pairs
-        if base_symbol and quote_symbol and base_symbol == quote_symbol:
-            logger.debug(
-                f"[token_resolver] Skipping invalid same-symbol pair: {base.get('symbol')}/{quote.get('symbol')}"
-            )
-            continue
-
-        # Skip pairs with insufficient liquidity (scam/wash trading filter)
-        if not _has_sufficient_liquidity(p):
-            liquidity_usd = (p.get("liquidity") or {}).get("usd", 0)
-            logger.debug(
-                f"[token_resolver] Skipping low-liquidity pair: "
-                f"{base.get('symbol')}/{quote.get('symbol')} "
-                f"(liq=${liquidity_usd:,.2f})"
-            )
-            continue
-
-        valid.append(p)
-
-    if not valid:
-        return valid
-
-    # If only 1 pair, don't apply volume/liquidity filter
-    if len(valid) == 1:
-        return valid
-
-    # Apply volume threshold only if at least one pair meets it
-    sufficient = []
-    insufficient = []
-    for p in valid:
-        if _has_sufficient_volume(p):
-            sufficient.append(p)
-        else:
-            insufficient.append(p)
-
-    if sufficient:
-        for p in insufficient:
-            logger.debug(
-                f"[token_resolver] Skipping low-volume pair: "
-                f"{(p.get('baseToken') or {}).get('symbol')}/{(p.get('quoteToken') or {}).get('symbol')} "
-                f"(vol=${(p.get('volume') or {}).get('h24', 0):,.0f})"
-            )
-        return sufficient
-
-    return valid
-
-
 def _extract_links_from_preview(preview: Dict[str, Any]) -> Dict[str, List]:
     """Extract standardized links structure from pair preview"""
     return {
@@ -298,21 +198,6 @@ def _calculate_name_match_score(query: str, token_name: str, token_symbol: str)
     return 0
 
 
-def _calculate_pair_score(liquidity_usd: float, volume24h_usd: float) -> float:
-    if liquidity_usd > 300000:
-        return volume24h_usd * 0.2 + liquidity_usd * 0.8
-    return liquidity_usd
-
-
-def _calculate_token_score(
-    query: str, token_name: str, token_symbol: str, liquidity_usd: float, volume24h_usd: float
-) -> float:
-    """Calculate total score including name match bonus and liquidity/volume."""
-    name_bonus = _calculate_name_match_score(query, token_name, token_symbol)
-    pair_score = _calculate_pair_score(liquidity_usd, volume24h_usd)
-    return name_bonus + pair_score
-
-
 # -----------------------------
 # Agent
 # -----------------------------
@@ -551,27 +436,6 @@ class TokenResolverAgent(MeshAgent):
 
         return "unknown"
 
-    def _pair_to_preview(self, p: Dict[str, Any]) -> Dict[str, Any]:
-        vol = (p.get("volume") or {}).get("h24")
-        liq = (p.get("liquidity") or {}).get("usd")
-        info = p.get("info") or {}
-        chain = p.get("chainId")
-        pair_address = p.get("pairAddress")
-        link = f"https://dexscreener.com/{chain}/{pair_address}"
-        return {
-            "link": link,
-            "dex": p.get("dexId"),
-            "price_usd": _safe_float(p.get("priceUsd")),
-            "volume24h_usd": _safe_float(vol),
-            "liquidity_usd": _safe_float(liq),
-            "txns24h": (p.get("txns") or {}).get("h24"),
-            "price_change": p.get("priceChange"),
-            "market_cap": _safe_float(p.get("marketCap")),
-            "fdv": _safe_float(p.get("fdv")),
-            "websites": info.get("websites") or [],
-            "socials": info.get("socials") or [],
-        }
-
     def _merge_links(self, current: Dict[str, Any], add: Dict[str, Any]) -> Dict[str, Any]:
         out = dict(current or {})
         if not add:
@@ -612,12 +476,15 @@ class TokenResolverAgent(MeshAgent):
         )
 
         if profile_result.get("status") == "success":
-            result["profile"] = profile_result.get("data", {})
+            profile = profile_result.get("data", {})
+            profile.pop("source_latency", None)
+            result["profile"] = profile
 
         return result
 
     @with_retry(max_retries=2)
     async def _token_search(self, query: str, chain: Optional[str], qtype: str, limit: int) -> Dict[str, Any]:
+        started = time.perf_counter()
         chain = _normalize_chain(chain)
         results: List[Dict[str, Any]] = []
 
@@ -625,29 +492,59 @@ class TokenResolverAgent(MeshAgent):
             # Fallback: treat as symbol for backwards compatibility
             qtype = "symbol"
 
+        graph = SourceGraph()
         if qtype == "address":
-            pairs_res = await self._ds_token_pairs(chain or "all", query)
+            graph.add(
+                "dexscreener",
+                lambda _: self._ds_token_pairs(chain or "all", query),
+                deadline_seconds=SOURCE_DEADLINES_SECONDS["dexscreener"],
+            )
+        else:
+            # The CoinGecko agent tries exact matches, then its search API, then an approximate name match
+            cg_query = query.lower() if qtype == "coingecko_id" else query
+            graph.add(
+                "coingecko",
+                lambda _: self._cg_get_token_info(cg_query),
+                deadline_seconds=SOURCE_DEADLINES_SECONDS["coingecko"],
+            )
+            graph.add(
+                "dexscreener",
+                lambda _: self._ds_search_pairs(query),
+                deadline_seconds=SOURCE_DEADLINES_SECONDS["dexscreener"],
+            )
+        sources = await graph.run()
+
+        def _empty_response() -> Dict[str, Any]:
+            return {
+                "status": "success",
+                "data": {
+                    "results": results,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "source_latency": graph.timings,
+                },
+            }
+
+        if qtype == "address":
+            pairs_res = sources["dexscreener"]
             pairs = ((pairs_res or {}).get("data") or {}).get("pairs") or []
             if not pairs:
-                return {"status": "success", "data": {"results": results, "timestamp": datetime.utcnow().isoformat()}}
+                return _empty_response()
 
-            pairs = _filter_pairs(pairs)
-            if not pairs:
-                return {"status": "success", "data": {"results": results, "timestamp": datetime.utcnow().isoformat()}}
+            records = filter_records(pair_records(pairs))
+            if not records:
+                return _empty_response()
 
             best_by_token: Dict[str, Dict[str, Any]] = {}
-            for p in pairs:
-                matched_sides = p.get("matched_sides") or []
+            for rec in records:
+                matched_sides = rec.matched_sides
                 if not matched_sides:
                     continue
-                base = p.get("baseToken") or {}
-                quote = p.get("quoteToken") or {}
-                ch = p.get("chainId")
-                preview = self._pair_to_preview(p)
+                ch = rec.chain
+                preview = rec.preview
                 ds_links = _extract_links_from_preview(preview)
-                pair_score = _calculate_pair_score(preview.get("liquidity_usd") or 0, preview.get("volume24h_usd") or 0)
+                pair_score = rec.score
                 for side in matched_sides:
-                    token = base if side == "base" else quote
+                    token = rec.base if side == "base" else rec.quote
                     addr = token.get("address")
                     if not addr:
                         continue
@@ -659,16 +556,16 @@ class TokenResolverAgent(MeshAgent):
                             "symbol": token.get("symbol"),
                             "chain": ch,
                             "address": addr,
-                            "coingecko_id": None,
+                            "coingecko_id": get_token_identity_index().coingecko_id_for_contract(ch, addr),
                             "price_usd": preview.get("price_usd"),
                             "market_cap_usd": None,
                             "top_pairs": [preview],
                             "links": self._merge_links({}, ds_links),
-                            "_all_pairs": [p],
+                            "_all_pairs": [rec],
                             "_max_score": pair_score,
                         }
                     else:
-                        best_by_token[token_key]["_all_pairs"].append(p)
+                        best_by_token[token_key]["_all_pairs"].append(rec)
                         best_by_token[token_key]["links"] = self._merge_links(
                             best_by_token[token_key]["links"], ds_links
                         )
@@ -678,24 +575,13 @@ class TokenResolverAgent(MeshAgent):
 
             out = []
             for token_key, obj in best_by_token.items():
-                previews = sorted(
-                    [self._pair_to_preview(p) for p in obj["_all_pairs"]],
-                    key=lambda x: _calculate_pair_score(x.get("liquidity_usd") or 0, x.get("volume24h_usd") or 0),
-                    reverse=True,
-                )[:3]
-                obj["top_pairs"] = previews
-                obj.pop("_all_pairs", None)
-                obj.pop("_max_score", None)
+                obj["top_pairs"] = [dict(r.preview) for r in top_k(obj.pop("_all_pairs"), 3, by_score)]
+                obj["_score"] = obj.pop("_max_score")
                 out.append(obj)
 
-            out = sorted(
-                out,
-                key=lambda x: _calculate_pair_score(
-                    x.get("top_pairs", [{}])[0].get("liquidity_usd") or 0,
-                    x.get("top_pairs", [{}])[0].get("volume24h_usd") or 0,
-                ),
-                reverse=True,
-            )[:limit]
+            out = top_k(out, limit, key=lambda x: x["_score"])
+            for obj in out:
+                obj.pop("_score", None)
 
         # Symbol/Name/CGID path
         else:  # qtype in {"symbol", "name", "coingecko_id"}
@@ -703,9 +589,8 @@ class TokenResolverAgent(MeshAgent):
             contract_to_cgid_map = {}
 
             if qtype in {"symbol", "name", "coingecko_id"}:
-                cg_query = query.lower() if qtype == "coingecko_id" else query
-                cg = await self._cg_get_token_info(cg_query)
-                if cg and cg.get("status") != "error":
+                cg = sources["coingecko"]
+                if cg and cg.get("status") not in {"error", "timeout"}:
                     ti = cg.get("token_info") or {}
                     mm = cg.get("market_metrics") or {}
                     links = ti.get("links") or {}
@@ -734,62 +619,48 @@ class TokenResolverAgent(MeshAgent):
                     for platform_id, address in platforms.items():
                         if address and cgid:
                             ds_chain = _normalize_platform_name(platform_id)
-                            contract_key = f"{ds_chain}:{address}"
+                            contract_key = f"{ds_chain}:{normalize_address(address)}"
                             contract_to_cgid_map[contract_key] = cgid
                     logger.info(
                         f"[token_resolver] CoinGecko platforms: {len(platforms)}, contract mappings: {len(contract_to_cgid_map)}"
                     )
 
-            ds = await self._ds_search_pairs(query)
+            ds = sources["dexscreener"] or {}
             pairs = ((ds or {}).get("data") or {}).get("pairs") or ds.get("pairs") or []
             logger.info(f"[token_resolver] DexScreener returned {len(pairs)} pairs")
             token_map: Dict[str, Dict[str, Any]] = {}
 
-            # Pre-filter pairs: keep only those with at least one token that fuzzy-matches the query
-            def _pair_has_fuzzy_match(pair: Dict[str, Any]) -> bool:
-                selected_sides = pair.get("selected_sides") or []
-                base = pair.get("baseToken") or {}
-                quote = pair.get("quoteToken") or {}
-                if "base" in selected_sides:
-                    if _is_fuzzy_match(query, base.get("name", ""), base.get("symbol", "")):
-                        return True
-                if "quote" in selected_sides:
-                    if _is_fuzzy_match(query, quote.get("name", ""), quote.get("symbol", "")):
-                        return True
-                return False
-
-            pairs = [p for p in pairs if _pair_has_fuzzy_match(p)]
-            logger.info(f"[token_resolver] After fuzzy pre-filter: {len(pairs)} pairs")
-
-            pairs = _filter_pairs(pairs)
-            for p in pairs:
-                base = p.get("baseToken")
-                quote = p.get("quoteToken")
-                if not base or not quote:
-                    continue
-                selected_sides = p.get("selected_sides") or []
-                if not selected_sides:
+            # Pre-filter pairs: keep only those with at least one selected token that fuzzy-matches the query
+            fuzzy_tokens: Dict[int, List[Dict[str, Any]]] = {}
+            records = []
+            for rec in pair_records(pairs):
+                selected_sides = rec.selected_sides
+                matching = [
+                    tok
+                    for side, tok in (("base", rec.base), ("quote", rec.quote))
+                    if side in selected_sides and _is_fuzzy_match(query, tok.get("name", ""), tok.get("symbol", ""))
+                ]
+                if matching:
+                    fuzzy_tokens[id(rec)] = matching
+                    records.append(rec)
+            logger.info(f"[token_resolver] After fuzzy pre-filter: {len(records)} pairs")
+
+            for rec in filter_records(records):
+                base = rec.base
+                if not base or not rec.quote:
                     continue
-                selected = []
-                if "base" in selected_sides:
-                    selected.append(base)
-                if "quote" in selected_sides:
-                    selected.append(quote)
 
                 # Extract pair-level links once
-                preview = self._pair_to_preview(p)
-                matched_sides = set(p.get("matched_sides") or [])
+                preview = rec.preview
+                matched_sides = set(rec.matched_sides)
 
-                for tok in selected:
+                # Only selected tokens that fuzzy-match the query; unrelated tokens are skipped
+                for tok in fuzzy_tokens[id(rec)]:
                     addr = tok.get("address")
-                    ch = p.get("chainId")
+                    ch = rec.chain
                     if not addr or not ch:
                         continue
 
-                    # Filter out completely unrelated tokens using fuzzy matching
-                    if not _is_fuzzy_match(query, tok.get("name", ""), tok.get("symbol", "")):
-                        continue
-
                     token_key = f"{ch}:{addr}"
 
                     # Only assign pair metadata (websites/socials) if this token matches the query
@@ -798,9 +669,7 @@ class TokenResolverAgent(MeshAgent):
 
                     ds_links = _extract_links_from_preview(preview) if should_get_links else {}
                     current = token_map.get(token_key)
-                    pair_score = _calculate_pair_score(
-                        preview.get("liquidity_usd") or 0, preview.get("volume24h_usd") or 0
-                    )
+                    pair_score = rec.score
                     if not current:
                         # First time seeing this token
                         token_map[token_key] = {
@@ -813,12 +682,12 @@ class TokenResolverAgent(MeshAgent):
                             "market_cap_usd": None,
                             "top_pairs": [preview],
                             "links": self._merge_links({}, ds_links),
-                            "_all_pairs": [p],
+                            "_all_pairs": [rec],
                             "_max_score": pair_score,
                         }
                     else:
                         # Add this pair to the token's collection
-                        token_map[token_key]["_all_pairs"].append(p)
+                        token_map[token_key]["_all_pairs"].append(rec)
                         token_map[token_key]["links"] = self._merge_links(token_map[token_key]["links"], ds_links)
 
                         # Update metadata if this pair has higher score
@@ -829,37 +698,31 @@ class TokenResolverAgent(MeshAgent):
             ds_candidates = []
             linked_count = 0
             for token_key, obj in token_map.items():
-                # Try to link with CoinGecko ID
-                if contract_to_cgid_map and not obj.get("coingecko_id"):
+                # Try to link with CoinGecko ID: the anchor's own platforms first, then the identity index
+                if not obj.get("coingecko_id"):
                     obj_chain = obj.get("chain")
                     address = obj.get("address")
                     if obj_chain and address:
-                        contract_key = f"{obj_chain}:{address}"
-                        if contract_key in contract_to_cgid_map:
-                            obj["coingecko_id"] = contract_to_cgid_map[contract_key]
+                        contract_key = f"{obj_chain}:{normalize_address(address)}"
+                        cgid = contract_to_cgid_map.get(contract_key)
+                        if not cgid:
+                            cgid = get_token_identity_index().coingecko_id_for_contract(obj_chain, address)
+                        if cgid:
+                            obj["coingecko_id"] = cgid
                             linked_count += 1
 
-                previews = sorted(
-                    [self._pair_to_preview(p) for p in obj["_all_pairs"]],
-                    key=lambda x: _calculate_pair_score(x.get("liquidity_usd") or 0, x.get("volume24h_usd") or 0),
-                    reverse=True,
-                )[:3]
-                obj["top_pairs"] = previews
-                obj.pop("_all_pairs", None)
+                top = top_k(obj.pop("_all_pairs"), 3, by_score)
+                obj["top_pairs"] = [dict(r.preview) for r in top]
                 obj.pop("_max_score", None)  # Clean up internal tracking field
+                obj["_score"] = (
+                    _calculate_name_match_score(query, obj.get("name", ""), obj.get("symbol", "")) + top[0].score
+                )
                 ds_candidates.append(obj)
 
-            ds_candidates = sorted(
-                ds_candidates,
-                key=lambda x: _calculate_token_score(
-                    query,
-                    x.get("name", ""),
-                    x.get("symbol", ""),
-                    x.get("top_pairs", [{}])[0].get("liquidity_usd") or 0,
-                    x.get("top_pairs", [{}])[0].get("volume24h_usd") or 0,
-                ),
-                reverse=True,
-            )
+            # Every candidate is kept (the CoinGecko merge below looks at all of them), so this one is a full sort.
+            ds_candidates.sort(key=lambda x: x["_score"], reverse=True)
+            for obj in ds_candidates:
+                obj.pop("_score", None)
             logger.info(
                 f"[token_resolver] Token map processed: {len(token_map)} unique tokens, {len(ds_candidates)} final candidates, {linked_count} linked to CoinGecko"
             )
@@ -904,20 +767,31 @@ class TokenResolverAgent(MeshAgent):
 
         final_results = out[:limit]
 
-        enriched_results = []
-        for result in final_results:
+        # Profiles for every result with a CoinGecko ID are independent of each other.
+        enrich_graph = SourceGraph(default_deadline_seconds=SOURCE_DEADLINES_SECONDS["profile"])
+        for i, result in enumerate(final_results):
             if result.get("coingecko_id"):
-                enriched = await self._enrich_with_profile_data(result)
-                enriched_results.append(enriched)
-            else:
-                enriched_results.append(result)
+                enrich_graph.add(
+                    f"profile:{result['coingecko_id']}:{i}", lambda _, r=result: self._enrich_with_profile_data(r)
+                )
+        await enrich_graph.run()
+        source_latency = {name: t for name, t in graph.timings.items() if name != "total"}
+        source_latency.update(enrich_graph.timings)
+        source_latency["total"] = {"ms": round((time.perf_counter() - started) * 1000, 1)}
 
         # Clean empty fields from results
-        cleaned_results = [_clean_empty_fields(result) for result in enriched_results]
+        cleaned_results = [_clean_empty_fields(result) for result in final_results]
 
         logger.info(f"[token_resolver] Final results: {len(final_results)}/{len(out)} (limit={limit})")
 
-        return {"status": "success", "data": {"results": cleaned_results, "timestamp": datetime.utcnow().isoformat()}}
+        return {
+            "status": "success",
+            "data": {
+                "results": cleaned_results,
+                "timestamp": datetime.utcnow().isoformat(),
+                "source_latency": source_latency,
+            },
+        }
 
     @with_retry(max_retries=2)
     async def _token_profile(
@@ -956,96 +830,156 @@ class TokenResolverAgent(MeshAgent):
         if is_contract:
             prof["contracts"][chain] = address
 
-        # Always get CoinGecko data when available
+        # Source graph: CoinGecko, DexScreener and GMGN only need the request inputs; funding
+        # rates and indicators need a symbol, which may have to come from CoinGecko/DexScreener.
         cg_query = coingecko_id
         if not cg_query and symbol:
             cg_query = symbol
+        want_pairs = "pairs" in include or (not include)
+        gmgn_chain = {"ethereum": "eth", "eth": "eth", "base": "base", "bsc": "bsc", "solana": "sol"}.get(chain or "")
+
+        def _resolved_symbol(results: Dict[str, Any]) -> str:
+            if symbol:
+                return symbol.upper()
+            ti = (results.get("coingecko") or {}).get("token_info") or {}
+            if ti.get("symbol"):
+                return ti["symbol"].upper()
+            records = filter_records(pair_records(((results.get("dexscreener") or {}).get("data") or {}).get("pairs")))
+            return records[0].base_symbol if records else ""
+
+        symbol_deps = () if symbol else ("coingecko", "dexscreener")
+
+        def _funding_source(results: Dict[str, Any]):
+            sym = _resolved_symbol(results)
+            return self._funding_rates(sym) if sym else None
+
+        def _indicator_source(results: Dict[str, Any]):
+            sym = _resolved_symbol(results)
+            if not sym:
+                return None
+            return self._yahoo_indicator_snapshot(
+                f"{sym}-USD", interval=indicator_interval or YF_DEFAULT_INTERVAL, period=YF_DEFAULT_PERIOD
+            )
 
-        if cg_query:
-            cg = await self._cg_get_token_info(cg_query)
-            if cg and not cg.get("error"):
-                ti = cg.get("token_info") or {}
-                mm = cg.get("market_metrics") or {}
-                prof["name"] = prof["name"] or ti.get("name")
-                if ti.get("symbol"):
-                    prof["symbol"] = (ti.get("symbol") or "").upper()
-                if not prof.get("coingecko_id"):
-                    prof["coingecko_id"] = ti.get("id")
-                prof["categories"] = ti.get("categories") or prof["categories"]
-                links = ti.get("links") or {}
-                prof["links"] = self._merge_links(prof["links"], links)
+        graph = SourceGraph()
+        graph.add(
+            "coingecko",
+            lambda _: self._cg_get_token_info(cg_query) if cg_query else None,
+            deadline_seconds=SOURCE_DEADLINES_SECONDS["coingecko"],
+        )
+        if want_pairs and is_native and prof.get("symbol"):
+            graph.add(
+                "dexscreener",
+                lambda _: self._ds_search_pairs(prof["symbol"]),
+                deadline_seconds=SOURCE_DEADLINES_SECONDS["dexscreener"],
+            )
+        elif (want_pairs or "funding_rates" in include or "technical_indicators" in include) and is_contract:
+            graph.add(
+                "dexscreener",
+                lambda _: self._ds_token_pairs(chain or "all", address),
+                deadline_seconds=SOURCE_DEADLINES_SECONDS["dexscreener"],
+            )
+        else:
+            graph.add("dexscreener", lambda _: None)
+        if is_contract and gmgn_chain:
+            graph.add(
+                "gmgn",
+                lambda _: self._gmgn_token_info(gmgn_chain, address),
+                deadline_seconds=SOURCE_DEADLINES_SECONDS["gmgn"],
+            )
+        if "funding_rates" in include:
+            graph.add(
+                "funding_rates",
+                _funding_source,
+                deps=symbol_deps,
+                deadline_seconds=SOURCE_DEADLINES_SECONDS["funding_rates"],
+            )
+        if "technical_indicators" in include:
+            graph.add(
+                "technical_indicators",
+                _indicator_source,
+                deps=symbol_deps,
+                deadline_seconds=SOURCE_DEADLINES_SECONDS["technical_indicators"],
+            )
+        sources = await graph.run()
+
+        cg = sources.get("coingecko")
+        if cg and not cg.get("error"):
+            ti = cg.get("token_info") or {}
+            mm = cg.get("market_metrics") or {}
+            prof["name"] = prof["name"] or ti.get("name")
+            if ti.get("symbol"):
+                prof["symbol"] = (ti.get("symbol") or "").upper()
+            if not prof.get("coingecko_id"):
+                prof["coingecko_id"] = ti.get("id")
+            prof["categories"] = ti.get("categories") or prof["categories"]
+            links = ti.get("links") or {}
+            prof["links"] = self._merge_links(prof["links"], links)
+            pm = cg.get("price_metrics") or {}
+            prof["fundamentals"] = {
+                "price_usd": mm.get("current_price_usd"),
+                "market_cap_usd": mm.get("market_cap_usd"),
+                "fdv_usd": (cg.get("market_metrics") or {}).get("fully_diluted_valuation_usd"),
+                "volume_all_cex_dex_24h_usd": mm.get("total_volume_usd"),
+                "price_change_24h": pm.get("price_change_24h"),
+                "price_change_percentage_24h": pm.get("price_change_percentage_24h"),
+            }
+            cex_data = cg.get("cex_data")
+            if cex_data:
+                # Transform CEX data: volume is in native tokens, convert to USD
+                current_price = mm.get("current_price_usd")
+                transformed_cex_data = []
+                for cex_entry in cex_data:
+                    volume_tokens = cex_entry.get("volume_24h")
+                    transformed_entry = {
+                        "name": cex_entry.get("cex_name"),
+                        "base_token": cex_entry.get("base_token"),
+                    }
+                    # Calculate USD volume if price and volume are available
+                    if current_price is not None and volume_tokens is not None:
+                        transformed_entry["volume_usd_24h"] = volume_tokens * current_price
+                    transformed_cex_data.append(transformed_entry)
+                prof["cex_data"] = transformed_cex_data
+            if cg.get("supply_info") or cg.get("price_metrics"):
+                si = cg.get("supply_info") or {}
                 pm = cg.get("price_metrics") or {}
-                prof["fundamentals"] = {
-                    "price_usd": mm.get("current_price_usd"),
-                    "market_cap_usd": mm.get("market_cap_usd"),
-                    "fdv_usd": (cg.get("market_metrics") or {}).get("fully_diluted_valuation_usd"),
-                    "volume_all_cex_dex_24h_usd": mm.get("total_volume_usd"),
-                    "price_change_24h": pm.get("price_change_24h"),
-                    "price_change_percentage_24h": pm.get("price_change_percentage_24h"),
+                prof["supply"] = {
+                    "circulating": si.get("circulating_supply"),
+                    "total": si.get("total_supply"),
+                    "max": si.get("max_supply"),
+                }
+                prof["price_extremes"] = {
+                    "ath_usd": pm.get("ath_usd"),
+                    "ath_date": pm.get("ath_date"),
+                    "atl_usd": pm.get("atl_usd"),
+                    "atl_date": pm.get("atl_date"),
                 }
-                cex_data = cg.get("cex_data")
-                if cex_data:
-                    # Transform CEX data: volume is in native tokens, convert to USD
-                    current_price = mm.get("current_price_usd")
-                    transformed_cex_data = []
-                    for cex_entry in cex_data:
-                        volume_tokens = cex_entry.get("volume_24h")
-                        transformed_entry = {
-                            "name": cex_entry.get("cex_name"),
-                            "base_token": cex_entry.get("base_token"),
-                        }
-                        # Calculate USD volume if price and volume are available
-                        if current_price is not None and volume_tokens is not None:
-                            transformed_entry["volume_usd_24h"] = volume_tokens * current_price
-                        transformed_cex_data.append(transformed_entry)
-                    prof["cex_data"] = transformed_cex_data
-                if cg.get("supply_info") or cg.get("price_metrics"):
-                    si = cg.get("supply_info") or {}
-                    pm = cg.get("price_metrics") or {}
-                    prof["supply"] = {
-                        "circulating": si.get("circulating_supply"),
-                        "total": si.get("total_supply"),
-                        "max": si.get("max_supply"),
-                    }
-                    prof["price_extremes"] = {
-                        "ath_usd": pm.get("ath_usd"),
-                        "ath_date": pm.get("ath_date"),
-                        "atl_usd": pm.get("atl_usd"),
-                        "atl_date": pm.get("atl_date"),
-                    }
 
         # Pairs (DexScreener) and collect websites/socials
-        if "pairs" in include or (not include):
+        if want_pairs:
             pairs_out = []
             if is_native and prof.get("symbol"):
-                ds = await self._ds_search_pairs(prof["symbol"])
+                ds = sources.get("dexscreener") or {}
                 pairs = ((ds or {}).get("data") or {}).get("pairs") or ds.get("pairs") or []
-                cand_previews = []
-                pairs = _filter_pairs(pairs)
-                for p in pairs:
-                    matched_sides = p.get("matched_sides") or []
-                    if not matched_sides:
+                candidates = []
+                for rec in filter_records(pair_records(pairs)):
+                    if not rec.matched_sides:
                         continue
-                    prev = self._pair_to_preview(p)
-                    cand_previews.append(prev)
+                    candidates.append(rec)
                     # merge pair websites/socials into links
-                    ds_links = _extract_links_from_preview(prev)
+                    ds_links = _extract_links_from_preview(rec.preview)
                     prof["links"] = self._merge_links(prof["links"], ds_links)
-                pairs_out = sorted(cand_previews, key=lambda x: x.get("liquidity_usd") or 0, reverse=True)[:top_n_pairs]
+                pairs_out = [dict(r.preview) for r in top_k(candidates, top_n_pairs, by_liquidity)]
             elif is_contract and chain and address:
-                ds = await self._ds_token_pairs(chain or "all", address)
+                ds = sources.get("dexscreener") or {}
                 ps = ((ds or {}).get("data") or {}).get("pairs") or []
 
                 # Filter out invalid same-symbol pairs and apply volume threshold when possible
-                valid_pairs = _filter_pairs(ps)
-
-                pairs_out = sorted(
-                    [self._pair_to_preview(p) for p in valid_pairs],
-                    key=lambda x: x.get("liquidity_usd") or 0,
-                    reverse=True,
-                )[:top_n_pairs]
-                if valid_pairs:
-                    base = valid_pairs[0].get("baseToken") or {}
+                valid_records = filter_records(pair_records(ps))
+
+                pairs_out = [dict(r.preview) for r in top_k(valid_records, top_n_pairs, by_liquidity)]
+                if valid_records:
+                    base = valid_records[0].base
                     prof["name"] = prof["name"] or base.get("name")
                     prof["symbol"] = prof["symbol"] or (base.get("symbol") or "").upper()
                 # merge links from pairs
@@ -1058,33 +992,25 @@ class TokenResolverAgent(MeshAgent):
                 prof["best_pool"] = pairs_out[0]
 
         # Optional: GMGN (if contract + chain supported by gmgn)
-        if is_contract and chain and address:
-            if chain in {"eth", "ethereum", "base", "bsc", "solana"}:
-                ch_map = {"ethereum": "eth", "eth": "eth", "base": "base", "bsc": "bsc", "solana": "sol"}
-                gmgn = await self._gmgn_token_info(ch_map.get(chain, chain), address)
-                if gmgn and not gmgn.get("error") and gmgn.get("status") != "no_data":
-                    result_str = gmgn.get("result", "")
-
-                    if "No token found" in result_str:
-                        logger.info(f"[token_resolver] GMGN: {result_str}")
-                    else:
-                        prof["extras"]["gmgn"] = gmgn
+        gmgn = sources.get("gmgn")
+        if gmgn and not gmgn.get("error") and gmgn.get("status") != "no_data":
+            result_str = gmgn.get("result", "")
+
+            if "No token found" in result_str:
+                logger.info(f"[token_resolver] GMGN: {result_str}")
+            else:
+                prof["extras"]["gmgn"] = gmgn
 
         # Optional: Funding rates + Technical indicators for large caps
-        sym = (symbol or prof.get("symbol") or "").upper()
-        if "funding_rates" in include:
-            fr = await self._funding_rates(sym)
-            if fr and not fr.get("error"):
-                prof["extras"]["funding_rates"] = fr
-
-        if "technical_indicators" in include and sym:
-            yf_symbol = f"{sym}-USD"
-            ind = await self._yahoo_indicator_snapshot(
-                yf_symbol, interval=indicator_interval or YF_DEFAULT_INTERVAL, period=YF_DEFAULT_PERIOD
-            )
-            if ind and not ind.get("error") and ind.get("status") != "no_data":
-                prof["extras"]["technical_indicators"] = ind
+        fr = sources.get("funding_rates")
+        if fr and not fr.get("error"):
+            prof["extras"]["funding_rates"] = fr
+
+        ind = sources.get("technical_indicators")
+        if ind and not ind.get("error") and ind.get("status") != "no_data":
+            prof["extras"]["technical_indicators"] = ind
 
+        prof["source_latency"] = graph.timings
         return {"status": "success", "data": prof}
 
     # -----------------------------
@@ -2,6 +2,7 @@ import asyncio
 import json
 import os
 import re
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -12,12 +13,23 @@ from loguru import logger
 
 from decorators import with_cache
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.twitter_entity_store import get_twitter_entity_store, normalize_username, tweet_id_value
 
 load_dotenv()
 
 DEFAULT_TIMELINE_LIMIT = 20
 FXTWITTER_API_BASE = "https://api.fxtwitter.com"
 
+# Latest-tweets requests are served from the shared entity store: a timeline checked within
+# TIMELINE_FRESH_SECONDS is served as held; otherwise a small probe page fetches only tweets
+# newer than the held ones. The first page is refetched in full after TIMELINE_MAX_AGE_SECONDS
+# so engagement numbers do not go stale.
+TIMELINE_FRESH_SECONDS = 60
+TIMELINE_MAX_AGE_SECONDS = 1800
+INCREMENTAL_PROBE_COUNT = 5
+# Cursors into a held timeline ("held:<tweet_id>") continue after that tweet.
+HELD_CURSOR_PREFIX = "held:"
+
 
 def _clean_tweet_text(text: str) -> str:
     if not text:
@@ -200,7 +212,7 @@ class TwitterInfoAgent(MeshAgent):
     # ------------------------------------------------------------------------
     def _clean_username(self, username: str) -> str:
         """Remove @ symbol if present in username"""
-        return username.strip().lstrip("@")
+        return normalize_username(username)
 
     def _is_numeric_id(self, input_str: str) -> bool:
         """Check if the input is a numeric ID"""
@@ -425,6 +437,7 @@ class TwitterInfoAgent(MeshAgent):
         }
 
         tweets = [self._simplify_apify_tweet(t) for t in items[:limit]]
+        get_twitter_entity_store().put_tweets(tweets)
         logger.info(f"Apify fallback: retrieved {len(tweets)} tweets for @{clean_username}")
         return {"profile": profile, "tweets": tweets}
 
@@ -450,6 +463,7 @@ class TwitterInfoAgent(MeshAgent):
             return {"query": query, "tweets": [], "result_count": 0}
 
         tweets = [self._simplify_apify_tweet(t) for t in items[:limit]]
+        get_twitter_entity_store().put_tweets(tweets)
         logger.info(f"Apify fallback: retrieved {len(tweets)} tweets for query '{query}'")
         return {"query": query, "tweets": tweets, "result_count": len(tweets)}
 
@@ -468,17 +482,30 @@ class TwitterInfoAgent(MeshAgent):
             return {"error": f"No tweet found for ID {tweet_id}"}
 
         main_tweet = self._simplify_apify_tweet(items[0])
+        get_twitter_entity_store().put_tweets([main_tweet])
         logger.info(f"Apify fallback: retrieved tweet detail for {tweet_id}")
         return {"main_tweet": main_tweet}
 
     # ------------------------------------------------------------------------
     #                      TWITTER API-SPECIFIC METHODS
     # ------------------------------------------------------------------------
-    @with_cache(ttl_seconds=300)
     async def get_user_id(self, identifier: str) -> Dict:
-        """Fetch Twitter user ID and profile information using GraphQL endpoint"""
+        """Fetch Twitter user ID and profile information using GraphQL endpoint
+
+        Profiles come from the shared entity store while fresh. The ID behind a screen name never
+        changes, so a stale profile still answers when the refresh fails (or the input is a numeric
+        ID, which the GraphQL endpoint cannot look up).
+        """
+        store = get_twitter_entity_store()
+        held = store.get_user(identifier)
+        if held:
+            return {"profile": held}
+
         try:
             if self._is_numeric_id(identifier):
+                stale = store.get_user(identifier, max_age_seconds=None)
+                if stale:
+                    return {"profile": stale}
                 logger.warning(
                     f"Numeric user ID {identifier} not supported by GraphQL endpoint, will try Apify fallback"
                 )
@@ -495,7 +522,8 @@ class TwitterInfoAgent(MeshAgent):
 
             if "error" in response_data:
                 logger.error(f"Error fetching user profile: {response_data['error']}")
-                return response_data
+                stale = store.get_user(identifier, max_age_seconds=None)
+                return {"profile": stale} if stale else response_data
 
             # Transform GraphQL response to match expected schema
             user_result = response_data.get("data", {}).get("user", {}).get("result", {})
@@ -519,15 +547,15 @@ class TwitterInfoAgent(MeshAgent):
             }
 
             logger.info(f"Successfully fetched profile for user: {profile_info.get('screen_name')}")
+            store.put_user(profile_info)
             return {"profile": profile_info}
 
         except Exception as e:
             logger.error(f"Error in get_user_id: {e}")
             return {"error": f"Failed to fetch user profile: {str(e)}"}
 
-    @with_cache(ttl_seconds=300)
-    async def get_tweets(self, user_id: str, limit: int = DEFAULT_TIMELINE_LIMIT, cursor: Optional[str] = None) -> Dict:
-        params = {"user_id": user_id, "count": min(limit, 50)}
+    async def _fetch_timeline_page(self, user_id: str, count: int, cursor: Optional[str]) -> Dict:
+        params = {"user_id": user_id, "count": min(count, 50)}
         if cursor:
             params["cursor"] = cursor
         tweets_data = await self._api_request(
@@ -542,8 +570,89 @@ class TwitterInfoAgent(MeshAgent):
         next_cursor = (root or tweets_data).get("cursor")
 
         cleaned = [self._simplify_tweet_data(t) for t in tweets]
+        get_twitter_entity_store().put_tweets(cleaned)
         return {"tweets": cleaned, "next_cursor": next_cursor}
 
+    @with_cache(ttl_seconds=300)
+    async def _timeline_page_at(self, user_id: str, limit: int, cursor: str) -> Dict:
+        return await self._fetch_timeline_page(user_id, limit, cursor)
+
+    def _timeline_window(self, timeline: Dict[str, Any], start: int, limit: int) -> Optional[Dict]:
+        """Tweets [start, start + limit) of a held timeline; None if any of them was evicted."""
+        ids = timeline["ids"][start : start + limit]
+        held = get_twitter_entity_store().get_tweets(ids, max_age_seconds=None)
+        if len(held) < len(ids):
+            return None
+        if start + limit < len(timeline["ids"]):
+            next_cursor = f"{HELD_CURSOR_PREFIX}{ids[-1]}"
+        else:
+            next_cursor = timeline["tail_cursor"]
+        return {"tweets": [held[tweet_id] for tweet_id in ids], "next_cursor": next_cursor}
+
+    async def _refetch_timeline(self, user_id: str, limit: int) -> Dict:
+        page = await self._fetch_timeline_page(user_id, limit, None)
+        if "error" not in page:
+            ids = [t["id"] for t in page["tweets"] if t.get("id")]
+            get_twitter_entity_store().put_timeline(user_id, ids, page.get("next_cursor"))
+        return page
+
+    async def _latest_tweets(self, user_id: str, limit: int) -> Dict:
+        store = get_twitter_entity_store()
+        timeline = store.get_timeline(user_id)
+        now = time.time()
+        if (
+            timeline is None
+            or now - timeline["fetched_at"] > TIMELINE_MAX_AGE_SECONDS
+            or (len(timeline["ids"]) < limit and timeline["tail_cursor"])
+        ):
+            return await self._refetch_timeline(user_id, limit)
+
+        if now - timeline["checked_at"] > TIMELINE_FRESH_SECONDS:
+            probe = await self._fetch_timeline_page(user_id, INCREMENTAL_PROBE_COUNT, None)
+            if "error" in probe:
+                logger.warning(f"Could not check @{user_id} for new tweets, serving held timeline: {probe['error']}")
+            else:
+                newest = max((tweet_id_value(tweet_id) for tweet_id in timeline["ids"]), default=0)
+                new_ids = [t["id"] for t in probe["tweets"] if tweet_id_value(t.get("id")) > newest]
+                # A probe that is all new (a pinned tweet aside) may have a gap behind it.
+                if len(probe["tweets"]) >= INCREMENTAL_PROBE_COUNT and len(new_ids) >= len(probe["tweets"]) - 1:
+                    return await self._refetch_timeline(user_id, limit)
+                logger.info(f"Timeline {user_id}: {len(new_ids)} new tweets on top of {len(timeline['ids'])} held")
+                timeline["ids"] = new_ids + timeline["ids"]
+                store.put_timeline(user_id, timeline["ids"], timeline["tail_cursor"], fetched_at=timeline["fetched_at"])
+
+        window = self._timeline_window(timeline, 0, limit)
+        return window if window is not None else await self._refetch_timeline(user_id, limit)
+
+    async def _held_timeline_page(self, user_id: str, cursor: str, limit: int) -> Dict:
+        store = get_twitter_entity_store()
+        after_id = cursor[len(HELD_CURSOR_PREFIX) :]
+        timeline = store.get_timeline(user_id)
+        if not timeline or after_id not in timeline["ids"]:
+            return {"error": "Timeline cursor expired; fetch the latest tweets again without a cursor"}
+
+        start = timeline["ids"].index(after_id) + 1
+        if start + limit > len(timeline["ids"]) and timeline["tail_cursor"]:
+            page = await self._fetch_timeline_page(user_id, limit, timeline["tail_cursor"])
+            if "error" not in page:
+                held = set(timeline["ids"])
+                timeline["ids"] += [t["id"] for t in page["tweets"] if t.get("id") and t["id"] not in held]
+                timeline["tail_cursor"] = page.get("next_cursor")
+                store.put_timeline(user_id, timeline["ids"], timeline["tail_cursor"], fetched_at=timeline["fetched_at"])
+
+        window = self._timeline_window(timeline, start, limit)
+        if window is None:
+            return {"error": "Timeline cursor expired; fetch the latest tweets again without a cursor"}
+        return window
+
+    async def get_tweets(self, user_id: str, limit: int = DEFAULT_TIMELINE_LIMIT, cursor: Optional[str] = None) -> Dict:
+        limit = min(limit, 50)
+        if not cursor:
+            return await self._latest_tweets(user_id, limit)
+        if cursor.startswith(HELD_CURSOR_PREFIX):
+            return await self._held_timeline_page(user_id, cursor, limit)
+        return await self._timeline_page_at(user_id, limit, cursor)
+
     @with_cache(ttl_seconds=300)
     async def get_tweet_detail(self, tweet_id: str, cursor: Optional[str] = None) -> Dict:
         params = {"tweet_id": tweet_id}
@@ -588,8 +697,9 @@ class TwitterInfoAgent(MeshAgent):
         replies = []
 
         # Second pass: categorize all tweets
-        for t in tweets:
-            s = self._simplify_tweet_data(t)
+        simplified = [self._simplify_tweet_data(t) for t in tweets]
+        get_twitter_entity_store().put_tweets(simplified)
+        for s in simplified:
             tid = s["id"]
             tweet_author = s.get("author", {}).get("username")
 
@@ -657,6 +767,7 @@ class TwitterInfoAgent(MeshAgent):
         next_cursor = (root or search_data).get("cursor")
 
         simplified = [self._simplify_tweet_data(t) for t in tweets]
+        get_twitter_entity_store().put_tweets(simplified)
         return {"query": query, "tweets": simplified, "result_count": len(simplified), "next_cursor": next_cursor}
 
     async def _handle_tool_logic(
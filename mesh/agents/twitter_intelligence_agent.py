@@ -1,4 +1,5 @@
 import asyncio
+import heapq
 import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional
@@ -15,6 +16,56 @@ MIN_TOTAL_ENGAGEMENT = 1  # likes+replies+retweets+quotes >= 1
 SEARCH_LIMIT_MIN = 5
 SEARCH_LIMIT_MAX = 15
 SEARCH_LIMIT_DEFAULT = 10
+ELFA_LIMIT_MIN = 10
+
+# twitter_search returns once `limit` general results have been merged; searches still running
+# by then get this long to finish before they are cancelled (Elfa mentions are always awaited).
+EARLY_RETURN_GRACE_SECONDS = 2.0
+
+ENGAGEMENT_KEYS = ("likes", "replies", "retweets", "quotes", "views")
+
+
+def _engagement_score(item: Dict[str, Any]) -> int:
+    engagement = item.get("engagement") or {}
+    return sum(int(engagement.get(k, 0) or 0) for k in ENGAGEMENT_KEYS)
+
+
+class _SearchMerge:
+    """Streaming merge of twitter_search sources.
+
+    Tweets are deduplicated by ID as each source completes, keeping the copy with the most
+    engagement. Influential mentions take precedence over general search results.
+    """
+
+    def __init__(self):
+        self.influential: Dict[str, Dict[str, Any]] = {}
+        self.general: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.influential) + len(self.general)
+
+    def add(self, items: List[Optional[Dict[str, Any]]], influential: bool) -> None:
+        for item in items:
+            tid = item.pop("_id", None) if item else None
+            if not tid:
+                continue
+            if influential:
+                self.general.pop(tid, None)
+                pool = self.influential
+            elif tid in self.influential:
+                continue
+            else:
+                pool = self.general
+            current = pool.get(tid)
+            if current is None or _engagement_score(item) > _engagement_score(current):
+                pool[tid] = item
+
+    @staticmethod
+    def best(pool: Dict[str, Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Up to `limit` most-engaged tweets of a pool, newest first."""
+        items = heapq.nlargest(limit, pool.values(), key=_engagement_score)
+        items.sort(key=lambda x: x.get("created_at") or "", reverse=True)
+        return items
 
 
 class TwitterIntelligenceAgent(MeshAgent):
@@ -179,6 +230,77 @@ Provide clear, structured information from Twitter/X to help users understand so
             {"keywords": keywords, "limit": max(SEARCH_LIMIT_MIN, min(SEARCH_LIMIT_MAX, limit))},
         )
 
+    def _merge_search_source(self, merge: _SearchMerge, query: Optional[str], task: asyncio.Task) -> None:
+        """Add one finished twitter_search source to the merge; `query` is None for Elfa mentions."""
+        error = task.exception()
+        res = task.result() if error is None else {"error": str(error)}
+
+        if query is None:
+            if "error" in res:
+                logger.info(f"Elfa mentions warning: {res.get('error')}")
+                return
+            # Elfa returns {"status":"success","data":[...]} with unwrapped tweet array
+            data = res.get("data", [])
+            candidates = data if isinstance(data, list) else []
+            merge.add([self._simplify_tweet(t) for t in candidates], influential=True)
+            return
+
+        if "error" in res:
+            logger.info(f"Public search error for '{query}': {res}")
+            return
+        pub_tweets = (
+            (res.get("search_data") or res.get("tweets") or res.get("items") or {}).get("tweets")
+            or (res.get("search_data") or {}).get("tweets")
+            or res.get("tweets")
+            or []
+        )
+        merge.add([self._simplify_tweet(t) for t in pub_tweets], influential=False)
+
+    async def _search_all(self, queries: List[str], limit: int) -> _SearchMerge:
+        """Run every search source together, merging results as they arrive.
+
+        Returns early once `limit` general search results are merged, cancelling searches that
+        are still running after EARLY_RETURN_GRACE_SECONDS. Influential mentions do not count
+        toward it and are never cut short: they fill their own section, so the Elfa source is
+        always awaited to completion.
+        """
+        sources: Dict[asyncio.Task, Optional[str]] = {
+            asyncio.create_task(self._search(q, limit=limit)): q for q in queries
+        }
+        elfa = asyncio.create_task(self._elfa_mentions(queries, limit=max(limit, ELFA_LIMIT_MIN)))
+        sources[elfa] = None
+
+        loop = asyncio.get_running_loop()
+        merge = _SearchMerge()
+        pending = set(sources)
+        deadline = None
+        skipped: List[str] = []
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    slow = [task for task in pending if task is not elfa]
+                    for task in slow:
+                        task.cancel()
+                    skipped = [sources[task] for task in slow]
+                    pending -= set(slow)
+                    deadline = None
+                    continue
+                for task in done:
+                    self._merge_search_source(merge, sources[task], task)
+                if deadline is None and len(merge.general) >= limit and any(t is not elfa for t in pending):
+                    deadline = loop.time() + EARLY_RETURN_GRACE_SECONDS
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if skipped:
+            logger.info(
+                f"Search returned early with {len(merge.general)} general results; cancelled slow sources: {skipped}"
+            )
+        return merge
+
     def _simplify_tweet(self, t: Dict[str, Any], include_replies: bool = False) -> Optional[Dict[str, Any]]:
         """
         Normalize a single tweet from TwitterInfoAgent's simplified tweet.
@@ -256,30 +378,6 @@ Provide clear, structured information from Twitter/X to help users understand so
                 del item["_id"]
         return items
 
-    def _dedupe_keep_best(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Deduplicate by _id; if duplicates exist, keep the one with higher total engagement."""
-        best: Dict[str, Dict[str, Any]] = {}
-        for x in items:
-            if not x:
-                continue
-            tid = x.get("_id")
-            if not tid:
-                continue
-            cur = best.get(tid)
-            score = sum(
-                int(x.get("engagement", {}).get(k, 0) or 0) for k in ("likes", "replies", "retweets", "quotes", "views")
-            )
-            if not cur:
-                best[tid] = x
-            else:
-                old = sum(
-                    int(cur.get("engagement", {}).get(k, 0) or 0)
-                    for k in ("likes", "replies", "retweets", "quotes", "views")
-                )
-                if score > old:
-                    best[tid] = x
-        return list(best.values())
-
     async def _handle_tool_logic(
         self, tool_name: str, function_args: dict, session_context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -382,55 +480,10 @@ Provide clear, structured information from Twitter/X to help users understand so
             limit = int(function_args.get("limit", SEARCH_LIMIT_DEFAULT))
             limit = max(SEARCH_LIMIT_MIN, min(SEARCH_LIMIT_MAX, limit))
 
-            # Query both sources: API Dance and Elfa
-            # 1) Public search (per query) - run in parallel
-            public_items: List[Dict[str, Any]] = []
-            search_tasks = [self._search(q, limit=limit) for q in queries[:3]]
-            search_results = await asyncio.gather(*search_tasks, return_exceptions=True)
-
-            for i, pub_res in enumerate(search_results):
-                if isinstance(pub_res, Exception) or "error" in pub_res:
-                    logger.info(f"Public search error for '{queries[i]}': {pub_res}")
-                    continue
-                pub_tweets = (
-                    (pub_res.get("search_data") or pub_res.get("tweets") or pub_res.get("items") or {}).get("tweets")
-                    or (pub_res.get("search_data") or {}).get("tweets")
-                    or pub_res.get("tweets")
-                    or []
-                )
-                if pub_tweets:
-                    public_items.extend([self._simplify_tweet(t) for t in pub_tweets])
-
-            # 2) Influential mentions (batch)
-            elfa_res = await self._elfa_mentions(queries[:3], limit=max(limit, 10))
-            elfa_items = []
-            if "error" not in elfa_res:
-                # Elfa returns {"status":"success","data":[...]} with unwrapped tweet array
-                data = elfa_res.get("data", [])
-                candidates = data if isinstance(data, list) else []
-                for t in candidates:
-                    simplified = self._simplify_tweet(t)
-                    if simplified:
-                        elfa_items.append(simplified)
-            else:
-                logger.info(f"Elfa mentions warning: {elfa_res.get('error')}")
-
-            # Deduplication: separate influential mentions from general search
-            # Build a set of tweet IDs from elfa results
-            elfa_tweet_ids = {item["_id"] for item in elfa_items if item.get("_id")}
-
-            # Filter out public items that are already in elfa results
-            general_items = []
-            for item in public_items:
-                if item and item.get("_id") not in elfa_tweet_ids:
-                    general_items.append(item)
-
-            # Sort both lists by newest first
-            elfa_items.sort(key=lambda x: (x.get("created_at") or ""), reverse=True)
-            general_items.sort(key=lambda x: (x.get("created_at") or ""), reverse=True)
-
-            self._remove_internal_ids(elfa_items)
-            self._remove_internal_ids(general_items)
+            # Query both sources together: API Dance (per query) and Elfa influential mentions
+            merge = await self._search_all(queries[:3], limit)
+            elfa_items = merge.best(merge.influential, max(limit, ELFA_LIMIT_MIN))
+            general_items = merge.best(merge.general, limit)
 
             # Prepare response
             influential_mentions = elfa_items if elfa_items else "No influential account mentioning this topic is found"
@@ -1,14 +1,14 @@
 import asyncio
 import json
 import logging
-import threading
+import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 import yfinance as yf
 from dotenv import load_dotenv
-from stockstats import wrap as stockstats_wrap
+from yfinance.data import YfData
 from yfinance.exceptions import (
     YFInvalidPeriodError,
     YFPricesMissingError,
@@ -19,16 +19,15 @@ from yfinance.exceptions import (
 
 from decorators import with_cache, with_retry
 from mesh.mesh_agent import MeshAgent
+from mesh.utils.micro_batcher import MicroBatcher
 from mesh.utils.response_compactor import compact_response_payload
+from mesh.utils.technical_indicators import get_indicator_engine
+from mesh.utils.yf_download_pool import get_yf_download_pool
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 HISTORY_INTERVALS = ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"]
-# yf.download stages per-ticker results in module-global yfinance.shared state,
-# so concurrent downloads clobber each other and can return another request's
-# date window as their own. Serialize all yf.download calls.
-YF_DOWNLOAD_LOCK = threading.Lock()
 INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
 MARKETS = ["US", "GB", "ASIA", "EUROPE", "RATES", "COMMODITIES", "CURRENCIES", "CRYPTOCURRENCIES"]
 ASSET_TYPES = ["stock", "etf", "crypto", "currency", "index", "future", "fund"]
@@ -107,11 +106,30 @@ EQUITY_OVERVIEW_SECTIONS = ["fundamentals", "analyst"]
 SHARED_HISTORY_TTL_SECONDS = 300
 SHARED_METADATA_TTL_SECONDS = 300
 SHARED_OPTIONS_TTL_SECONDS = 180
+SHARED_PROFILE_TTL_SECONDS = 86400
+# Yahoo's multi-symbol quote endpoint; one call returns price and stats for a whole batch.
+YF_QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+QUOTE_BATCH_WINDOW_SECONDS = 0.02
+MAX_QUOTE_BATCH_SYMBOLS = 50
+PROFILE_INFO_KEYS = ["sector", "industry", "category", "fundFamily", "website", "country", "algorithm", "name"]
 INDEX_FALLBACK_SYMBOLS = {
     "000985.SS": "000300.SS",
 }
 
 
+async def _fetch_quote_batch(_group: Any, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """One multi-symbol v7 quote call, keyed by upper-case symbol (shared quote batcher fetch)."""
+
+    def _do_quotes() -> Dict[str, Dict[str, Any]]:
+        payload = YfData().get_raw_json(
+            YF_QUOTE_URL, params={"symbols": ",".join(symbols), "formatted": "false"}, timeout=10
+        )
+        items = ((payload or {}).get("quoteResponse") or {}).get("result") or []
+        return {item["symbol"].upper(): item for item in items if item.get("symbol")}
+
+    return await asyncio.to_thread(_do_quotes)
+
+
 class YahooFinanceAgent(MeshAgent):
     def __init__(self):
         super().__init__()
@@ -614,6 +632,27 @@ Rules:
             setattr(self.__class__, "_shared_options_chain_cache_ttl", {})
         return getattr(self.__class__, "_shared_options_chain_cache"), getattr(self.__class__, "_shared_options_chain_cache_ttl")
 
+    def _shared_profile_store(self) -> tuple[Dict[str, Any], Dict[str, Any]]:
+        if not hasattr(self.__class__, "_shared_profile_cache"):
+            setattr(self.__class__, "_shared_profile_cache", {})
+            setattr(self.__class__, "_shared_profile_cache_ttl", {})
+        return getattr(self.__class__, "_shared_profile_cache"), getattr(self.__class__, "_shared_profile_cache_ttl")
+
+    def _shared_quote_batcher(self) -> MicroBatcher:
+        # Quote lookups from concurrent requests (and agent instances) share one batcher, so
+        # symbols requested within the batching window go out as a single multi-symbol call.
+        if not hasattr(self.__class__, "_shared_quote_batcher_instance"):
+            setattr(
+                self.__class__,
+                "_shared_quote_batcher_instance",
+                MicroBatcher(
+                    _fetch_quote_batch,
+                    window_seconds=QUOTE_BATCH_WINDOW_SECONDS,
+                    max_batch_size=MAX_QUOTE_BATCH_SYMBOLS,
+                ),
+            )
+        return getattr(self.__class__, "_shared_quote_batcher_instance")
+
     def _shared_history_key(self, symbol: str, interval: str, include_prepost: bool, repair: bool) -> str:
         return f"{symbol}|{interval}|prepost={int(include_prepost)}|repair={int(repair)}"
 
@@ -1345,6 +1384,7 @@ Rules:
             }
 
         context = await asyncio.to_thread(_do_context)
+        self._remember_quote_profile(symbol, context.get("info") or {})
         self._store_cached_option_symbol_context(
             symbol,
             expirations=context.get("expirations") or [],
@@ -1370,11 +1410,19 @@ Rules:
         self._store_cached_option_chain(symbol, expiration, chain_data.get("calls", pd.DataFrame()), chain_data.get("puts", pd.DataFrame()))
         return chain_data
 
-    def _wrap_stockstats(self, ohlcv_df: pd.DataFrame) -> pd.DataFrame:
-        cols = [c for c in ["Open", "High", "Low", "Close", "Volume"] if c in ohlcv_df.columns]
-        df = ohlcv_df[cols].copy()
-        df.columns = [c.lower() for c in df.columns]
-        return stockstats_wrap(df)
+    def _compute_indicators(
+        self,
+        frames: Dict[str, pd.DataFrame],
+        interval: str,
+        period: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str],
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        # One vectorized pass over all symbols; the engine keeps per-(symbol, window)
+        # state so a repeat request with newly completed bars only feeds the new bars.
+        window = (interval, period or "", start_date or "", end_date or "")
+        computed = get_indicator_engine().compute({(symbol, *window): df for symbol, df in frames.items()})
+        return {key[0]: values for key, values in computed.items()}
 
     def _download_kwargs(
         self,
@@ -1404,20 +1452,6 @@ Rules:
             kwargs["period"] = period or self._default_period(interval)
         return kwargs
 
-    def _extract_download_frame(self, df: pd.DataFrame, symbol: str) -> pd.DataFrame:
-        if df is None or df.empty:
-            return pd.DataFrame()
-        try:
-            if isinstance(df.columns, pd.MultiIndex):
-                symbol_df = df[symbol].copy()
-            else:
-                symbol_df = df.copy()
-        except Exception:
-            return pd.DataFrame()
-        if symbol_df is None or symbol_df.empty:
-            return pd.DataFrame()
-        return self._normalize_history_frame(symbol_df.dropna(how="all"))
-
     async def _fetch_history_batch(
         self,
         symbols: List[str],
@@ -1502,17 +1536,14 @@ Rules:
         if not missing_symbols:
             return {symbol: results.get(symbol, pd.DataFrame()) for symbol in symbols}
 
-        def _do_download() -> Dict[str, pd.DataFrame]:
-            with YF_DOWNLOAD_LOCK:
-                downloaded = yf.download(
-                    missing_symbols,
-                    **self._download_kwargs(interval, period, start_date, end_date, include_prepost, repair),
-                )
-            return {symbol: self._extract_download_frame(downloaded, symbol) for symbol in missing_symbols}
-
-        fetched = await asyncio.to_thread(_do_download)
+        # yf.download keeps module-global state, so downloads run in a process pool that
+        # also merges concurrent requests for the same window into one batched download.
+        fetched = await get_yf_download_pool().download(
+            missing_symbols,
+            **self._download_kwargs(interval, period, start_date, end_date, include_prepost, repair),
+        )
         for symbol in missing_symbols:
-            frame = fetched.get(symbol, pd.DataFrame())
+            frame = self._normalize_history_frame(fetched.get(symbol, pd.DataFrame()))
             if isinstance(frame, pd.DataFrame) and not frame.empty:
                 self._store_cached_history(
                     symbol=symbol,
@@ -2150,7 +2181,7 @@ Rules:
 
         return await self._run_symbol_tool_batch(
             normalized_symbols,
-            lambda symbol: self._quote_snapshot_one(
+            lambda symbol: self._quote_snapshot_batched_one(
                 symbol=symbol,
                 recent=recent_frames.get(symbol),
                 include_history=include_history,
@@ -2160,6 +2191,117 @@ Rules:
             ),
         )
 
+    def _cached_quote_profile(self, symbol: str) -> Dict[str, Any]:
+        # Profile fields (sector, website, ...) are not in the batched quote response. They are
+        # never fetched per symbol on the quote path; tools that already load `Ticker.info`
+        # remember them here, and quotes include them once known.
+        cache, cache_ttl = self._shared_profile_store()
+        if self._is_cache_valid(cache_ttl, symbol):
+            return dict(cache.get(symbol) or {})
+        return {}
+
+    def _remember_quote_profile(self, symbol: str, info: Dict[str, Any]) -> None:
+        if not info:
+            return
+        cache, cache_ttl = self._shared_profile_store()
+        cache[symbol] = {key: info[key] for key in PROFILE_INFO_KEYS if info.get(key) not in (None, "", [], {})}
+        cache_ttl[symbol] = datetime.now() + timedelta(seconds=SHARED_PROFILE_TTL_SECONDS)
+
+    def _quote_history_block(
+        self, recent_df: pd.DataFrame, interval: str, period: Optional[str], limit_bars: int
+    ) -> Dict[str, Any]:
+        completed = self._drop_incomplete_bar(recent_df, interval)
+        if completed.empty:
+            completed = recent_df
+        bars = self._serialize_bars(completed.tail(limit_bars))
+        return {
+            "interval": interval,
+            "period": period or self._default_period(interval),
+            "latest_completed_bar": bars[-1] if bars else None,
+            "previous_completed_bar": bars[-2] if len(bars) > 1 else None,
+            "window_summary": self._window_summary(completed),
+            "bars": bars,
+        }
+
+    async def _quote_snapshot_batched_one(
+        self,
+        symbol: str,
+        recent: Optional[pd.DataFrame] = None,
+        include_history: bool = False,
+        interval: str = "1d",
+        period: Optional[str] = "5d",
+        limit_bars: int = 10,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            quote = await self._shared_quote_batcher().load(symbol)
+        except Exception as exc:
+            logger.info(f"[yahoo_finance] Batched quote failed for {symbol}, falling back to per-symbol: {exc}")
+            quote = None
+
+        if not quote or quote.get("regularMarketPrice") is None:
+            result = await self._quote_snapshot_one(
+                symbol=symbol,
+                recent=recent,
+                include_history=include_history,
+                interval=interval,
+                period=period,
+                limit_bars=limit_bars,
+            )
+        else:
+            recent_df = recent if isinstance(recent, pd.DataFrame) else pd.DataFrame()
+            profile = self._cached_quote_profile(symbol)
+            result = {"status": "success", "data": self._quote_from_batch(symbol, quote, profile, recent_df)}
+            if include_history and not recent_df.empty:
+                result["data"]["history"] = self._quote_history_block(recent_df, interval, period, limit_bars)
+
+        if isinstance(result.get("data"), dict):
+            result["data"]["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def _quote_from_batch(
+        self, symbol: str, quote: Dict[str, Any], profile: Dict[str, Any], recent_df: pd.DataFrame
+    ) -> Dict[str, Any]:
+        last_row = recent_df.iloc[-1] if not recent_df.empty else pd.Series(dtype=float)
+        quote_type = quote.get("quoteType")
+        asset_type = self._normalize_asset_type(quote_type, quote.get("typeDisp"))
+        if not recent_df.empty:
+            as_of = recent_df.index[-1]
+        elif quote.get("regularMarketTime"):
+            as_of = pd.Timestamp(quote["regularMarketTime"], unit="s")
+        else:
+            as_of = None
+
+        return self._prune_empty(
+            {
+                "symbol": symbol,
+                "name": quote.get("shortName") or quote.get("longName") or profile.get("name") or symbol,
+                "asset_type": asset_type,
+                "quote_type": quote_type,
+                "currency": quote.get("currency"),
+                "exchange": quote.get("exchange"),
+                "price": {
+                    "last_price": self._safe_float(quote.get("regularMarketPrice") or last_row.get("Close")),
+                    "open": self._safe_float(quote.get("regularMarketOpen") or last_row.get("Open")),
+                    "previous_close": self._safe_float(quote.get("regularMarketPreviousClose")),
+                    "day_high": self._safe_float(quote.get("regularMarketDayHigh") or last_row.get("High")),
+                    "day_low": self._safe_float(quote.get("regularMarketDayLow") or last_row.get("Low")),
+                    "volume": self._safe_int(quote.get("regularMarketVolume") or last_row.get("Volume")),
+                },
+                "stats": {
+                    "market_cap": self._safe_float(quote.get("marketCap")),
+                    "fifty_day_average": self._safe_float(quote.get("fiftyDayAverage")),
+                    "two_hundred_day_average": self._safe_float(quote.get("twoHundredDayAverage")),
+                    "year_high": self._safe_float(quote.get("fiftyTwoWeekHigh")),
+                    "year_low": self._safe_float(quote.get("fiftyTwoWeekLow")),
+                    # Already a percentage in the v7 quote response.
+                    "year_change_pct": self._safe_float(quote.get("fiftyTwoWeekChangePercent")),
+                },
+                "profile": self._compact_profile({**quote, **profile}, asset_type),
+                "as_of": self._iso(as_of),
+            }
+        )
+
     async def _quote_snapshot_one(
         self,
         symbol: str,
@@ -2180,6 +2322,7 @@ Rules:
                 return {}
             fast_info = dict(ticker.fast_info)
             info = ticker.info or {}
+            self._remember_quote_profile(symbol, info)
             last_row = recent_df.iloc[-1]
             quote_type = info.get("quoteType") or fast_info.get("quoteType")
             asset_type = self._normalize_asset_type(quote_type, info.get("typeDisp"))
@@ -2187,20 +2330,7 @@ Rules:
 
             history_block = None
             if include_history:
-                completed = self._drop_incomplete_bar(recent_df, interval)
-                if completed.empty:
-                    completed = recent_df
-                bars = self._serialize_bars(completed.tail(limit_bars))
-                latest_bar = bars[-1] if bars else None
-                previous_bar = bars[-2] if len(bars) > 1 else None
-                history_block = {
-                    "interval": interval,
-                    "period": period or self._default_period(interval),
-                    "latest_completed_bar": latest_bar,
-                    "previous_completed_bar": previous_bar,
-                    "window_summary": self._window_summary(completed),
-                    "bars": bars,
-                }
+                history_block = self._quote_history_block(recent_df, interval, period, limit_bars)
 
             return self._prune_empty(
                 {
@@ -2409,6 +2539,14 @@ Rules:
             for symbol, metadata in zip(normalized_symbols, metadata_results)
         }
 
+        completed_frames = {}
+        for symbol, df in history_frames.items():
+            if isinstance(df, pd.DataFrame) and not df.empty:
+                completed = self._drop_incomplete_bar(df, interval)
+                if len(completed) >= 30:
+                    completed_frames[symbol] = completed
+        indicators_by_symbol = self._compute_indicators(completed_frames, interval, period, start_date, end_date)
+
         return await self._run_symbol_tool_batch(
             normalized_symbols,
             lambda symbol: self._technical_snapshot_one(
@@ -2419,6 +2557,7 @@ Rules:
                 end_date=end_date,
                 prefetched_df=history_frames.get(symbol),
                 metadata=metadata_by_symbol.get(symbol, {}),
+                indicators=indicators_by_symbol.get(symbol),
             ),
         )
 
@@ -2431,11 +2570,13 @@ Rules:
         end_date: Optional[str] = None,
         prefetched_df: Optional[pd.DataFrame] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        indicators: Optional[Dict[str, Optional[float]]] = None,
     ) -> Dict[str, Any]:
         try:
             df = prefetched_df.copy() if isinstance(prefetched_df, pd.DataFrame) else pd.DataFrame()
             current_metadata = metadata or {}
             if df.empty:
+                indicators = None
                 df, current_metadata = await self._fetch_history(
                     symbol=symbol,
                     interval=interval,
@@ -2462,37 +2603,21 @@ Rules:
                 }
             return result
 
-        ss = self._wrap_stockstats(df)
-
-        def _series(name: str) -> Optional[pd.Series]:
-            try:
-                return ss[name].astype(float)
-            except Exception:
-                return None
+        if indicators is None:
+            indicators = self._compute_indicators({symbol: df}, interval, period, start_date, end_date).get(symbol, {})
 
-        close = df["Close"].astype(float)
-        rsi = _series("rsi")
-        macd = _series("macd")
-        macds = _series("macds")
-        macdh = _series("macdh")
-        boll = _series("boll")
-        boll_ub = _series("boll_ub")
-        boll_lb = _series("boll_lb")
-        ema10 = _series("close_10_ema")
-        sma50 = _series("close_50_sma")
-        sma200 = _series("close_200_sma")
-
-        last_close = self._safe_float(close.iloc[-1])
-        last_rsi = self._safe_float(rsi.iloc[-1]) if rsi is not None else None
-        last_macd = self._safe_float(macd.iloc[-1]) if macd is not None else None
-        last_macds = self._safe_float(macds.iloc[-1]) if macds is not None else None
-        last_macdh = self._safe_float(macdh.iloc[-1]) if macdh is not None else None
-        last_ema10 = self._safe_float(ema10.iloc[-1]) if ema10 is not None else None
-        last_sma50 = self._safe_float(sma50.iloc[-1]) if sma50 is not None else None
-        last_sma200 = self._safe_float(sma200.iloc[-1]) if sma200 is not None else None
-        last_boll = self._safe_float(boll.iloc[-1]) if boll is not None else None
-        last_boll_ub = self._safe_float(boll_ub.iloc[-1]) if boll_ub is not None else None
-        last_boll_lb = self._safe_float(boll_lb.iloc[-1]) if boll_lb is not None else None
+        last_close = self._safe_float(df["Close"].iloc[-1])
+        last_rsi = indicators.get("rsi")
+        last_macd = indicators.get("macd")
+        last_macds = indicators.get("macds")
+        last_macdh = indicators.get("macdh")
+        last_ema10 = indicators.get("close_10_ema")
+        last_sma50 = indicators.get("close_50_sma")
+        last_sma200 = indicators.get("close_200_sma")
+        last_boll = indicators.get("boll")
+        last_boll_ub = indicators.get("boll_ub")
+        last_boll_lb = indicators.get("boll_lb")
+        last_atr = indicators.get("atr")
 
         recent_window = df.tail(min(len(df), 20))
         support = self._safe_float(recent_window["Low"].min())
@@ -2599,6 +2724,7 @@ Rules:
                     "bollinger_middle": last_boll,
                     "bollinger_upper": last_boll_ub,
                     "bollinger_lower": last_boll_lb,
+                    "atr_14": last_atr,
                 },
                 "states": {
                     "trend": trend,
@@ -2723,6 +2849,7 @@ Rules:
         def _do_overview() -> Dict[str, Any]:
             ticker = yf.Ticker(symbol)
             info = ticker.info or {}
+            self._remember_quote_profile(symbol, info)
             asset_type = self._normalize_asset_type(info.get("quoteType"), info.get("typeDisp"))
             if not info and asset_type is None:
                 return {}
@@ -2797,6 +2924,7 @@ Rules:
         def _do_fund() -> Dict[str, Any]:
             ticker = yf.Ticker(symbol)
             info = ticker.info or {}
+            self._remember_quote_profile(symbol, info)
             funds = ticker.funds_data
             asset_type = self._normalize_asset_type(funds.quote_type(), info.get("typeDisp"))
             if not info and asset_type is None:
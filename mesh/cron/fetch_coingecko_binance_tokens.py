@@ -1,5 +1,6 @@
 """
-Fetch Binance-listed tokens from CoinGecko API and update coingecko_id_map.json
+Fetch Binance-listed tokens from CoinGecko API, update coingecko_id_map.json and
+rebuild the token identity index (mesh/utils/token_identity_index.py)
 Designed to run as a PM2 cron job
 """
 
@@ -7,13 +8,19 @@ import asyncio
 import json
 import logging
 import os
+import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Set
+from typing import Any, Dict, List, Set
 
 import aiohttp
 from dotenv import load_dotenv
 
+# Run as a plain script by PM2, so make the repo root importable for mesh.utils.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from mesh.utils.token_identity_index import TOKEN_IDENTITY_INDEX_PATH, build_token_identity_index  # noqa: E402
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -24,6 +31,7 @@ DATA_DIR = Path(__file__).parent.parent / "data"
 MAP_FILE = DATA_DIR / "coingecko_id_map.json"
 MAX_PAGES = 20
 PAGE_DELAY = 1.5
+MARKET_RANK_PAGES = 8  # 250 coins per page
 
 
 class CoinGeckoBinanceTokenUpdater:
@@ -83,21 +91,50 @@ class CoinGeckoBinanceTokenUpdater:
 
         return all_tickers
 
-    async def _fetch_coin_names(self, coin_ids: Set[str]) -> Dict[str, str]:
-        """Fetch coin names for given IDs"""
+    async def _fetch_coin_list(self) -> List[Dict[str, Any]]:
+        """Fetch all coins with their contract addresses per platform"""
         url = f"{PRO_API_URL}/coins/list"
+        params = {"include_platform": "true"}
 
         try:
-            async with self.session.get(url, headers=self.headers) as response:
+            async with self.session.get(url, headers=self.headers, params=params) as response:
                 if response.status == 200:
-                    all_coins = await response.json()
-                    return {coin["id"]: coin["name"] for coin in all_coins if coin["id"] in coin_ids}
+                    return await response.json()
                 else:
                     logger.error(f"Failed to fetch coin list: {response.status}")
-                    return {}
+                    return []
         except Exception as e:
-            logger.error(f"Error fetching coin names: {e}")
-            return {}
+            logger.error(f"Error fetching coin list: {e}")
+            return []
+
+    async def _fetch_market_cap_ranks(self) -> Dict[str, int]:
+        """Fetch market cap ranks for the top coins, used to disambiguate shared symbols/names"""
+        url = f"{PRO_API_URL}/coins/markets"
+        ranks = {}
+
+        for page in range(1, MARKET_RANK_PAGES + 1):
+            params = {"vs_currency": "usd", "order": "market_cap_desc", "per_page": 250, "page": page}
+            try:
+                async with self.session.get(url, headers=self.headers, params=params) as response:
+                    if response.status != 200:
+                        logger.error(f"API error {response.status} on markets page {page}")
+                        break
+                    coins = await response.json()
+            except Exception as e:
+                logger.error(f"Error fetching markets page {page}: {e}")
+                break
+            if not coins:
+                break
+            for coin in coins:
+                if coin.get("id") and coin.get("market_cap_rank"):
+                    ranks[coin["id"]] = coin["market_cap_rank"]
+            await asyncio.sleep(PAGE_DELAY)
+
+        return ranks
+
+    def _coin_names(self, coin_ids: Set[str], coin_list: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Coin names for given IDs"""
+        return {coin["id"]: coin["name"] for coin in coin_list if coin["id"] in coin_ids}
 
     def _build_ticker_mapping(self, tickers):
         """Build ticker -> coin_id mapping, excluding duplicates"""
@@ -206,6 +243,31 @@ class CoinGeckoBinanceTokenUpdater:
             logger.error(f"Error saving mapping: {e}", exc_info=True)
             raise
 
+    def _save_index(
+        self,
+        coin_list: List[Dict[str, Any]],
+        curated_map: Dict[str, str],
+        binance_symbols: Dict[str, str],
+        market_cap_ranks: Dict[str, int],
+    ):
+        """Rebuild the token identity index shared by the token agents"""
+        if not coin_list:
+            logger.warning("Empty coin list, keeping the existing token identity index")
+            return
+
+        if self.dry_run:
+            logger.info(f"DRY RUN: Would build token identity index from {len(coin_list)} coins")
+            return
+
+        stats = build_token_identity_index(
+            Path(TOKEN_IDENTITY_INDEX_PATH),
+            coins=coin_list,
+            curated_map=curated_map,
+            binance_symbols=binance_symbols,
+            market_cap_ranks=market_cap_ranks,
+        )
+        logger.info(f"Built token identity index at {TOKEN_IDENTITY_INDEX_PATH}: {stats}")
+
     async def run(self):
         """Main execution"""
         logger.info("=" * 80)
@@ -224,9 +286,13 @@ class CoinGeckoBinanceTokenUpdater:
             ticker_mapping = self._build_ticker_mapping(tickers)
             logger.info(f"Unique tickers (no duplicates): {len(ticker_mapping)}")
 
+            logger.info("Fetching CoinGecko coin list with platforms...")
+            coin_list = await self._fetch_coin_list()
+            logger.info(f"Coins listed: {len(coin_list)}")
+
             coin_ids = set(ticker_mapping.values())
-            logger.info(f"Fetching names for {len(coin_ids)} coins...")
-            id_to_name = await self._fetch_coin_names(coin_ids)
+            logger.info(f"Resolving names for {len(coin_ids)} coins...")
+            id_to_name = self._coin_names(coin_ids, coin_list)
             logger.info(f"Got names for {len(id_to_name)} coins")
 
             logger.info("Building name mapping...")
@@ -244,6 +310,11 @@ class CoinGeckoBinanceTokenUpdater:
 
             self._save_mapping(final_mapping)
 
+            logger.info("Fetching market cap ranks...")
+            market_cap_ranks = await self._fetch_market_cap_ranks()
+            logger.info(f"Ranked coins: {len(market_cap_ranks)}")
+            self._save_index(coin_list, final_mapping, ticker_mapping, market_cap_ranks)
+
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
 
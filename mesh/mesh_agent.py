@@ -12,6 +12,7 @@ from loguru import logger
 from decorators import monitor_execution, with_cache
 from mesh.gemini import call_gemini_async, call_gemini_with_tools_async
 from mesh.utils.proxy_client import get_proxy_client
+from mesh.utils.rate_limiter import RateLimiter, retry_after_seconds
 
 
 # --- Tool Schema Types ---
@@ -258,6 +259,15 @@ class MeshAgent(ABC):
         """
         return False
 
+    def api_rate_limiter(self) -> Optional[RateLimiter]:
+        """Shared rate limiter pacing this agent's _api_request calls, or None for no pacing.
+
+        Override in agents whose provider has a quota, typically returning
+        mesh.utils.rate_limiter.get_rate_limiter(provider, api_key). 429 responses make the
+        limiter back off for the Retry-After time.
+        """
+        return None
+
     async def get_fallback_for_tool(
         self, tool_name: Optional[str], function_args: Dict[str, Any], original_params: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
@@ -596,12 +606,17 @@ class MeshAgent(ABC):
 
         # Check if this agent has opted in to proxy fallback
         use_proxy = self.supports_proxy_fallback() and self._proxy_client.enabled
+        rate_limiter = self.api_rate_limiter()
 
         try:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
             if method.upper() == "GET":
                 async with self.session.get(url, headers=headers, params=params, timeout=timeout_cfg) as response:
                     if response.status == 429:
                         logger.warning(f"Rate limit exceeded for {url}.")
+                        if rate_limiter is not None:
+                            rate_limiter.report_rate_limited(retry_after_seconds(response.headers.get("Retry-After")))
                         if use_proxy:
                             logger.info(f"Attempting proxy fallback for {url}")
                             proxy_result = await self._proxy_client.forward_request(
@@ -615,6 +630,8 @@ class MeshAgent(ABC):
                                 return proxy_result.get("data", {})
                             return {"error": proxy_result.get("error", "Proxy fallback failed")}
                     response.raise_for_status()
+                    if rate_limiter is not None:
+                        rate_limiter.report_success()
                     return await response.json()
             elif method.upper() == "POST":
                 async with self.session.post(
@@ -622,6 +639,8 @@ class MeshAgent(ABC):
                 ) as response:
                     if response.status == 429:
                         logger.warning(f"Rate limit exceeded for {url}.")
+                        if rate_limiter is not None:
+                            rate_limiter.report_rate_limited(retry_after_seconds(response.headers.get("Retry-After")))
                         if use_proxy:
                             logger.info(f"Attempting proxy fallback for {url}")
                             proxy_result = await self._proxy_client.forward_request(
@@ -636,6 +655,8 @@ class MeshAgent(ABC):
                                 return proxy_result.get("data", {})
                             return {"error": proxy_result.get("error", "Proxy fallback failed")}
                     response.raise_for_status()
+                    if rate_limiter is not None:
+                        rate_limiter.report_success()
                     return await response.json()
 
         except Exception as e:
@@ -0,0 +1,160 @@
+"""Benchmark normalized DexScreener pair records against the previous per-call dict path.
+
+Uses a recorded search_pairs response when given one, otherwise a synthetic payload of
+the same shape, so no network access is needed:
+
+    python mesh/test_scripts/benchmark_dex_pairs.py --pairs 3000
+    python mesh/test_scripts/benchmark_dex_pairs.py --payload search_pairs_eth.json
+
+A payload can be recorded with DexScreenerTokenInfoAgent().search_pairs("eth") dumped as JSON.
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from mesh.utils.dex_pairs import (  # noqa: E402
+    MIN_POOL_LIQUIDITY_USD,
+    MIN_POOL_VOLUME_24H,
+    _record_cache,
+    by_liquidity,
+    by_score,
+    filter_records,
+    pair_preview,
+    pair_records,
+    pair_score,
+    top_k,
+)
+
+TOP_N = 5
+
+logger = logging.getLogger(__name__)
+
+
+def make_pairs(count: int) -> list:
+    rng = random.Random(7)
+    chains = ["ethereum", "base", "solana", "bsc", "arbitrum"]
+    symbols = ["ETH", "WETH", "USDC", "PEPE", "WIF", "BONK", "AERO", "DEGEN", "TOSHI", "BRETT"]
+    pairs = []
+    for i in range(count):
+        base, quote = rng.sample(symbols, 2) if rng.random() > 0.02 else ("ETH", "ETH")
+        liquidity = rng.choice([None, rng.lognormvariate(10, 2.5)])
+        pairs.append(
+            {
+                "chainId": rng.choice(chains),
+                "dexId": rng.choice(["uniswap", "aerodrome", "raydium", "pancakeswap"]),
+                "pairAddress": f"0x{i:040x}",
+                "baseToken": {"address": f"0x{i * 2:040x}", "name": f"{base} Token", "symbol": base},
+                "quoteToken": {"address": f"0x{i * 2 + 1:040x}", "name": f"{quote} Token", "symbol": quote},
+                "priceUsd": f"{rng.lognormvariate(0, 3):.8f}",
+                "txns": {"h24": {"buys": rng.randint(0, 5000), "sells": rng.randint(0, 5000)}},
+                "volume": {"h24": rng.lognormvariate(9, 3)},
+                "priceChange": {"h1": f"{rng.uniform(-5, 5):.2f}%", "h24": f"{rng.uniform(-30, 30):.2f}%"},
+                "liquidity": {"usd": liquidity} if liquidity is not None else {},
+                "marketCap": rng.lognormvariate(15, 3),
+                "fdv": rng.lognormvariate(15, 3),
+                "info": {
+                    "websites": [{"url": f"https://{base.lower()}.example"}],
+                    "socials": [{"type": "twitter", "url": f"https://x.com/{base.lower()}"}],
+                },
+                "matched_sides": ["base"],
+                "selected_sides": ["base"],
+            }
+        )
+    return pairs
+
+
+def previous_path(pairs: list) -> list:
+    # Mirrors the previous TokenResolverAgent._filter_pairs + _pair_to_preview + full sorts,
+    # including its per-pair debug logging.
+    valid = []
+    for p in pairs:
+        base = p.get("baseToken") or {}
+        quote = p.get("quoteToken") or {}
+        base_symbol = base.get("symbol", "").upper()
+        quote_symbol = quote.get("symbol", "").upper()
+        if base_symbol and quote_symbol and base_symbol == quote_symbol:
+            logger.debug(f"Skipping invalid same-symbol pair: {base.get('symbol')}/{quote.get('symbol')}")
+            continue
+        liquidity = (p.get("liquidity") or {}).get("usd")
+        if liquidity is None or liquidity < MIN_POOL_LIQUIDITY_USD:
+            logger.debug(
+                f"Skipping low-liquidity pair: {base.get('symbol')}/{quote.get('symbol')} (liq=${liquidity or 0:,.2f})"
+            )
+            continue
+        valid.append(p)
+    if len(valid) > 1:
+        sufficient, insufficient = [], []
+        for p in valid:
+            volume = (p.get("volume") or {}).get("h24")
+            (sufficient if volume is None or volume >= MIN_POOL_VOLUME_24H else insufficient).append(p)
+        if sufficient:
+            for p in insufficient:
+                logger.debug(f"Skipping low-volume pair (vol=${(p.get('volume') or {}).get('h24', 0):,.0f})")
+            valid = sufficient
+
+    by_pair_score = sorted(
+        [pair_preview(p) for p in valid],
+        key=lambda x: pair_score(x.get("liquidity_usd") or 0, x.get("volume24h_usd") or 0),
+        reverse=True,
+    )[:TOP_N]
+    by_pair_liquidity = sorted(
+        [pair_preview(p) for p in valid], key=lambda x: x.get("liquidity_usd") or 0, reverse=True
+    )[:TOP_N]
+    return [by_pair_score, by_pair_liquidity]
+
+
+def records_path(pairs: list) -> list:
+    records = filter_records(pair_records(pairs))
+    return [
+        [dict(r.preview) for r in top_k(records, TOP_N, by_score)],
+        [dict(r.preview) for r in top_k(records, TOP_N, by_liquidity)],
+    ]
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payload", type=Path, help="Recorded search_pairs response (JSON)")
+    parser.add_argument("--pairs", type=int, default=3000, help="Synthetic pair count when no payload is given")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.payload:
+        response = json.loads(args.payload.read_text())
+        pairs = ((response.get("data") or {}).get("pairs")) or response.get("pairs") or []
+    else:
+        pairs = make_pairs(args.pairs)
+
+    assert previous_path(pairs) == records_path(pairs), "record path changed the output"
+
+    previous_ms = timed(lambda: previous_path(pairs), args.repeat)
+
+    def cold():
+        _record_cache.clear()
+        records_path(pairs)
+
+    cold_ms = timed(cold, args.repeat)
+    records_path(pairs)
+    warm_ms = timed(lambda: records_path(pairs), args.repeat)
+
+    print(f"pairs={len(pairs)} top_n={TOP_N}")
+    print(f"previous (dicts, full sorts):     {previous_ms:8.2f} ms")
+    print(f"records (normalize + top-k):      {cold_ms:8.2f} ms  ({previous_ms / cold_ms:.1f}x)")
+    print(f"records (cached response, top-k): {warm_ms:8.2f} ms  ({previous_ms / warm_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
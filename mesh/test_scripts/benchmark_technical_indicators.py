@@ -0,0 +1,104 @@
+"""Benchmark the vectorized indicator engine against the previous stockstats path.
+
+Runs on synthetic OHLCV data, so no network access is needed:
+
+    python mesh/test_scripts/benchmark_technical_indicators.py --symbols 10 --bars 252
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from stockstats import wrap as stockstats_wrap
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from mesh.utils.technical_indicators import TechnicalIndicatorEngine, compute_latest_indicators
+
+INDICATORS = [
+    "rsi",
+    "macd",
+    "macds",
+    "macdh",
+    "boll",
+    "boll_ub",
+    "boll_lb",
+    "close_10_ema",
+    "close_50_sma",
+    "close_200_sma",
+]
+
+
+def make_frames(symbols: int, bars: int) -> dict:
+    rng = np.random.default_rng(7)
+    index = pd.date_range("2020-01-01", periods=bars, freq="D")
+    frames = {}
+    for i in range(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+        frames[f"SYM{i}"] = pd.DataFrame(
+            {
+                "Open": close,
+                "High": close * (1 + rng.uniform(0, 0.02, bars)),
+                "Low": close * (1 - rng.uniform(0, 0.02, bars)),
+                "Close": close,
+                "Volume": rng.uniform(1e5, 1e6, bars),
+            },
+            index=index,
+        )
+    return frames
+
+
+def stockstats_path(frames: dict) -> dict:
+    # Mirrors the previous YahooFinanceAgent._wrap_stockstats + per-indicator access.
+    results = {}
+    for symbol, df in frames.items():
+        wrapped = stockstats_wrap(df[["Open", "High", "Low", "Close", "Volume"]].rename(columns=str.lower))
+        results[symbol] = {name: float(wrapped[name].astype(float).iloc[-1]) for name in INDICATORS}
+    return results
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--bars", type=int, default=252)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = make_frames(args.symbols, args.bars)
+    keys = list(frames)
+
+    baseline = stockstats_path(frames)
+    vectorized = dict(zip(keys, compute_latest_indicators([frames[key] for key in keys])))
+    max_diff = max(abs(baseline[key][name] - vectorized[key][name]) for key in keys for name in INDICATORS)
+
+    stockstats_ms = timed(lambda: stockstats_path(frames), args.repeat)
+    vectorized_ms = timed(lambda: compute_latest_indicators([frames[key] for key in keys]), args.repeat)
+
+    # Incremental: prime the cache without the last bar, then append it.
+    def incremental():
+        engine = TechnicalIndicatorEngine()
+        engine.compute({key: df.iloc[:-1] for key, df in frames.items()})
+        start = time.perf_counter()
+        engine.compute(frames)
+        return (time.perf_counter() - start) * 1000
+
+    incremental_ms = sum(incremental() for _ in range(args.repeat)) / args.repeat
+
+    print(f"symbols={args.symbols} bars={args.bars} max_abs_diff={max_diff:.2e}")
+    print(f"stockstats (per symbol):     {stockstats_ms:8.2f} ms")
+    print(f"vectorized (full batch):     {vectorized_ms:8.2f} ms  ({stockstats_ms / vectorized_ms:.1f}x)")
+    print(f"vectorized (append one bar): {incremental_ms:8.2f} ms  ({stockstats_ms / incremental_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
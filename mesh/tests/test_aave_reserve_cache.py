@@ -0,0 +1,131 @@
+"""Tests for AaveAgent reserve decoding and the block-pinned reserve cache, with a fake RPC pool (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from eth_abi import encode as abi_encode
+from eth_utils.abi import collapse_if_tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.agents import aave_agent  # noqa: E402
+from mesh.agents.aave_agent import AaveAgent  # noqa: E402
+
+CHAIN_ID = 137
+USDC = "0x3c499c542cEF5E3811e1192ce70d8cC03d5c3359"
+
+
+def _filler(component: Dict[str, Any], symbol: str) -> Any:
+    abi_type = component["type"]
+    if abi_type == "address":
+        return USDC
+    if abi_type == "string":
+        return symbol
+    if abi_type == "bool":
+        return False
+    if abi_type.startswith("bytes"):
+        return b"\0" * int(abi_type[5:] or 0)
+    if component["name"] == "liquidityRate":
+        return 5 * 10**25
+    return 1
+
+
+class FakeRpcPool:
+    """Answers eth_getBlockByNumber with the current height and eth_call with one encoded USDC reserve."""
+
+    def __init__(self, outputs: List[Dict[str, Any]], height: int):
+        self.outputs = outputs
+        self.height = height
+        self.requests: List[tuple] = []
+
+    def _result(self, method: str, params: list) -> Any:
+        self.requests.append((method, params))
+        if method == "eth_getBlockByNumber":
+            return {"number": hex(self.height)}
+        reserve = tuple(_filler(c, "USDC") for c in self.outputs[0]["components"])
+        base_currency = tuple(_filler(c, "") for c in self.outputs[1]["components"])
+        types = [collapse_if_tuple(output) for output in self.outputs]
+        return "0x" + abi_encode(types, [[reserve], base_currency]).hex()
+
+    async def call(self, chain_id: int, method: str, params: list) -> Any:
+        return self._result(method, params)
+
+    async def batch(self, chain_id: int, calls: list) -> list:
+        return [self._result(method, params) for method, params in calls]
+
+
+@pytest.fixture
+def agent(monkeypatch) -> AaveAgent:
+    monkeypatch.setattr(AaveAgent, "_reserve_cache", OrderedDict())
+    monkeypatch.setattr(AaveAgent, "_reserve_inflight", {})
+    return AaveAgent()
+
+
+@pytest.fixture
+def pool(agent: AaveAgent, monkeypatch) -> FakeRpcPool:
+    contracts = agent._initialize_aave_contracts(CHAIN_ID)
+    func = contracts.ui_pool_data_provider.functions.getReservesData(contracts.pool_addresses_provider.address)
+    pool = FakeRpcPool(func.abi["outputs"], height=100)
+    monkeypatch.setattr(aave_agent, "get_evm_rpc_pool", lambda: pool)
+    return pool
+
+
+def _eth_call_blocks(pool: FakeRpcPool) -> List[Any]:
+    return [params[1] for method, params in pool.requests if method == "eth_call"]
+
+
+def test_reserves_are_decoded_into_named_structs(agent: AaveAgent, pool: FakeRpcPool) -> None:
+    result = asyncio.run(agent.get_aave_reserves(CHAIN_ID))
+
+    assert result["block_number"] == 100
+    reserve = result["reserves"][USDC.lower()]
+    assert reserve["underlyingAsset"] == USDC
+    assert reserve["symbol"] == "USDC"
+    assert reserve["depositAPR"] == 5.0
+
+
+def test_latest_is_pinned_to_the_block_it_was_read_at(agent: AaveAgent, pool: FakeRpcPool) -> None:
+    async def main():
+        latest = await agent.get_aave_reserves(CHAIN_ID)
+        # Another endpoint of the hedged pool is already a block ahead
+        pool.height = 101
+        pinned = await agent.get_aave_reserves(CHAIN_ID, block_identifier="100")
+        cached_latest = await agent.get_aave_reserves(CHAIN_ID)
+        return latest, pinned, cached_latest
+
+    latest, pinned, cached_latest = asyncio.run(main())
+
+    # The tag is resolved first and eth_call runs at that number, never at "latest"
+    assert _eth_call_blocks(pool) == ["0x64"]
+    assert pinned["block_number"] == latest["block_number"] == cached_latest["block_number"] == 100
+
+
+def test_expired_latest_is_read_again_at_the_new_height(agent: AaveAgent, pool: FakeRpcPool) -> None:
+    asyncio.run(agent.get_aave_reserves(CHAIN_ID))
+    AaveAgent._reserve_cache[(CHAIN_ID, "latest")] = (0.0, AaveAgent._reserve_cache[(CHAIN_ID, "latest")][1])
+    pool.height = 101
+
+    async def main():
+        return await agent.get_aave_reserves(CHAIN_ID), await agent.get_aave_reserves(CHAIN_ID, block_identifier="100")
+
+    refreshed, pinned = asyncio.run(main())
+
+    assert refreshed["block_number"] == 101
+    assert pinned["block_number"] == 100
+    assert _eth_call_blocks(pool) == ["0x64", "0x65"]
+
+
+def test_pending_reads_are_not_pinned(agent: AaveAgent, pool: FakeRpcPool) -> None:
+    result = asyncio.run(agent.get_aave_reserves(CHAIN_ID, block_identifier="pending"))
+
+    assert result["block_number"] == 100
+    assert _eth_call_blocks(pool) == ["pending"]
+    assert (CHAIN_ID, 100) not in AaveAgent._reserve_cache
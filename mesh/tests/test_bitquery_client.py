@@ -0,0 +1,41 @@
+"""Tests for Bitquery query normalization and merging (no network)."""
+
+from __future__ import annotations
+
+import ast
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.utils.bitquery_client import _split_operation, normalize_query  # noqa: E402
+
+
+def _agent_query(module: str, name: str) -> str:
+    """A query string literal assigned to `name` in an agent module, read without importing it."""
+    tree = ast.parse((ROOT / "mesh" / "agents" / module).read_text())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return node.value.value
+    raise AssertionError(f"{name} not found in {module}")
+
+
+def test_normalize_drops_comments_before_collapsing_lines() -> None:
+    """Regression: an inline `#` comment must not swallow the rest of the one-line query."""
+    query = _agent_query("pumpfun_token_agent.py", "graduated_query")
+    assert "# This is a specific amount" in query
+
+    normalized = normalize_query(query)
+    assert "\n" not in normalized and "#" not in normalized
+    var_defs, fields = _split_operation(normalized)
+    assert var_defs == "$since: DateTime!"
+    assert [key for key, _ in fields] == ["Solana"]
+    assert "orderBy: { descending: Block_Time }" in fields[0][1]
+    assert "MintAddress" in fields[0][1]
+
+
+def test_normalize_keeps_hash_inside_string_literals() -> None:
+    normalized = normalize_query('query {\n  a(x: "#tag") # comment "quoted"\n  b\n}')
+    assert normalized == 'query { a(x: "#tag" ) b }'
@@ -0,0 +1,107 @@
+"""Tests for deterministic extraction of Etherscan-family explorer pages (no network)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.utils.explorer_extractor import extract_explorer_page, parse_fields, parse_tables  # noqa: E402
+
+TRANSACTION_PAGE = """
+# Transaction Details
+
+Transaction Hash:
+
+0x5c50b7d9a9b04e37b3d0e4a1e6f4e9f1c3a8b2d7e6f5a4b3c2d1e0f9a8b7c6d5
+
+Status:
+
+Success
+
+Block:
+
+[19000000](https://etherscan.io/block/19000000) 12 Block Confirmations
+
+From:
+
+[0xAb5801a7D398351b8bE11C439e05C5B3259aeC9B](https://etherscan.io/address/0xab58)
+
+Interacted With (To):
+
+[Uniswap V3: Router](https://etherscan.io/address/0xe592)
+
+ERC-20 Tokens Transferred:
+
+From 0xAb58...eC9B To Uniswap V3 For 1,000 USDC
+
+From Uniswap V3 To 0xAb58...eC9B For 0.3 WETH
+
+Value:
+
+0 ETH ($0.00)
+
+Transaction Fee:
+
+0.0021 ETH ($6.30)
+"""
+
+ADDRESS_PAGE = """
+## Overview
+
+ETH Balance
+
+![eth](https://etherscan.io/images/eth.svg) 1.5 ETH
+
+Token Holdings
+
+$120.00 (3 Tokens)
+
+| Transaction Hash | Method | Block | From | To | Amount | Note |
+| --- | --- | --- | --- | --- | --- | --- |
+| [0xabc](https://etherscan.io/tx/0xabc) | Transfer | 19000000 | 0xAb58 | 0xDead | 1 ETH | |
+| [0xdef](https://etherscan.io/tx/0xdef) | Swap | 18999999 | 0xAb58 | Uniswap | 0.5 ETH | |
+"""
+
+
+def test_transaction_page_fields_are_extracted() -> None:
+    summary = extract_explorer_page(
+        TRANSACTION_PAGE, "transaction", chain="ethereum", url="https://etherscan.io/tx/0x5c"
+    )
+
+    assert summary is not None
+    assert summary.startswith("**Transaction Overview** (ethereum, [https://etherscan.io/tx/0x5c]")
+    assert "- **Status:** Success" in summary
+    assert "- **Interacted With (To):** [Uniswap V3: Router](https://etherscan.io/address/0xe592)" in summary
+    assert "  - From Uniswap V3 To 0xAb58...eC9B For 0.3 WETH" in summary
+    assert "- **Transaction Fee:** 0.0021 ETH ($6.30)" in summary
+
+
+def test_longer_labels_win_over_their_prefixes() -> None:
+    fields = parse_fields(TRANSACTION_PAGE, ["To", "Interacted With (To)", "From"])
+    assert fields["Interacted With (To)"] == ["[Uniswap V3: Router](https://etherscan.io/address/0xe592)"]
+    assert "To" not in fields
+
+
+def test_address_page_keeps_the_transactions_table_without_empty_columns() -> None:
+    summary = extract_explorer_page(ADDRESS_PAGE, "address")
+
+    assert summary is not None
+    assert "- **ETH Balance:** 1.5 ETH" in summary
+    assert "**Transactions**" in summary
+    assert "| Transaction Hash | Method | Block | From | To | Amount |" in summary
+    assert "Note" not in summary
+
+
+def test_unrecognized_pages_fall_back_to_none() -> None:
+    assert extract_explorer_page("Please verify you are a human", "transaction") is None
+    assert extract_explorer_page(ADDRESS_PAGE.split("|")[0], "address") is None
+    assert extract_explorer_page(TRANSACTION_PAGE, "unknown") is None
+
+
+def test_tables_need_a_separator_row() -> None:
+    tables = parse_tables("| a | b |\n| 1 | 2 |\n\n| a | b |\n|---|---|\n| 1 | 2 |\n")
+    assert tables == [{"header": ["a", "b"], "rows": [["1", "2"]]}]
@@ -0,0 +1,85 @@
+"""Tests for scrape sharing and caching in the async Firecrawl client (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.utils.firecrawl_client import FirecrawlClient, FirecrawlError  # noqa: E402
+
+URL = "https://etherscan.io/tx/0x5c"
+
+
+class FakeScrape:
+    """Stands in for FirecrawlClient._scrape; each call takes `delay` seconds."""
+
+    def __init__(self, delay: float = 0.05, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+        self.urls: List[str] = []
+
+    async def __call__(self, url: str, wait_for, timeout_ms) -> Dict[str, Any]:
+        self.urls.append(url)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"markdown": f"# {url}", "metadata": {}, "content_hash": "h", "fetched_at": 0.0}
+
+
+@pytest.fixture
+def client() -> FirecrawlClient:
+    return FirecrawlClient(api_key="test")
+
+
+def test_concurrent_scrapes_of_a_page_share_one_request(client: FirecrawlClient) -> None:
+    client._scrape = fake = FakeScrape()
+
+    async def main():
+        return await asyncio.gather(client.scrape(URL), client.scrape(URL), client.scrape(URL + "/other"))
+
+    first, second, other = asyncio.run(main())
+
+    assert fake.urls == [URL, URL + "/other"]
+    assert first == second and first["markdown"] == f"# {URL}"
+    assert other["markdown"] == f"# {URL}/other"
+
+
+def test_followers_finish_the_scrape_when_the_first_caller_is_cancelled(client: FirecrawlClient) -> None:
+    client._scrape = fake = FakeScrape()
+
+    async def main():
+        leader = asyncio.create_task(client.scrape(URL))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(client.scrape(URL))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        return leader, result
+
+    leader, result = asyncio.run(main())
+
+    assert leader.cancelled()
+    assert result["markdown"] == f"# {URL}"
+    assert fake.urls == [URL]
+
+
+def test_a_failed_scrape_fails_every_caller_and_is_not_cached(client: FirecrawlClient) -> None:
+    client._scrape = FakeScrape(error=FirecrawlError("Firecrawl scrape failed (HTTP 500)"))
+
+    async def main():
+        return await asyncio.gather(client.scrape(URL), client.scrape(URL), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, FirecrawlError) for result in results)
+    client._scrape = fake = FakeScrape()
+    assert asyncio.run(client.scrape(URL))["markdown"] == f"# {URL}"
+    assert fake.urls == [URL]
@@ -0,0 +1,124 @@
+"""Tests for the incrementally refreshed FRED observation store (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.agents.fred_macro_agent import FredMacroAgent  # noqa: E402
+from mesh.utils.fred_observation_store import FredObservationStore, SeriesObservations  # noqa: E402
+
+
+class FakeFred:
+    """Serves series/observations from a dict of date -> value and records every request."""
+
+    def __init__(self, observations: Dict[str, float]):
+        self.observations = observations
+        self.requests: List[Dict[str, Any]] = []
+
+    async def __call__(self, endpoint: str, timeout: int = 20, **params) -> Dict[str, Any]:
+        if endpoint == "release/dates":
+            return {"release_dates": []}
+        self.requests.append(params)
+        start = params.get("observation_start", "")
+        return {
+            "observations": [
+                {"date": day, "value": str(value)} for day, value in sorted(self.observations.items()) if day >= start
+            ]
+        }
+
+
+@pytest.fixture
+def agent() -> FredMacroAgent:
+    agent = FredMacroAgent()
+    agent._observation_store = FredObservationStore(store_dir="")
+    return agent
+
+
+def test_series_is_seeded_once_and_then_served_from_the_store(agent: FredMacroAgent) -> None:
+    spec = agent.series_by_key["headline_cpi"]
+    fred = agent._fred_get = FakeFred({"2025-01-01": 100.0, "2025-02-01": 101.0, "2025-03-01": 102.0})
+
+    async def main():
+        first = await agent._series_observations(spec, start_date="2025-02-01")
+        second = await agent._series_observations(spec, limit=1)
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert [obs["date"] for obs in first["data"]] == ["2025-02-01", "2025-03-01"]
+    assert second["data"] == [{"date": "2025-03-01", "value": 102.0}]
+    assert fred.requests == [{"series_id": spec["series_id"], "sort_order": "asc"}]
+    assert agent._observation_store.stats["hits"] == 1
+
+
+def test_refresh_refetches_the_revision_lookback_and_replaces_revised_values(agent: FredMacroAgent) -> None:
+    spec = agent.series_by_key["headline_cpi"]
+    fred = agent._fred_get = FakeFred({"2025-01-01": 100.0, "2025-02-01": 101.0, "2025-03-01": 102.0})
+    asyncio.run(agent._stored_series(spec))
+
+    # February is revised and April is released; the stored copy is now stale
+    fred.observations.update({"2025-01-01": 99.0, "2025-02-01": 101.5, "2025-04-01": 103.0})
+    agent._observation_store.get(spec["series_id"]).refreshed_at = 0.0
+    series = asyncio.run(agent._stored_series(spec))["data"]
+
+    # Monthly refreshes start REVISION_LOOKBACK_DAYS["monthly"] (95) days before the last stored date
+    assert fred.requests[-1]["observation_start"] == "2024-11-26"
+    assert series.to_observations() == [
+        {"date": "2025-01-01", "value": 99.0},
+        {"date": "2025-02-01", "value": 101.5},
+        {"date": "2025-03-01", "value": 102.0},
+        {"date": "2025-04-01", "value": 103.0},
+    ]
+    assert agent._observation_store.stats["refreshes"] == 1
+    assert agent._observation_store.stats["appended"] == 1
+
+
+def test_merge_tail_keeps_rows_before_the_refetched_range() -> None:
+    stored = SeriesObservations.from_observations(
+        [{"date": "2025-01-01", "value": 1.0}, {"date": "2025-02-01", "value": 2.0}]
+    )
+    tail = SeriesObservations.from_observations([{"date": "2025-02-01", "value": 2.5}])
+
+    merged = stored.merge_tail(tail, "2025-01-15")
+
+    assert merged.to_observations() == [{"date": "2025-01-01", "value": 1.0}, {"date": "2025-02-01", "value": 2.5}]
+
+
+def test_daily_yoy_compares_with_the_latest_prior_trading_day(agent: FredMacroAgent) -> None:
+    spec = agent.series_by_key["ust_10y"]
+    observations = [
+        {"date": "2025-05-15", "value": 4.50},  # Thursday; 2025-05-17 was a Saturday
+        {"date": "2025-06-02", "value": 4.40},
+        {"date": "2026-05-17", "value": 4.70},
+        {"date": "2026-06-16", "value": 4.60},
+    ]
+
+    transformed = agent._transform_observations(spec, observations, "yoy_change")
+
+    # 2026-06-16 has no observation within a week before 2025-06-16, so it has no point
+    assert [(point["date"], point["comparison_date"]) for point in transformed] == [("2026-05-17", "2025-05-15")]
+    assert transformed[0]["value"] == pytest.approx(0.2)
+    point = agent._metric_point(spec, observations, 2, "yoy_change")
+    assert point is not None and point["comparison_date"] == "2025-05-15"
+
+
+def test_least_recently_used_series_are_evicted() -> None:
+    store = FredObservationStore(store_dir="", max_series=2)
+    series = SeriesObservations.from_observations([{"date": "2025-01-01", "value": 1.0}])
+    store.put("A", series)
+    store.put("B", series)
+    store.get("A")
+    store.put("C", series)
+
+    assert store.get("B") is None
+    assert store.get("A") is not None and store.get("C") is not None
+    assert store.stats["evictions"] == 1
@@ -0,0 +1,125 @@
+"""Tests for request coalescing in MicroBatcher and the yf.download pool's broken-pool retry (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.utils import yf_download_pool  # noqa: E402
+from mesh.utils.micro_batcher import MicroBatcher  # noqa: E402
+from mesh.utils.yf_download_pool import YFDownloadPool  # noqa: E402
+
+
+class RecordingFetch:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, group, keys):
+        self.calls.append((group, list(keys)))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {key: f"{group}:{key}" for key in keys if key != "missing"}
+
+
+def test_concurrent_loads_are_coalesced_into_one_batch_per_group() -> None:
+    fetch = RecordingFetch()
+    batcher = MicroBatcher(fetch, window_seconds=0.01)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.load_many(["a", "b"], group="1d"),
+            batcher.load_many(["b", "c", "missing"], group="1d"),
+            batcher.load("a", group="1h"),
+        )
+
+    first, second, other_group = asyncio.run(main())
+
+    assert sorted(fetch.calls) == [("1d", ["a", "b", "c", "missing"]), ("1h", ["a"])]
+    assert first == {"a": "1d:a", "b": "1d:b"}
+    assert second == {"b": "1d:b", "c": "1d:c", "missing": None}
+    assert other_group == "1h:a"
+    assert batcher.stats["coalesced_keys"] == 1
+    assert not batcher._batch_tasks
+
+
+def test_full_batches_are_flushed_before_the_window() -> None:
+    fetch = RecordingFetch()
+    batcher = MicroBatcher(fetch, window_seconds=10, max_batch_size=2)
+
+    async def main():
+        return await asyncio.wait_for(batcher.load_many(["a", "b", "c", "d"]), 1)
+
+    asyncio.run(main())
+
+    assert [keys for _, keys in fetch.calls] == [["a", "b"], ["c", "d"]]
+
+
+def test_a_failed_batch_fails_every_caller_and_is_not_reused() -> None:
+    fetch = RecordingFetch(fail=True)
+    batcher = MicroBatcher(fetch, window_seconds=0.01)
+
+    async def main():
+        return await asyncio.gather(batcher.load("a"), batcher.load("a"), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(fetch.calls) == 1
+    fetch.fail = False
+    assert asyncio.run(batcher.load("a")) == "None:a"
+
+
+class BrokenExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+class InlineExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def _fake_download(symbols, kwargs):
+    return {symbol: pd.DataFrame({"Close": [1.0]}) for symbol in symbols}
+
+
+@pytest.fixture
+def pool(monkeypatch) -> YFDownloadPool:
+    monkeypatch.setattr(yf_download_pool, "_download_in_worker", _fake_download)
+    monkeypatch.setattr(yf_download_pool, "_download_in_process", _fake_download)
+    return YFDownloadPool(max_workers=1, batch_window_seconds=0)
+
+
+def test_broken_pool_is_restarted_and_the_batch_retried(pool: YFDownloadPool) -> None:
+    executors = [BrokenExecutor(), InlineExecutor()]
+    pool._get_executor = lambda: executors.pop(0)
+
+    frames = asyncio.run(pool.download(["AAPL", "MSFT"], period="1d"))
+
+    assert sorted(frames) == ["AAPL", "MSFT"]
+    assert frames["AAPL"]["Close"].tolist() == [1.0]
+    assert executors == []
+
+
+def test_pool_broken_twice_downloads_in_process(pool: YFDownloadPool) -> None:
+    pool._get_executor = BrokenExecutor
+
+    frames = asyncio.run(pool.download(["AAPL"], period="1d"))
+
+    assert frames["AAPL"]["Close"].tolist() == [1.0]
@@ -0,0 +1,46 @@
+"""Checks that the mesh copy of the search rate limiter stays identical to the core one (no network)."""
+
+from __future__ import annotations
+
+import ast
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+CORE_RATE_LIMITER = ROOT / "core" / "clients" / "search" / "rate_limiter.py"
+MESH_RATE_LIMITER = ROOT / "mesh" / "utils" / "rate_limiter.py"
+
+
+def _definitions(path: Path) -> dict:
+    """Source of every top-level class, function and constant of a module, read without importing it."""
+    source = path.read_text()
+    definitions = {}
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            definitions[node.name] = ast.get_source_segment(source, node)
+        elif isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            definitions[node.targets[0].id] = ast.get_source_segment(source, node)
+    return definitions
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "RateLimiter",
+        "retry_after_seconds",
+        "BACKOFF_BASE_SECONDS",
+        "BACKOFF_MAX_SECONDS",
+        "MIN_RATE_FRACTION",
+        "RECOVERY_FRACTION",
+    ],
+)
+def test_mesh_copy_matches_core(name: str) -> None:
+    """mesh/utils/rate_limiter.py copies the core limiter (mesh does not import core); keep them identical."""
+    core, mesh = _definitions(CORE_RATE_LIMITER), _definitions(MESH_RATE_LIMITER)
+    assert name in core and name in mesh
+    assert mesh[name] == core[name], f"{name} differs between {CORE_RATE_LIMITER.name} copies in core and mesh"
@@ -0,0 +1,94 @@
+"""Parity tests for the vectorized indicator engine against stockstats (no network)."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.utils.technical_indicators import TechnicalIndicatorEngine, compute_latest_indicators  # noqa: E402
+
+stockstats = pytest.importorskip("stockstats")
+
+INDICATORS = [
+    "rsi",
+    "macd",
+    "macds",
+    "macdh",
+    "boll",
+    "boll_ub",
+    "boll_lb",
+    "close_10_ema",
+    "close_50_sma",
+    "close_200_sma",
+    "atr",
+]
+
+
+def _ohlcv(bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close * (1 + rng.uniform(0, 0.02, bars)),
+            "Low": close * (1 - rng.uniform(0, 0.02, bars)),
+            "Close": close,
+            "Volume": rng.uniform(1e5, 1e6, bars),
+        },
+        index=pd.date_range("2024-01-01", periods=bars, freq="D"),
+    )
+
+
+def _stockstats_latest(df: pd.DataFrame) -> dict:
+    wrapped = stockstats.wrap(df.rename(columns=str.lower))
+    return {name: float(wrapped[name].iloc[-1]) for name in INDICATORS}
+
+
+def test_batch_matches_stockstats_for_unequal_lengths() -> None:
+    frames = [_ohlcv(250, 1), _ohlcv(35, 2), _ohlcv(120, 3)]
+    for df, values in zip(frames, compute_latest_indicators(frames)):
+        expected = _stockstats_latest(df)
+        for name in INDICATORS:
+            assert values[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9), name
+
+
+def test_incremental_append_matches_full_recompute() -> None:
+    df = _ohlcv(260, 4)
+    engine = TechnicalIndicatorEngine()
+    engine.compute({"AAA": df.iloc[:-3]})
+    appended = engine.compute({"AAA": df})["AAA"]
+    assert engine.stats["incremental"] == 1
+
+    expected = _stockstats_latest(df)
+    for name in INDICATORS:
+        assert appended[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9), name
+
+
+def test_revised_last_bar_forces_full_recompute() -> None:
+    df = _ohlcv(80, 5)
+    engine = TechnicalIndicatorEngine()
+    engine.compute({"AAA": df})
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] *= 1.01
+    engine.compute({"AAA": revised})
+    assert engine.stats["full"] == 2
+
+
+def test_rolled_window_recomputes_from_its_own_bars() -> None:
+    df = _ohlcv(260, 6)
+    engine = TechnicalIndicatorEngine()
+    engine.compute({"AAA": df.iloc[:-5]})
+    rolled = engine.compute({"AAA": df.iloc[5:]})["AAA"]
+    assert engine.stats["full"] == 2
+
+    expected = _stockstats_latest(df.iloc[5:])
+    for name in INDICATORS:
+        assert rolled[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9), name
@@ -0,0 +1,105 @@
+"""Tests for token identity resolution against a small built index (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.utils.token_identity_index import TokenIdentityIndex, write_token_identity_index  # noqa: E402
+
+COINS = [
+    {"id": "dogwifcoin", "symbol": "wif", "name": "dogwifhat", "platforms": {}},
+    {"id": "fetch-ai", "symbol": "fet", "name": "Artificial Superintelligence Alliance", "platforms": {}},
+    {"id": "render-token", "symbol": "render", "name": "Render", "platforms": {}},
+]
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> TokenIdentityIndex:
+    path = tmp_path / "token_identity_index.db"
+    conn = sqlite3.connect(path)
+    write_token_identity_index(conn, coins=COINS)
+    conn.commit()
+    conn.close()
+    return TokenIdentityIndex(str(path))
+
+
+def test_fuzzy_resolution_matches_misspelled_and_partial_names(index: TokenIdentityIndex) -> None:
+    assert index.resolve_coingecko_id("dogwifhatt") is None
+    assert index.resolve_coingecko_id("dogwifhatt", fuzzy=True) == "dogwifcoin"
+    assert index.resolve_coingecko_id("Artificial Superintelligence", fuzzy=True) == "fetch-ai"
+
+
+def test_fuzzy_resolution_rejects_weak_or_short_matches(index: TokenIdentityIndex) -> None:
+    assert index.resolve_coingecko_id("rend", fuzzy=True) is None
+    assert index.resolve_coingecko_id("xyzzy", fuzzy=True) is None
+    assert index.resolve_coingecko_id("render", fuzzy=True) == "render-token"
+
+
+class FakeCoinGecko:
+    """Answers /search from a dict of query -> coins and /coins/{id} for the given IDs; records every URL."""
+
+    def __init__(self, search_results: dict, known_ids: set):
+        self.search_results = search_results
+        self.known_ids = known_ids
+        self.urls: list = []
+
+    async def request(self, url: str, params=None) -> dict:
+        self.urls.append(url if not params else f"{url}?query={params['query']}")
+        if url.endswith("/search"):
+            return {"coins": self.search_results.get(params["query"], [])}
+        coingecko_id = url.rsplit("/", 1)[-1]
+        if coingecko_id in self.known_ids:
+            return {"id": coingecko_id, "name": coingecko_id, "symbol": "tok"}
+        return {"error": "coin not found"}
+
+
+@pytest.fixture
+def coingecko_agent(index: TokenIdentityIndex, monkeypatch):
+    from mesh.agents import coingecko_token_info_agent
+    from mesh.mesh_agent import MeshAgent
+
+    for name in ("COINGECKO_API_KEY", "R2_ENDPOINT", "R2_ACCESS_KEY", "R2_SECRET_KEY"):
+        monkeypatch.setenv(name, "https://r2.invalid" if name == "R2_ENDPOINT" else "test")
+    monkeypatch.setattr(coingecko_token_info_agent, "get_token_identity_index", lambda: index)
+    fake = FakeCoinGecko(
+        search_results={"Dogwif Coin": [{"id": "dogwifcoin", "name": "dogwifhat", "symbol": "wif"}]},
+        known_ids={"dogwifcoin", "render-token"},
+    )
+
+    async def api_request(self, url, method="GET", headers=None, params=None, json_data=None, **kwargs):
+        return await fake.request(url, params)
+
+    monkeypatch.setattr(MeshAgent, "_api_request", api_request)
+    return coingecko_token_info_agent.CoinGeckoTokenInfoAgent(), fake
+
+
+def test_coingecko_agent_searches_before_matching_names_approximately(coingecko_agent) -> None:
+    agent, fake = coingecko_agent
+
+    result = asyncio.run(agent._handle_tool_logic("get_token_info", {"coingecko_id": "Dogwifhatt"}))
+
+    assert fake.urls == [
+        "https://pro-api.coingecko.com/api/v3/search?query=Dogwifhatt",
+        "https://pro-api.coingecko.com/api/v3/coins/dogwifcoin",
+    ]
+    assert result["token_info"]["id"] == "dogwifcoin"
+    assert result["approximate_match"] == {"query": "Dogwifhatt", "coingecko_id": "dogwifcoin"}
+
+
+def test_coingecko_agent_prefers_search_results_over_approximate_names(coingecko_agent) -> None:
+    agent, fake = coingecko_agent
+
+    result = asyncio.run(agent._handle_tool_logic("get_token_info", {"coingecko_id": "Dogwif Coin"}))
+
+    assert fake.urls[0] == "https://pro-api.coingecko.com/api/v3/search?query=Dogwif Coin"
+    assert result["token_info"]["id"] == "dogwifcoin"
+    assert "approximate_match" not in result
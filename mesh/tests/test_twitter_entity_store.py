@@ -0,0 +1,142 @@
+"""Tests for the held Twitter timelines: incremental refresh, gap refetch and held cursors (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mesh.agents import twitter_info_agent  # noqa: E402
+from mesh.agents.twitter_info_agent import HELD_CURSOR_PREFIX, TwitterInfoAgent  # noqa: E402
+from mesh.utils.twitter_entity_store import TwitterEntityStore  # noqa: E402
+
+USER_ID = "44196397"
+
+
+class FakeTimelineApi:
+    """Serves one user's timeline (newest first) in pages; API cursors are "after:<offset>"."""
+
+    def __init__(self, count: int):
+        self.tweet_ids: List[int] = list(range(1000 + count, 1000, -1))
+        self.requests: List[tuple] = []
+
+    def post(self, count: int) -> None:
+        newest = self.tweet_ids[0]
+        self.tweet_ids = list(range(newest + count, newest, -1)) + self.tweet_ids
+
+    async def __call__(self, url: str, method: str = "GET", headers=None, params=None, **kwargs) -> Dict[str, Any]:
+        cursor: Optional[str] = params.get("cursor")
+        self.requests.append((params["count"], cursor))
+        start = int(cursor.split(":")[1]) if cursor else 0
+        end = start + params["count"]
+        tweets = [{"tweet_id": str(tweet_id), "text": f"tweet {tweet_id}"} for tweet_id in self.tweet_ids[start:end]]
+        next_cursor = f"after:{end}" if end < len(self.tweet_ids) else None
+        return {"data": {"tweets": tweets, "cursor": next_cursor}}
+
+
+@pytest.fixture
+def store(monkeypatch) -> TwitterEntityStore:
+    store = TwitterEntityStore()
+    monkeypatch.setattr(twitter_info_agent, "get_twitter_entity_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def api() -> FakeTimelineApi:
+    return FakeTimelineApi(count=30)
+
+
+@pytest.fixture
+def agent(store: TwitterEntityStore, api: FakeTimelineApi, monkeypatch) -> TwitterInfoAgent:
+    monkeypatch.setenv("APIDANCE_API_KEY", "test")
+    monkeypatch.setenv("APIFY_API_KEY", "test")
+    agent = TwitterInfoAgent()
+    agent._api_request = api
+    return agent
+
+
+def _ids(page: Dict[str, Any]) -> List[int]:
+    return [int(tweet["id"]) for tweet in page["tweets"]]
+
+
+def _mark_checked_long_ago(store: TwitterEntityStore) -> None:
+    store._timelines[USER_ID]["checked_at"] -= twitter_info_agent.TIMELINE_FRESH_SECONDS + 1
+
+
+def test_latest_tweets_are_topped_up_with_only_the_new_ones(
+    agent: TwitterInfoAgent, api: FakeTimelineApi, store: TwitterEntityStore
+) -> None:
+    first = asyncio.run(agent.get_tweets(USER_ID, limit=10))
+    repeat = asyncio.run(agent.get_tweets(USER_ID, limit=10))
+    api.post(2)
+    _mark_checked_long_ago(store)
+    refreshed = asyncio.run(agent.get_tweets(USER_ID, limit=10))
+
+    assert _ids(first) == _ids(repeat) == list(range(1030, 1020, -1))
+    # One full page, nothing while fresh, then a small probe instead of a second full page
+    assert api.requests == [(10, None), (twitter_info_agent.INCREMENTAL_PROBE_COUNT, None)]
+    assert _ids(refreshed) == list(range(1032, 1022, -1))
+    assert store.get_timeline(USER_ID)["ids"][:3] == ["1032", "1031", "1030"]
+
+
+def test_a_probe_of_only_new_tweets_refetches_the_first_page(
+    agent: TwitterInfoAgent, api: FakeTimelineApi, store: TwitterEntityStore
+) -> None:
+    asyncio.run(agent.get_tweets(USER_ID, limit=10))
+    # More new tweets than the probe holds, so there may be a gap behind it
+    api.post(twitter_info_agent.INCREMENTAL_PROBE_COUNT + 3)
+    _mark_checked_long_ago(store)
+
+    refreshed = asyncio.run(agent.get_tweets(USER_ID, limit=10))
+
+    assert api.requests == [(10, None), (twitter_info_agent.INCREMENTAL_PROBE_COUNT, None), (10, None)]
+    assert _ids(refreshed) == list(range(1038, 1028, -1))
+    assert store.get_timeline(USER_ID)["ids"] == [str(tweet_id) for tweet_id in range(1038, 1028, -1)]
+
+
+def test_held_cursors_page_through_the_store_and_continue_from_the_api_cursor(
+    agent: TwitterInfoAgent, api: FakeTimelineApi
+) -> None:
+    first = asyncio.run(agent.get_tweets(USER_ID, limit=10))
+    assert first["next_cursor"] == "after:10"
+
+    # A shorter page leaves held tweets behind it, reachable through a held cursor
+    latest = asyncio.run(agent.get_tweets(USER_ID, limit=4))
+    assert latest["next_cursor"] == f"{HELD_CURSOR_PREFIX}1027"
+    second = asyncio.run(agent.get_tweets(USER_ID, limit=4, cursor=latest["next_cursor"]))
+    assert _ids(second) == [1026, 1025, 1024, 1023]
+    assert api.requests == [(10, None)]
+
+    # Past the held tweets the page is completed from the stored API cursor
+    third = asyncio.run(agent.get_tweets(USER_ID, limit=4, cursor=second["next_cursor"]))
+    assert _ids(third) == [1022, 1021, 1020, 1019]
+    assert api.requests == [(10, None), (4, "after:10")]
+
+
+def test_held_cursors_expire_when_the_timeline_or_its_tweets_are_gone(
+    agent: TwitterInfoAgent, api: FakeTimelineApi, store: TwitterEntityStore
+) -> None:
+    asyncio.run(agent.get_tweets(USER_ID, limit=10))
+    stale_cursor = asyncio.run(agent.get_tweets(USER_ID, limit=4))["next_cursor"]
+
+    # A gap refetch replaces the held timeline, so the cursor's tweet is no longer in it
+    api.post(twitter_info_agent.INCREMENTAL_PROBE_COUNT + 3)
+    _mark_checked_long_ago(store)
+    asyncio.run(agent.get_tweets(USER_ID, limit=10))
+    assert "expired" in asyncio.run(agent.get_tweets(USER_ID, limit=4, cursor=stale_cursor))["error"]
+
+    # The timeline still lists the next tweets, but the tweet store evicted one of them
+    cursor = asyncio.run(agent.get_tweets(USER_ID, limit=4))["next_cursor"]
+    assert cursor == f"{HELD_CURSOR_PREFIX}1035"
+    store._tweets.pop("1033")
+    assert "expired" in asyncio.run(agent.get_tweets(USER_ID, limit=4, cursor=cursor))["error"]
+
+    store._timelines.clear()
+    assert "expired" in asyncio.run(agent.get_tweets(USER_ID, limit=4, cursor=cursor))["error"]
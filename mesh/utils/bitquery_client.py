@@ -0,0 +1,422 @@
+"""Shared Bitquery GraphQL client.
+
+Every Bitquery-backed agent sends its queries through one client, which:
+
+- merges queries issued within a short batching window into a single GraphQL
+  request, renaming each query's variables and aliasing its top-level fields so
+  they cannot collide, then splits the response back per query;
+- caches successful results by normalized query document plus variables, so an
+  identical query from any agent within the TTL is served without a request;
+- keeps per-query latency and response-size stats, so expensive queries are easy
+  to spot (Bitquery does not report points per query in the response, so response
+  size stands in for cost).
+
+A merged request that fails as a whole (HTTP error, or GraphQL errors that cannot
+be attributed to one query) is retried query by query, so one bad query cannot
+fail the queries it happened to be batched with.
+"""
+
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from mesh.utils.micro_batcher import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+BITQUERY_URL = "https://streaming.bitquery.io/eap"
+REQUEST_TIMEOUT_SECONDS = 30
+DEFAULT_BATCH_WINDOW_MS = 20
+DEFAULT_MAX_BATCH_QUERIES = 8
+DEFAULT_CACHE_TTL_SECONDS = 60
+MAX_CACHE_ENTRIES = 1024
+SLOW_QUERY_SECONDS = 5.0
+
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+# String literals (kept verbatim) or `#` comments (dropped), whichever starts first
+_STRING_OR_COMMENT_RE = re.compile(r'"(?:[^"\\]|\\.)*"|#[^\r\n]*')
+_VARIABLE_RE = re.compile(r"\$([A-Za-z_]\w*)")
+_NAME_RE = re.compile(r"[A-Za-z_]\w*")
+
+
+def normalize_query(query: str) -> str:
+    """Drop comments and collapse whitespace outside string literals.
+
+    Formatting then does not split cache entries, and the single-line result is what gets
+    sent, so comments must go first: a `#` comment would otherwise swallow the rest of it.
+    """
+    parts = []
+    last = 0
+    for match in _STRING_OR_COMMENT_RE.finditer(query):
+        parts.append(" ".join(query[last : match.start()].split()))
+        if not match.group(0).startswith("#"):
+            parts.append(match.group(0))
+        last = match.end()
+    parts.append(" ".join(query[last:].split()))
+    return " ".join(part for part in parts if part)
+
+
+def _matching(text: str, start: int, open_char: str, close_char: str) -> int:
+    """Index just past the bracket that closes text[start], skipping string literals."""
+    depth = 0
+    i = start
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            match = _STRING_RE.match(text, i)
+            if match is None:
+                raise ValueError("Unterminated string literal")
+            i = match.end()
+            continue
+        if char == open_char:
+            depth += 1
+        elif char == close_char:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError(f"Unbalanced '{open_char}'")
+
+
+def _skip_space(text: str, i: int) -> int:
+    while i < len(text) and (text[i].isspace() or text[i] == ","):
+        i += 1
+    return i
+
+
+def _split_selection(text: str, open_index: int) -> Tuple[List[Tuple[str, str]], int]:
+    """Parse the selection set opening at text[open_index] into (response key, field text) pairs.
+
+    Field text has any alias stripped. Also returns the index just past the closing brace.
+    """
+    close = _matching(text, open_index, "{", "}")
+    fields = []
+    i = _skip_space(text, open_index + 1)
+    while i < close - 1:
+        name = _NAME_RE.match(text, i)
+        if not name:
+            raise ValueError(f"Unexpected token at {i}")
+        response_key = name.group(0)
+        j = _skip_space(text, name.end())
+        if text[j] == ":":
+            name = _NAME_RE.match(text, _skip_space(text, j + 1))
+            if not name:
+                raise ValueError("Alias without a field name")
+            j = _skip_space(text, name.end())
+        if text[j] == "(":
+            j = _skip_space(text, _matching(text, j, "(", ")"))
+        if text[j] == "{":
+            j = _matching(text, j, "{", "}")
+        fields.append((response_key, text[name.start() : j].strip()))
+        i = _skip_space(text, j)
+    return fields, close
+
+
+def _split_operation(query: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split a single query operation into (variable definitions, top-level fields).
+
+    Raises ValueError for documents that cannot be merged (fragments, mutations,
+    several operations, directives on the operation).
+    """
+    text = query.strip()
+    i = 0
+    if text.startswith("query"):
+        i = _skip_space(text, len("query"))
+        name = _NAME_RE.match(text, i)
+        if name:
+            i = _skip_space(text, name.end())
+    var_defs = ""
+    if i < len(text) and text[i] == "(":
+        end = _matching(text, i, "(", ")")
+        var_defs = text[i + 1 : end - 1].strip()
+        i = _skip_space(text, end)
+    if i >= len(text) or text[i] != "{":
+        raise ValueError("Not a mergeable query operation")
+    fields, end = _split_selection(text, i)
+    if text[end:].strip():
+        raise ValueError("Document has more than one definition")
+    if not fields:
+        raise ValueError("Empty selection set")
+    return var_defs, fields
+
+
+def _rename_variables(text: str, prefix: str) -> str:
+    parts = []
+    last = 0
+    for match in _STRING_RE.finditer(text):
+        parts.append(_VARIABLE_RE.sub(lambda m: f"${prefix}{m.group(1)}", text[last : match.start()]))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(_VARIABLE_RE.sub(lambda m: f"${prefix}{m.group(1)}", text[last:]))
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=512)
+def _query_label(query: str) -> str:
+    """Short, stable label for stats: top-level and cube field names plus a document hash."""
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:8]
+    try:
+        _, fields = _split_operation(query)
+        names = []
+        for _, field in fields:
+            head = _NAME_RE.match(field).group(0)
+            if field.endswith("}"):
+                cubes, _ = _split_selection(field, field.index("{"))
+                head += "." + "+".join(dict.fromkeys(_NAME_RE.match(cube).group(0) for _, cube in cubes))
+            names.append(head)
+    except (ValueError, IndexError):
+        return f"query#{digest}"
+    return f"{','.join(names)}#{digest}"
+
+
+class BitqueryError(Exception):
+    """A merged Bitquery request failed as a whole."""
+
+
+class BitqueryClient:
+    """Batches, caches and measures Bitquery GraphQL queries for all agents."""
+
+    def __init__(
+        self,
+        url: str = BITQUERY_URL,
+        batch_window_seconds: Optional[float] = None,
+        max_batch_queries: Optional[int] = None,
+        cache_ttl_seconds: Optional[float] = None,
+    ):
+        if batch_window_seconds is None:
+            batch_window_seconds = float(os.getenv("BITQUERY_BATCH_WINDOW_MS", str(DEFAULT_BATCH_WINDOW_MS))) / 1000
+        if max_batch_queries is None:
+            max_batch_queries = int(os.getenv("BITQUERY_MAX_BATCH_QUERIES", str(DEFAULT_MAX_BATCH_QUERIES)))
+        if cache_ttl_seconds is None:
+            cache_ttl_seconds = float(os.getenv("BITQUERY_CACHE_TTL_SECONDS", str(DEFAULT_CACHE_TTL_SECONDS)))
+
+        self.url = url
+        self.cache_ttl_seconds = max(0.0, cache_ttl_seconds)
+        self._batcher = MicroBatcher(
+            self._fetch_batch, window_seconds=batch_window_seconds, max_batch_size=max_batch_queries
+        )
+        # (normalized query, variables json) -> (expires_at, result)
+        self._cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._query_stats: Dict[str, Dict[str, Any]] = {}
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.stats = {"queries": 0, "cache_hits": 0, "requests": 0, "merged_requests": 0, "split_retries": 0}
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS))
+            self._sessions[loop] = session
+        return session
+
+    async def execute(self, query: str, variables: Optional[Dict[str, Any]], api_key: str) -> Dict[str, Any]:
+        """Run one query; returns the GraphQL response ({"data": ...}) or {"error": message}.
+
+        The returned dict is the caller's own copy and may be modified freely.
+        """
+        self.stats["queries"] += 1
+        key = (normalize_query(query), json.dumps(variables or {}, sort_keys=True, default=str))
+
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.time():
+            self.stats["cache_hits"] += 1
+            self._record(key[0], cache_hit=True)
+            return copy.deepcopy(cached[1])
+
+        try:
+            result = await self._batcher.load(key, group=api_key)
+        except Exception as e:
+            logger.error(f"Bitquery request failed: {e}")
+            return {"error": f"Query execution failed: {str(e)}"}
+        if result is None:
+            return {"error": "Query execution failed: no result returned"}
+
+        if "error" not in result and self.cache_ttl_seconds > 0:
+            self._cache[key] = (time.time() + self.cache_ttl_seconds, result)
+            if len(self._cache) > MAX_CACHE_ENTRIES:
+                self._prune_cache()
+        return copy.deepcopy(result)
+
+    def _prune_cache(self) -> None:
+        now = time.time()
+        for key in [key for key, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[key]
+        # Still full of live entries: drop the ones closest to expiry.
+        overflow = len(self._cache) - MAX_CACHE_ENTRIES
+        if overflow > 0:
+            for key, _ in sorted(self._cache.items(), key=lambda item: item[1][0])[:overflow]:
+                del self._cache[key]
+
+    async def _post(self, payload: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+        self.stats["requests"] += 1
+        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+        async with self._session().post(self.url, json=payload, headers=headers) as response:
+            if response.status >= 400:
+                text = await response.text()
+                raise BitqueryError(f"HTTP {response.status}: {text[:300]}")
+            return await response.json(content_type=None)
+
+    async def _fetch_batch(self, api_key: str, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        if len(keys) == 1:
+            return {keys[0]: await self._run_single(keys[0], api_key)}
+
+        merged = self._merge(keys)
+        if merged is None:
+            return await self._run_each(keys, api_key)
+
+        payload, field_map = merged
+        started = time.perf_counter()
+        try:
+            response = await self._post(payload, api_key)
+        except Exception as e:
+            logger.warning(f"Merged Bitquery request of {len(keys)} queries failed, retrying individually: {e}")
+            return await self._run_each(keys, api_key)
+        elapsed = time.perf_counter() - started
+
+        errors_by_query: Dict[int, List[str]] = {}
+        for error in response.get("errors") or []:
+            path = error.get("path") or []
+            index = field_map.get(path[0], (None,))[0] if path else None
+            if index is None:
+                # Not attributable to one query (e.g. a validation error): isolate them.
+                logger.warning(f"Merged Bitquery request failed as a whole, retrying individually: {error}")
+                return await self._run_each(keys, api_key)
+            errors_by_query.setdefault(index, []).append(error.get("message", "Unknown error"))
+
+        self.stats["merged_requests"] += 1
+        data = response.get("data") or {}
+        results: Dict[Tuple[str, str], Dict[str, Any]] = {key: {"data": {}} for key in keys}
+        for alias, (index, response_key) in field_map.items():
+            results[keys[index]]["data"][response_key] = data.get(alias)
+        for index, key in enumerate(keys):
+            if index in errors_by_query:
+                results[key] = {"error": f"GraphQL errors: {', '.join(errors_by_query[index])}"}
+            self._record(key[0], elapsed=elapsed, result=results[key], batch_size=len(keys))
+        return results
+
+    def _merge(self, keys: List[Tuple[str, str]]) -> Optional[Tuple[Dict[str, Any], Dict[str, Tuple[int, str]]]]:
+        """One aliased document for all queries, or None if any of them cannot be merged."""
+        var_defs: List[str] = []
+        selections: List[str] = []
+        variables: Dict[str, Any] = {}
+        # alias in the merged document -> (query index, original response key)
+        field_map: Dict[str, Tuple[int, str]] = {}
+        for index, (query, variables_json) in enumerate(keys):
+            prefix = f"q{index}_"
+            try:
+                query_var_defs, fields = _split_operation(query)
+            except (ValueError, IndexError):
+                return None
+            if query_var_defs:
+                var_defs.append(_rename_variables(query_var_defs, prefix))
+            for response_key, field in fields:
+                alias = f"{prefix}{response_key}"
+                field_map[alias] = (index, response_key)
+                selections.append(f"{alias}: {_rename_variables(field, prefix)}")
+            variables.update({f"{prefix}{name}": value for name, value in json.loads(variables_json).items()})
+
+        header = f"query ({', '.join(var_defs)})" if var_defs else "query"
+        payload = {"query": f"{header} {{ {' '.join(selections)} }}", "variables": variables}
+        return payload, field_map
+
+    async def _run_each(self, keys: List[Tuple[str, str]], api_key: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        self.stats["split_retries"] += 1
+        results = await asyncio.gather(*(self._run_single(key, api_key) for key in keys))
+        return dict(zip(keys, results))
+
+    async def _run_single(self, key: Tuple[str, str], api_key: str) -> Dict[str, Any]:
+        query, variables_json = key
+        variables = json.loads(variables_json)
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+
+        started = time.perf_counter()
+        try:
+            response = await self._post(payload, api_key)
+        except Exception as e:
+            result = {"error": f"Query execution failed: {str(e)}"}
+        else:
+            if response.get("errors"):
+                messages = [error.get("message", "Unknown error") for error in response["errors"]]
+                result = {"error": f"GraphQL errors: {', '.join(messages)}"}
+            else:
+                result = {"data": response.get("data") or {}}
+        self._record(query, elapsed=time.perf_counter() - started, result=result, batch_size=1)
+        return result
+
+    def _record(
+        self,
+        query: str,
+        elapsed: float = 0.0,
+        result: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1,
+        cache_hit: bool = False,
+    ) -> None:
+        label = _query_label(query)
+        stats = self._query_stats.get(label)
+        if stats is None:
+            stats = self._query_stats[label] = {
+                "calls": 0,
+                "cache_hits": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "response_bytes": 0,
+                "batched_calls": 0,
+            }
+        if cache_hit:
+            stats["cache_hits"] += 1
+            return
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed * 1000
+        stats["max_ms"] = max(stats["max_ms"], elapsed * 1000)
+        if batch_size > 1:
+            stats["batched_calls"] += 1
+        if result is not None:
+            if "error" in result:
+                stats["errors"] += 1
+            else:
+                stats["response_bytes"] += len(json.dumps(result.get("data"), separators=(",", ":")))
+        if elapsed >= SLOW_QUERY_SECONDS:
+            logger.warning(f"Slow Bitquery query {label}: {elapsed:.1f}s (batch of {batch_size})")
+
+    def query_stats(self) -> List[Dict[str, Any]]:
+        """Per-query stats, most expensive (total time) first."""
+        rows = []
+        for label, stats in self._query_stats.items():
+            calls = stats["calls"]
+            rows.append(
+                {
+                    "query": label,
+                    **stats,
+                    "avg_ms": round(stats["total_ms"] / calls, 1) if calls else 0.0,
+                    "avg_response_bytes": stats["response_bytes"] // calls if calls else 0,
+                }
+            )
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+
+# Singleton instance
+_bitquery_client: Optional[BitqueryClient] = None
+
+
+def get_bitquery_client() -> BitqueryClient:
+    """Get or create the singleton BitqueryClient instance."""
+    global _bitquery_client
+    if _bitquery_client is None:
+        _bitquery_client = BitqueryClient()
+    return _bitquery_client
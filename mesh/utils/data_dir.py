@@ -0,0 +1,26 @@
+"""
+Location of the files mesh agents write at runtime (query result caches and the like).
+
+They live under HEURIST_DATA_DIR, by default the user cache directory
+($XDG_CACHE_HOME/heurist or ~/.cache/heurist), the same directory core uses
+(core/utils/data_dir.py; mesh does not import core).
+"""
+
+import os
+from pathlib import Path
+
+
+def data_dir() -> Path:
+    """The runtime data directory, created on first use."""
+    configured = os.environ.get("HEURIST_DATA_DIR")
+    if configured:
+        path = Path(configured).expanduser()
+    else:
+        path = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "heurist"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_path(*parts: str) -> str:
+    """Path of a file or directory inside the runtime data directory."""
+    return str(data_dir().joinpath(*parts))
@@ -0,0 +1,157 @@
+"""Normalized DexScreener pair records.
+
+DexScreener responses are lists of nested pair dicts. Aggregators read the same few
+fields from every pair several times per request (liquidity, volume, symbols, the
+preview shown to users), so each response is normalized once into compact slotted
+records with those fields and the pair score precomputed. Records are cached per
+response object: DexScreenerTokenInfoAgent's tool cache hands back the same response
+for repeated lookups, and those skip normalization entirely.
+"""
+
+import heapq
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Minimum 24h volume threshold for DEX pools (filters out low-activity/fake pools)
+MIN_POOL_VOLUME_24H = 2000
+
+# Minimum liquidity threshold for DEX pools (filters out scam/fake pools with wash trading)
+MIN_POOL_LIQUIDITY_USD = 4000
+
+RECORD_CACHE_SIZE = 256
+
+
+def _safe_float(x) -> Optional[float]:
+    try:
+        return float(x)
+    except Exception:
+        return None
+
+
+def pair_score(liquidity_usd: float, volume24h_usd: float) -> float:
+    if liquidity_usd > 300000:
+        return volume24h_usd * 0.2 + liquidity_usd * 0.8
+    return liquidity_usd
+
+
+def pair_preview(p: Dict[str, Any]) -> Dict[str, Any]:
+    """User-facing summary of one pair."""
+    info = p.get("info") or {}
+    return {
+        "link": f"https://dexscreener.com/{p.get('chainId')}/{p.get('pairAddress')}",
+        "dex": p.get("dexId"),
+        "price_usd": _safe_float(p.get("priceUsd")),
+        "volume24h_usd": _safe_float((p.get("volume") or {}).get("h24")),
+        "liquidity_usd": _safe_float((p.get("liquidity") or {}).get("usd")),
+        "txns24h": (p.get("txns") or {}).get("h24"),
+        "price_change": p.get("priceChange"),
+        "market_cap": _safe_float(p.get("marketCap")),
+        "fdv": _safe_float(p.get("fdv")),
+        "websites": info.get("websites") or [],
+        "socials": info.get("socials") or [],
+    }
+
+
+class PairRecord:
+    """One pair with the fields used for filtering and ranking extracted up front.
+
+    The preview is built on first access, so pairs dropped by the filters never pay for it.
+    """
+
+    __slots__ = (
+        "raw",
+        "chain",
+        "base",
+        "quote",
+        "base_symbol",
+        "quote_symbol",
+        "liquidity_usd",
+        "volume24h_usd",
+        "score",
+        "_preview",
+    )
+
+    def __init__(self, p: Dict[str, Any]):
+        self.raw = p
+        self.chain = p.get("chainId")
+        self.base = p.get("baseToken") or {}
+        self.quote = p.get("quoteToken") or {}
+        self.base_symbol = (self.base.get("symbol") or "").upper()
+        self.quote_symbol = (self.quote.get("symbol") or "").upper()
+        self.liquidity_usd = _safe_float((p.get("liquidity") or {}).get("usd"))
+        self.volume24h_usd = _safe_float((p.get("volume") or {}).get("h24"))
+        self.score = pair_score(self.liquidity_usd or 0, self.volume24h_usd or 0)
+        self._preview = None
+
+    @property
+    def preview(self) -> Dict[str, Any]:
+        if self._preview is None:
+            self._preview = pair_preview(self.raw)
+        return self._preview
+
+    @property
+    def matched_sides(self) -> List[str]:
+        return self.raw.get("matched_sides") or []
+
+    @property
+    def selected_sides(self) -> List[str]:
+        return self.raw.get("selected_sides") or []
+
+
+# id(pairs) -> (pairs, records); holding `pairs` keeps its id from being reused while cached.
+_record_cache: "OrderedDict[int, tuple]" = OrderedDict()
+
+
+def pair_records(pairs: List[Dict[str, Any]]) -> List[PairRecord]:
+    """Normalized records for a DexScreener pairs list, cached per list object."""
+    if not pairs:
+        return []
+    cached = _record_cache.get(id(pairs))
+    if cached is not None and cached[0] is pairs and len(cached[1]) == len(pairs):
+        _record_cache.move_to_end(id(pairs))
+        return cached[1]
+    records = [PairRecord(p) for p in pairs if isinstance(p, dict)]
+    _record_cache[id(pairs)] = (pairs, records)
+    if len(_record_cache) > RECORD_CACHE_SIZE:
+        _record_cache.popitem(last=False)
+    return records
+
+
+def filter_records(records: List[PairRecord]) -> List[PairRecord]:
+    """Drop same-symbol and low-liquidity pairs; drop low-volume pairs when enough others remain.
+
+    Pairs without volume data get the benefit of the doubt; pairs without liquidity data
+    are treated as scams.
+    """
+    valid = [
+        r
+        for r in records
+        if not (r.base_symbol and r.quote_symbol and r.base_symbol == r.quote_symbol)
+        and r.liquidity_usd is not None
+        and r.liquidity_usd >= MIN_POOL_LIQUIDITY_USD
+    ]
+
+    # A lone pair is kept regardless of volume
+    if len(valid) > 1:
+        # Apply volume threshold only if at least one pair meets it
+        sufficient = [r for r in valid if r.volume24h_usd is None or r.volume24h_usd >= MIN_POOL_VOLUME_24H]
+        valid = sufficient or valid
+
+    logger.debug(f"Kept {len(valid)} of {len(records)} pairs after same-symbol, liquidity and volume filters")
+    return valid
+
+
+def top_k(items: Iterable[Any], k: int, key: Callable[[Any], float]) -> List[Any]:
+    """The k items with the largest key, best first; same order as a stable descending sort."""
+    return heapq.nlargest(k, items, key=key)
+
+
+def by_score(record: PairRecord) -> float:
+    return record.score
+
+
+def by_liquidity(record: PairRecord) -> float:
+    return record.liquidity_usd or 0
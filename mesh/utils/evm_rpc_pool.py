@@ -0,0 +1,232 @@
+"""Shared async JSON-RPC layer for EVM chains.
+
+Each chain has a pool of public RPC endpoints. Every endpoint keeps a health score
+(latency EWMA, inflated by recent failures), and requests go to the best-scoring
+endpoint first. If that endpoint has not answered within a hedge delay derived from
+its usual latency, the request is also sent to the next-best endpoint; the first
+good answer wins and the rest are cancelled. Several calls can be sent as a single
+JSON-RPC batch so they cost one round trip.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RPC_URLS: Dict[int, List[str]] = {
+    1: [
+        "https://rpc.ankr.com/eth",
+        "https://eth.llamarpc.com",
+        "https://ethereum.publicnode.com",
+    ],
+    137: [
+        "https://polygon-rpc.com",
+        "https://rpc.ankr.com/polygon",
+        "https://polygon.llamarpc.com",
+        "https://polygon-bor-rpc.publicnode.com",
+    ],
+    43114: [
+        "https://api.avax.network/ext/bc/C/rpc",
+        "https://rpc.ankr.com/avalanche",
+        "https://avalanche.public-rpc.com",
+    ],
+    42161: [
+        "https://arb1.arbitrum.io/rpc",
+        "https://rpc.ankr.com/arbitrum",
+        "https://arbitrum.llamarpc.com",
+    ],
+}
+
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_HEDGED_ENDPOINTS = 3
+MIN_HEDGE_DELAY_SECONDS = 0.25
+MAX_HEDGE_DELAY_SECONDS = 2.0
+LATENCY_EWMA_ALPHA = 0.3
+FAILURE_COOLDOWN_SECONDS = 30.0
+
+
+class RpcError(Exception):
+    """A JSON-RPC call failed on every endpoint tried, or returned an error object."""
+
+
+class _Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.latency = 0.5
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def score(self) -> float:
+        """Lower is better; endpoints in cooldown sort after all healthy ones."""
+        penalty = 1000.0 if time.monotonic() < self.cooldown_until else 0.0
+        return penalty + self.latency * (1 + self.consecutive_failures)
+
+    def record_latency(self, elapsed: float) -> None:
+        self.latency = (1 - LATENCY_EWMA_ALPHA) * self.latency + LATENCY_EWMA_ALPHA * elapsed
+
+    def record_success(self, elapsed: float) -> None:
+        self.requests += 1
+        self.record_latency(elapsed)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.cooldown_until = time.monotonic() + FAILURE_COOLDOWN_SECONDS * min(self.consecutive_failures, 4)
+
+
+class EvmRpcPool:
+    """Per-chain endpoint pools with health scoring and hedged JSON-RPC requests."""
+
+    def __init__(self, rpc_urls: Optional[Dict[int, List[str]]] = None):
+        self._endpoints: Dict[int, List[_Endpoint]] = {
+            chain_id: [_Endpoint(url) for url in urls] for chain_id, urls in (rpc_urls or DEFAULT_RPC_URLS).items()
+        }
+        self._ids = itertools.count(1)
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def chain_ids(self) -> List[int]:
+        return list(self._endpoints)
+
+    def health(self, chain_id: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "url": endpoint.url,
+                "latency_ms": round(endpoint.latency * 1000, 1),
+                "consecutive_failures": endpoint.consecutive_failures,
+                "requests": endpoint.requests,
+                "failures": endpoint.failures,
+            }
+            for endpoint in self._ranked(chain_id)
+        ]
+
+    def _ranked(self, chain_id: int) -> List[_Endpoint]:
+        endpoints = self._endpoints.get(chain_id)
+        if not endpoints:
+            raise ValueError(f"Unsupported chain ID: {chain_id}")
+        return sorted(endpoints, key=lambda endpoint: endpoint.score)
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+                headers={"Content-Type": "application/json", "User-Agent": "HeuristMeshAgent/1.0.0"},
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def call(self, chain_id: int, method: str, params: Sequence[Any] = ()) -> Any:
+        """Send one JSON-RPC call and return its `result`."""
+        return (await self.batch(chain_id, [(method, params)]))[0]
+
+    async def batch(self, chain_id: int, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Any]:
+        """Send calls as one JSON-RPC batch; returns their results in order.
+
+        Raises RpcError if any call in the batch returns an error object.
+        """
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": list(params)}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        responses = await self._hedged(chain_id, payload if len(payload) > 1 else payload[0])
+        if isinstance(responses, dict):
+            responses = [responses]
+        by_id = {response.get("id"): response for response in responses}
+
+        results = []
+        for request_id, (method, _) in zip(ids, calls):
+            response = by_id.get(request_id)
+            if response is None:
+                raise RpcError(f"Missing response for {method} on chain {chain_id}")
+            if response.get("error"):
+                raise RpcError(f"{method} failed on chain {chain_id}: {response['error']}")
+            results.append(response.get("result"))
+        return results
+
+    async def _post(self, endpoint: _Endpoint, payload: Any) -> Any:
+        started = time.monotonic()
+        try:
+            async with self._session().post(endpoint.url, json=payload) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            # A bare error object where a batch array was expected means the endpoint rejected the batch.
+            if isinstance(payload, list) and not isinstance(data, list):
+                raise RpcError(f"Endpoint returned a non-batch response: {str(data)[:200]}")
+        except asyncio.CancelledError:
+            # Lost a hedge race: count the time it had taken so far so slow endpoints rank lower.
+            endpoint.record_latency(time.monotonic() - started)
+            raise
+        except Exception:
+            endpoint.record_failure()
+            raise
+        endpoint.record_success(time.monotonic() - started)
+        return data
+
+    async def _hedged(self, chain_id: int, payload: Any) -> Any:
+        ranked = self._ranked(chain_id)[:MAX_HEDGED_ENDPOINTS]
+        pending: Dict[asyncio.Task, _Endpoint] = {}
+        errors: List[str] = []
+        next_index = 0
+
+        def launch() -> None:
+            nonlocal next_index
+            endpoint = ranked[next_index]
+            next_index += 1
+            pending[asyncio.create_task(self._post(endpoint, payload))] = endpoint
+
+        launch()
+        try:
+            while pending:
+                hedge_delay = None
+                if next_index < len(ranked):
+                    hedge_delay = min(
+                        MAX_HEDGE_DELAY_SECONDS, max(MIN_HEDGE_DELAY_SECONDS, 2 * ranked[next_index - 1].latency)
+                    )
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.debug(f"Hedging chain {chain_id} request to {ranked[next_index].url}")
+                    launch()
+                    continue
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(f"{endpoint.url}: {task.exception()}")
+                    logger.warning(f"RPC request to {endpoint.url} failed: {task.exception()}")
+                # A failed endpoint is not worth waiting out a hedge delay for.
+                if next_index < len(ranked):
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise RpcError(f"All RPC endpoints failed for chain {chain_id}: {'; '.join(errors)}")
+
+
+# Singleton instance
+_evm_rpc_pool: Optional[EvmRpcPool] = None
+
+
+def get_evm_rpc_pool() -> EvmRpcPool:
+    """Get or create the singleton EvmRpcPool instance."""
+    global _evm_rpc_pool
+    if _evm_rpc_pool is None:
+        _evm_rpc_pool = EvmRpcPool()
+    return _evm_rpc_pool
@@ -0,0 +1,230 @@
+"""Deterministic extraction of Etherscan-family explorer pages.
+
+Etherscan, Basescan, Arbiscan, BscScan, Snowscan and the zkSync Era explorer share one
+page template. Scraped to markdown, their overview panels are "Label:" lines followed by
+the value, and their lists (transactions, transfers, holders) are markdown tables. This
+module pulls the known fields and tables out of that markdown and formats them the way
+EtherscanAgent's LLM pass does: bold section headers, clickable addresses, tables, empty
+columns dropped.
+
+`extract_explorer_page` returns None when the page does not parse into the fields a page
+type needs (a layout change, a captcha page, an unknown explorer), so callers can fall
+back to the LLM.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+MAX_VALUE_LINES = 8
+MAX_TABLE_ROWS = 50
+
+TRANSACTION_LABELS = [
+    "Transaction Hash",
+    "Status",
+    "Block",
+    "Timestamp",
+    "Transaction Action",
+    "From",
+    "Interacted With (To)",
+    "To",
+    "ERC-20 Tokens Transferred",
+    "ERC-721 Tokens Transferred",
+    "ERC-1155 Tokens Transferred",
+    "Internal Transactions",
+    "Value",
+    "Transaction Fee",
+    "Gas Price",
+    "Gas Limit & Usage by Txn",
+    "Gas Fees",
+    "Burnt & Txn Savings Fees",
+    "Txn Type",
+    "Nonce",
+]
+ADDRESS_LABELS = [
+    "Balance",
+    "ETH Balance",
+    "BNB Balance",
+    "AVAX Balance",
+    "Value",
+    "ETH Value",
+    "BNB Value",
+    "AVAX Value",
+    "Token Holdings",
+    "Private Name Tags",
+    "Contract Creator",
+    "Funded By",
+    "Last Txn Sent",
+    "First Txn Sent",
+]
+# Values that are lists (one line per transfer/action); other values end at the first blank line.
+MULTILINE_LABELS = {
+    "Transaction Action",
+    "ERC-20 Tokens Transferred",
+    "ERC-721 Tokens Transferred",
+    "ERC-1155 Tokens Transferred",
+    "Internal Transactions",
+    "Token Holdings",
+}
+TOKEN_LABELS = [
+    "Max Total Supply",
+    "Holders",
+    "Total Transfers",
+    "Price",
+    "Onchain Market Cap",
+    "Circulating Supply Market Cap",
+    "Token Contract",
+    "Decimals",
+]
+
+# page type -> (title, labels, fields that must parse, table kinds to keep, table kinds that must parse)
+PAGE_LAYOUTS: Dict[str, Tuple[str, List[str], Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]] = {
+    "transaction": ("Transaction Overview", TRANSACTION_LABELS, ("Transaction Hash", "Status", "From"), (), ()),
+    "address": ("Address Overview", ADDRESS_LABELS, (), ("transactions", "transfers"), ("transactions",)),
+    "token_transfers": ("Token Overview", TOKEN_LABELS, ("Max Total Supply", "Holders"), ("transfers",), ()),
+    "token_holders": ("Token Overview", TOKEN_LABELS, ("Max Total Supply",), ("holders",), ("holders",)),
+}
+
+TABLE_TITLES = {"transactions": "Transactions", "transfers": "Token Transfers", "holders": "Top Holders"}
+
+_DECORATION_RE = re.compile(r"^[#>\-*\s]+|[*_]+")
+_IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_SEPARATOR_RE = re.compile(r"^\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?$")
+
+
+def _plain(line: str) -> str:
+    """Line without heading/list/emphasis markers and images, for label matching."""
+    return _DECORATION_RE.sub("", _IMAGE_RE.sub("", line)).strip()
+
+
+def _match_label(line: str, labels: List[str]) -> Optional[Tuple[str, str]]:
+    """(label, inline value) when the line starts with one of the labels, else None.
+
+    Labels may be followed by a parenthetical ("Token Contract (WITH 6 Decimals)") and
+    either a colon and the value on the same line, or nothing (value on the next lines).
+    """
+    plain = _plain(line)
+    for label in labels:
+        if not plain.lower().startswith(label.lower()):
+            continue
+        rest = plain[len(label) :].strip()
+        if rest.startswith("(") and ")" in rest:
+            rest = rest[rest.index(")") + 1 :].strip()
+        if rest.startswith(":"):
+            return label, rest[1:].strip()
+        if not rest:
+            return label, ""
+    return None
+
+
+def parse_fields(markdown: str, labels: List[str]) -> Dict[str, List[str]]:
+    """First value of each label, as a list of non-empty lines (markdown links kept as-is).
+
+    A value starts on the label's line or the next non-empty line and runs to the next
+    label, table or heading; single-line fields also end at the first blank line after it.
+    """
+    lines = markdown.splitlines()
+    # Longest first, so "Interacted With (To)" wins over "To" and "ETH Balance" over "Balance".
+    ordered = sorted(labels, key=len, reverse=True)
+    fields: Dict[str, List[str]] = {}
+    i = 0
+    while i < len(lines):
+        matched = _match_label(lines[i], ordered)
+        i += 1
+        if not matched:
+            continue
+        label, inline = matched
+        value = [inline] if inline else []
+        while i < len(lines) and len(value) < MAX_VALUE_LINES:
+            line = lines[i].strip()
+            if not line and value and label not in MULTILINE_LABELS:
+                break
+            if line.startswith("|") or line.startswith("#") or _match_label(line, ordered):
+                break
+            i += 1
+            text = _IMAGE_RE.sub("", line).strip()
+            if text:
+                value.append(text)
+        if value and label not in fields:
+            fields[label] = value
+    return fields
+
+
+def _cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def parse_tables(markdown: str) -> List[Dict[str, List]]:
+    """Markdown tables as {"header": [...], "rows": [[...], ...]}."""
+    tables = []
+    block: List[str] = []
+    for line in markdown.splitlines() + [""]:
+        if line.strip().startswith("|"):
+            block.append(line)
+            continue
+        if len(block) >= 3 and _SEPARATOR_RE.match(block[1].strip()):
+            header = _cells(block[0])
+            rows = [_cells(row) for row in block[2:]]
+            tables.append({"header": header, "rows": [row for row in rows if any(row)]})
+        block = []
+    return tables
+
+
+def table_kind(header: List[str]) -> Optional[str]:
+    names = {_plain(h).lower() for h in header}
+    if {"txn hash", "transaction hash"} & names:
+        return "transactions"
+    if "rank" in names and ({"quantity", "percentage"} & names):
+        return "holders"
+    if "from" in names and "to" in names:
+        return "transfers"
+    return None
+
+
+def format_table(header: List[str], rows: List[List[str]]) -> str:
+    """Markdown table limited to MAX_TABLE_ROWS rows, without columns that are empty in every row."""
+    rows = [row + [""] * (len(header) - len(row)) for row in rows[:MAX_TABLE_ROWS]]
+    keep = [i for i, name in enumerate(header) if any(row[i] for row in rows)]
+    lines = [
+        "| " + " | ".join(header[i] or "-" for i in keep) + " |",
+        "|" + "---|" * len(keep),
+    ]
+    lines.extend("| " + " | ".join(row[i] for i in keep) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+def extract_explorer_page(markdown: str, page_type: str, chain: str = "", url: str = "") -> Optional[str]:
+    """Formatted summary of an explorer page, or None if its layout was not recognized."""
+    layout = PAGE_LAYOUTS.get(page_type)
+    if not layout or not markdown:
+        return None
+    title, labels, required_fields, table_kinds, required_tables = layout
+
+    fields = parse_fields(markdown, labels)
+    if any(label not in fields for label in required_fields) or not fields:
+        return None
+
+    tables: Dict[str, Dict[str, List]] = {}
+    for table in parse_tables(markdown):
+        kind = table_kind(table["header"])
+        if kind in table_kinds and table["rows"] and kind not in tables:
+            tables[kind] = table
+    if any(kind not in tables for kind in required_tables):
+        return None
+
+    context = ", ".join(part for part in (chain, f"[{url}]({url})" if url else "") if part)
+    out = [f"**{title}**" + (f" ({context})" if context else ""), ""]
+    for label in labels:
+        value = fields.get(label)
+        if not value:
+            continue
+        if len(value) == 1:
+            out.append(f"- **{label}:** {value[0]}")
+        else:
+            out.append(f"- **{label}:**")
+            out.extend(f"  - {line}" for line in value)
+
+    for kind in table_kinds:
+        table = tables.get(kind)
+        if table:
+            out.extend(["", f"**{TABLE_TITLES[kind]}**", "", format_table(table["header"], table["rows"])])
+    return "\n".join(out)
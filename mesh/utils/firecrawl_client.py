@@ -0,0 +1,255 @@
+"""Native async Firecrawl client shared by the Firecrawl-backed agents.
+
+Talks to the Firecrawl REST API over one pooled aiohttp session per event loop instead
+of running the synchronous SDK in the default executor. Scrapes go through a bounded
+queue (at most FIRECRAWL_MAX_CONCURRENT_SCRAPES requests in flight; concurrent scrapes
+of the same page share one request), and every request is paced by the shared rate
+limiter of its API key, which backs off on 429 responses. Scraped markdown is cached by URL together with
+its content hash, so callers can cache anything derived from a page (an LLM summary,
+a parsed extract) by the hash of its content and skip that work when a re-scrape
+returns the same page.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from mesh.utils.rate_limiter import get_rate_limiter, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+FIRECRAWL_API_URL = "https://api.firecrawl.dev/v1"
+REQUEST_TIMEOUT_SECONDS = 90
+DEFAULT_MAX_CONCURRENT_SCRAPES = 5
+SCRAPE_CACHE_TTL_SECONDS = 300
+MAX_CACHED_SCRAPES = 512
+EXTRACT_POLL_INTERVAL_SECONDS = 2
+EXTRACT_TIMEOUT_SECONDS = 120
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class FirecrawlError(Exception):
+    """A Firecrawl request failed or returned success=false."""
+
+
+class FirecrawlClient:
+    def __init__(self, api_key: str, api_url: str = FIRECRAWL_API_URL, max_concurrent_scrapes: Optional[int] = None):
+        if max_concurrent_scrapes is None:
+            max_concurrent_scrapes = int(
+                os.getenv("FIRECRAWL_MAX_CONCURRENT_SCRAPES", str(DEFAULT_MAX_CONCURRENT_SCRAPES))
+            )
+        self.api_key = api_key
+        self.api_url = api_url.rstrip("/")
+        self.max_concurrent_scrapes = max(1, max_concurrent_scrapes)
+        self.rate_limiter = get_rate_limiter("firecrawl", api_key)
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._scrape_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # (url, options) -> {"markdown", "metadata", "content_hash", "fetched_at"}
+        self._scrapes: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        # Tasks belong to the loop they were created on, so scrapes in flight are tracked per loop
+        self._in_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def close(self) -> None:
+        """Close the session of the running event loop (a later request opens a new one).
+
+        Sessions of loops that have already been closed are dropped along the way.
+        """
+        loop = asyncio.get_running_loop()
+        for session_loop, session in list(self._sessions.items()):
+            if session_loop is loop:
+                await session.close()
+            elif not session_loop.is_closed():
+                continue
+            del self._sessions[session_loop]
+
+    def _scrape_slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slot = self._scrape_slots.get(loop)
+        if slot is None:
+            slot = asyncio.Semaphore(self.max_concurrent_scrapes)
+            self._scrape_slots[loop] = slot
+        return slot
+
+    async def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self.rate_limiter.acquire()
+        async with self._session().request(method, f"{self.api_url}/{path.lstrip('/')}", json=payload) as response:
+            try:
+                body = await response.json(content_type=None)
+            except ValueError:
+                body = {"error": (await response.text())[:200]}
+        if response.status == 429:
+            self.rate_limiter.report_rate_limited(retry_after_seconds(response.headers.get("Retry-After")))
+        elif response.status < 400:
+            self.rate_limiter.report_success()
+        if response.status >= 400 or not isinstance(body, dict) or body.get("success") is False:
+            error = body.get("error") if isinstance(body, dict) else body
+            raise FirecrawlError(f"Firecrawl {path} failed (HTTP {response.status}): {error}")
+        return body
+
+    # ------------------------------------------------------------------------
+    # Scrape
+    # ------------------------------------------------------------------------
+    async def scrape(
+        self,
+        url: str,
+        wait_for: Optional[int] = None,
+        timeout_ms: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Scrape one page as markdown.
+
+        Returns {"markdown", "metadata", "content_hash"}; an empty page comes back with
+        empty markdown rather than an error. Pages scraped within `max_age` seconds
+        (default SCRAPE_CACHE_TTL_SECONDS) are served from the cache. Concurrent scrapes
+        of a page share one request, which keeps running if the caller that started it
+        is cancelled.
+        """
+        key = (url, wait_for, timeout_ms)
+        max_age = SCRAPE_CACHE_TTL_SECONDS if max_age is None else max_age
+        cached = self._scrapes.get(key)
+        if cached and time.time() - cached["fetched_at"] <= max_age:
+            self._scrapes.move_to_end(key)
+            return self._public(cached)
+
+        loop = asyncio.get_running_loop()
+        loop_in_flight = self._in_flight.setdefault(loop, {})
+        task = loop_in_flight.get(key)
+        if task is None:
+            task = loop.create_task(self._scrape_and_cache(key, url, wait_for, timeout_ms))
+            loop_in_flight[key] = task
+            task.add_done_callback(lambda done: self._scrape_done(loop_in_flight, key, done))
+        # Shielded: a caller that is cancelled leaves the scrape running for the others sharing it
+        return self._public(await asyncio.shield(task))
+
+    async def _scrape_and_cache(
+        self, key: Tuple, url: str, wait_for: Optional[int], timeout_ms: Optional[int]
+    ) -> Dict[str, Any]:
+        entry = await self._scrape(url, wait_for, timeout_ms)
+        if entry["markdown"]:
+            self._scrapes[key] = entry
+            while len(self._scrapes) > MAX_CACHED_SCRAPES:
+                self._scrapes.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _scrape_done(loop_in_flight: Dict[Tuple, asyncio.Task], key: Tuple, task: asyncio.Task) -> None:
+        loop_in_flight.pop(key, None)
+        # Retrieve the exception so a scrape whose callers were all cancelled does not log it again.
+        if not task.cancelled():
+            task.exception()
+
+    async def _scrape(self, url: str, wait_for: Optional[int], timeout_ms: Optional[int]) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"url": url, "formats": ["markdown"]}
+        if wait_for:
+            payload["waitFor"] = wait_for
+        if timeout_ms:
+            payload["timeout"] = timeout_ms
+
+        async with self._scrape_slot():
+            start = time.perf_counter()
+            body = await self._request("POST", "scrape", payload)
+            logger.info(f"Firecrawl scraped {url} in {time.perf_counter() - start:.2f}s")
+
+        data = body.get("data") or {}
+        markdown = data.get("markdown") or ""
+        return {
+            "markdown": markdown,
+            "metadata": data.get("metadata") or {},
+            "content_hash": content_hash(markdown),
+            "fetched_at": time.time(),
+        }
+
+    @staticmethod
+    def _public(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "markdown": entry["markdown"],
+            "metadata": dict(entry["metadata"]),
+            "content_hash": entry["content_hash"],
+        }
+
+    async def scrape_many(self, urls: Iterable[str], **kwargs) -> List[Any]:
+        """Scrape several pages through the bounded queue; failures come back as exceptions in place."""
+        return await asyncio.gather(*(self.scrape(url, **kwargs) for url in urls), return_exceptions=True)
+
+    # ------------------------------------------------------------------------
+    # Search / extract
+    # ------------------------------------------------------------------------
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        tbs: Optional[str] = None,
+        timeout_ms: Optional[int] = None,
+        scrape_markdown: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Web search; with `scrape_markdown` each result also carries the page markdown."""
+        payload: Dict[str, Any] = {"query": query, "limit": limit}
+        if tbs:
+            payload["tbs"] = tbs
+        if timeout_ms:
+            payload["timeout"] = timeout_ms
+        if scrape_markdown:
+            payload["scrapeOptions"] = {"formats": ["markdown"]}
+        body = await self._request("POST", "search", payload)
+        return body.get("data") or []
+
+    async def extract(self, urls: List[str], prompt: str, enable_web_search: bool = False) -> Dict[str, Any]:
+        """Start an extract job and poll it until it completes; returns the final job body."""
+        body = await self._request(
+            "POST", "extract", {"urls": urls, "prompt": prompt, "enableWebSearch": enable_web_search}
+        )
+        job_id = body.get("id")
+        if not job_id:
+            return body
+
+        deadline = time.monotonic() + EXTRACT_TIMEOUT_SECONDS
+        while True:
+            status = await self._request("GET", f"extract/{job_id}")
+            state = status.get("status")
+            if state == "completed":
+                return status
+            if state in ("failed", "cancelled"):
+                raise FirecrawlError(f"Firecrawl extract {job_id} {state}: {status.get('error')}")
+            if time.monotonic() > deadline:
+                raise FirecrawlError(f"Firecrawl extract {job_id} did not finish in {EXTRACT_TIMEOUT_SECONDS}s")
+            await asyncio.sleep(EXTRACT_POLL_INTERVAL_SECONDS)
+
+
+# One client per API key
+_firecrawl_clients: Dict[str, FirecrawlClient] = {}
+
+
+def get_firecrawl_client(api_key: str) -> FirecrawlClient:
+    """Get or create the shared FirecrawlClient for an API key."""
+    client = _firecrawl_clients.get(api_key)
+    if client is None:
+        client = FirecrawlClient(api_key)
+        _firecrawl_clients[api_key] = client
+    return client
@@ -0,0 +1,233 @@
+"""Local per-series store for FRED/ALFRED observations.
+
+Each series is seeded with its full history once and then kept current by fetching
+only the tail (see FredMacroAgent._stored_series). Observations are held as sorted
+numpy arrays so windowing is a searchsorted slice and derived views can be computed
+in bulk instead of per row.
+
+Set FRED_OBSERVATION_STORE_DIR to persist series across restarts as .npz files;
+without it the store lives in memory for the life of the process. Either way at most
+`max_series` series (ALFRED vintages included) are held in memory, least recently
+used first out.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# While a scheduled release is due but not yet visible on FRED, retry at most this often.
+RELEASE_RETRY_SECONDS = 15 * 60
+# Series held in memory; every distinct ALFRED vintage is a separate full-history entry.
+MAX_STORED_SERIES = 256
+
+
+@dataclass
+class SeriesObservations:
+    """Ascending observation arrays for one series (or one ALFRED vintage of it)."""
+
+    dates: np.ndarray  # datetime64[D]
+    values: np.ndarray  # float64
+    realtime_start: Optional[np.ndarray] = None
+    realtime_end: Optional[np.ndarray] = None
+    refreshed_at: float = 0.0
+    next_release: Optional[date] = None
+    # None means the data can no longer change (a vintage pinned in the past).
+    max_age_seconds: Optional[float] = None
+
+    @classmethod
+    def from_observations(cls, observations: List[Dict[str, Any]], **kwargs: Any) -> "SeriesObservations":
+        observations = sorted(observations, key=lambda obs: obs["date"])
+        has_realtime = any("realtime_start" in obs for obs in observations)
+        return cls(
+            dates=np.array([obs["date"] for obs in observations], dtype="datetime64[D]"),
+            values=np.array([obs["value"] for obs in observations], dtype=np.float64),
+            realtime_start=np.array([obs.get("realtime_start", "") for obs in observations]) if has_realtime else None,
+            realtime_end=np.array([obs.get("realtime_end", "") for obs in observations]) if has_realtime else None,
+            **kwargs,
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def last_date(self) -> Optional[date]:
+        if not len(self.dates):
+            return None
+        return self.dates[-1].astype(date)
+
+    def needs_refresh(self, now: Optional[float] = None) -> bool:
+        if self.max_age_seconds is None:
+            return False
+        now = time.time() if now is None else now
+        age = now - self.refreshed_at
+        if age >= self.max_age_seconds:
+            return True
+        if self.next_release is not None and date.today() >= self.next_release:
+            return age >= RELEASE_RETRY_SECONDS
+        return False
+
+    def _take(self, index: Any) -> "SeriesObservations":
+        return SeriesObservations(
+            dates=self.dates[index],
+            values=self.values[index],
+            realtime_start=self.realtime_start[index] if self.realtime_start is not None else None,
+            realtime_end=self.realtime_end[index] if self.realtime_end is not None else None,
+            refreshed_at=self.refreshed_at,
+            next_release=self.next_release,
+            max_age_seconds=self.max_age_seconds,
+        )
+
+    def window(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None, limit: Optional[int] = None
+    ) -> "SeriesObservations":
+        """Observations within [start_date, end_date]; with limit, only the latest `limit` of them."""
+        lo = 0 if start_date is None else int(np.searchsorted(self.dates, np.datetime64(start_date, "D"), "left"))
+        hi = len(self.dates)
+        if end_date is not None:
+            hi = int(np.searchsorted(self.dates, np.datetime64(end_date, "D"), "right"))
+        if limit:
+            lo = max(lo, hi - limit)
+        return self._take(slice(lo, max(lo, hi)))
+
+    def merge_tail(self, tail: "SeriesObservations", fetched_from: str) -> "SeriesObservations":
+        """Replace everything from `fetched_from` on with `tail`, keeping older rows as stored."""
+        cut = int(np.searchsorted(self.dates, np.datetime64(fetched_from, "D"), "left"))
+        head = self._take(slice(0, cut))
+        has_realtime = head.realtime_start is not None or tail.realtime_start is not None
+
+        def realtime(part: "SeriesObservations", field: str) -> np.ndarray:
+            column = getattr(part, field)
+            return column.astype(str) if column is not None else np.full(len(part), "")
+
+        return SeriesObservations(
+            dates=np.concatenate([head.dates, tail.dates]),
+            values=np.concatenate([head.values, tail.values]),
+            realtime_start=(
+                np.concatenate([realtime(head, "realtime_start"), realtime(tail, "realtime_start")])
+                if has_realtime
+                else None
+            ),
+            realtime_end=(
+                np.concatenate([realtime(head, "realtime_end"), realtime(tail, "realtime_end")])
+                if has_realtime
+                else None
+            ),
+            refreshed_at=tail.refreshed_at,
+            next_release=tail.next_release,
+            max_age_seconds=tail.max_age_seconds,
+        )
+
+    def to_observations(self) -> List[Dict[str, Any]]:
+        observations = [
+            {"date": str(day), "value": float(value)} for day, value in zip(self.dates, self.values.tolist())
+        ]
+        if self.realtime_start is not None:
+            for observation, realtime_start, realtime_end in zip(observations, self.realtime_start, self.realtime_end):
+                if realtime_start:
+                    observation["realtime_start"] = str(realtime_start)
+                if realtime_end:
+                    observation["realtime_end"] = str(realtime_end)
+        return observations
+
+
+class FredObservationStore:
+    """In-memory (optionally disk-backed) LRU map of store key to SeriesObservations."""
+
+    def __init__(self, store_dir: Optional[str] = None, max_series: int = MAX_STORED_SERIES):
+        store_dir = store_dir if store_dir is not None else os.getenv("FRED_OBSERVATION_STORE_DIR")
+        self.store_dir = Path(store_dir) if store_dir else None
+        self.max_series = max(1, max_series)
+        self._series: "OrderedDict[str, SeriesObservations]" = OrderedDict()
+        # Locks belong to the event loop they are used on, so they are kept per loop.
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.stats = {"hits": 0, "seeds": 0, "refreshes": 0, "appended": 0, "evictions": 0}
+
+    def lock(self, key: str) -> asyncio.Lock:
+        """Per-key lock so concurrent requests for one series share a single seed/refresh."""
+        locks = self._locks.setdefault(asyncio.get_running_loop(), {})
+        lock = locks.get(key)
+        if lock is None:
+            lock = locks[key] = asyncio.Lock()
+        return lock
+
+    def get(self, key: str) -> Optional[SeriesObservations]:
+        record = self._series.get(key)
+        if record is not None:
+            self._series.move_to_end(key)
+        elif self.store_dir is not None:
+            record = self._load(key)
+            if record is not None:
+                self._remember(key, record)
+        return record
+
+    def _remember(self, key: str, record: SeriesObservations) -> None:
+        self._series[key] = record
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_series:
+            evicted, _ = self._series.popitem(last=False)
+            self.stats["evictions"] += 1
+            for locks in self._locks.values():
+                lock = locks.get(evicted)
+                if lock is not None and not lock.locked():
+                    del locks[evicted]
+
+    def put(self, key: str, record: SeriesObservations) -> None:
+        self._remember(key, record)
+        if self.store_dir is not None:
+            try:
+                self._save(key, record)
+            except OSError as e:
+                logger.warning(f"Failed to persist FRED series {key}: {e}")
+
+    def _path(self, key: str) -> Path:
+        return self.store_dir / f"{key.replace('@', '__')}.npz"
+
+    def _save(self, key: str, record: SeriesObservations) -> None:
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "refreshed_at": record.refreshed_at,
+            "next_release": record.next_release.isoformat() if record.next_release else None,
+            "max_age_seconds": record.max_age_seconds,
+        }
+        arrays = {"dates": record.dates.astype("int64"), "values": record.values, "meta": np.array(json.dumps(meta))}
+        if record.realtime_start is not None:
+            arrays["realtime_start"] = record.realtime_start.astype(str)
+            arrays["realtime_end"] = record.realtime_end.astype(str)
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    def _load(self, key: str) -> Optional[SeriesObservations]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                return SeriesObservations(
+                    dates=data["dates"].astype("datetime64[D]"),
+                    values=data["values"].astype(np.float64),
+                    realtime_start=data["realtime_start"] if "realtime_start" in data.files else None,
+                    realtime_end=data["realtime_end"] if "realtime_end" in data.files else None,
+                    refreshed_at=meta["refreshed_at"],
+                    next_release=date.fromisoformat(meta["next_release"]) if meta["next_release"] else None,
+                    max_age_seconds=meta["max_age_seconds"],
+                )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable FRED store file {path}: {e}")
+            return None
@@ -0,0 +1,132 @@
+"""Coalesce concurrent per-key lookups into batched upstream calls.
+
+Callers ask for individual keys (symbols, ids, documents); keys requested within a
+short window are grouped into one call to a batch fetch function, and a key that is
+already in flight is awaited instead of requested again. Requests are grouped by an
+optional `group` so only compatible keys share a call (e.g. the same download window).
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BatchFetch = Callable[[Hashable, List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class _PendingBatch:
+    def __init__(self):
+        self.keys: List[Hashable] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class _LoopState:
+    def __init__(self):
+        # (group, key) -> future resolving to that key's value
+        self.inflight: Dict[tuple[Hashable, Hashable], asyncio.Future] = {}
+        # group -> batch still collecting keys
+        self.pending: Dict[Hashable, _PendingBatch] = {}
+
+
+class MicroBatcher:
+    """Groups concurrent `load_many` calls into batched `fetch_batch(group, keys)` calls.
+
+    `fetch_batch` returns a mapping of key to value; keys it leaves out resolve to
+    None. If it raises, every caller waiting on that batch sees the exception.
+    """
+
+    def __init__(self, fetch_batch: BatchFetch, window_seconds: float = 0.02, max_batch_size: int = 50):
+        self.fetch_batch = fetch_batch
+        self.window_seconds = max(0.0, window_seconds)
+        self.max_batch_size = max(1, max_batch_size)
+        self._loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Running batch tasks; the event loop only keeps weak references to tasks
+        self._batch_tasks = set()
+        self.stats = {"requests": 0, "coalesced_keys": 0, "batches": 0, "batched_keys": 0, "batch_ms_total": 0.0}
+
+    def _loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loop_states.get(loop)
+        if state is None:
+            state = _LoopState()
+            self._loop_states[loop] = state
+        return state
+
+    async def load_many(self, keys: Iterable[Hashable], group: Hashable = None) -> Dict[Hashable, Any]:
+        state = self._loop_state()
+        loop = asyncio.get_running_loop()
+        self.stats["requests"] += 1
+
+        futures: Dict[Hashable, asyncio.Future] = {}
+        for key in dict.fromkeys(keys):
+            inflight_key = (group, key)
+            existing = state.inflight.get(inflight_key)
+            if existing is not None:
+                self.stats["coalesced_keys"] += 1
+                futures[key] = existing
+                continue
+
+            future = loop.create_future()
+            state.inflight[inflight_key] = future
+            futures[key] = future
+
+            batch = state.pending.get(group)
+            if batch is None:
+                batch = _PendingBatch()
+                state.pending[group] = batch
+                batch.flush_handle = loop.call_later(self.window_seconds, self._flush, state, group)
+            batch.keys.append(key)
+            if len(batch.keys) >= self.max_batch_size:
+                self._flush(state, group)
+
+        # Shield so one cancelled caller does not cancel a batch other callers share.
+        results = await asyncio.gather(*(asyncio.shield(future) for future in futures.values()))
+        return dict(zip(futures.keys(), results))
+
+    async def load(self, key: Hashable, group: Hashable = None) -> Any:
+        return (await self.load_many([key], group=group))[key]
+
+    def _flush(self, state: _LoopState, group: Hashable) -> None:
+        batch = state.pending.pop(group, None)
+        if batch is None:
+            return
+        if batch.flush_handle is not None:
+            batch.flush_handle.cancel()
+        task = asyncio.get_running_loop().create_task(self._run_batch(state, group, batch.keys))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, state: _LoopState, group: Hashable, keys: List[Hashable]) -> None:
+        self.stats["batches"] += 1
+        self.stats["batched_keys"] += len(keys)
+        started = time.perf_counter()
+        try:
+            try:
+                values = await self.fetch_batch(group, keys)
+            except Exception as e:
+                for key in keys:
+                    future = state.inflight.pop((group, key), None)
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+                        # Mark retrieved so an abandoned future does not log "exception never retrieved".
+                        future.exception()
+                return
+            finally:
+                self.stats["batch_ms_total"] += (time.perf_counter() - started) * 1000
+
+            values = values or {}
+            for key in keys:
+                future = state.inflight.pop((group, key), None)
+                if future is not None and not future.done():
+                    future.set_result(values.get(key))
+        finally:
+            # If the batch task was cancelled (or failed with a BaseException), waiters must not hang
+            for key in keys:
+                future = state.inflight.pop((group, key), None)
+                if future is not None and not future.done():
+                    future.cancel()
@@ -0,0 +1,59 @@
+"""SQLite-backed cache for JSON-serializable query results.
+
+Entries are keyed by a hash of the query text and its parameters and expire after a
+per-entry TTL, so results survive restarts and are shared by every worker process
+pointed at the same database file.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+
+class QueryResultCache:
+    def __init__(self, db_path: Path):
+        self.db_path = str(db_path)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_results (
+                    cache_key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    @staticmethod
+    def make_key(query: str, params: Any) -> str:
+        material = json.dumps([" ".join(query.split()), params], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM query_results WHERE cache_key = ? AND expires_at > ?", (cache_key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, cache_key: str, result: Any, ttl_seconds: float) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO query_results (cache_key, result, created_at, expires_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (cache_key, json.dumps(result, default=str), now, now + ttl_seconds),
+            )
+            conn.execute("DELETE FROM query_results WHERE expires_at <= ?", (now,))
@@ -0,0 +1,199 @@
+"""
+Shared, adaptive token-bucket rate limiting for the mesh agents' search providers.
+
+One RateLimiter per (provider, API key) is shared by every agent in the process, so
+agents using the same account draw from one quota. A limiter refills `rate` tokens per
+second (PROVIDER_RATE_LIMITS) up to `burst`. Callers queue for tokens in arrival order: the
+queue lock is FIFO and is held while the head of the queue waits for its token, so
+concurrent callers are spaced out rather than all reading the same state and firing
+together.
+
+A 429 response halves the effective rate and pauses the limiter until the Retry-After
+time (or an exponential backoff when the provider sends none); each success afterwards
+restores a tenth of the configured rate.
+
+The mesh package does not depend on core, so this is the mesh copy of
+core/clients/search/rate_limiter.py; mesh/tests/test_rate_limiter.py checks that the two
+stay identical.
+"""
+
+import asyncio
+import email.utils
+import hashlib
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+MIN_RATE_FRACTION = 0.125
+RECOVERY_FRACTION = 0.1
+# provider -> (requests per second per API key, burst) used when a limiter is first created
+PROVIDER_RATE_LIMITS: Dict[str, Tuple[Optional[float], int]] = {
+    "exa": (5.0, 5),
+    "firecrawl": (10.0, 10),
+    "duckduckgo": (1.0, 2),
+}
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or an HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    def __init__(self, name: str, rate: Optional[float] = None, burst: int = 1):
+        """
+        Args:
+            name: Provider name, for logs and metrics
+            rate: Requests per second; None for no pacing (429 backoff still applies)
+            burst: Requests that may be made at once after an idle period
+        """
+        self.name = name
+        self._state_lock = threading.Lock()
+        self._queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = max(1, burst)
+        self._effective_rate = self.rate
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_limited = 0
+        self._waiting = 0
+        self._metrics = {"acquired": 0, "rate_limited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def configure(self, rate: Optional[float], burst: int = 1) -> None:
+        """Change the configured rate and burst, keeping the 429 backoff state.
+
+        A limiter slowed down by 429s stays at the same fraction of the new rate, and a
+        pause in effect is kept.
+        """
+        with self._state_lock:
+            rate = rate if rate and rate > 0 else None
+            if rate is None or self.rate is None or self._effective_rate is None:
+                self._effective_rate = rate
+            else:
+                self._effective_rate = rate * self._effective_rate / self.rate
+            self.rate = rate
+            self.burst = max(1, burst)
+            self._tokens = min(self._tokens, self.burst)
+
+    # ------------------------------------------------------------------
+    # Tokens
+    # ------------------------------------------------------------------
+    def _refill(self, now: float) -> None:
+        if self._effective_rate is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self._effective_rate)
+        self._updated_at = now
+
+    def _take(self) -> float:
+        """Take a token if one is available; otherwise the seconds until one is."""
+        with self._state_lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._effective_rate is None:
+                return 0.0
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self._effective_rate
+
+    def _queue(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(loop)
+        if queue is None:
+            queue = asyncio.Lock()
+            self._queues[loop] = queue
+        return queue
+
+    async def acquire(self) -> float:
+        """Wait for a request slot in arrival order; returns the seconds waited."""
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._queue():
+                while True:
+                    wait = self._take()
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - start
+        with self._state_lock:
+            self._metrics["acquired"] += 1
+            self._metrics["wait_seconds"] += waited
+            self._metrics["max_wait_seconds"] = max(self._metrics["max_wait_seconds"], waited)
+        return waited
+
+    # ------------------------------------------------------------------
+    # Feedback
+    # ------------------------------------------------------------------
+    def report_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Back off after a 429: pause for Retry-After (or an exponential backoff) and halve the rate."""
+        with self._state_lock:
+            self._consecutive_limited += 1
+            self._metrics["rate_limited"] += 1
+            if retry_after is None:
+                retry_after = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (self._consecutive_limited - 1))
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            if self._effective_rate is not None:
+                self._effective_rate = max(self.rate * MIN_RATE_FRACTION, self._effective_rate / 2)
+            self._tokens = 0.0
+        logger.warning(f"{self.name} rate limited; pausing requests for {retry_after:.1f}s")
+
+    def report_success(self) -> None:
+        with self._state_lock:
+            self._consecutive_limited = 0
+            if self._effective_rate is not None and self._effective_rate < self.rate:
+                self._effective_rate = min(self.rate, self._effective_rate + self.rate * RECOVERY_FRACTION)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._state_lock:
+            return {
+                "name": self.name,
+                "rate": self.rate,
+                "effective_rate": self._effective_rate,
+                "burst": self.burst,
+                "waiting": self._waiting,
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 3),
+                **self._metrics,
+            }
+
+
+# One limiter per (provider, API key)
+_rate_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, api_key: str = "") -> RateLimiter:
+    """Get or create the shared RateLimiter for a provider and API key, paced per PROVIDER_RATE_LIMITS."""
+    key = (provider, hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16])
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(provider, *PROVIDER_RATE_LIMITS.get(provider, (None, 1)))
+            _rate_limiters[key] = limiter
+        return limiter
+
+
+def rate_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metrics of every shared limiter, keyed by provider and API key hash prefix."""
+    with _rate_limiters_lock:
+        limiters = dict(_rate_limiters)
+    return {f"{provider}:{key_hash[:8]}": limiter.metrics() for (provider, key_hash), limiter in limiters.items()}
@@ -0,0 +1,83 @@
+"""Run an aggregator's upstream sources as a small dependency graph.
+
+Each source is a named async call that may depend on the results of other sources.
+A source starts as soon as its dependencies have finished, so independent sources
+run concurrently. Each source has its own deadline; a source that times out or
+fails yields a structured error instead of failing the whole graph, so callers can
+return partial results. Per-source timings are kept for the response.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Called with the results of the source's dependencies; returns the awaitable to run,
+# or None to skip the source (e.g. a required input did not resolve).
+SourceFactory = Callable[[Dict[str, Any]], Optional[Awaitable[Any]]]
+
+
+class SourceGraph:
+    def __init__(self, default_deadline_seconds: Optional[float] = None):
+        self.default_deadline_seconds = default_deadline_seconds
+        self._sources: Dict[str, tuple[SourceFactory, tuple[str, ...], Optional[float]]] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    def add(
+        self,
+        name: str,
+        factory: SourceFactory,
+        deps: Iterable[str] = (),
+        deadline_seconds: Optional[float] = None,
+    ) -> "SourceGraph":
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._sources:
+                raise ValueError(f"Source '{name}' depends on unknown source '{dep}'")
+        self._sources[name] = (factory, deps, deadline_seconds or self.default_deadline_seconds)
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every source; returns results by name (None for skipped sources)."""
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_source(name: str) -> Any:
+            factory, deps, deadline = self._sources[name]
+            dep_results = {dep: await tasks[dep] for dep in deps}
+            source_started = time.perf_counter()
+            timing = {"start_ms": round((source_started - started) * 1000, 1)}
+            self.timings[name] = timing
+
+            try:
+                awaitable = factory(dep_results)
+                if awaitable is None:
+                    timing.update(ms=0.0, status="skipped")
+                    return None
+                result = await asyncio.wait_for(awaitable, timeout=deadline)
+                timing["status"] = "ok"
+            except asyncio.TimeoutError:
+                logger.warning(f"Source {name} timed out after {deadline}s")
+                result = {"status": "timeout", "error": f"{name} timed out after {deadline}s"}
+                timing["status"] = "timeout"
+            except Exception as e:
+                logger.warning(f"Source {name} failed: {e}")
+                result = {"status": "error", "error": str(e)}
+                timing["status"] = "error"
+            timing["ms"] = round((time.perf_counter() - source_started) * 1000, 1)
+            return result
+
+        # Sources are added in dependency order, so every dependency's task exists first.
+        for name in self._sources:
+            tasks[name] = asyncio.create_task(run_source(name))
+        try:
+            values = await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        self.results = dict(zip(tasks.keys(), values))
+        self.timings["total"] = {"ms": round((time.perf_counter() - started) * 1000, 1)}
+        return self.results
@@ -0,0 +1,326 @@
+"""Vectorized technical indicators with incremental per-symbol state.
+
+Computes the indicator set used by the Yahoo Finance technical snapshot (SMA, EMA,
+RSI, MACD, Bollinger bands, ATR) for many symbols at once. Closes and ranges are laid
+out as aligned (bars x symbols) arrays and each smoothed series is computed for all
+symbols in one pass, rather than building one stockstats frame per symbol.
+
+The recursive state (EMA/SMMA numerators, previous close, the closing-price tail) is
+cached per symbol and window. When a later request sees the same history plus newly
+completed bars, only the new bars are fed, which makes appending a bar O(1) instead of
+recomputing the full window.
+
+Formulas follow stockstats so results match the previous implementation: EMAs use
+pandas' adjust=True weighting, RSI and ATR use Wilder smoothing (alpha = 1/n), and
+moving averages and standard deviations use min_periods=1 windows.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+EMA_SPANS = (10, 12, 26)
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+BOLL_WINDOW = 20
+BOLL_STD_TIMES = 2
+SMA_WINDOWS = (50, 200)
+TAIL_LENGTH = max(max(SMA_WINDOWS), BOLL_WINDOW)
+DEFAULT_CACHE_SIZE = 2048
+
+# Decay factor per smoothed series; span-based EMAs use alpha = 2 / (span + 1) and
+# Wilder smoothing uses alpha = 1 / window.
+_DECAYS = {
+    **{f"ema{span}": 1.0 - 2.0 / (span + 1) for span in EMA_SPANS},
+    "macd_signal": 1.0 - 2.0 / (MACD_SIGNAL + 1),
+    "rsi_up": 1.0 - 1.0 / RSI_WINDOW,
+    "rsi_down": 1.0 - 1.0 / RSI_WINDOW,
+    "atr": 1.0 - 1.0 / ATR_WINDOW,
+}
+
+
+def _adjusted_weight_sum(decay: float, count: np.ndarray) -> np.ndarray:
+    # Denominator of an adjust=True exponential mean after `count` observations:
+    # sum(decay ** i for i in range(count)).
+    return (1.0 - np.power(decay, count)) / (1.0 - decay)
+
+
+class IndicatorState:
+    """Recursive indicator state for a batch of symbols, one slot per symbol."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = np.zeros(size, dtype=np.int64)
+        self.prev_close = np.full(size, np.nan)
+        self.nums = {name: np.zeros(size) for name in _DECAYS}
+        self.tails: List[np.ndarray] = [np.empty(0) for _ in range(size)]
+
+    @classmethod
+    def stack(cls, states: List["IndicatorState"]) -> "IndicatorState":
+        stacked = cls(0)
+        stacked.size = sum(state.size for state in states)
+        stacked.count = np.concatenate([state.count for state in states])
+        stacked.prev_close = np.concatenate([state.prev_close for state in states])
+        stacked.nums = {name: np.concatenate([state.nums[name] for state in states]) for name in _DECAYS}
+        stacked.tails = [tail for state in states for tail in state.tails]
+        return stacked
+
+    def split(self) -> List["IndicatorState"]:
+        parts = []
+        for i in range(self.size):
+            part = IndicatorState(1)
+            part.count = self.count[i : i + 1].copy()
+            part.prev_close = self.prev_close[i : i + 1].copy()
+            part.nums = {name: values[i : i + 1].copy() for name, values in self.nums.items()}
+            part.tails = [self.tails[i]]
+            parts.append(part)
+        return parts
+
+    def feed(self, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> None:
+        """Advance the state over right-aligned (bars x symbols) arrays; leading NaNs are padding."""
+        if self.count.any():
+            self._feed_steps(close, high, low)
+        else:
+            self._feed_fresh(close, high, low)
+
+        for i in range(self.size):
+            column = close[:, i]
+            column = column[~np.isnan(column)]
+            if column.size:
+                self.tails[i] = np.concatenate([self.tails[i], column])[-TAIL_LENGTH:]
+
+    def _feed_fresh(self, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> None:
+        # Empty state: run each smoothed series through pandas' ewm over the whole block
+        # (C loop, all symbols at once) and recover the numerators from the final means.
+        if close.shape[0] == 0:
+            return
+        valid = ~np.isnan(close)
+        count = valid.sum(axis=0)
+        prev = np.vstack([close[:1], close[:-1]])
+        prev = np.where(np.isnan(prev), close, prev)
+        diff = close - prev
+        h = np.where(np.isnan(high), close, high)
+        lo = np.where(np.isnan(low), close, low)
+        true_range = np.maximum(h - lo, np.maximum(np.abs(h - prev), np.abs(lo - prev)))
+
+        def _ewm(block: np.ndarray, decay: float) -> np.ndarray:
+            return pd.DataFrame(block).ewm(alpha=1.0 - decay, adjust=True, ignore_na=False).mean().to_numpy()
+
+        series = {
+            "rsi_up": np.where(valid, np.where(diff > 0, diff, 0.0), np.nan),
+            "rsi_down": np.where(valid, np.where(diff < 0, -diff, 0.0), np.nan),
+            "atr": np.where(valid, np.nan_to_num(true_range), np.nan),
+        }
+        for span in EMA_SPANS:
+            series[f"ema{span}"] = close
+        means = {name: _ewm(block, _DECAYS[name]) for name, block in series.items()}
+        macd = means[f"ema{MACD_FAST}"] - means[f"ema{MACD_SLOW}"]
+        means["macd_signal"] = _ewm(macd, _DECAYS["macd_signal"])
+
+        for name, mean in means.items():
+            numerator = mean[-1] * _adjusted_weight_sum(_DECAYS[name], count)
+            self.nums[name] = np.where(count > 0, numerator, 0.0)
+        self.count = count.astype(np.int64)
+        self.prev_close = np.where(count > 0, close[-1], np.nan)
+
+    def _feed_steps(self, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> None:
+        # Resuming from cached state: advance the recursions one bar at a time, which is
+        # what makes appending a bar O(1) regardless of how much history is behind it.
+        decays = _DECAYS
+        nums = self.nums
+        for t in range(close.shape[0]):
+            c = close[t]
+            valid = ~np.isnan(c)
+            if not valid.any():
+                continue
+            prev = np.where(np.isnan(self.prev_close), c, self.prev_close)
+            diff = c - prev
+            h = np.where(np.isnan(high[t]), c, high[t])
+            lo = np.where(np.isnan(low[t]), c, low[t])
+            true_range = np.maximum(h - lo, np.maximum(np.abs(h - prev), np.abs(lo - prev)))
+
+            updates = {
+                "rsi_up": np.where(diff > 0, diff, 0.0),
+                "rsi_down": np.where(diff < 0, -diff, 0.0),
+                "atr": np.nan_to_num(true_range),
+            }
+            for span in EMA_SPANS:
+                updates[f"ema{span}"] = c
+            for name, value in updates.items():
+                nums[name] = np.where(valid, value + decays[name] * nums[name], nums[name])
+
+            count = self.count + valid
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fast = nums[f"ema{MACD_FAST}"] / _adjusted_weight_sum(decays[f"ema{MACD_FAST}"], count)
+                slow = nums[f"ema{MACD_SLOW}"] / _adjusted_weight_sum(decays[f"ema{MACD_SLOW}"], count)
+            nums["macd_signal"] = np.where(
+                valid, (fast - slow) + decays["macd_signal"] * nums["macd_signal"], nums["macd_signal"]
+            )
+            self.count = count
+            self.prev_close = np.where(valid, c, self.prev_close)
+
+    def latest(self) -> List[Dict[str, Optional[float]]]:
+        """Indicator values at the last fed bar, per symbol."""
+        count = self.count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            emas = {
+                span: self.nums[f"ema{span}"] / _adjusted_weight_sum(_DECAYS[f"ema{span}"], count) for span in EMA_SPANS
+            }
+            macd = emas[MACD_FAST] - emas[MACD_SLOW]
+            macd_signal = self.nums["macd_signal"] / _adjusted_weight_sum(_DECAYS["macd_signal"], count)
+            up, down = self.nums["rsi_up"], self.nums["rsi_down"]
+            total = up + down
+            rsi = np.where(total != 0, 100 * up / total, 50.0)
+            rsi = np.where(count == 1, 50.0, rsi)
+            atr = self.nums["atr"] / _adjusted_weight_sum(_DECAYS["atr"], count)
+
+        results = []
+        for i in range(self.size):
+            if count[i] == 0:
+                results.append({})
+                continue
+            tail = self.tails[i]
+            boll_window = tail[-BOLL_WINDOW:]
+            boll_mid = float(boll_window.mean())
+            boll_std = float(boll_window.std(ddof=1)) if boll_window.size > 1 else float("nan")
+            values = {
+                "rsi": rsi[i],
+                "macd": macd[i],
+                "macds": macd_signal[i],
+                "macdh": macd[i] - macd_signal[i],
+                "boll": boll_mid,
+                "boll_ub": boll_mid + BOLL_STD_TIMES * boll_std,
+                "boll_lb": boll_mid - BOLL_STD_TIMES * boll_std,
+                "atr": atr[i],
+            }
+            for span in EMA_SPANS:
+                values[f"close_{span}_ema"] = emas[span][i]
+            for window in SMA_WINDOWS:
+                values[f"close_{window}_sma"] = float(tail[-window:].mean())
+            results.append({key: (None if np.isnan(value) else float(value)) for key, value in values.items()})
+        return results
+
+
+def aligned_ohlc(frames: List[pd.DataFrame]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Right-align Close/High/Low of several frames into NaN-padded (bars x symbols) arrays.
+
+    Bars without a close are dropped first, so NaNs only ever appear as leading padding.
+    """
+    columns = []
+    for frame in frames:
+        close = frame["Close"].to_numpy(dtype=float) if "Close" in frame.columns else np.empty(0)
+        keep = ~np.isnan(close)
+        columns.append(
+            [close[keep]]
+            + [
+                frame[name].to_numpy(dtype=float)[keep] if name in frame.columns else np.full(keep.sum(), np.nan)
+                for name in ("High", "Low")
+            ]
+        )
+    length = max((len(column[0]) for column in columns), default=0)
+    arrays = []
+    for position in range(3):
+        block = np.full((length, len(frames)), np.nan)
+        for i, column in enumerate(columns):
+            values = column[position]
+            if values.size:
+                block[length - values.size :, i] = values
+        arrays.append(block)
+    return arrays[0], arrays[1], arrays[2]
+
+
+def compute_latest_indicators(frames: List[pd.DataFrame]) -> List[Dict[str, Optional[float]]]:
+    """Latest indicator values for each OHLC frame, computed in one vectorized pass."""
+    state = IndicatorState(len(frames))
+    state.feed(*aligned_ohlc(frames))
+    return state.latest()
+
+
+class TechnicalIndicatorEngine:
+    """Batched indicator computation with an incremental per-(symbol, window) state cache.
+
+    A cached state is reused when the new frame starts at the same bar as the state and
+    still contains the last bar the state saw, with the same close; only the bars after
+    it are fed. Otherwise (e.g. a rolling window that has moved on) the symbol is
+    recomputed from its full frame, so results never include bars outside the frame.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"full": 0, "incremental": 0, "unchanged": 0}
+
+    def _plan(self, key: Hashable, frame: pd.DataFrame) -> tuple[IndicatorState, pd.DataFrame, Any]:
+        """State to resume from, the bars still to feed, and the first bar the state covers."""
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and frame.index[0] == entry["first_index"]:
+            last_index = entry["last_index"]
+            if last_index in frame.index:
+                cached_close = frame.at[last_index, "Close"]
+                if isinstance(cached_close, (int, float, np.floating)) and cached_close == entry["last_close"]:
+                    new_rows = frame.loc[frame.index > last_index]
+                    self.stats["incremental" if len(new_rows) else "unchanged"] += 1
+                    return entry["state"], new_rows, entry["first_index"]
+        self.stats["full"] += 1
+        return IndicatorState(1), frame, frame.index[0]
+
+    def compute(self, frames: Dict[Hashable, pd.DataFrame]) -> Dict[Hashable, Dict[str, Optional[float]]]:
+        """Latest indicators per key, where each key identifies a symbol and history window."""
+        keys = [key for key, frame in frames.items() if isinstance(frame, pd.DataFrame) and not frame.empty]
+        if not keys:
+            return {}
+
+        states, pending, first_indexes = [], [], []
+        for key in keys:
+            state, rows, first_index = self._plan(key, frames[key])
+            states.append(state)
+            pending.append(rows)
+            first_indexes.append(first_index)
+
+        # Fresh and resumed states take different feed paths, so run them as two batches.
+        updated: Dict[Hashable, IndicatorState] = {}
+        latest: Dict[Hashable, Dict[str, Optional[float]]] = {}
+        for resumed in (False, True):
+            group = [i for i, state in enumerate(states) if bool(state.count.any()) is resumed]
+            if not group:
+                continue
+            batch = IndicatorState.stack([states[i] for i in group])
+            batch.feed(*aligned_ohlc([pending[i] for i in group]))
+            for i, state, values in zip(group, batch.split(), batch.latest()):
+                updated[keys[i]] = state
+                latest[keys[i]] = values
+
+        with self._lock:
+            for key, first_index in zip(keys, first_indexes):
+                state = updated[key]
+                frame = frames[key]
+                self._cache[key] = {
+                    "state": state,
+                    "first_index": first_index,
+                    "last_index": frame.index[-1],
+                    "last_close": float(frame["Close"].iloc[-1]),
+                }
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return {key: latest[key] for key in keys}
+
+
+# Singleton instance
+_indicator_engine: Optional[TechnicalIndicatorEngine] = None
+
+
+def get_indicator_engine() -> TechnicalIndicatorEngine:
+    """Get or create the singleton TechnicalIndicatorEngine instance."""
+    global _indicator_engine
+    if _indicator_engine is None:
+        _indicator_engine = TechnicalIndicatorEngine()
+    return _indicator_engine
@@ -0,0 +1,382 @@
+"""Persistent token identity index shared by the token-facing agents.
+
+Maps symbols, names, CoinGecko IDs and chain:address pairs to canonical CoinGecko
+tokens. The index is a read-only SQLite file built by
+mesh/cron/fetch_coingecko_binance_tokens.py and opened memory-mapped, so startup
+costs nothing beyond opening the file and lookups are indexed point reads. Names
+also get a trigram index for fuzzy matching.
+
+When the index file has not been built yet, an in-memory index is built from the
+curated coingecko_id_map.json alone, which resolves exactly what that map did.
+
+Resolution order for a free-text query: the curated map, then Binance-listed
+tickers, then exact CoinGecko IDs and symbols (the best market-cap rank wins), then
+exact names, then (when asked for) the closest fuzzy name match.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+CURATED_MAP_FILE = DATA_DIR / "coingecko_id_map.json"
+TOKEN_IDENTITY_INDEX_PATH = os.getenv("TOKEN_IDENTITY_INDEX_PATH", str(DATA_DIR / "token_identity_index.db"))
+
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+RELOAD_CHECK_SECONDS = 60
+FUZZY_CANDIDATES = 50
+# A fuzzy name match resolves a query only when it is at least this similar and long.
+FUZZY_RESOLVE_SIMILARITY = 0.6
+FUZZY_RESOLVE_MIN_LENGTH = 4
+
+# CoinGecko asset platform IDs -> DexScreener chain IDs (the chain names used across mesh agents)
+COINGECKO_TO_DEXSCREENER_PLATFORM = {
+    "binance-smart-chain": "bsc",
+    "arbitrum-one": "arbitrum",
+    "optimistic-ethereum": "optimism",
+    "polygon-pos": "polygon",
+    "sei-network": "sei",
+    "zora-network": "zora",
+    "blast-mainnet": "blast",
+}
+
+_SCHEMA = """
+CREATE TABLE tokens (
+    id INTEGER PRIMARY KEY,
+    coingecko_id TEXT NOT NULL UNIQUE,
+    symbol TEXT,
+    name TEXT,
+    name_key TEXT,
+    market_cap_rank INTEGER,
+    binance_listed INTEGER NOT NULL DEFAULT 0,
+    trigram_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX tokens_symbol ON tokens (symbol);
+CREATE INDEX tokens_name_key ON tokens (name_key);
+CREATE TABLE aliases (
+    kind TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    coingecko_id TEXT NOT NULL,
+    PRIMARY KEY (kind, alias)
+) WITHOUT ROWID;
+CREATE TABLE contracts (
+    chain TEXT NOT NULL,
+    address TEXT NOT NULL,
+    coingecko_id TEXT NOT NULL,
+    PRIMARY KEY (chain, address)
+) WITHOUT ROWID;
+CREATE TABLE name_trigrams (
+    trigram TEXT NOT NULL,
+    token_id INTEGER NOT NULL
+);
+CREATE INDEX name_trigrams_trigram ON name_trigrams (trigram);
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def normalize_chain(platform_id: str) -> str:
+    platform_id = (platform_id or "").strip().lower()
+    return COINGECKO_TO_DEXSCREENER_PLATFORM.get(platform_id, platform_id)
+
+
+def normalize_address(address: str) -> str:
+    address = (address or "").strip()
+    # EVM addresses are case-insensitive; base58 (Solana etc.) addresses are not.
+    return address.lower() if address.lower().startswith("0x") else address
+
+
+def _name_key(name: str) -> str:
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", (name or "").casefold()).split())
+
+
+def _trigrams(text: str) -> set:
+    key = _name_key(text)
+    if not key:
+        return set()
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def write_token_identity_index(
+    conn: sqlite3.Connection,
+    coins: Iterable[Dict[str, Any]],
+    curated_map: Optional[Dict[str, str]] = None,
+    binance_symbols: Optional[Dict[str, str]] = None,
+    market_cap_ranks: Optional[Dict[str, int]] = None,
+) -> Dict[str, int]:
+    """Populate an empty database with the index.
+
+    coins: CoinGecko /coins/list?include_platform=true entries (id, symbol, name, platforms).
+    curated_map: coingecko_id_map.json (symbol or name -> CoinGecko ID).
+    binance_symbols: Binance base ticker -> CoinGecko ID, unambiguous tickers only.
+    market_cap_ranks: CoinGecko ID -> market cap rank.
+    """
+    curated_map = curated_map or {}
+    binance_symbols = binance_symbols or {}
+    market_cap_ranks = market_cap_ranks or {}
+    binance_ids = set(binance_symbols.values())
+
+    conn.executescript(_SCHEMA)
+    # Ranked coins first, so they win contract-address collisions (bridged/duplicate listings).
+    coins = sorted(coins, key=lambda coin: market_cap_ranks.get(coin.get("id"), float("inf")))
+    stats = {"tokens": 0, "contracts": 0, "aliases": 0, "trigrams": 0}
+    for coin in coins:
+        cgid = coin.get("id")
+        if not cgid:
+            continue
+        name = coin.get("name") or ""
+        grams = _trigrams(name)
+        cursor = conn.execute(
+            """
+            INSERT OR IGNORE INTO tokens (coingecko_id, symbol, name, name_key, market_cap_rank, binance_listed, trigram_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                cgid,
+                (coin.get("symbol") or "").upper(),
+                name,
+                _name_key(name),
+                market_cap_ranks.get(cgid),
+                int(cgid in binance_ids),
+                len(grams),
+            ),
+        )
+        if not cursor.rowcount:
+            continue
+        stats["tokens"] += 1
+        token_id = cursor.lastrowid
+        conn.executemany("INSERT INTO name_trigrams (trigram, token_id) VALUES (?, ?)", ((g, token_id) for g in grams))
+        stats["trigrams"] += len(grams)
+        for platform_id, address in (coin.get("platforms") or {}).items():
+            if not platform_id or not address:
+                continue
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO contracts (chain, address, coingecko_id) VALUES (?, ?, ?)",
+                (normalize_chain(platform_id), normalize_address(address), cgid),
+            )
+            stats["contracts"] += cursor.rowcount
+
+    for kind, mapping in (("curated", curated_map), ("binance", binance_symbols)):
+        rows = [(kind, alias if kind == "curated" else alias.upper(), cgid) for alias, cgid in mapping.items() if cgid]
+        conn.executemany("INSERT OR IGNORE INTO aliases (kind, alias, coingecko_id) VALUES (?, ?, ?)", rows)
+        stats["aliases"] += len(rows)
+
+    conn.execute("INSERT INTO meta (key, value) VALUES ('built_at', ?)", (str(time.time()),))
+    conn.execute("INSERT INTO meta (key, value) VALUES ('stats', ?)", (json.dumps(stats),))
+    conn.commit()
+    return stats
+
+
+def build_token_identity_index(path: Path, **kwargs: Any) -> Dict[str, int]:
+    """Build the index into a fresh file and atomically swap it in place of `path`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        stats = write_token_identity_index(conn, **kwargs)
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return stats
+
+
+class TokenIdentityIndex:
+    """Read-only lookups against the token identity index."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or TOKEN_IDENTITY_INDEX_PATH)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._file_id: Optional[tuple] = None
+        self._checked_at = 0.0
+
+    def _file_identity(self) -> Optional[tuple]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _open(self) -> sqlite3.Connection:
+        file_id = self._file_identity()
+        if file_id is not None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+            logger.info(f"Opened token identity index {self.path}")
+        else:
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            curated = {}
+            if CURATED_MAP_FILE.exists():
+                with open(CURATED_MAP_FILE, "r") as f:
+                    curated = json.load(f)
+            write_token_identity_index(conn, coins=[], curated_map=curated)
+            logger.warning(f"Token identity index not found at {self.path}, using curated map only")
+        conn.row_factory = sqlite3.Row
+        self._file_id = file_id
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """Current connection, reopened when the cron job has swapped in a new index file."""
+        now = time.monotonic()
+        if self._conn is None:
+            self._conn = self._open()
+            self._checked_at = now
+        elif now - self._checked_at >= RELOAD_CHECK_SECONDS:
+            self._checked_at = now
+            if self._file_identity() != self._file_id:
+                old, self._conn = self._conn, self._open()
+                old.close()
+        return self._conn
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _token(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "coingecko_id": row["coingecko_id"],
+            "symbol": row["symbol"],
+            "name": row["name"],
+            "market_cap_rank": row["market_cap_rank"],
+            "binance_listed": bool(row["binance_listed"]),
+        }
+
+    def _alias(self, kind: str, alias: str) -> Optional[str]:
+        rows = self._query("SELECT coingecko_id FROM aliases WHERE kind = ? AND alias = ?", (kind, alias))
+        return rows[0]["coingecko_id"] if rows else None
+
+    def _best(self, rows: List[sqlite3.Row]) -> Optional[str]:
+        """The only candidate, or the best market-cap-ranked one; None if it stays ambiguous."""
+        if len(rows) == 1:
+            return rows[0]["coingecko_id"]
+        ranked = [row for row in rows if row["market_cap_rank"] is not None]
+        if ranked:
+            return min(ranked, key=lambda row: row["market_cap_rank"])["coingecko_id"]
+        return None
+
+    def resolve_coingecko_id(self, query: str, fuzzy: bool = False) -> Optional[str]:
+        """CoinGecko ID for a symbol, name or ID; None when unknown or ambiguous.
+
+        With `fuzzy`, a name query no exact lookup resolves falls back to the most similar
+        token name (typos, missing or extra words), if it is similar enough.
+        """
+        query = (query or "").strip()
+        if not query:
+            return None
+        for variant in dict.fromkeys((query, query.upper(), query.title())):
+            cgid = self._alias("curated", variant)
+            if cgid:
+                return cgid
+        cgid = self._alias("binance", query.upper())
+        if cgid:
+            return cgid
+
+        # An exact ID and a symbol can both match ("wif" the ID vs WIF the ticker); prefer ranked tokens.
+        by_id = self._query("SELECT coingecko_id, market_cap_rank FROM tokens WHERE coingecko_id = ?", (query.lower(),))
+        by_symbol = []
+        if " " not in query:
+            by_symbol = self._query(
+                "SELECT coingecko_id, market_cap_rank FROM tokens WHERE symbol = ?", (query.upper(),)
+            )
+        ranked = [row for row in by_id + by_symbol if row["market_cap_rank"] is not None]
+        if ranked:
+            return min(ranked, key=lambda row: row["market_cap_rank"])["coingecko_id"]
+        if by_id:
+            return by_id[0]["coingecko_id"]
+        if len(by_symbol) == 1:
+            return by_symbol[0]["coingecko_id"]
+        cgid = self._best(
+            self._query("SELECT coingecko_id, market_cap_rank FROM tokens WHERE name_key = ?", (_name_key(query),))
+        )
+        if cgid or not fuzzy or len(_name_key(query)) < FUZZY_RESOLVE_MIN_LENGTH:
+            return cgid
+        matches = self.search_names(query, limit=1, min_similarity=FUZZY_RESOLVE_SIMILARITY)
+        return matches[0]["coingecko_id"] if matches else None
+
+    def get(self, coingecko_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM tokens WHERE coingecko_id = ?", ((coingecko_id or "").lower(),))
+        if not rows:
+            return None
+        token = self._token(rows[0])
+        token["contracts"] = {
+            row["chain"]: row["address"]
+            for row in self._query(
+                "SELECT chain, address FROM contracts WHERE coingecko_id = ?", (token["coingecko_id"],)
+            )
+        }
+        return token
+
+    def coingecko_id_for_contract(self, chain: Optional[str], address: str) -> Optional[str]:
+        """CoinGecko ID for a contract; with no chain, any chain the address is listed on."""
+        address = normalize_address(address)
+        if chain:
+            rows = self._query(
+                "SELECT coingecko_id FROM contracts WHERE chain = ? AND address = ?", (normalize_chain(chain), address)
+            )
+        else:
+            rows = self._query("SELECT coingecko_id FROM contracts WHERE address = ? LIMIT 1", (address,))
+        return rows[0]["coingecko_id"] if rows else None
+
+    def symbol_for(self, query: str) -> Optional[str]:
+        """Ticker for a symbol, name or CoinGecko ID, via resolve_coingecko_id."""
+        cgid = self.resolve_coingecko_id(query)
+        if not cgid:
+            return None
+        rows = self._query("SELECT symbol FROM tokens WHERE coingecko_id = ?", (cgid,))
+        if rows and rows[0]["symbol"]:
+            return rows[0]["symbol"]
+        # Curated-only index: the alias itself is the ticker when it looks like one.
+        return query.upper() if re.fullmatch(r"[A-Za-z0-9]{2,15}", query.strip()) else None
+
+    def search_names(self, query: str, limit: int = 5, min_similarity: float = 0.3) -> List[Dict[str, Any]]:
+        """Fuzzy name search by trigram Jaccard similarity, best first."""
+        grams = _trigrams(query)
+        if not grams:
+            return []
+        placeholders = ",".join("?" * len(grams))
+        rows = self._query(
+            f"""
+            SELECT t.*, COUNT(*) AS shared
+            FROM name_trigrams g JOIN tokens t ON t.id = g.token_id
+            WHERE g.trigram IN ({placeholders})
+            GROUP BY g.token_id
+            ORDER BY shared DESC
+            LIMIT ?
+            """,
+            (*grams, FUZZY_CANDIDATES),
+        )
+        matches = []
+        for row in rows:
+            similarity = row["shared"] / (len(grams) + row["trigram_count"] - row["shared"])
+            if similarity >= min_similarity:
+                matches.append({**self._token(row), "similarity": round(similarity, 3)})
+        matches.sort(key=lambda m: (-m["similarity"], m["market_cap_rank"] or float("inf")))
+        return matches[:limit]
+
+
+# Singleton instance
+_token_identity_index: Optional[TokenIdentityIndex] = None
+
+
+def get_token_identity_index() -> TokenIdentityIndex:
+    """Get or create the singleton TokenIdentityIndex instance."""
+    global _token_identity_index
+    if _token_identity_index is None:
+        _token_identity_index = TokenIdentityIndex()
+    return _token_identity_index
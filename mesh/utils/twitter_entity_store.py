@@ -0,0 +1,157 @@
+"""In-process store of Twitter entities shared by the Twitter agents.
+
+Holds three kinds of entities, all bounded LRUs:
+
+- users: screen name and numeric ID -> profile. The ID behind a screen name does not
+  change, so the mapping is kept for as long as it stays in the LRU; only the profile
+  stats (followers etc.) are considered stale after PROFILE_TTL_SECONDS.
+- tweets: simplified tweet objects keyed by tweet ID, so a tweet seen in a timeline,
+  a search or a detail lookup is one entry, refreshed by whichever fetch saw it last.
+- timelines: per user, the IDs of the newest tweets held (newest first) plus the API
+  cursor that continues after the oldest of them, so a repeat "latest tweets" request
+  only needs to fetch tweets newer than the ones already held.
+
+Entities are copied in and out so callers can decorate results freely.
+"""
+
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+MAX_USERS = 20_000
+MAX_TWEETS = 50_000
+MAX_TIMELINES = 5_000
+
+PROFILE_TTL_SECONDS = 3600
+TWEET_TTL_SECONDS = 900
+
+
+def normalize_username(username: str) -> str:
+    """Screen name without whitespace or leading @."""
+    return (username or "").strip().lstrip("@")
+
+
+def tweet_id_value(tweet_id: str) -> int:
+    """Numeric value of a tweet ID; tweet IDs are snowflakes, so larger means newer."""
+    try:
+        return int(tweet_id)
+    except (TypeError, ValueError):
+        return 0
+
+
+class _LRU(OrderedDict):
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+
+    def get_fresh(self, key: Any) -> Any:
+        value = self.get(key)
+        if value is not None:
+            self.move_to_end(key)
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+class TwitterEntityStore:
+    def __init__(self, max_users: int = MAX_USERS, max_tweets: int = MAX_TWEETS, max_timelines: int = MAX_TIMELINES):
+        self._users = _LRU(max_users)  # user ID -> {"profile", "stored_at"}
+        self._user_ids = _LRU(max_users)  # lowercased screen name -> user ID
+        self._tweets = _LRU(max_tweets)  # tweet ID -> {"tweet", "stored_at"}
+        self._timelines = _LRU(max_timelines)  # user ID -> {"ids", "tail_cursor", "fetched_at", "checked_at"}
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+    def put_user(self, profile: Dict[str, Any]) -> None:
+        """Store a profile in the TwitterInfoAgent shape (id_str, screen_name, ...)."""
+        user_id = str(profile.get("id_str") or "")
+        if not user_id:
+            return
+        self._users.put(user_id, {"profile": copy.deepcopy(profile), "stored_at": time.time()})
+        screen_name = normalize_username(profile.get("screen_name") or "").lower()
+        if screen_name:
+            self._user_ids.put(screen_name, user_id)
+
+    def user_id_for(self, identifier: str) -> Optional[str]:
+        """User ID for a screen name or numeric ID, if known."""
+        identifier = normalize_username(identifier)
+        if identifier.isdigit():
+            return identifier if identifier in self._users else None
+        return self._user_ids.get_fresh(identifier.lower())
+
+    def get_user(self, identifier: str, max_age_seconds: Optional[float] = PROFILE_TTL_SECONDS) -> Optional[Dict]:
+        """Profile for a screen name or numeric ID; None if unknown or older than max_age_seconds."""
+        user_id = self.user_id_for(identifier)
+        entry = self._users.get_fresh(user_id) if user_id else None
+        if entry is None:
+            return None
+        if max_age_seconds is not None and time.time() - entry["stored_at"] > max_age_seconds:
+            return None
+        return copy.deepcopy(entry["profile"])
+
+    # ------------------------------------------------------------------
+    # Tweets
+    # ------------------------------------------------------------------
+    def put_tweets(self, tweets: Iterable[Optional[Dict[str, Any]]]) -> None:
+        now = time.time()
+        for tweet in tweets:
+            tweet_id = str((tweet or {}).get("id") or "")
+            if tweet_id:
+                self._tweets.put(tweet_id, {"tweet": copy.deepcopy(tweet), "stored_at": now})
+
+    def get_tweets(
+        self, tweet_ids: Iterable[str], max_age_seconds: Optional[float] = TWEET_TTL_SECONDS
+    ) -> Dict[str, Dict[str, Any]]:
+        """Held tweets by ID; IDs that are unknown or older than max_age_seconds are left out."""
+        now = time.time()
+        found = {}
+        for tweet_id in tweet_ids:
+            entry = self._tweets.get_fresh(str(tweet_id))
+            if entry is None:
+                continue
+            if max_age_seconds is not None and now - entry["stored_at"] > max_age_seconds:
+                continue
+            found[str(tweet_id)] = copy.deepcopy(entry["tweet"])
+        return found
+
+    # ------------------------------------------------------------------
+    # Timelines
+    # ------------------------------------------------------------------
+    def get_timeline(self, user_id: str) -> Optional[Dict[str, Any]]:
+        timeline = self._timelines.get_fresh(str(user_id))
+        return dict(timeline, ids=list(timeline["ids"])) if timeline else None
+
+    def put_timeline(
+        self, user_id: str, tweet_ids: List[str], tail_cursor: Optional[str], fetched_at: Optional[float] = None
+    ) -> None:
+        """Replace the held timeline: `tweet_ids` newest first, `tail_cursor` continues after the last.
+
+        `fetched_at` is when the held first page was fetched in full; topping the timeline up
+        with newer tweets keeps it, while `checked_at` records the latest check for new tweets.
+        """
+        now = time.time()
+        self._timelines.put(
+            str(user_id),
+            {"ids": list(tweet_ids), "tail_cursor": tail_cursor, "fetched_at": fetched_at or now, "checked_at": now},
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {"users": len(self._users), "tweets": len(self._tweets), "timelines": len(self._timelines)}
+
+
+# Singleton instance
+_twitter_entity_store: Optional[TwitterEntityStore] = None
+
+
+def get_twitter_entity_store() -> TwitterEntityStore:
+    """Get or create the singleton TwitterEntityStore instance."""
+    global _twitter_entity_store
+    if _twitter_entity_store is None:
+        _twitter_entity_store = TwitterEntityStore()
+    return _twitter_entity_store
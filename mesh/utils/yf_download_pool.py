@@ -0,0 +1,171 @@
+"""Process-isolated pool for yf.download calls.
+
+yf.download stages per-ticker results in module-global yfinance.shared state, so
+concurrent downloads in one process clobber each other and can return another
+request's date window as their own. Each worker process here owns its own copy of
+that state, which lets downloads run in parallel across processes instead of
+queueing behind a single lock.
+
+On top of the pool, concurrent requests are coalesced per (download kwargs, symbol):
+a symbol already in flight is awaited instead of downloaded again, and symbols
+requested within a short batching window are merged into one multi-symbol download.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from mesh.utils.micro_batcher import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_BATCH_WINDOW_MS = 25
+DEFAULT_MAX_BATCH_SYMBOLS = 50
+
+# Only used when the pool runs in-process (YF_DOWNLOAD_WORKERS=0), where the
+# shared yfinance state is back to being process-global.
+YF_DOWNLOAD_LOCK = threading.Lock()
+
+
+def _split_download_frame(df: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    frames = {}
+    for symbol in symbols:
+        if df is None or df.empty:
+            frames[symbol] = pd.DataFrame()
+            continue
+        try:
+            symbol_df = df[symbol] if isinstance(df.columns, pd.MultiIndex) else df
+        except Exception:
+            frames[symbol] = pd.DataFrame()
+            continue
+        if symbol_df is None or symbol_df.empty:
+            frames[symbol] = pd.DataFrame()
+            continue
+        frames[symbol] = symbol_df.dropna(how="all").copy()
+    return frames
+
+
+def _download_in_worker(symbols: List[str], kwargs: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    # Imported here so the parent process never touches yfinance state on behalf of
+    # the pool, and spawned workers only pay for the import once.
+    import yfinance as yf
+
+    downloaded = yf.download(symbols, **kwargs)
+    return _split_download_frame(downloaded, symbols)
+
+
+def _download_in_process(symbols: List[str], kwargs: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    with YF_DOWNLOAD_LOCK:
+        return _download_in_worker(symbols, kwargs)
+
+
+class YFDownloadPool:
+    """Runs yf.download in worker processes with request coalescing and batching.
+
+    Set YF_DOWNLOAD_WORKERS=0 to download in-process behind YF_DOWNLOAD_LOCK, e.g.
+    where spawning subprocesses is not allowed.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        batch_window_seconds: Optional[float] = None,
+        max_batch_symbols: Optional[int] = None,
+    ):
+        if max_workers is None:
+            max_workers = int(os.getenv("YF_DOWNLOAD_WORKERS", str(DEFAULT_MAX_WORKERS)))
+        if batch_window_seconds is None:
+            batch_window_ms = float(os.getenv("YF_DOWNLOAD_BATCH_WINDOW_MS", str(DEFAULT_BATCH_WINDOW_MS)))
+            batch_window_seconds = batch_window_ms / 1000
+        if max_batch_symbols is None:
+            max_batch_symbols = int(os.getenv("YF_DOWNLOAD_MAX_BATCH_SYMBOLS", str(DEFAULT_MAX_BATCH_SYMBOLS)))
+
+        self.max_workers = max(0, max_workers)
+        self.batch_window_seconds = max(0.0, batch_window_seconds)
+        self.max_batch_symbols = max(1, max_batch_symbols)
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._batcher = MicroBatcher(
+            self._download_batch, window_seconds=self.batch_window_seconds, max_batch_size=self.max_batch_symbols
+        )
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return self._batcher.stats
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                if self.max_workers == 0:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yf-download")
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                    logger.info(f"YFDownloadPool started with {self.max_workers} worker process(es)")
+            return self._executor
+
+    def _reset_executor(self, broken: Executor) -> None:
+        with self._executor_lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _kwargs_key(self, kwargs: Dict[str, Any]) -> str:
+        return json.dumps(kwargs, sort_keys=True, default=str)
+
+    async def download(self, symbols: List[str], **kwargs: Any) -> Dict[str, pd.DataFrame]:
+        """Download history for symbols; returns a per-symbol frame (empty when Yahoo has none).
+
+        Accepts the same keyword arguments as yf.download. Raises whatever the
+        underlying download raised for the batch this request ended up in.
+        """
+        frames = await self._batcher.load_many(symbols, group=self._kwargs_key(kwargs))
+        return {symbol: frame.copy() if frame is not None else pd.DataFrame() for symbol, frame in frames.items()}
+
+    async def _download_batch(self, kwargs_key: str, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        # The group key is the JSON-encoded kwargs, so it round-trips back to the call arguments.
+        return await self._submit(symbols, json.loads(kwargs_key))
+
+    async def _submit(self, symbols: List[str], kwargs: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+        loop = asyncio.get_running_loop()
+        worker = _download_in_process if self.max_workers == 0 else _download_in_worker
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, worker, symbols, kwargs)
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault in a native dep); start a fresh pool and retry once.
+            logger.warning("YFDownloadPool worker pool broke, restarting it")
+            self._reset_executor(executor)
+        try:
+            return await loop.run_in_executor(self._get_executor(), worker, symbols, kwargs)
+        except BrokenProcessPool:
+            logger.error("YFDownloadPool worker pool broke again, downloading in-process for this batch")
+            return await asyncio.to_thread(_download_in_process, symbols, kwargs)
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+_yf_download_pool: Optional[YFDownloadPool] = None
+
+
+def get_yf_download_pool() -> YFDownloadPool:
+    """Get or create the singleton YFDownloadPool instance."""
+    global _yf_download_pool
+    if _yf_download_pool is None:
+        _yf_download_pool = YFDownloadPool()
+    return _yf_download_pool